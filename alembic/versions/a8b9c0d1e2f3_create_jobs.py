@@ -0,0 +1,51 @@
+"""create jobs and add pdf_status to bills
+
+Revision ID: a8b9c0d1e2f3
+Revises: 7b13be8a199e
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "a8b9c0d1e2f3"
+down_revision: Union[str, Sequence[str], None] = "7b13be8a199e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("uuid", sa.String(26), nullable=False, unique=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("payload", sa.Text, nullable=False),
+        sa.Column("dedupe_key", sa.String(100), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="queued"),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer, nullable=False, server_default="5"),
+        sa.Column("run_after", sa.DateTime, nullable=False),
+        sa.Column("locked_by", sa.String(100), nullable=False, server_default=""),
+        sa.Column("locked_at", sa.DateTime, nullable=True),
+        sa.Column("last_error", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_jobs_status_run_after", "jobs", ["status", "run_after"])
+    op.create_index("ix_jobs_dedupe_key", "jobs", ["dedupe_key"])
+
+    op.add_column(
+        "bills",
+        sa.Column("pdf_status", sa.String(20), nullable=False, server_default="ready"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("bills", "pdf_status")
+    op.drop_index("ix_jobs_dedupe_key", table_name="jobs")
+    op.drop_index("ix_jobs_status_run_after", table_name="jobs")
+    op.drop_table("jobs")
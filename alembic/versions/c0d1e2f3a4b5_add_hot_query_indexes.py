@@ -0,0 +1,59 @@
+"""add composite indexes for hot query shapes
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "c0d1e2f3a4b5"
+down_revision: Union[str, Sequence[str], None] = "b9c0d1e2f3a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns) — the indexes each new one makes redundant are dropped after it exists,
+# so foreign keys on the leading column always keep an index.
+NEW_INDEXES = [
+    # list_by_billing(_page) and the bill_count / latest_bill_status subqueries (covering). id is
+    # spelled out so (reference_month, id) keyset order comes from the index despite status.
+    ("ix_bills_billing_live_month", "bills", ["billing_id", "deleted_at", "reference_month", "id", "status"]),
+    ("ix_billing_items_billing_sort", "billing_items", ["billing_id", "sort_order"]),
+    ("ix_bill_line_items_bill_sort", "bill_line_items", ["bill_id", "sort_order"]),
+    ("ix_billings_owner_live_created", "billings", ["owner_type", "owner_id", "deleted_at", "created_at"]),
+    ("ix_billings_live_created", "billings", ["deleted_at", "created_at"]),
+    # Covers list_roles_for_user and the "orgs I belong to" subquery of the billing lists
+    ("ix_org_members_user_org_role", "organization_members", ["user_id", "organization_id", "role"]),
+    ("ix_receipts_bill_sort", "receipts", ["bill_id", "sort_order"]),
+    ("ix_audit_logs_entity_created", "audit_logs", ["entity_type", "entity_id", "created_at"]),
+    ("ix_audit_logs_actor_created", "audit_logs", ["actor_id", "created_at"]),
+]
+
+REPLACED_INDEXES = [
+    ("ix_billings_owner", "billings", ["owner_type", "owner_id"]),
+    ("ix_org_members_user", "organization_members", ["user_id"]),
+    ("ix_receipts_bill_id", "receipts", ["bill_id"]),
+    ("ix_audit_logs_entity", "audit_logs", ["entity_type", "entity_id"]),
+    ("ix_audit_logs_actor_id", "audit_logs", ["actor_id"]),
+]
+
+
+def upgrade() -> None:
+    # TEXT can't be indexed in full on MySQL; values are 'YYYY-MM'
+    op.alter_column("bills", "reference_month", type_=sa.String(20), existing_type=sa.Text, existing_nullable=False)
+    for name, table, columns in NEW_INDEXES:
+        op.create_index(name, table, columns)
+    for name, table, _ in REPLACED_INDEXES:
+        op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    for name, table, columns in REPLACED_INDEXES:
+        op.create_index(name, table, columns)
+    for name, table, _ in reversed(NEW_INDEXES):
+        op.drop_index(name, table_name=table)
+    op.alter_column("bills", "reference_month", type_=sa.Text, existing_type=sa.String(20), existing_nullable=False)
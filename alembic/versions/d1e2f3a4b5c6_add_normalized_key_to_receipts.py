@@ -0,0 +1,26 @@
+"""add normalized_key to receipts
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "d1e2f3a4b5c6"
+down_revision: Union[str, Sequence[str], None] = "c0d1e2f3a4b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Storage key of the single-page PDF rendered from an image receipt; NULL for PDF receipts
+    op.add_column("receipts", sa.Column("normalized_key", sa.Text, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("receipts", "normalized_key")
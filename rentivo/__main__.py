@@ -1,9 +1,17 @@
+import sys
+
 from rentivo.cli.app import main_menu
 from rentivo.db import initialize_db
 from rentivo.logging import configure_logging
 
 
 def main() -> None:
+    if sys.argv[1:2] == ["worker"]:
+        from rentivo.worker import main as worker_main
+
+        worker_main(sys.argv[2:])
+        return
+
     configure_logging()
     initialize_db()
     main_menu()
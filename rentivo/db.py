@@ -1,9 +1,17 @@
+import bisect
+import contextvars
+import functools
 import logging
 import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
 
 from alembic.config import Config
-from sqlalchemy import Connection, create_engine
+from sqlalchemy import Connection, create_engine, event, exc
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, PoolProxiedConnection, QueuePool
 
 from alembic import command
 from rentivo.settings import settings
@@ -11,29 +19,399 @@ from rentivo.settings import settings
 logger = logging.getLogger(__name__)
 
 _engine: Engine | None = None
-_connection: Connection | None = None
+_read_engine: Engine | None = None
+_connection: "ResilientConnection | None" = None
+
+
+class PoolMetrics:
+    """Checkout latency and connection counters for the engine's pool.
+
+    Latency covers everything ``engine.connect()`` waits for: a free pooled
+    connection, a new overflow connection or the timeout. Gauges (in use,
+    idle, overflow) are read from the pool when a snapshot is taken.
+    """
+
+    # Upper bounds, in seconds, of the checkout latency histogram
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pool: Pool | None = None
+        self.reset()
+
+    def bind(self, pool: Pool) -> None:
+        self._pool = pool
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.overflow_connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.pings = 0
+            self.pings_skipped = 0
+            self.ping_failures = 0
+            self.retries = 0
+            self.wait_seconds = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * (len(self.BUCKETS) + 1)
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._record_wait(seconds)
+
+    def record_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self._record_wait(seconds)
+        logger.warning("DB pool checkout timed out after %.2fs", seconds)
+
+    def _record_wait(self, seconds: float) -> None:
+        self.wait_seconds += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.wait_buckets[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def on_connect(self, overflow: bool) -> None:
+        with self._lock:
+            self.connects += 1
+            if overflow:
+                self.overflow_connects += 1
+
+    def on_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def on_invalidate(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_ping(self, skipped: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            if skipped:
+                self.pings_skipped += 1
+                return
+            self.pings += 1
+            if failed:
+                self.ping_failures += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> dict:
+        pool = self._pool
+        with self._lock:
+            snapshot = {
+                "size": 0,
+                "checked_out": 0,
+                "idle": 0,
+                "overflow": 0,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "overflow_connects": self.overflow_connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "pings": self.pings,
+                "pings_skipped": self.pings_skipped,
+                "ping_failures": self.ping_failures,
+                "retries": self.retries,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "wait_max": round(self.wait_max, 6),
+                # Cumulative counts per upper bound, as Prometheus histograms expect
+                "wait_buckets": [
+                    (bound, sum(self.wait_buckets[: i + 1])) for i, bound in enumerate((*self.BUCKETS, float("inf")))
+                ],
+            }
+        if isinstance(pool, QueuePool):
+            snapshot.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return snapshot
+
+
+pool_metrics = PoolMetrics()
+replica_pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout took to ``metrics`` (``pool_metrics`` by default)."""
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self) -> PoolProxiedConnection:
+        metrics = self.metrics or pool_metrics
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.record_timeout(time.perf_counter() - started)
+            raise
+        metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    """Pool of the read replica engine."""
+
+    metrics = replica_pool_metrics
+
+
+def instrument_pool(engine: Engine, metrics: PoolMetrics = pool_metrics) -> None:
+    """Feed pool events of ``engine`` into ``metrics``."""
+    pool = engine.pool
+    metrics.bind(pool)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        metrics.on_connect(overflow=isinstance(pool, QueuePool) and pool.overflow() > 0)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        metrics.on_checkin()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception) -> None:
+        metrics.on_invalidate()
+
+
+class ResilientConnection:
+    """Stand-in for a ``Connection`` that re-runs a statement once if the server connection was lost.
+
+    Only a statement that opens a new transaction is retried: nothing else ran
+    on the lost connection, so running it again on a fresh one is safe. This
+    covers pooled connections handed out without a liveness ping (see
+    ``enable_adaptive_ping``). Anything else is passed to the wrapped connection.
+    """
+
+    def __init__(self, connection: Connection) -> None:
+        self._connection = connection
+
+    def execute(self, statement, parameters=None, *, execution_options=None):
+        first_in_transaction = not self._connection.in_transaction()
+        try:
+            return self._connection.execute(statement, parameters, execution_options=execution_options)
+        except exc.DBAPIError as err:
+            if not (first_in_transaction and err.connection_invalidated):
+                raise
+            logger.warning("DB connection lost (%s), retrying once on a new connection", err.orig)
+            (getattr(self._connection.engine.pool, "metrics", None) or pool_metrics).record_retry()
+            # Discard the invalidated transaction; the next execute reconnects
+            self._connection.rollback()
+            return self._connection.execute(statement, parameters, execution_options=execution_options)
+
+    def commit(self) -> None:
+        self._connection.commit()
+
+    def rollback(self) -> None:
+        self._connection.rollback()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "ResilientConnection":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+
+def resilient_connect(engine: Engine) -> ResilientConnection:
+    """``engine.connect()`` wrapped in a ``ResilientConnection``."""
+    return ResilientConnection(engine.connect())
+
+
+def enable_adaptive_ping(engine: Engine, idle_seconds: float, metrics: PoolMetrics = pool_metrics) -> None:
+    """Ping pooled connections on checkout only after ``idle_seconds`` unused.
+
+    ``pool_pre_ping`` costs a round trip on every checkout. A connection
+    returned moments ago is almost certainly alive, so the ping is skipped;
+    ``pool_recycle`` still bounds the age of every connection. A failed ping
+    invalidates the pool, like ``pool_pre_ping`` does, since it usually means
+    the server restarted. A connection that skipped its ping and turns out to
+    be dead fails its statement and SQLAlchemy invalidates the pool the same
+    way; opened through ``resilient_connect``, the statement is then re-run
+    once on a fresh connection.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _mark_new(dbapi_connection, connection_record) -> None:
+        connection_record.info["last_used"] = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def _mark_returned(dbapi_connection, connection_record) -> None:
+        if connection_record is not None:
+            connection_record.info["last_used"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy) -> None:
+        idle = time.monotonic() - connection_record.info.get("last_used", float("-inf"))
+        if idle < idle_seconds:
+            metrics.record_ping(skipped=True)
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except engine.dialect.loaded_dbapi.Error as err:
+            if not engine.dialect.is_disconnect(err, dbapi_connection, None):
+                raise
+            metrics.record_ping(failed=True)
+            logger.warning("DB connection idle for %.0fs failed its ping, reconnecting: %s", idle, err)
+            # The pool retries the checkout with a new connection
+            raise exc.InvalidatePoolError() from err
+        metrics.record_ping()
+
+
+def _create_engine(url: str, role: str, poolclass: type[InstrumentedQueuePool], metrics: PoolMetrics) -> Engine:
+    options: dict = {"pool_recycle": settings.db_pool_recycle}
+    if not url.startswith("sqlite"):
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    engine = create_engine(url, **options)
+    instrument_pool(engine, metrics)
+    enable_adaptive_ping(engine, settings.db_ping_idle_seconds, metrics)
+    logger.info(
+        "Database engine created: %s (pool_size=%s max_overflow=%s timeout=%ss)",
+        role,
+        options.get("pool_size", "-"),
+        options.get("max_overflow", "-"),
+        options.get("pool_timeout", "-"),
+    )
+    return engine
 
 
 def get_engine() -> Engine:
     global _engine
     if _engine is None:
-        _engine = create_engine(
-            settings.db_url,
-            pool_pre_ping=True,
-            pool_recycle=1800,
-        )
-        logger.info("Database engine created")
+        _engine = _create_engine(settings.db_url, "primary", InstrumentedQueuePool, pool_metrics)
     return _engine
 
 
-def get_connection() -> Connection:
+def get_read_engine() -> Engine:
+    """Engine for the read replica (``RENTIVO_DB_READ_URL``); the primary engine when none is configured."""
+    global _read_engine
+    if not settings.db_read_url:
+        return get_engine()
+    if _read_engine is None:
+        _read_engine = _create_engine(settings.db_read_url, "replica", ReplicaQueuePool, replica_pool_metrics)
+    return _read_engine
+
+
+# Set while a repository read method (see ``replica_reads``) runs
+_replica_read: contextvars.ContextVar[bool] = contextvars.ContextVar("replica_read", default=False)
+
+_READ_PREFIXES = ("get_", "list_")
+
+
+def replica_reads(cls: type) -> type:
+    """Class decorator: let the repository's ``get_*``/``list_*`` methods read from the replica.
+
+    Only has an effect when the repository was given a ``RoutingConnection``;
+    with a plain ``Connection`` everything runs on it as before.
+    """
+    for name, attr in list(vars(cls).items()):
+        if name.startswith(_READ_PREFIXES) and callable(attr):
+            setattr(cls, name, _replica_read_method(attr))
+    return cls
+
+
+def _replica_read_method(method: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(method)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = _replica_read.set(True)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _replica_read.reset(token)
+
+    return wrapper
+
+
+def _is_read(statement: Any) -> bool:
+    return str(statement).lstrip()[:6].upper() == "SELECT"
+
+
+class RoutingConnection:
+    """Per-request stand-in for a ``Connection`` that sends repository reads to a replica.
+
+    Statements issued from a ``replica_reads`` method go to the replica; all
+    others go to the primary. Once the primary has run a write, the rest of
+    the request reads from the primary too ("sticky primary"), so a page never
+    misses the change it just made because of replication lag. Both
+    connections are opened on first use. If the replica is unreachable the
+    request falls back to the primary.
+    """
+
+    def __init__(self, primary: Engine, replica: Engine) -> None:
+        self._primary_engine = primary
+        self._replica_engine = replica
+        self._primary: ResilientConnection | None = None
+        self._replica: ResilientConnection | None = None
+        self.sticky = False
+
+    @property
+    def primary(self) -> ResilientConnection:
+        if self._primary is None:
+            self._primary = resilient_connect(self._primary_engine)
+        return self._primary
+
+    def _reader(self) -> ResilientConnection:
+        if self.sticky or not _replica_read.get():
+            return self.primary
+        if self._replica is None:
+            try:
+                self._replica = resilient_connect(self._replica_engine)
+            except exc.DBAPIError as err:
+                logger.warning("Read replica unavailable, reading from the primary: %s", err.orig)
+                self.sticky = True
+                return self.primary
+        return self._replica
+
+    def execute(self, statement, parameters=None, *, execution_options=None):
+        if _is_read(statement):
+            return self._reader().execute(statement, parameters, execution_options=execution_options)
+        self.sticky = True
+        return self.primary.execute(statement, parameters, execution_options=execution_options)
+
+    def commit(self) -> None:
+        if self._primary is not None:
+            self._primary.commit()
+        if self._replica is not None:
+            # End the read transaction so the next read sees fresh replica data
+            self._replica.rollback()
+
+    def rollback(self) -> None:
+        for conn in (self._primary, self._replica):
+            if conn is not None:
+                conn.rollback()
+
+    def close(self) -> None:
+        for conn in (self._replica, self._primary):
+            if conn is not None:
+                conn.close()
+        self._primary = self._replica = None
+
+
+def get_connection() -> ResilientConnection:
     """Return a global singleton connection — CLI use only.
 
     The web app uses per-request connections via DBConnectionMiddleware instead.
     """
     global _connection
     if _connection is None:
-        _connection = get_engine().connect()
+        _connection = resilient_connect(get_engine())
         logger.debug("Singleton DB connection created")
     return _connection
 
@@ -0,0 +1,73 @@
+"""Prometheus text exposition (format 0.0.4) for in-process counters.
+
+Rentivo keeps its own counters (DB pool, web thread pool, caches) rather
+than depending on prometheus_client; ``MetricsWriter`` only formats them.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = dict[str, str]
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels | None) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class MetricsWriter:
+    """Collects metric families and renders them in Prometheus text format."""
+
+    def __init__(self, prefix: str = "rentivo_") -> None:
+        self.prefix = prefix
+        self._lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str, samples: Iterable[tuple[Labels | None, float]]) -> None:
+        """Add a family with one sample per label set."""
+        full_name = self.prefix + name
+        self._lines.append(f"# HELP {full_name} {help_text}")
+        self._lines.append(f"# TYPE {full_name} {kind}")
+        for labels, value in samples:
+            self._lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+
+    def gauge(self, name: str, help_text: str, value: float) -> None:
+        self.family(name, "gauge", help_text, [(None, value)])
+
+    def counter(self, name: str, help_text: str, value: float) -> None:
+        self.family(name, "counter", help_text, [(None, value)])
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Iterable[tuple[float, int]], total: float, count: int
+    ) -> None:
+        """Add a histogram from cumulative ``(upper_bound, count)`` buckets ending with +Inf."""
+        full_name = self.prefix + name
+        self._lines.append(f"# HELP {full_name} {help_text}")
+        self._lines.append(f"# TYPE {full_name} histogram")
+        for bound, cumulative in buckets:
+            self._lines.append(f'{full_name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        self._lines.append(f"{full_name}_sum {_format_value(total)}")
+        self._lines.append(f"{full_name}_count {count}")
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
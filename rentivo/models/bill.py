@@ -17,6 +17,12 @@ class BillStatus(str, Enum):
     DELAYED_PAYMENT = "delayed_payment"
 
 
+class BillPdfStatus(str, Enum):
+    READY = "ready"
+    PENDING = "pending"
+    FAILED = "failed"
+
+
 class BillLineItem(BaseModel):
     id: int | None = None
     bill_id: int | None = None
@@ -38,5 +44,18 @@ class Bill(BaseModel):
     due_date: str | None = None
     status: str = BillStatus.DRAFT.value
     status_updated_at: datetime | None = None
+    pdf_status: str = BillPdfStatus.READY.value
     created_at: datetime | None = None
     deleted_at: datetime | None = None
+
+
+class BillSummary(BaseModel):
+    """Bill header for list views — no line items."""
+
+    id: int
+    uuid: str
+    billing_id: int
+    reference_month: str
+    total_amount: int = 0  # centavos
+    due_date: str | None = None
+    status: str = BillStatus.DRAFT.value
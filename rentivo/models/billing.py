@@ -33,3 +33,18 @@ class Billing(BaseModel):
     created_at: datetime | None = None
     updated_at: datetime | None = None
     deleted_at: datetime | None = None
+
+
+class BillingSummary(BaseModel):
+    """Billing header with aggregate counts for list views — no items."""
+
+    id: int
+    uuid: str
+    name: str
+    description: str = ""
+    owner_type: str = "user"
+    owner_id: int = 0
+    item_count: int = 0
+    bill_count: int = 0
+    latest_bill_status: str | None = None
+    created_at: datetime | None = None
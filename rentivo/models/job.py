@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobKind:
+    """String constants for background job kinds."""
+
+    BILL_PDF = "bill.pdf"
+
+
+class Job(BaseModel):
+    id: int | None = None
+    uuid: str = ""
+    kind: str
+    payload: dict = {}
+    dedupe_key: str | None = None  # at most one queued job per key
+    status: str = JobStatus.QUEUED.value
+    attempts: int = 0
+    max_attempts: int = 5
+    run_after: datetime | None = None
+    locked_by: str = ""
+    locked_at: datetime | None = None
+    last_error: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
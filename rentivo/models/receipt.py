@@ -11,6 +11,7 @@ class Receipt(BaseModel):
     bill_id: int
     filename: str
     storage_key: str = ""
+    normalized_key: str | None = None  # single-page PDF rendered from an image receipt
     content_type: str = ""
     file_size: int = 0
     sort_order: int = 0
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class StoredSession(BaseModel):
+    """Server-side web session, keyed by a hash of the opaque id sent in the cookie."""
+
+    session_key: str
+    data: dict = {}
+    expires_at: datetime
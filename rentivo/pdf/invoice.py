@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import copy
 import logging
+import threading
 from io import BytesIO
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from fontTools import ttLib
 from fpdf import FPDF
+from fpdf.fonts import SubsetMap, TTFFont
 
 from rentivo.constants import TYPE_LABELS, format_month
 from rentivo.models import format_brl
@@ -19,6 +23,69 @@ logger = logging.getLogger(__name__)
 FONTS_DIR = Path(__file__).parent / "fonts"
 
 
+class FontRegistry:
+    """Per-process cache of parsed invoice fonts.
+
+    ``FPDF.add_font`` parses the whole TTF (cmap, hmtx, descriptor) on every
+    call. The registry parses each file once and hands every document a
+    lightweight copy that shares the metrics but owns its subset map and a
+    lazily-loaded ``TTFont``, since fpdf2 subsets that object in place when
+    the document is written.
+
+    The copy relies on ``TTFFont``'s private attributes, so fpdf2 is pinned to
+    the 2.8 series; ``test_cached_output_matches_uncached`` checks that the
+    output stays byte-identical with and without the cache.
+    """
+
+    def __init__(self) -> None:
+        self._templates: dict[tuple[str, str], tuple[TTFFont, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def add_font(self, pdf: FPDF, family: str, style: str, path: Path) -> None:
+        """Register ``path`` on ``pdf`` as ``family``/``style``, parsing it at most once."""
+        fontkey = f"{family.lower()}{style}"
+        if fontkey in pdf.fonts:
+            return
+        template, data = self._template(family, style, path)
+
+        font = TTFFont.__new__(TTFFont)
+        for slot in TTFFont.__slots__:
+            if hasattr(template, slot):
+                setattr(font, slot, getattr(template, slot))
+        font.i = len(pdf.fonts) + 1
+        font.ttfont = ttLib.TTFont(BytesIO(data), recalcTimestamp=False, lazy=True)
+        font.ttfont.setGlyphOrder(list(template.ttfont.getGlyphOrder()))
+        font.cw = copy.copy(template.cw)
+        font.missing_glyphs = []
+        font.biggest_size_pt = 0
+        font._hbfont = None
+        font.subset = SubsetMap(font)
+        pdf.fonts[fontkey] = font
+
+    def _template(self, family: str, style: str, path: Path) -> tuple[TTFFont, bytes]:
+        fontkey = f"{family.lower()}{style}"
+        key = (str(path), fontkey)
+        with self._lock:
+            cached = self._templates.get(key)
+            if cached is None:
+                scratch = FPDF()
+                scratch.add_font(family, style, str(path))
+                cached = (scratch.fonts[fontkey], path.read_bytes())
+                self._templates[key] = cached
+                logger.debug("Font parsed and cached: %s as %s", path.name, fontkey)
+        return cached
+
+
+font_registry = FontRegistry()
+
+
 def _hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
     h = hex_color.lstrip("#")
     return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
@@ -50,6 +117,15 @@ def _derive_colors(theme: Theme) -> dict[str, tuple[int, int, int]]:
 
 
 class InvoicePDF:
+    def __init__(self, cache_fonts: bool = True) -> None:
+        self._font_registry = font_registry if cache_fonts else None
+
+    def _add_font(self, pdf: FPDF, family: str, style: str, filename: str) -> None:
+        if self._font_registry is None:
+            pdf.add_font(family, style, str(FONTS_DIR / filename))
+        else:
+            self._font_registry.add_font(pdf, family, style, FONTS_DIR / filename)
+
     def generate(
         self,
         bill: Bill,
@@ -78,15 +154,15 @@ class InvoicePDF:
         pdf.set_auto_page_break(auto=True, margin=20)
 
         # Register header font
-        pdf.add_font(self._hf, "", str(FONTS_DIR / header_info["regular"]))
-        pdf.add_font(self._hf, "B", str(FONTS_DIR / header_info["bold"]))
-        pdf.add_font(self._hf_sb, "", str(FONTS_DIR / header_info["semibold"]))
+        self._add_font(pdf, self._hf, "", header_info["regular"])
+        self._add_font(pdf, self._hf, "B", header_info["bold"])
+        self._add_font(pdf, self._hf_sb, "", header_info["semibold"])
 
         # Register text font if different
         if self._tf != self._hf:
-            pdf.add_font(self._tf, "", str(FONTS_DIR / text_info["regular"]))
-            pdf.add_font(self._tf, "B", str(FONTS_DIR / text_info["bold"]))
-            pdf.add_font(self._tf_sb, "", str(FONTS_DIR / text_info["semibold"]))
+            self._add_font(pdf, self._tf, "", text_info["regular"])
+            self._add_font(pdf, self._tf, "B", text_info["bold"])
+            self._add_font(pdf, self._tf_sb, "", text_info["semibold"])
         else:
             self._tf_sb = self._hf_sb
 
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import logging
+import math
+from collections.abc import Iterable
 from io import BytesIO
+from typing import BinaryIO
 
 from fpdf import FPDF
 from PIL import Image
@@ -11,17 +14,20 @@ from pypdf import PdfReader, PdfWriter
 
 logger = logging.getLogger(__name__)
 
+IMAGE_CONTENT_TYPES = ("image/jpeg", "image/png")
 
-def _image_to_pdf(image_bytes: bytes) -> bytes:
-    """Convert an image (JPEG/PNG) to a single-page PDF respecting aspect ratio."""
-    img = Image.open(BytesIO(image_bytes))
+# Receipts are printed at most this sharp; phone photos are far denser than an A4 page needs
+DEFAULT_IMAGE_DPI = 200
+MM_PER_INCH = 25.4
+JPEG_QUALITY = 85
+# Keep at least 2x the target size before the final resample, for quality
+REDUCING_GAP = 2.0
+# Colour modes a PDF viewer can show straight from the JPEG data
+JPEG_PASSTHROUGH_MODES = ("RGB", "L", "CMYK")
 
-    # Convert RGBA to RGB for PDF compatibility
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
-
-    width_px, height_px = img.size
 
+def _page_layout(width_px: int, height_px: int) -> tuple[str, float, float, float, float]:
+    """Orientation and placement (x, y, w, h in mm) of an image fitted to an A4 page with margins."""
     # Choose orientation based on aspect ratio
     if width_px > height_px:
         orientation = "L"
@@ -36,36 +42,82 @@ def _image_to_pdf(image_bytes: bytes) -> bytes:
     max_h = page_h - 2 * margin
 
     # Scale to fit
-    scale_w = max_w / width_px
-    scale_h = max_h / height_px
-    scale = min(scale_w, scale_h)
-
+    scale = min(max_w / width_px, max_h / height_px)
     img_w = width_px * scale
     img_h = height_px * scale
 
     # Center on page
     x = margin + (max_w - img_w) / 2
     y = margin + (max_h - img_h) / 2
+    return orientation, x, y, img_w, img_h
+
+
+def _image_to_pdf(image: bytes | BinaryIO, max_dpi: int = DEFAULT_IMAGE_DPI) -> bytes:
+    """Convert an image (JPEG/PNG) to a single-page PDF respecting aspect ratio.
+
+    ``image`` is the encoded image or a file positioned at its start; a file
+    is decoded from directly and only read whole when its JPEG data is
+    embedded as is. Images are downscaled to at most ``max_dpi`` at their
+    printed size (0 keeps the full resolution). JPEGs that already fit are
+    embedded as they are (DCTDecode passthrough); larger ones are decoded at a
+    reduced scale and re-encoded as JPEG. Other formats are embedded losslessly.
+    """
+    source = BytesIO(image) if isinstance(image, bytes) else image
+    img = Image.open(source)
+    orientation, x, y, img_w, img_h = _page_layout(*img.size)
+
+    if max_dpi:
+        target = (math.ceil(img_w / MM_PER_INCH * max_dpi), math.ceil(img_h / MM_PER_INCH * max_dpi))
+    else:
+        target = img.size
+    oversized = img.width > target[0] or img.height > target[1]
+
+    if img.format == "JPEG" and img.mode in JPEG_PASSTHROUGH_MODES and not oversized:
+        source.seek(0)
+        embedded: Image.Image | BytesIO = source if isinstance(source, BytesIO) else BytesIO(source.read())
+    else:
+        if oversized:
+            # For JPEGs thumbnail() first asks the decoder for a 1/2, 1/4 or 1/8 scale (draft
+            # mode), then reduce()s by whole factors before the final resample
+            img.thumbnail(target, reducing_gap=REDUCING_GAP)
+        if img.format == "JPEG" or img.mode == "CMYK":
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            embedded = BytesIO()
+            img.save(embedded, format="JPEG", quality=JPEG_QUALITY)
+        else:
+            # Convert RGBA to RGB for PDF compatibility
+            if img.mode in ("RGBA", "P"):
+                img = img.convert("RGB")
+            embedded = img
 
     pdf = FPDF(orientation=orientation, unit="mm", format="A4")
     pdf.add_page()
     pdf.set_auto_page_break(auto=False)
+    pdf.image(embedded, x=x, y=y, w=img_w, h=img_h)
 
-    img_buf = BytesIO()
-    img.save(img_buf, format="PNG")
-    img_buf.seek(0)
+    return bytes(pdf.output())
 
-    pdf.image(img_buf, x=x, y=y, w=img_w, h=img_h)
 
-    return bytes(pdf.output())
+def normalize_receipt(receipt: bytes | BinaryIO, content_type: str, max_dpi: int = DEFAULT_IMAGE_DPI) -> bytes:
+    """Return the receipt (bytes, or a file positioned at its start) as PDF bytes for ``merge_receipts``.
+
+    Images become a single A4 page; PDFs are returned unchanged.
+    """
+    if content_type in IMAGE_CONTENT_TYPES:
+        return _image_to_pdf(receipt, max_dpi)
+    if content_type == "application/pdf":
+        return receipt if isinstance(receipt, bytes) else receipt.read()
+    raise ValueError(f"Unsupported content type: {content_type}")
 
 
-def merge_receipts(invoice_pdf: bytes, receipts: list[tuple[bytes, str]]) -> bytes:
+def merge_receipts(invoice_pdf: bytes, receipts: list[tuple[bytes, str]], max_dpi: int = DEFAULT_IMAGE_DPI) -> bytes:
     """Merge receipt attachments after the invoice PDF.
 
     Args:
         invoice_pdf: The generated invoice PDF bytes.
         receipts: List of (file_bytes, content_type) tuples, in order.
+        max_dpi: Resolution cap for image receipts (see ``_image_to_pdf``).
 
     Returns:
         Merged PDF bytes.
@@ -73,6 +125,34 @@ def merge_receipts(invoice_pdf: bytes, receipts: list[tuple[bytes, str]]) -> byt
     if not receipts:
         return invoice_pdf
 
+    output = BytesIO()
+    if not merge_receipts_into(invoice_pdf, ((BytesIO(data), ct) for data, ct in receipts), output, max_dpi):
+        return invoice_pdf
+    return output.getvalue()
+
+
+def merge_receipts_into(
+    invoice_pdf: bytes,
+    receipts: Iterable[tuple[BinaryIO, str]],
+    output: BinaryIO,
+    max_dpi: int = DEFAULT_IMAGE_DPI,
+) -> bool:
+    """Streaming variant of ``merge_receipts`` that writes the merged PDF to ``output``.
+
+    ``receipts`` yields (file, content_type) pairs and is consumed one at a
+    time: each receipt's pages are copied into the output document before the
+    next one is requested, so the producer can close (or delete) a receipt
+    file as soon as the iteration moves on. Receipts are read from their
+    files as pages are parsed rather than loaded up front.
+
+    This avoids holding every receipt's raw bytes at once, but peak memory is
+    not constant per receipt: the ``PdfWriter`` keeps each copied page, with
+    its content and image streams, until the final ``write``, so it still
+    grows with the total size of the merged document.
+
+    Returns False, leaving ``output`` untouched, when the invoice itself can't
+    be read; the caller should store the invoice on its own.
+    """
     writer = PdfWriter()
 
     # Add all invoice pages
@@ -82,26 +162,23 @@ def merge_receipts(invoice_pdf: bytes, receipts: list[tuple[bytes, str]]) -> byt
             writer.add_page(page)
     except Exception:
         logger.exception("Failed to read invoice PDF, returning original")
-        return invoice_pdf
+        return False
 
     # Add each receipt
-    for file_bytes, content_type in receipts:
+    for source, content_type in receipts:
         try:
             if content_type == "application/pdf":
-                reader = PdfReader(BytesIO(file_bytes))
-                for page in reader.pages:
-                    writer.add_page(page)
-            elif content_type in ("image/jpeg", "image/png"):
-                pdf_bytes = _image_to_pdf(file_bytes)
-                reader = PdfReader(BytesIO(pdf_bytes))
-                for page in reader.pages:
-                    writer.add_page(page)
+                reader = PdfReader(source)
+            elif content_type in IMAGE_CONTENT_TYPES:
+                reader = PdfReader(BytesIO(_image_to_pdf(source, max_dpi)))
             else:
                 logger.warning("Skipping unsupported content type: %s", content_type)
+                continue
+            for page in reader.pages:
+                writer.add_page(page)
         except Exception:
             logger.exception("Failed to process receipt (type=%s), skipping", content_type)
             continue
 
-    output = BytesIO()
     writer.write(output)
-    return output.getvalue()
+    return True
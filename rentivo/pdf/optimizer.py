@@ -0,0 +1,156 @@
+"""Post-processing that shrinks generated bill PDFs before they are stored.
+
+fpdf2 and ``merge_receipts`` write their documents as they were built:
+receipts can carry uncompressed page content, the same image or font once
+per receipt that uses it, and resources their pages never draw.
+``optimize_pdf`` rewrites the document with:
+
+- page content streams Flate-compressed when they were stored raw;
+- fonts and images no page content refers to dropped from page resources;
+- byte-identical objects (images, font files, resource dictionaries) merged
+  into one, and unreferenced objects removed.
+
+The result is only used when it is smaller; any failure returns the input.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from io import SEEK_END, BytesIO
+from typing import BinaryIO
+
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject
+
+logger = logging.getLogger(__name__)
+
+# Resource categories whose entries are only used by the page content operators below
+_NAMED_RESOURCES = {"/Font": b"Tf", "/XObject": b"Do"}
+
+
+class OptimizeMetrics:
+    """Process-wide totals of the optimisation stage, for ``/internal/metrics``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.documents = 0
+            self.failures = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.documents += 1
+            self.failures += int(failed)
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.seconds += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "failures": self.failures,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "seconds": self.seconds,
+            }
+
+
+optimize_metrics = OptimizeMetrics()
+
+
+def _content_streams(page: PageObject) -> list:
+    contents = page.get("/Contents")
+    if contents is None:
+        return []
+    contents = contents.get_object()
+    if isinstance(contents, ArrayObject):
+        return [item.get_object() for item in contents]
+    return [contents]
+
+
+def _compress_page_contents(page: PageObject) -> bool:
+    """Flate-compress the page content if any of its streams is stored without a filter."""
+    if not any("/Filter" not in stream for stream in _content_streams(page)):
+        return False
+    page.compress_content_streams()
+    return True
+
+
+def _strip_unused_resources(writer: PdfWriter) -> int:
+    """Remove fonts and XObjects no page draws. Returns how many entries were removed.
+
+    Resource dictionaries can be shared between pages (fpdf2 shares one per
+    document), so names are collected over every page using a dictionary
+    before anything is removed from it.
+    """
+    shared: dict[int, tuple[DictionaryObject, set]] = {}
+    for page in writer.pages:
+        resources = page.get("/Resources")
+        if resources is None:
+            continue
+        resources = resources.get_object()
+        _, used = shared.setdefault(id(resources), (resources, set()))
+        contents = page.get_contents()
+        if contents is None:
+            continue
+        for operands, operator in contents.operations:
+            if operator in _NAMED_RESOURCES.values() and operands:
+                used.add(operands[0])
+
+    removed = 0
+    for resources, used in shared.values():
+        for category in _NAMED_RESOURCES:
+            entries = resources.get(category)
+            if entries is None:
+                continue
+            entries = entries.get_object()
+            for name in [name for name in entries if name not in used]:
+                del entries[name]
+                removed += 1
+    return removed
+
+
+def _rewrite(source: BinaryIO, output: BinaryIO) -> None:
+    writer = PdfWriter(clone_from=PdfReader(source))
+    compressed = sum(_compress_page_contents(page) for page in writer.pages)
+    stripped = _strip_unused_resources(writer)
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    logger.debug("Optimized PDF: %d page(s) compressed, %d unused resource(s) removed", compressed, stripped)
+    writer.write(output)
+
+
+def optimize_pdf_file(source: BinaryIO, output: BinaryIO, metrics: OptimizeMetrics = optimize_metrics) -> bool:
+    """Write an optimized copy of the PDF in ``source`` to ``output``.
+
+    Returns True when ``output`` holds a smaller PDF to store instead of
+    ``source``. On False keep ``source``; ``output`` may hold a partial write.
+    """
+    started = time.perf_counter()
+    size_in = source.seek(0, SEEK_END)
+    source.seek(0)
+    try:
+        _rewrite(source, output)
+    except Exception:
+        logger.exception("Failed to optimize PDF, storing it as generated")
+        metrics.record(size_in, size_in, time.perf_counter() - started, failed=True)
+        return False
+    smaller = output.tell() < size_in
+    metrics.record(size_in, output.tell() if smaller else size_in, time.perf_counter() - started)
+    return smaller
+
+
+def optimize_pdf(pdf_bytes: bytes, metrics: OptimizeMetrics = optimize_metrics) -> bytes:
+    """Return a smaller equivalent of ``pdf_bytes``, or ``pdf_bytes`` itself if it can't be shrunk."""
+    output = BytesIO()
+    if optimize_pdf_file(BytesIO(pdf_bytes), output, metrics):
+        return output.getvalue()
+    return pdf_bytes
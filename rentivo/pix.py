@@ -5,31 +5,80 @@ Generates the payload string for a static PIX QR code and renders it as a PNG im
 
 from __future__ import annotations
 
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import lru_cache
 from io import BytesIO
+from typing import TYPE_CHECKING
 
 import qrcode
 from qrcode.image.pil import PilImage
 
+from rentivo.settings import settings
+
+if TYPE_CHECKING:
+    from rentivo.storage.base import StorageBackend
+
+logger = logging.getLogger(__name__)
+
 
 def _tlv(tag: str, value: str) -> str:
     """Build a TLV (Tag-Length-Value) field."""
     return f"{tag}{len(value):02d}{value}"
 
 
+def _build_crc16_table() -> tuple[int, ...]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+_CRC16_TABLE = _build_crc16_table()
+
+
 def _crc16_ccitt(data: str) -> str:
     """Compute CRC16-CCITT (0xFFFF) over the payload string."""
     crc = 0xFFFF
+    table = _CRC16_TABLE
     for byte in data.encode("ascii"):
-        crc ^= byte << 8
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc <<= 1
-            crc &= 0xFFFF
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
     return f"{crc:04X}"
 
 
+# Payload Format Indicator; Merchant Account Information starts with the PIX GUI
+_PAYLOAD_HEAD = _tlv("00", "01")
+_PIX_GUI = _tlv("00", "br.gov.bcb.pix")
+# Merchant Category Code + Transaction Currency (BRL)
+_PAYLOAD_MCC_CURRENCY = _tlv("52", "0000") + _tlv("53", "986")
+
+
+@lru_cache(maxsize=256)
+def _merchant_fields(merchant_name: str, merchant_city: str) -> str:
+    """Country code, merchant name and city TLVs, with accents stripped and lengths capped."""
+    name = _strip_accents(merchant_name)[:25]
+    city = _strip_accents(merchant_city)[:15]
+    return _tlv("58", "BR") + _tlv("59", name) + _tlv("60", city)
+
+
+def _build_payload(pix_key: str, merchant_fields: str, amount: float | None, txid: str) -> str:
+    payload = _PAYLOAD_HEAD + _tlv("26", _PIX_GUI + _tlv("01", pix_key)) + _PAYLOAD_MCC_CURRENCY
+    if amount is not None and amount > 0:
+        payload += _tlv("54", f"{amount:.2f}")
+    payload += merchant_fields + _tlv("62", _tlv("05", txid))
+
+    # CRC16 placeholder: tag "63" + length "04" + actual CRC
+    payload += "6304"
+    return payload + _crc16_ccitt(payload)
+
+
 def generate_pix_payload(
     *,
     pix_key: str,
@@ -50,48 +99,189 @@ def generate_pix_payload(
     Returns:
         The complete BR Code payload string with CRC16.
     """
-    # Strip accents for ASCII-only fields
-    name = _strip_accents(merchant_name)[:25]
-    city = _strip_accents(merchant_city)[:15]
+    return _build_payload(pix_key, _merchant_fields(merchant_name, merchant_city), amount, txid)
 
-    # Merchant Account Information (tag 26)
-    mai = _tlv("00", "br.gov.bcb.pix") + _tlv("01", pix_key)
-    # Additional Data Field Template (tag 62)
-    adft = _tlv("05", txid)
 
-    payload = (
-        _tlv("00", "01")  # Payload Format Indicator
-        + _tlv("26", mai)  # Merchant Account Information
-        + _tlv("52", "0000")  # Merchant Category Code
-        + _tlv("53", "986")  # Transaction Currency (BRL)
-    )
+def generate_pix_payloads(
+    entries: Iterable[tuple[str, float | None]],
+    *,
+    merchant_name: str,
+    merchant_city: str,
+    txid: str = "***",
+) -> list[str]:
+    """Generate many PIX payloads for the same merchant in one call.
 
-    if amount is not None and amount > 0:
-        payload += _tlv("54", f"{amount:.2f}")
+    Args:
+        entries: ``(pix_key, amount)`` pairs; amount may be None for an open amount.
+        merchant_name: Recipient name shared by every payload.
+        merchant_city: Recipient city shared by every payload.
+        txid: Transaction ID used for every payload.
 
-    payload += (
-        _tlv("58", "BR")  # Country Code
-        + _tlv("59", name)  # Merchant Name
-        + _tlv("60", city)  # Merchant City
-        + _tlv("62", adft)  # Additional Data
-    )
+    Returns:
+        Payload strings in the same order as ``entries``.
+    """
+    merchant_fields = _merchant_fields(merchant_name, merchant_city)
+    return [_build_payload(pix_key, merchant_fields, amount, txid) for pix_key, amount in entries]
 
-    # CRC16 placeholder: tag "63" + length "04" + actual CRC
-    payload += "6304"
-    crc = _crc16_ccitt(payload)
-    payload += crc
 
-    return payload
+# Tags whose values are themselves TLV templates
+_TEMPLATE_TAGS = frozenset({"26", "62"})
+
+
+def _parse_tlv(data: str) -> dict[str, str]:
+    fields: dict[str, str] = {}
+    pos = 0
+    while pos < len(data):
+        tag, length = data[pos : pos + 2], data[pos + 2 : pos + 4]
+        if len(tag) < 2 or not length.isdigit():
+            raise ValueError(f"Malformed TLV field at position {pos}")
+        end = pos + 4 + int(length)
+        if end > len(data):
+            raise ValueError(f"TLV field {tag} overruns the payload")
+        fields[tag] = data[pos + 4 : end]
+        pos = end
+    return fields
+
+
+def decode_pix_payload(payload: str) -> dict[str, str | dict[str, str]]:
+    """Decode and validate a static PIX BR Code payload.
+
+    Returns the top-level fields keyed by tag; the Merchant Account
+    Information (26) and Additional Data (62) templates are decoded into
+    nested dicts.
+
+    Raises:
+        ValueError: If the payload is not ASCII, is malformed, lacks the
+            PIX GUI or has a CRC mismatch.
+    """
+    if not payload.isascii():
+        raise ValueError("PIX payload must be ASCII")
+    if len(payload) < 8 or payload[-8:-4] != "6304":
+        raise ValueError("PIX payload must end with a CRC16 field")
+
+    expected = _crc16_ccitt(payload[:-4])
+    if payload[-4:].upper() != expected:
+        raise ValueError(f"PIX payload CRC mismatch: expected {expected}, got {payload[-4:]}")
 
+    decoded: dict[str, str | dict[str, str]] = {}
+    for tag, value in _parse_tlv(payload).items():
+        decoded[tag] = _parse_tlv(value) if tag in _TEMPLATE_TAGS else value
 
+    if decoded.get("00") != "01":
+        raise ValueError("PIX payload has an unsupported format indicator")
+    account = decoded.get("26")
+    if not isinstance(account, dict) or account.get("00", "").lower() != "br.gov.bcb.pix":
+        raise ValueError("PIX payload has no PIX merchant account")
+    return decoded
+
+
+def is_valid_pix_payload(payload: str) -> bool:
+    """Return True if ``payload`` decodes as a valid static PIX BR Code."""
+    try:
+        decode_pix_payload(payload)
+    except ValueError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=1024)
 def _strip_accents(text: str) -> str:
     """Remove accents for ASCII-safe PIX payload fields."""
-    import unicodedata
-
     nfkd = unicodedata.normalize("NFKD", text)
     return "".join(c for c in nfkd if not unicodedata.combining(c))
 
 
+class QRCodeCache:
+    """Content-addressed cache of rendered QR code PNGs.
+
+    Entries are keyed by a hash of the payload and render options, so the
+    same bill amount for the same PIX key is only encoded once. The in-memory
+    tier is a bounded LRU; a storage backend can be passed per lookup as a
+    second tier shared across processes.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.storage_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(payload: str, box_size: int, border: int) -> str:
+        return hashlib.sha256(f"{box_size}:{border}:{payload}".encode()).hexdigest()
+
+    @staticmethod
+    def storage_key(key: str) -> str:
+        prefix = settings.storage_prefix
+        if prefix:
+            return f"{prefix}/pix-qr/{key}.png"
+        return f"pix-qr/{key}.png"
+
+    def get(self, key: str, storage: StorageBackend | None = None) -> bytes | None:
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+
+        if storage is not None:
+            try:
+                png = storage.get(self.storage_key(key))
+            except Exception:
+                png = None
+            if png:
+                self._remember(key, png)
+                with self._lock:
+                    self.storage_hits += 1
+                return png
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, png: bytes, storage: StorageBackend | None = None) -> None:
+        self._remember(key, png)
+        if storage is not None:
+            try:
+                storage.save(self.storage_key(key), png, content_type="image/png")
+            except Exception:
+                logger.warning("Failed to persist PIX QR code %s to storage", key, exc_info=True)
+
+    def _remember(self, key: str, png: bytes) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Counters for monitoring: hits, storage_hits, misses and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "storage_hits": self.storage_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.storage_hits = self.misses = 0
+
+
+qrcode_cache = QRCodeCache(maxsize=settings.pix_qr_cache_size)
+
+
 def generate_pix_qrcode_png(
     *,
     pix_key: str,
@@ -102,11 +292,15 @@ def generate_pix_qrcode_png(
     box_size: int = 10,
     border: int = 2,
     payload: str = "",
+    storage: StorageBackend | None = None,
 ) -> bytes:
     """Generate a PIX QR code as PNG bytes.
 
+    Rendered images are cached in ``qrcode_cache`` by payload hash.
+
     Args:
         payload: Pre-computed payload string. If empty, generates one from the other args.
+        storage: Optional backend used as a shared second cache tier.
 
     Returns:
         PNG image bytes ready to be saved or embedded in a PDF.
@@ -120,6 +314,17 @@ def generate_pix_qrcode_png(
             txid=txid,
         )
 
+    key = QRCodeCache.make_key(payload, box_size, border)
+    cached = qrcode_cache.get(key, storage)
+    if cached is not None:
+        return cached
+
+    png = _render_qrcode_png(payload, box_size, border)
+    qrcode_cache.put(key, png, storage)
+    return png
+
+
+def _render_qrcode_png(payload: str, box_size: int, border: int) -> bytes:
     qr = qrcode.QRCode(
         version=None,
         error_correction=qrcode.constants.ERROR_CORRECT_M,
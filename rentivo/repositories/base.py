@@ -2,12 +2,15 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 
 from rentivo.models.audit_log import AuditLog
-from rentivo.models.bill import Bill
-from rentivo.models.billing import Billing
+from rentivo.models.bill import Bill, BillSummary
+from rentivo.models.billing import Billing, BillingSummary
 from rentivo.models.invite import Invite
+from rentivo.models.job import Job
 from rentivo.models.mfa import RecoveryCode, UserPasskey, UserTOTP
 from rentivo.models.organization import Organization, OrganizationMember
+from rentivo.models.page import Page
 from rentivo.models.receipt import Receipt
+from rentivo.models.session import StoredSession
 from rentivo.models.theme import Theme
 from rentivo.models.user import User
 
@@ -28,6 +31,18 @@ class BillingRepository(ABC):
     @abstractmethod
     def list_for_user(self, user_id: int) -> list[Billing]: ...
 
+    @abstractmethod
+    def list_all_page(self, limit: int, cursor: str | None = None) -> Page[Billing]:
+        """Keyset page of billings, newest first. Raises ValueError on a malformed cursor."""
+
+    @abstractmethod
+    def list_for_user_page(self, user_id: int, limit: int, cursor: str | None = None) -> Page[Billing]:
+        """Keyset page of billings visible to the user, newest first."""
+
+    @abstractmethod
+    def list_summaries_for_user_page(self, user_id: int, limit: int, cursor: str | None = None) -> Page[BillingSummary]:
+        """Like ``list_for_user_page`` but returns headers with counts instead of hydrated billings."""
+
     @abstractmethod
     def update(self, billing: Billing) -> Billing: ...
 
@@ -51,12 +66,39 @@ class BillRepository(ABC):
     @abstractmethod
     def list_by_billing(self, billing_id: int) -> list[Bill]: ...
 
+    @abstractmethod
+    def list_by_billing_page(self, billing_id: int, limit: int, cursor: str | None = None) -> Page[Bill]:
+        """Keyset page of a billing's bills, latest reference month first."""
+
+    @abstractmethod
+    def list_summaries_by_billing_page(
+        self, billing_id: int, limit: int, cursor: str | None = None
+    ) -> Page[BillSummary]:
+        """Like ``list_by_billing_page`` but selects only the header columns."""
+
+    @abstractmethod
+    def list_after_id(
+        self,
+        after_id: int,
+        limit: int,
+        *,
+        billing_id: int | None = None,
+        organization_id: int | None = None,
+        month_from: str | None = None,
+        month_to: str | None = None,
+        status: str | None = None,
+    ) -> list[Bill]:
+        """Keyset page of bills with ``id > after_id`` ordered by id, skipping deleted billings."""
+
     @abstractmethod
     def update(self, bill: Bill) -> Bill: ...
 
     @abstractmethod
     def update_pdf_path(self, bill_id: int, pdf_path: str) -> None: ...
 
+    @abstractmethod
+    def update_pdf_status(self, bill_id: int, pdf_status: str) -> None: ...
+
     @abstractmethod
     def update_status(self, bill_id: int, status: str, status_updated_at: datetime) -> None: ...
 
@@ -112,6 +154,10 @@ class OrganizationRepository(ABC):
     @abstractmethod
     def list_members(self, org_id: int) -> list[OrganizationMember]: ...
 
+    @abstractmethod
+    def list_roles_for_user(self, user_id: int) -> dict[int, str]:
+        """Map of organization id to the user's role, for every organization the user belongs to."""
+
     @abstractmethod
     def update_member_role(self, org_id: int, user_id: int, role: str) -> None: ...
 
@@ -149,6 +195,12 @@ class AuditLogRepository(ABC):
     @abstractmethod
     def list_by_entity(self, entity_type: str, entity_id: int) -> list[AuditLog]: ...
 
+    @abstractmethod
+    def list_by_entity_page(
+        self, entity_type: str, entity_id: int, limit: int, cursor: str | None = None
+    ) -> Page[AuditLog]:
+        """Keyset page of an entity's audit trail, newest first."""
+
     @abstractmethod
     def list_by_actor(self, actor_id: int, limit: int = 50) -> list[AuditLog]: ...
 
@@ -175,6 +227,9 @@ class ReceiptRepository(ABC):
     @abstractmethod
     def update_sort_orders(self, updates: list[tuple[int, int]]) -> None: ...
 
+    @abstractmethod
+    def set_normalized_key(self, receipt_id: int, normalized_key: str) -> None: ...
+
 
 class MFATOTPRepository(ABC):
     @abstractmethod
@@ -245,3 +300,62 @@ class ThemeRepository(ABC):
 
     @abstractmethod
     def delete(self, theme_id: int) -> None: ...
+
+
+class JobRepository(ABC):
+    @abstractmethod
+    def enqueue(self, job: Job) -> Job:
+        """Insert a queued job; with a ``dedupe_key``, return the already-queued job instead."""
+
+    @abstractmethod
+    def get_by_id(self, job_id: int) -> Job | None: ...
+
+    @abstractmethod
+    def claim(self, worker_id: str, limit: int, now: datetime) -> list[Job]:
+        """Atomically move up to ``limit`` due queued jobs to running, locked by ``worker_id``."""
+
+    @abstractmethod
+    def heartbeat(self, job_id: int, worker_id: str, now: datetime) -> bool:
+        """Refresh the lock of a running job held by ``worker_id``. False if the worker no longer holds it."""
+
+    @abstractmethod
+    def mark_done(self, job_id: int, worker_id: str) -> bool:
+        """Mark a running job held by ``worker_id`` done. False (nothing written) if the lock was lost."""
+
+    @abstractmethod
+    def mark_failed(self, job_id: int, worker_id: str, error: str, retry_at: datetime | None) -> bool:
+        """Record a failed attempt; requeue at ``retry_at`` or fail permanently when it is None.
+
+        Only applies while ``worker_id`` holds the lock; returns False otherwise.
+        """
+
+    @abstractmethod
+    def requeue_stale(self, locked_before: datetime) -> int:
+        """Requeue running jobs locked before ``locked_before`` (crashed workers) that have attempts left.
+
+        Returns the count.
+        """
+
+    @abstractmethod
+    def fail_stale(self, locked_before: datetime, error: str) -> list[Job]:
+        """Fail running jobs locked before ``locked_before`` whose attempts are used up. Returns them."""
+
+    @abstractmethod
+    def count_by_status(self) -> dict[str, int]: ...
+
+
+class SessionRepository(ABC):
+    @abstractmethod
+    def get(self, session_key: str, now: datetime) -> StoredSession | None:
+        """Return the session unless it is missing or expired at ``now``."""
+
+    @abstractmethod
+    def save(self, session: StoredSession) -> None:
+        """Insert or replace the session."""
+
+    @abstractmethod
+    def delete(self, session_key: str) -> None: ...
+
+    @abstractmethod
+    def delete_expired(self, now: datetime) -> int:
+        """Delete sessions that expired before ``now``. Returns the count."""
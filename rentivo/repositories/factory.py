@@ -3,6 +3,7 @@ from rentivo.repositories.base import (
     BillingRepository,
     BillRepository,
     InviteRepository,
+    JobRepository,
     MFATOTPRepository,
     OrganizationRepository,
     PasskeyRepository,
@@ -88,3 +89,10 @@ def get_theme_repository() -> ThemeRepository:
     from rentivo.repositories.sqlalchemy import SQLAlchemyThemeRepository
 
     return SQLAlchemyThemeRepository(get_connection())
+
+
+def get_job_repository() -> JobRepository:
+    from rentivo.db import get_connection
+    from rentivo.repositories.sqlalchemy import SQLAlchemyJobRepository
+
+    return SQLAlchemyJobRepository(get_connection())
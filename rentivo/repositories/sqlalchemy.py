@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import base64
+import json
 from datetime import datetime
 
 from sqlalchemy import Connection, text
@@ -7,13 +9,17 @@ from sqlalchemy.engine import RowMapping
 from ulid import ULID
 
 from rentivo.constants import SP_TZ
+from rentivo.db import replica_reads
 from rentivo.models.audit_log import AuditLog
-from rentivo.models.bill import Bill, BillLineItem
-from rentivo.models.billing import Billing, BillingItem, ItemType
+from rentivo.models.bill import Bill, BillLineItem, BillSummary
+from rentivo.models.billing import Billing, BillingItem, BillingSummary, ItemType
 from rentivo.models.invite import Invite
+from rentivo.models.job import Job, JobStatus
 from rentivo.models.mfa import RecoveryCode, UserPasskey, UserTOTP
 from rentivo.models.organization import Organization, OrganizationMember
+from rentivo.models.page import Page
 from rentivo.models.receipt import Receipt
+from rentivo.models.session import StoredSession
 from rentivo.models.theme import Theme
 from rentivo.models.user import User
 from rentivo.repositories.base import (
@@ -21,11 +27,13 @@ from rentivo.repositories.base import (
     BillingRepository,
     BillRepository,
     InviteRepository,
+    JobRepository,
     MFATOTPRepository,
     OrganizationRepository,
     PasskeyRepository,
     ReceiptRepository,
     RecoveryCodeRepository,
+    SessionRepository,
     ThemeRepository,
     UserRepository,
 )
@@ -35,6 +43,151 @@ def _now() -> datetime:
     return datetime.now(SP_TZ)
 
 
+def _split_joined_rows(rows: list[RowMapping], prefix: str) -> list[dict]:
+    """Extract the child rows of a parent LEFT JOIN child query.
+
+    Child columns are aliased with ``prefix``; a parent without children yields
+    a single row whose child columns are all NULL.
+    """
+    id_key = f"{prefix}id"
+    return [
+        {key[len(prefix) :]: value for key, value in row.items() if key.startswith(prefix)}
+        for row in rows
+        if row[id_key] is not None
+    ]
+
+
+def _encode_cursor(sort_value: object, row_id: int) -> str:
+    """Opaque keyset cursor for the row at (sort_value, id). Datetimes are kept typed."""
+    if isinstance(sort_value, datetime):
+        payload: list = [{"dt": sort_value.isoformat()}, row_id]
+    else:
+        payload = [sort_value, row_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[object, int]:
+    """Inverse of ``_encode_cursor``. Raises ValueError on a malformed cursor.
+
+    Only the shapes ``_encode_cursor`` produces are accepted: a str, int or
+    ``{"dt": str}`` sort value and an int id (booleans are rejected).
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        sort_value, row_id = payload
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("Invalid cursor")
+    if not isinstance(sort_value, (str, int, datetime)) or isinstance(sort_value, bool):
+        raise ValueError("Invalid cursor")
+    return sort_value, row_id
+
+
+def _keyset_page(
+    conn: Connection,
+    select_sql: str,
+    params: dict,
+    sort_column: str,
+    limit: int,
+    cursor: str | None,
+) -> tuple[list[RowMapping], str | None]:
+    """Fetch one page of ``select_sql`` (which must end in a WHERE clause) ordered by
+    ``(sort_column, id) DESC``, resuming after ``cursor``.
+
+    One extra row is fetched to know whether a next page exists.
+    """
+    sql = select_sql
+    params = {**params, "page_limit": limit + 1}
+    if cursor is not None:
+        cursor_sort, cursor_id = _decode_cursor(cursor)
+        sql += f" AND ({sort_column} < :cursor_sort OR ({sort_column} = :cursor_sort AND id < :cursor_id))"
+        params.update(cursor_sort=cursor_sort, cursor_id=cursor_id)
+    sql += f" ORDER BY {sort_column} DESC, id DESC LIMIT :page_limit"
+    rows = list(conn.execute(text(sql), params).mappings().fetchall())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(rows[-1][sort_column], rows[-1]["id"])
+
+
+def _write_items(
+    conn: Connection,
+    table: str,
+    parent_column: str,
+    parent_id: int,
+    items: list[BillingItem] | list[BillLineItem],
+    existing_rows: list[RowMapping] | None = None,
+) -> list[int]:
+    """Persist ``items`` (positioned by list index) for one parent with batched statements.
+
+    ``existing_rows`` are the rows currently stored for the parent; rows are matched
+    by ``sort_order`` and only changed positions are written: one executemany UPDATE,
+    one executemany INSERT and one DELETE at most. Returns the item ids in order.
+    """
+    existing_by_sort = {row["sort_order"]: row for row in existing_rows or []}
+    ids: dict[int, int] = {}
+    to_insert: list[dict] = []
+    to_update: list[dict] = []
+    for i, item in enumerate(items):
+        params = {
+            parent_column: parent_id,
+            "description": item.description,
+            "amount": item.amount,
+            "item_type": item.item_type.value,
+            "sort_order": i,
+        }
+        row = existing_by_sort.get(i)
+        if row is None:
+            to_insert.append(params)
+            continue
+        ids[i] = row["id"]
+        if (row["description"], row["amount"], row["item_type"]) != (
+            item.description,
+            item.amount,
+            params["item_type"],
+        ):
+            to_update.append({**params, "id": row["id"]})
+
+    kept_ids = set(ids.values())
+    stale_ids = [row["id"] for row in existing_rows or [] if row["id"] not in kept_ids]
+    if stale_ids:
+        placeholders = ", ".join(f":id{i}" for i in range(len(stale_ids)))
+        conn.execute(
+            text(f"DELETE FROM {table} WHERE id IN ({placeholders})"),
+            {f"id{i}": item_id for i, item_id in enumerate(stale_ids)},
+        )
+    if to_update:
+        conn.execute(
+            text(
+                f"UPDATE {table} SET description = :description, amount = :amount, "
+                "item_type = :item_type WHERE id = :id"
+            ),
+            to_update,
+        )
+    if to_insert:
+        conn.execute(
+            text(
+                f"INSERT INTO {table} ({parent_column}, description, amount, item_type, sort_order) "
+                f"VALUES (:{parent_column}, :description, :amount, :item_type, :sort_order)"
+            ),
+            to_insert,
+        )
+        # executemany does not report per-row ids; fetch the new ones in one query
+        new_rows = conn.execute(
+            text(f"SELECT id, sort_order FROM {table} WHERE {parent_column} = :parent_id AND sort_order >= :first"),
+            {"parent_id": parent_id, "first": to_insert[0]["sort_order"]},
+        ).fetchall()
+        inserted_sorts = {params["sort_order"] for params in to_insert}
+        for item_id, sort_order in new_rows:
+            if sort_order in inserted_sorts:
+                ids[sort_order] = item_id
+    return [ids[i] for i in range(len(items))]
+
+
+@replica_reads
 class SQLAlchemyBillingRepository(BillingRepository):
     def __init__(self, conn: Connection) -> None:
         self.conn = conn
@@ -59,28 +212,33 @@ class SQLAlchemyBillingRepository(BillingRepository):
             },
         )
         billing_id = result.lastrowid
-        for i, item in enumerate(billing.items):
-            self.conn.execute(
-                text(
-                    "INSERT INTO billing_items (billing_id, description, amount, item_type, sort_order) "
-                    "VALUES (:billing_id, :description, :amount, :item_type, :sort_order)"
-                ),
-                {
-                    "billing_id": billing_id,
-                    "description": item.description,
-                    "amount": item.amount,
-                    "item_type": item.item_type.value,
-                    "sort_order": i,
-                },
-            )
+        items = self._save_items(billing_id, billing.items)
         self.conn.commit()
-        result = self.get_by_id(billing_id)
-        if result is None:
-            raise RuntimeError(f"Failed to retrieve billing after create (id={billing_id})")
-        return result
+        return billing.model_copy(
+            update={
+                "id": billing_id,
+                "uuid": billing_uuid,
+                "items": items,
+                "created_at": now,
+                "updated_at": now,
+                "deleted_at": None,
+            }
+        )
+
+    def _save_items(
+        self,
+        billing_id: int,
+        items: list[BillingItem],
+        existing_rows: list[RowMapping] | None = None,
+    ) -> list[BillingItem]:
+        ids = _write_items(self.conn, "billing_items", "billing_id", billing_id, items, existing_rows)
+        return [
+            item.model_copy(update={"id": item_id, "billing_id": billing_id, "sort_order": i})
+            for i, (item, item_id) in enumerate(zip(items, ids))
+        ]
 
     @staticmethod
-    def _build_billing(row: RowMapping, item_rows: list[RowMapping]) -> Billing:
+    def _build_billing(row: RowMapping, item_rows: list[RowMapping] | list[dict]) -> Billing:
         return Billing(
             id=row["id"],
             uuid=row["uuid"],
@@ -105,42 +263,31 @@ class SQLAlchemyBillingRepository(BillingRepository):
             deleted_at=row["deleted_at"],
         )
 
-    def _row_to_billing(self, row: RowMapping) -> Billing:
-        items = (
+    def _get_one(self, where: str, params: dict) -> Billing | None:
+        """Load a billing and its items in a single LEFT JOIN round trip."""
+        rows = (
             self.conn.execute(
-                text("SELECT * FROM billing_items WHERE billing_id = :billing_id ORDER BY sort_order"),
-                {"billing_id": row["id"]},
+                text(
+                    "SELECT g.*, bi.id AS bi_id, bi.billing_id AS bi_billing_id, "
+                    "bi.description AS bi_description, bi.amount AS bi_amount, "
+                    "bi.item_type AS bi_item_type, bi.sort_order AS bi_sort_order "
+                    "FROM billings g LEFT JOIN billing_items bi ON bi.billing_id = g.id "
+                    f"WHERE {where} AND g.deleted_at IS NULL ORDER BY bi.sort_order"
+                ),
+                params,
             )
             .mappings()
             .fetchall()
         )
-        return self._build_billing(row, list(items))
+        if not rows:
+            return None
+        return self._build_billing(rows[0], _split_joined_rows(rows, "bi_"))
 
     def get_by_id(self, billing_id: int) -> Billing | None:
-        row = (
-            self.conn.execute(
-                text("SELECT * FROM billings WHERE id = :id AND deleted_at IS NULL"),
-                {"id": billing_id},
-            )
-            .mappings()
-            .fetchone()
-        )
-        if row is None:
-            return None
-        return self._row_to_billing(row)
+        return self._get_one("g.id = :id", {"id": billing_id})
 
     def get_by_uuid(self, uuid: str) -> Billing | None:
-        row = (
-            self.conn.execute(
-                text("SELECT * FROM billings WHERE uuid = :uuid AND deleted_at IS NULL"),
-                {"uuid": uuid},
-            )
-            .mappings()
-            .fetchone()
-        )
-        if row is None:
-            return None
-        return self._row_to_billing(row)
+        return self._get_one("g.uuid = :uuid", {"uuid": uuid})
 
     def list_all(self) -> list[Billing]:
         rows = (
@@ -167,6 +314,50 @@ class SQLAlchemyBillingRepository(BillingRepository):
         )
         return self._build_billings_from_rows(rows)
 
+    def list_all_page(self, limit: int, cursor: str | None = None) -> Page[Billing]:
+        rows, next_cursor = _keyset_page(
+            self.conn,
+            "SELECT * FROM billings WHERE deleted_at IS NULL",
+            {},
+            "created_at",
+            limit,
+            cursor,
+        )
+        return Page(items=self._build_billings_from_rows(rows), next_cursor=next_cursor)
+
+    def list_for_user_page(self, user_id: int, limit: int, cursor: str | None = None) -> Page[Billing]:
+        rows, next_cursor = _keyset_page(
+            self.conn,
+            "SELECT * FROM billings WHERE deleted_at IS NULL AND ("
+            "(owner_type = 'user' AND owner_id = :uid) OR "
+            "(owner_type = 'organization' AND owner_id IN "
+            "(SELECT organization_id FROM organization_members WHERE user_id = :uid)))",
+            {"uid": user_id},
+            "created_at",
+            limit,
+            cursor,
+        )
+        return Page(items=self._build_billings_from_rows(rows), next_cursor=next_cursor)
+
+    def list_summaries_for_user_page(self, user_id: int, limit: int, cursor: str | None = None) -> Page[BillingSummary]:
+        rows, next_cursor = _keyset_page(
+            self.conn,
+            "SELECT id, uuid, name, description, owner_type, owner_id, created_at, "
+            "(SELECT COUNT(*) FROM billing_items bi WHERE bi.billing_id = billings.id) AS item_count, "
+            "(SELECT COUNT(*) FROM bills b WHERE b.billing_id = billings.id AND b.deleted_at IS NULL) AS bill_count, "
+            "(SELECT b.status FROM bills b WHERE b.billing_id = billings.id AND b.deleted_at IS NULL "
+            "ORDER BY b.reference_month DESC, b.id DESC LIMIT 1) AS latest_bill_status "
+            "FROM billings WHERE deleted_at IS NULL AND ("
+            "(owner_type = 'user' AND owner_id = :uid) OR "
+            "(owner_type = 'organization' AND owner_id IN "
+            "(SELECT organization_id FROM organization_members WHERE user_id = :uid)))",
+            {"uid": user_id},
+            "created_at",
+            limit,
+            cursor,
+        )
+        return Page(items=[BillingSummary(**row) for row in rows], next_cursor=next_cursor)
+
     def _build_billings_from_rows(self, rows: list[RowMapping]) -> list[Billing]:
         if not rows:
             return []
@@ -187,6 +378,9 @@ class SQLAlchemyBillingRepository(BillingRepository):
         return [self._build_billing(row, items_by_billing.get(row["id"], [])) for row in rows]
 
     def update(self, billing: Billing) -> Billing:
+        if billing.id is None:
+            raise ValueError("Cannot update billing without an id")
+        now = _now()
         self.conn.execute(
             text(
                 "UPDATE billings SET name = :name, description = :description, "
@@ -196,35 +390,21 @@ class SQLAlchemyBillingRepository(BillingRepository):
                 "name": billing.name,
                 "description": billing.description,
                 "pix_key": billing.pix_key,
-                "updated_at": _now(),
+                "updated_at": now,
                 "id": billing.id,
             },
         )
-        self.conn.execute(
-            text("DELETE FROM billing_items WHERE billing_id = :billing_id"),
-            {"billing_id": billing.id},
-        )
-        for i, item in enumerate(billing.items):
+        existing = (
             self.conn.execute(
-                text(
-                    "INSERT INTO billing_items (billing_id, description, amount, item_type, sort_order) "
-                    "VALUES (:billing_id, :description, :amount, :item_type, :sort_order)"
-                ),
-                {
-                    "billing_id": billing.id,
-                    "description": item.description,
-                    "amount": item.amount,
-                    "item_type": item.item_type.value,
-                    "sort_order": i,
-                },
+                text("SELECT * FROM billing_items WHERE billing_id = :billing_id"),
+                {"billing_id": billing.id},
             )
+            .mappings()
+            .fetchall()
+        )
+        items = self._save_items(billing.id, billing.items, list(existing))
         self.conn.commit()
-        if billing.id is None:  # pragma: no cover
-            raise ValueError("Cannot update billing without an id")
-        result = self.get_by_id(billing.id)
-        if result is None:
-            raise RuntimeError(f"Failed to retrieve billing after update (id={billing.id})")
-        return result
+        return billing.model_copy(update={"items": items, "updated_at": now})
 
     def delete(self, billing_id: int) -> None:
         self.conn.execute(
@@ -244,6 +424,7 @@ class SQLAlchemyBillingRepository(BillingRepository):
         self.conn.commit()
 
 
+@replica_reads
 class SQLAlchemyBillRepository(BillRepository):
     def __init__(self, conn: Connection) -> None:
         self.conn = conn
@@ -272,28 +453,33 @@ class SQLAlchemyBillRepository(BillRepository):
             },
         )
         bill_id = result.lastrowid
-        for i, item in enumerate(bill.line_items):
-            self.conn.execute(
-                text(
-                    "INSERT INTO bill_line_items (bill_id, description, amount, item_type, sort_order) "
-                    "VALUES (:bill_id, :description, :amount, :item_type, :sort_order)"
-                ),
-                {
-                    "bill_id": bill_id,
-                    "description": item.description,
-                    "amount": item.amount,
-                    "item_type": item.item_type.value,
-                    "sort_order": i,
-                },
-            )
+        line_items = self._save_line_items(bill_id, bill.line_items)
         self.conn.commit()
-        result = self.get_by_id(bill_id)
-        if result is None:
-            raise RuntimeError(f"Failed to retrieve bill after create (id={bill_id})")
-        return result
+        return bill.model_copy(
+            update={
+                "id": bill_id,
+                "uuid": bill_uuid,
+                "line_items": line_items,
+                "status_updated_at": now,
+                "created_at": now,
+                "deleted_at": None,
+            }
+        )
+
+    def _save_line_items(
+        self,
+        bill_id: int,
+        line_items: list[BillLineItem],
+        existing_rows: list[RowMapping] | None = None,
+    ) -> list[BillLineItem]:
+        ids = _write_items(self.conn, "bill_line_items", "bill_id", bill_id, line_items, existing_rows)
+        return [
+            item.model_copy(update={"id": item_id, "bill_id": bill_id, "sort_order": i})
+            for i, (item, item_id) in enumerate(zip(line_items, ids))
+        ]
 
     @staticmethod
-    def _build_bill(row: RowMapping, item_rows: list[RowMapping]) -> Bill:
+    def _build_bill(row: RowMapping, item_rows: list[RowMapping] | list[dict]) -> Bill:
         return Bill(
             id=row["id"],
             uuid=row["uuid"],
@@ -316,46 +502,36 @@ class SQLAlchemyBillRepository(BillRepository):
             due_date=row["due_date"],
             status=row.get("status", "draft"),
             status_updated_at=row.get("status_updated_at"),
+            pdf_status=row.get("pdf_status") or "ready",
             created_at=row["created_at"],
             deleted_at=row["deleted_at"],
         )
 
-    def _row_to_bill(self, row: RowMapping) -> Bill:
-        items = (
+    def _get_one(self, where: str, params: dict) -> Bill | None:
+        """Load a bill and its line items in a single LEFT JOIN round trip."""
+        rows = (
             self.conn.execute(
-                text("SELECT * FROM bill_line_items WHERE bill_id = :bill_id ORDER BY sort_order"),
-                {"bill_id": row["id"]},
+                text(
+                    "SELECT b.*, li.id AS li_id, li.bill_id AS li_bill_id, "
+                    "li.description AS li_description, li.amount AS li_amount, "
+                    "li.item_type AS li_item_type, li.sort_order AS li_sort_order "
+                    "FROM bills b LEFT JOIN bill_line_items li ON li.bill_id = b.id "
+                    f"WHERE {where} AND b.deleted_at IS NULL ORDER BY li.sort_order"
+                ),
+                params,
             )
             .mappings()
             .fetchall()
         )
-        return self._build_bill(row, list(items))
+        if not rows:
+            return None
+        return self._build_bill(rows[0], _split_joined_rows(rows, "li_"))
 
     def get_by_id(self, bill_id: int) -> Bill | None:
-        row = (
-            self.conn.execute(
-                text("SELECT * FROM bills WHERE id = :id AND deleted_at IS NULL"),
-                {"id": bill_id},
-            )
-            .mappings()
-            .fetchone()
-        )
-        if row is None:
-            return None
-        return self._row_to_bill(row)
+        return self._get_one("b.id = :id", {"id": bill_id})
 
     def get_by_uuid(self, uuid: str) -> Bill | None:
-        row = (
-            self.conn.execute(
-                text("SELECT * FROM bills WHERE uuid = :uuid AND deleted_at IS NULL"),
-                {"uuid": uuid},
-            )
-            .mappings()
-            .fetchone()
-        )
-        if row is None:
-            return None
-        return self._row_to_bill(row)
+        return self._get_one("b.uuid = :uuid", {"uuid": uuid})
 
     def list_by_billing(self, billing_id: int) -> list[Bill]:
         rows = (
@@ -369,6 +545,79 @@ class SQLAlchemyBillRepository(BillRepository):
             .mappings()
             .fetchall()
         )
+        return self._build_bills_from_rows(rows)
+
+    def list_by_billing_page(self, billing_id: int, limit: int, cursor: str | None = None) -> Page[Bill]:
+        rows, next_cursor = _keyset_page(
+            self.conn,
+            "SELECT * FROM bills WHERE billing_id = :billing_id AND deleted_at IS NULL",
+            {"billing_id": billing_id},
+            "reference_month",
+            limit,
+            cursor,
+        )
+        return Page(items=self._build_bills_from_rows(rows), next_cursor=next_cursor)
+
+    def list_summaries_by_billing_page(
+        self, billing_id: int, limit: int, cursor: str | None = None
+    ) -> Page[BillSummary]:
+        rows, next_cursor = _keyset_page(
+            self.conn,
+            "SELECT id, uuid, billing_id, reference_month, total_amount, due_date, status "
+            "FROM bills WHERE billing_id = :billing_id AND deleted_at IS NULL",
+            {"billing_id": billing_id},
+            "reference_month",
+            limit,
+            cursor,
+        )
+        return Page(items=[BillSummary(**row) for row in rows], next_cursor=next_cursor)
+
+    def list_after_id(
+        self,
+        after_id: int,
+        limit: int,
+        *,
+        billing_id: int | None = None,
+        organization_id: int | None = None,
+        month_from: str | None = None,
+        month_to: str | None = None,
+        status: str | None = None,
+    ) -> list[Bill]:
+        conditions = [
+            "b.id > :after_id",
+            "b.deleted_at IS NULL",
+            "g.deleted_at IS NULL",
+        ]
+        params: dict[str, object] = {"after_id": after_id, "limit": limit}
+        if billing_id is not None:
+            conditions.append("b.billing_id = :billing_id")
+            params["billing_id"] = billing_id
+        if organization_id is not None:
+            conditions.append("g.owner_type = 'organization' AND g.owner_id = :organization_id")
+            params["organization_id"] = organization_id
+        if month_from is not None:
+            conditions.append("b.reference_month >= :month_from")
+            params["month_from"] = month_from
+        if month_to is not None:
+            conditions.append("b.reference_month <= :month_to")
+            params["month_to"] = month_to
+        if status is not None:
+            conditions.append("b.status = :status")
+            params["status"] = status
+        rows = (
+            self.conn.execute(
+                text(
+                    "SELECT b.* FROM bills b JOIN billings g ON g.id = b.billing_id "
+                    f"WHERE {' AND '.join(conditions)} ORDER BY b.id LIMIT :limit"
+                ),
+                params,
+            )
+            .mappings()
+            .fetchall()
+        )
+        return self._build_bills_from_rows(rows)
+
+    def _build_bills_from_rows(self, rows: list[RowMapping]) -> list[Bill]:
         if not rows:
             return []
         bill_ids = [row["id"] for row in rows]
@@ -388,6 +637,8 @@ class SQLAlchemyBillRepository(BillRepository):
         return [self._build_bill(row, items_by_bill.get(row["id"], [])) for row in rows]
 
     def update(self, bill: Bill) -> Bill:
+        if bill.id is None:
+            raise ValueError("Cannot update bill without an id")
         self.conn.execute(
             text(
                 "UPDATE bills SET reference_month = :reference_month, "
@@ -401,31 +652,17 @@ class SQLAlchemyBillRepository(BillRepository):
                 "id": bill.id,
             },
         )
-        self.conn.execute(
-            text("DELETE FROM bill_line_items WHERE bill_id = :bill_id"),
-            {"bill_id": bill.id},
-        )
-        for i, item in enumerate(bill.line_items):
+        existing = (
             self.conn.execute(
-                text(
-                    "INSERT INTO bill_line_items (bill_id, description, amount, item_type, sort_order) "
-                    "VALUES (:bill_id, :description, :amount, :item_type, :sort_order)"
-                ),
-                {
-                    "bill_id": bill.id,
-                    "description": item.description,
-                    "amount": item.amount,
-                    "item_type": item.item_type.value,
-                    "sort_order": i,
-                },
+                text("SELECT * FROM bill_line_items WHERE bill_id = :bill_id"),
+                {"bill_id": bill.id},
             )
+            .mappings()
+            .fetchall()
+        )
+        line_items = self._save_line_items(bill.id, bill.line_items, list(existing))
         self.conn.commit()
-        if bill.id is None:  # pragma: no cover
-            raise ValueError("Cannot update bill without an id")
-        result = self.get_by_id(bill.id)
-        if result is None:
-            raise RuntimeError(f"Failed to retrieve bill after update (id={bill.id})")
-        return result
+        return bill.model_copy(update={"line_items": line_items})
 
     def update_pdf_path(self, bill_id: int, pdf_path: str) -> None:
         self.conn.execute(
@@ -434,6 +671,13 @@ class SQLAlchemyBillRepository(BillRepository):
         )
         self.conn.commit()
 
+    def update_pdf_status(self, bill_id: int, pdf_status: str) -> None:
+        self.conn.execute(
+            text("UPDATE bills SET pdf_status = :pdf_status WHERE id = :id"),
+            {"pdf_status": pdf_status, "id": bill_id},
+        )
+        self.conn.commit()
+
     def update_status(self, bill_id: int, status: str, status_updated_at: datetime) -> None:
         self.conn.execute(
             text("UPDATE bills SET status = :status, status_updated_at = :status_updated_at WHERE id = :id"),
@@ -659,6 +903,13 @@ class SQLAlchemyOrganizationRepository(OrganizationRepository):
             return None
         return self._row_to_member(row)
 
+    def list_roles_for_user(self, user_id: int) -> dict[int, str]:
+        rows = self.conn.execute(
+            text("SELECT organization_id, role FROM organization_members WHERE user_id = :user_id"),
+            {"user_id": user_id},
+        ).fetchall()
+        return {org_id: role for org_id, role in rows}
+
     def list_members(self, org_id: int) -> list[OrganizationMember]:
         rows = (
             self.conn.execute(
@@ -851,6 +1102,7 @@ class SQLAlchemyInviteRepository(InviteRepository):
         return (result["cnt"] if result else 0) > 0
 
 
+@replica_reads
 class SQLAlchemyReceiptRepository(ReceiptRepository):
     def __init__(self, conn: Connection) -> None:
         self.conn = conn
@@ -863,6 +1115,7 @@ class SQLAlchemyReceiptRepository(ReceiptRepository):
             bill_id=row["bill_id"],
             filename=row["filename"],
             storage_key=row["storage_key"],
+            normalized_key=row["normalized_key"],
             content_type=row["content_type"],
             file_size=row["file_size"],
             sort_order=row["sort_order"],
@@ -874,9 +1127,9 @@ class SQLAlchemyReceiptRepository(ReceiptRepository):
         now = _now()
         self.conn.execute(
             text(
-                "INSERT INTO receipts (uuid, bill_id, filename, storage_key, content_type, "
+                "INSERT INTO receipts (uuid, bill_id, filename, storage_key, normalized_key, content_type, "
                 "file_size, sort_order, created_at) "
-                "VALUES (:uuid, :bill_id, :filename, :storage_key, :content_type, "
+                "VALUES (:uuid, :bill_id, :filename, :storage_key, :normalized_key, :content_type, "
                 ":file_size, :sort_order, :created_at)"
             ),
             {
@@ -884,6 +1137,7 @@ class SQLAlchemyReceiptRepository(ReceiptRepository):
                 "bill_id": receipt.bill_id,
                 "filename": receipt.filename,
                 "storage_key": receipt.storage_key,
+                "normalized_key": receipt.normalized_key,
                 "content_type": receipt.content_type,
                 "file_size": receipt.file_size,
                 "sort_order": receipt.sort_order,
@@ -948,7 +1202,15 @@ class SQLAlchemyReceiptRepository(ReceiptRepository):
             )
         self.conn.commit()
 
+    def set_normalized_key(self, receipt_id: int, normalized_key: str) -> None:
+        self.conn.execute(
+            text("UPDATE receipts SET normalized_key = :normalized_key WHERE id = :id"),
+            {"normalized_key": normalized_key, "id": receipt_id},
+        )
+        self.conn.commit()
+
 
+@replica_reads
 class SQLAlchemyAuditLogRepository(AuditLogRepository):
     def __init__(self, conn: Connection) -> None:
         self.conn = conn
@@ -1043,6 +1305,19 @@ class SQLAlchemyAuditLogRepository(AuditLogRepository):
         )
         return [self._row_to_audit_log(row) for row in rows]
 
+    def list_by_entity_page(
+        self, entity_type: str, entity_id: int, limit: int, cursor: str | None = None
+    ) -> Page[AuditLog]:
+        rows, next_cursor = _keyset_page(
+            self.conn,
+            "SELECT * FROM audit_logs WHERE entity_type = :entity_type AND entity_id = :entity_id",
+            {"entity_type": entity_type, "entity_id": entity_id},
+            "created_at",
+            limit,
+            cursor,
+        )
+        return Page(items=[self._row_to_audit_log(row) for row in rows], next_cursor=next_cursor)
+
     def list_by_actor(self, actor_id: int, limit: int = 50) -> list[AuditLog]:
         rows = (
             self.conn.execute(
@@ -1285,6 +1560,7 @@ class SQLAlchemyPasskeyRepository(PasskeyRepository):
         self.conn.commit()
 
 
+@replica_reads
 class SQLAlchemyThemeRepository(ThemeRepository):
     def __init__(self, conn: Connection) -> None:
         self.conn = conn
@@ -1399,3 +1675,278 @@ class SQLAlchemyThemeRepository(ThemeRepository):
     def delete(self, theme_id: int) -> None:
         self.conn.execute(text("DELETE FROM themes WHERE id = :id"), {"id": theme_id})
         self.conn.commit()
+
+
+class SQLAlchemyJobRepository(JobRepository):
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+
+    @staticmethod
+    def _row_to_job(row: RowMapping) -> Job:
+        payload = row["payload"]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        return Job(
+            id=row["id"],
+            uuid=row["uuid"],
+            kind=row["kind"],
+            payload=payload,
+            dedupe_key=row["dedupe_key"],
+            status=row["status"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            run_after=row["run_after"],
+            locked_by=row["locked_by"],
+            locked_at=row["locked_at"],
+            last_error=row["last_error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def enqueue(self, job: Job) -> Job:
+        if job.dedupe_key:
+            row = (
+                self.conn.execute(
+                    text("SELECT * FROM jobs WHERE dedupe_key = :dedupe_key AND status = :status ORDER BY id LIMIT 1"),
+                    {"dedupe_key": job.dedupe_key, "status": JobStatus.QUEUED.value},
+                )
+                .mappings()
+                .fetchone()
+            )
+            if row is not None:
+                return self._row_to_job(row)
+
+        job_uuid = str(ULID())
+        now = _now()
+        run_after = job.run_after or now
+        result = self.conn.execute(
+            text(
+                "INSERT INTO jobs (uuid, kind, payload, dedupe_key, status, attempts, max_attempts, "
+                "run_after, locked_by, created_at, updated_at) "
+                "VALUES (:uuid, :kind, :payload, :dedupe_key, :status, 0, :max_attempts, "
+                ":run_after, '', :created_at, :updated_at)"
+            ),
+            {
+                "uuid": job_uuid,
+                "kind": job.kind,
+                "payload": json.dumps(job.payload),
+                "dedupe_key": job.dedupe_key,
+                "status": JobStatus.QUEUED.value,
+                "max_attempts": job.max_attempts,
+                "run_after": run_after,
+                "created_at": now,
+                "updated_at": now,
+            },
+        )
+        self.conn.commit()
+        return job.model_copy(
+            update={
+                "id": result.lastrowid,
+                "uuid": job_uuid,
+                "status": JobStatus.QUEUED.value,
+                "attempts": 0,
+                "run_after": run_after,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+
+    def get_by_id(self, job_id: int) -> Job | None:
+        row = self.conn.execute(text("SELECT * FROM jobs WHERE id = :id"), {"id": job_id}).mappings().fetchone()
+        if row is None:
+            return None
+        return self._row_to_job(row)
+
+    def claim(self, worker_id: str, limit: int, now: datetime) -> list[Job]:
+        candidates = (
+            self.conn.execute(
+                text(
+                    "SELECT id FROM jobs WHERE status = :queued AND run_after <= :now "
+                    "ORDER BY run_after, id LIMIT :limit"
+                ),
+                {"queued": JobStatus.QUEUED.value, "now": now, "limit": limit},
+            )
+            .scalars()
+            .fetchall()
+        )
+        claimed: list[int] = []
+        for job_id in candidates:
+            # Conditional update: a concurrent worker that claimed the row first leaves rowcount at 0
+            result = self.conn.execute(
+                text(
+                    "UPDATE jobs SET status = :running, locked_by = :worker_id, locked_at = :now, "
+                    "attempts = attempts + 1, updated_at = :now WHERE id = :id AND status = :queued"
+                ),
+                {
+                    "running": JobStatus.RUNNING.value,
+                    "queued": JobStatus.QUEUED.value,
+                    "worker_id": worker_id,
+                    "now": now,
+                    "id": job_id,
+                },
+            )
+            if result.rowcount == 1:
+                claimed.append(job_id)
+        self.conn.commit()
+        if not claimed:
+            return []
+
+        placeholders = ", ".join(f":id{i}" for i in range(len(claimed)))
+        rows = (
+            self.conn.execute(
+                text(f"SELECT * FROM jobs WHERE id IN ({placeholders}) ORDER BY run_after, id"),
+                {f"id{i}": job_id for i, job_id in enumerate(claimed)},
+            )
+            .mappings()
+            .fetchall()
+        )
+        return [self._row_to_job(row) for row in rows]
+
+    def heartbeat(self, job_id: int, worker_id: str, now: datetime) -> bool:
+        result = self.conn.execute(
+            text(
+                "UPDATE jobs SET locked_at = :now, updated_at = :now "
+                "WHERE id = :id AND status = :running AND locked_by = :worker_id"
+            ),
+            {"now": now, "id": job_id, "running": JobStatus.RUNNING.value, "worker_id": worker_id},
+        )
+        self.conn.commit()
+        return result.rowcount == 1
+
+    def mark_done(self, job_id: int, worker_id: str) -> bool:
+        result = self.conn.execute(
+            text(
+                "UPDATE jobs SET status = :status, locked_by = '', locked_at = NULL, last_error = NULL, "
+                "updated_at = :updated_at WHERE id = :id AND status = :running AND locked_by = :worker_id"
+            ),
+            {
+                "status": JobStatus.DONE.value,
+                "updated_at": _now(),
+                "id": job_id,
+                "running": JobStatus.RUNNING.value,
+                "worker_id": worker_id,
+            },
+        )
+        self.conn.commit()
+        return result.rowcount == 1
+
+    def mark_failed(self, job_id: int, worker_id: str, error: str, retry_at: datetime | None) -> bool:
+        now = _now()
+        result = self.conn.execute(
+            text(
+                "UPDATE jobs SET status = :status, run_after = :run_after, locked_by = '', locked_at = NULL, "
+                "last_error = :error, updated_at = :updated_at "
+                "WHERE id = :id AND status = :running AND locked_by = :worker_id"
+            ),
+            {
+                "status": JobStatus.QUEUED.value if retry_at is not None else JobStatus.FAILED.value,
+                "run_after": retry_at or now,
+                "error": error,
+                "updated_at": now,
+                "id": job_id,
+                "running": JobStatus.RUNNING.value,
+                "worker_id": worker_id,
+            },
+        )
+        self.conn.commit()
+        return result.rowcount == 1
+
+    def requeue_stale(self, locked_before: datetime) -> int:
+        result = self.conn.execute(
+            text(
+                "UPDATE jobs SET status = :queued, locked_by = '', locked_at = NULL, updated_at = :updated_at "
+                "WHERE status = :running AND locked_at < :locked_before AND attempts < max_attempts"
+            ),
+            {
+                "queued": JobStatus.QUEUED.value,
+                "running": JobStatus.RUNNING.value,
+                "locked_before": locked_before,
+                "updated_at": _now(),
+            },
+        )
+        self.conn.commit()
+        return result.rowcount
+
+    def fail_stale(self, locked_before: datetime, error: str) -> list[Job]:
+        params = {"running": JobStatus.RUNNING.value, "locked_before": locked_before}
+        rows = (
+            self.conn.execute(
+                text(
+                    "SELECT * FROM jobs WHERE status = :running AND locked_at < :locked_before "
+                    "AND attempts >= max_attempts ORDER BY id"
+                ),
+                params,
+            )
+            .mappings()
+            .fetchall()
+        )
+        failed: list[Job] = []
+        for row in rows:
+            # Conditional on the lock we saw, so a concurrent reaper (or a late heartbeat) wins cleanly
+            result = self.conn.execute(
+                text(
+                    "UPDATE jobs SET status = :failed, locked_by = '', locked_at = NULL, last_error = :error, "
+                    "updated_at = :updated_at WHERE id = :id AND status = :running AND locked_at < :locked_before"
+                ),
+                {**params, "failed": JobStatus.FAILED.value, "error": error, "updated_at": _now(), "id": row["id"]},
+            )
+            if result.rowcount == 1:
+                failed.append(self._row_to_job(row))
+        self.conn.commit()
+        return failed
+
+    def count_by_status(self) -> dict[str, int]:
+        rows = self.conn.execute(text("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")).fetchall()
+        return {status: count for status, count in rows}
+
+
+class SQLAlchemySessionRepository(SessionRepository):
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+
+    def get(self, session_key: str, now: datetime) -> StoredSession | None:
+        row = (
+            self.conn.execute(
+                text("SELECT * FROM sessions WHERE session_key = :session_key AND expires_at > :now"),
+                {"session_key": session_key, "now": now},
+            )
+            .mappings()
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return StoredSession(session_key=row["session_key"], data=json.loads(row["data"]), expires_at=row["expires_at"])
+
+    def save(self, session: StoredSession) -> None:
+        params = {
+            "session_key": session.session_key,
+            "data": json.dumps(session.data),
+            "expires_at": session.expires_at,
+            "updated_at": _now(),
+        }
+        # Keys are random, so a concurrent insert of the same key cannot happen
+        result = self.conn.execute(
+            text(
+                "UPDATE sessions SET data = :data, expires_at = :expires_at, updated_at = :updated_at "
+                "WHERE session_key = :session_key"
+            ),
+            params,
+        )
+        if result.rowcount == 0:
+            self.conn.execute(
+                text(
+                    "INSERT INTO sessions (session_key, data, expires_at, updated_at) "
+                    "VALUES (:session_key, :data, :expires_at, :updated_at)"
+                ),
+                params,
+            )
+        self.conn.commit()
+
+    def delete(self, session_key: str) -> None:
+        self.conn.execute(text("DELETE FROM sessions WHERE session_key = :session_key"), {"session_key": session_key})
+        self.conn.commit()
+
+    def delete_expired(self, now: datetime) -> int:
+        result = self.conn.execute(text("DELETE FROM sessions WHERE expires_at <= :now"), {"now": now})
+        self.conn.commit()
+        return result.rowcount
@@ -1,93 +1,388 @@
-"""List all invoices and regenerate their PDFs with the current template.
+"""Regenerate invoice PDFs with the current template, in parallel and resumably.
+
+Bills are streamed from the database in keyset-paginated batches (ordered by id)
+and rendered in a process pool. Progress is checkpointed to a JSON file so an
+interrupted run picks up where it stopped.
 
 Usage:
     python -m rentivo.scripts.regenerate_pdfs
     python -m rentivo.scripts.regenerate_pdfs --dry-run
+    python -m rentivo.scripts.regenerate_pdfs --workers 8 --from 2025-01 --to 2025-06
+    python -m rentivo.scripts.regenerate_pdfs --billing <uuid> --status paid
+    python -m rentivo.scripts.regenerate_pdfs --organization <uuid> --reset
 """
 
 from __future__ import annotations
 
-import sys
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 
 from rich.console import Console
 from rich.table import Table
 
 from rentivo.db import initialize_db
 from rentivo.models import format_brl
-from rentivo.models.bill import Bill
+from rentivo.models.bill import Bill, BillStatus
 from rentivo.models.billing import Billing
+from rentivo.repositories.base import BillingRepository, BillRepository
 from rentivo.repositories.factory import (
     get_bill_repository,
     get_billing_repository,
+    get_organization_repository,
     get_receipt_repository,
+    get_theme_repository,
 )
 from rentivo.services.bill_service import BillService
+from rentivo.services.theme_service import ThemeService
 from rentivo.storage.factory import get_storage
 
+logger = logging.getLogger(__name__)
+
 console = Console()
 
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_CHECKPOINT_PATH = ".regenerate_pdfs.checkpoint.json"
+CHECKPOINT_EVERY = 25
 
-def main() -> None:
-    dry_run = "--dry-run" in sys.argv
+# Per-process BillService, built once by _init_worker
+_worker_service: BillService | None = None
 
-    initialize_db()
 
-    billing_repo = get_billing_repository()
-    bill_repo = get_bill_repository()
-    receipt_repo = get_receipt_repository()
-    storage = get_storage()
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Regenera os PDFs das faturas com o template atual.")
+    parser.add_argument("--dry-run", action="store_true", help="lista as faturas sem regenerar")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos em paralelo")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="faturas por consulta")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="arquivo de checkpoint")
+    parser.add_argument("--reset", action="store_true", help="ignora o checkpoint e recomeça do zero")
+    parser.add_argument("--billing", help="UUID da cobranca")
+    parser.add_argument("--organization", help="UUID da organizacao")
+    parser.add_argument("--from", dest="month_from", help="mes de referencia inicial (YYYY-MM)")
+    parser.add_argument("--to", dest="month_to", help="mes de referencia final (YYYY-MM)")
+    parser.add_argument("--status", choices=[s.value for s in BillStatus], help="status da fatura")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be >= 1")
+    return args
 
-    bill_service = BillService(bill_repo, storage, receipt_repo)
 
-    billings = billing_repo.list_all()
+class Checkpoint:
+    """Resumable progress marker persisted as JSON.
 
-    if not billings:
-        console.print("[yellow]Nenhuma cobranca encontrada.[/yellow]")
-        return
+    Bills are processed in id order, so progress is a single watermark: every
+    bill with ``id <= watermark`` has been handled (successfully or not).
+    The checkpoint is only honoured when the filters match the current run.
+    """
 
-    all_bills: list[tuple[Billing, Bill]] = []
-    for billing in billings:
-        assert billing.id is not None
-        bills = bill_repo.list_by_billing(billing.id)
-        for bill in bills:
-            all_bills.append((billing, bill))
+    def __init__(self, path: str, filters: dict[str, str | None]) -> None:
+        self.path = path
+        self.filters = filters
+        self.watermark = 0
+        self.completed = 0
+        self.failed: list[int] = []
 
-    if not all_bills:
-        console.print("[yellow]Nenhuma fatura encontrada.[/yellow]")
-        return
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            logger.warning("Unreadable checkpoint %s, starting over", self.path)
+            return False
+        if data.get("filters") != self.filters:
+            logger.warning("Checkpoint %s was written with different filters, starting over", self.path)
+            return False
+        self.watermark = int(data.get("watermark", 0))
+        self.completed = int(data.get("completed", 0))
+        self.failed = [int(bill_id) for bill_id in data.get("failed", [])]
+        return True
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(
+                {
+                    "filters": self.filters,
+                    "watermark": self.watermark,
+                    "completed": self.completed,
+                    "failed": self.failed,
+                },
+                fh,
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named stage."""
+
+    def __init__(self) -> None:
+        self.totals: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+
+    def merge(self, timings: dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self.add(stage, seconds)
+
+
+def _iter_bills(
+    bill_repo: BillRepository,
+    after_id: int,
+    batch_size: int,
+    timer: StageTimer,
+    filters: dict,
+) -> Iterator[Bill]:
+    """Stream bills in keyset-paginated batches instead of loading them all at once."""
+    while True:
+        started = time.perf_counter()
+        batch = bill_repo.list_after_id(after_id, batch_size, **filters)
+        timer.add("scan", time.perf_counter() - started)
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1].id
+        if last_id is None or len(batch) < batch_size:
+            return
+        after_id = last_id
+
+
+class _BillingCache:
+    """Looks billings up once per run — bills of the same billing share the lookup."""
+
+    def __init__(self, billing_repo: BillingRepository, timer: StageTimer) -> None:
+        self.billing_repo = billing_repo
+        self.timer = timer
+        self._by_id: dict[int, Billing | None] = {}
+
+    def get(self, billing_id: int) -> Billing | None:
+        if billing_id not in self._by_id:
+            started = time.perf_counter()
+            self._by_id[billing_id] = self.billing_repo.get_by_id(billing_id)
+            self.timer.add("load", time.perf_counter() - started)
+        return self._by_id[billing_id]
+
+
+def _init_worker() -> None:
+    """Build the BillService used by this process (one DB connection per worker)."""
+    global _worker_service
+    _worker_service = BillService(
+        get_bill_repository(),
+        get_storage(),
+        get_receipt_repository(),
+        theme_service=ThemeService(get_theme_repository()),
+    )
+
+
+def _regenerate_one(bill: Bill, billing: Billing) -> tuple[int, dict[str, float], str | None]:
+    """Worker entry point. Returns (bill_id, stage timings, error message or None)."""
+    if _worker_service is None:
+        _init_worker()
+    assert _worker_service is not None
+    assert bill.id is not None
+    timings: dict[str, float] = {}
+    try:
+        _worker_service.regenerate_pdf(bill, billing, timings=timings)
+    except Exception as exc:
+        logger.exception("Failed to regenerate PDF for bill %s", bill.uuid)
+        return bill.id, timings, f"{type(exc).__name__}: {exc}"
+    return bill.id, timings, None
 
+
+def _resolve_filters(args: argparse.Namespace) -> dict | None:
+    """Translate CLI filters into repository keyword arguments. Returns None if a uuid is unknown."""
+    filters: dict = {
+        "month_from": args.month_from,
+        "month_to": args.month_to,
+        "status": args.status,
+    }
+    if args.billing:
+        billing = get_billing_repository().get_by_uuid(args.billing)
+        if billing is None:
+            console.print(f"[red]Cobranca {args.billing} nao encontrada.[/red]")
+            return None
+        filters["billing_id"] = billing.id
+    if args.organization:
+        org = get_organization_repository().get_by_uuid(args.organization)
+        if org is None:
+            console.print(f"[red]Organizacao {args.organization} nao encontrada.[/red]")
+            return None
+        filters["organization_id"] = org.id
+    return filters
+
+
+def _dry_run(bills: Iterator[Bill], billings: _BillingCache, storage) -> None:
     table = Table(title="Faturas encontradas")
     table.add_column("#", style="dim")
     table.add_column("Cobranca", style="bold")
     table.add_column("Referencia")
+    table.add_column("Status")
     table.add_column("Total", justify="right")
     table.add_column("Link", style="dim")
 
-    for billing, bill in all_bills:
+    count = 0
+    for bill in bills:
+        billing = billings.get(bill.billing_id)
+        if billing is None:
+            continue
         link = storage.get_url(bill.pdf_path) if bill.pdf_path else "-"
         table.add_row(
             str(bill.id),
             billing.name,
             bill.reference_month,
+            bill.status,
             format_brl(bill.total_amount),
             link,
         )
+        count += 1
+
+    if not count:
+        console.print("[yellow]Nenhuma fatura encontrada.[/yellow]")
+        return
+    console.print(table)
+    console.print(f"\nTotal de faturas: [bold]{count}[/bold]")
+    console.print("\n[yellow]--dry-run: nenhum PDF foi regenerado.[/yellow]")
+
 
+def _print_report(processed: int, failed: int, elapsed: float, timer: StageTimer, workers: int) -> None:
+    throughput = processed / elapsed if elapsed > 0 else 0.0
+    table = Table(title="Tempo por etapa")
+    table.add_column("Etapa", style="bold")
+    table.add_column("Total (s)", justify="right")
+    table.add_column("Media/fatura (ms)", justify="right")
+    for stage, seconds in timer.totals.items():
+        avg_ms = (seconds / processed * 1000) if processed else 0.0
+        table.add_row(stage, f"{seconds:.2f}", f"{avg_ms:.1f}")
     console.print(table)
-    console.print(f"\nTotal de faturas: [bold]{len(all_bills)}[/bold]")
+    console.print(
+        f"\n[green bold]{processed - failed} fatura(s) regenerada(s)[/green bold]"
+        f" em {elapsed:.1f}s com {workers} processo(s) — [bold]{throughput:.1f} faturas/s[/bold]"
+    )
+    if failed:
+        console.print(f"[red]{failed} fatura(s) falharam — veja o log.[/red]")
+
+
+def run(args: argparse.Namespace) -> None:
+    filters = _resolve_filters(args)
+    if filters is None:
+        return
+
+    timer = StageTimer()
+    billings = _BillingCache(get_billing_repository(), timer)
+    bill_repo = get_bill_repository()
+
+    if args.dry_run:
+        _dry_run(_iter_bills(bill_repo, 0, args.batch_size, timer, filters), billings, get_storage())
+        return
+
+    checkpoint = Checkpoint(args.checkpoint, {k: (str(v) if v is not None else None) for k, v in filters.items()})
+    if args.reset:
+        checkpoint.clear()
+    elif checkpoint.load():
+        console.print(
+            f"[cyan]Retomando do checkpoint: {checkpoint.completed} fatura(s) ja processada(s),"
+            f" continuando apos id {checkpoint.watermark}.[/cyan]"
+        )
+
+    console.print(f"\n[cyan]Regenerando PDFs com {args.workers} processo(s)...[/cyan]\n")
 
-    if dry_run:
-        console.print("\n[yellow]--dry-run: nenhum PDF foi regenerado.[/yellow]")
+    bills = _iter_bills(bill_repo, checkpoint.watermark, args.batch_size, timer, filters)
+    in_flight: dict[Future, tuple[Bill, Billing]] = {}
+    last_dispatched = checkpoint.watermark
+    processed = 0
+    last_saved = 0
+    failed = 0
+    started = time.perf_counter()
+
+    def _handle(bill: Bill, billing: Billing, bill_id: int, timings: dict[str, float], error: str | None) -> None:
+        nonlocal processed, failed
+        timer.merge(timings)
+        processed += 1
+        checkpoint.completed += 1
+        if error is None:
+            console.print(f"  [green]✓[/green] {billing.name} - {bill.reference_month} (#{bill_id})")
+        else:
+            failed += 1
+            checkpoint.failed.append(bill_id)
+            console.print(f"  [red]✗[/red] {billing.name} - {bill.reference_month} (#{bill_id}): {error}")
+
+    def _advance_watermark() -> None:
+        nonlocal last_saved
+        # Everything below the oldest in-flight bill is done
+        pending = [b.id for b, _ in in_flight.values() if b.id is not None]
+        checkpoint.watermark = min(pending) - 1 if pending else last_dispatched
+        if processed - last_saved >= CHECKPOINT_EVERY:
+            checkpoint.save()
+            last_saved = processed
+
+    try:
+        if args.workers == 1:
+            for bill in bills:
+                billing = billings.get(bill.billing_id)
+                if billing is None or bill.id is None:
+                    continue
+                last_dispatched = bill.id
+                _handle(bill, billing, *_regenerate_one(bill, billing))
+                _advance_watermark()
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx, initializer=_init_worker) as pool:
+                max_in_flight = args.workers * 2
+                for bill in bills:
+                    billing = billings.get(bill.billing_id)
+                    if billing is None or bill.id is None:
+                        continue
+                    in_flight[pool.submit(_regenerate_one, bill, billing)] = (bill, billing)
+                    last_dispatched = bill.id
+                    if len(in_flight) >= max_in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            # result() first: if it raises, the bill stays in flight and below the watermark
+                            result = future.result()
+                            _handle(*in_flight.pop(future), *result)
+                            _advance_watermark()
+                for future in list(in_flight):
+                    result = future.result()
+                    _handle(*in_flight.pop(future), *result)
+                    _advance_watermark()
+    except BaseException as exc:
+        # Ctrl-C, a crashed worker pool or a database error: keep what is done so the next run resumes
+        checkpoint.save()
+        if isinstance(exc, KeyboardInterrupt):
+            console.print(f"\n[yellow]Interrompido. Progresso salvo em {checkpoint.path}.[/yellow]")
+        else:
+            console.print(f"\n[red]Falha: {exc}. Progresso salvo em {checkpoint.path}.[/red]")
+        raise
+
+    elapsed = time.perf_counter() - started
+    if processed == 0:
+        checkpoint.clear()
+        console.print("[yellow]Nenhuma fatura encontrada.[/yellow]")
         return
 
-    console.print("\n[cyan]Regenerando PDFs...[/cyan]\n")
+    checkpoint.clear()
+    _print_report(processed, failed, elapsed, timer, args.workers)
+    if checkpoint.failed:
+        console.print("Faturas com falha (ids): " + ", ".join(str(bill_id) for bill_id in checkpoint.failed))
 
-    for billing, bill in all_bills:
-        bill_service.regenerate_pdf(bill, billing)
-        url = storage.get_url(bill.pdf_path) if bill.pdf_path else "-"
-        console.print(f"  [green]\u2713[/green] {billing.name} - {bill.reference_month} \u2192 {url}")
 
-    console.print(f"\n[green bold]{len(all_bills)} fatura(s) regenerada(s) com sucesso![/green bold]")
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    initialize_db()
+    run(args)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 
 from rentivo.models.audit_log import AuditLog
+from rentivo.models.page import Page
 from rentivo.repositories.base import AuditLogRepository
 
 logger = logging.getLogger(__name__)
@@ -60,6 +61,11 @@ class AuditService:
     def list_by_entity(self, entity_type: str, entity_id: int) -> list[AuditLog]:
         return self.repo.list_by_entity(entity_type, entity_id)
 
+    def list_by_entity_page(
+        self, entity_type: str, entity_id: int, limit: int, cursor: str | None = None
+    ) -> Page[AuditLog]:
+        return self.repo.list_by_entity_page(entity_type, entity_id, limit, cursor)
+
     def list_by_actor(self, actor_id: int, limit: int = 50) -> list[AuditLog]:
         return self.repo.list_by_actor(actor_id, limit)
 
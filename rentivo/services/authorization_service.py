@@ -2,25 +2,65 @@ from __future__ import annotations
 
 import logging
 
+from rentivo.cache import TTLCache
 from rentivo.models.billing import Billing
 from rentivo.repositories.base import OrganizationRepository
+from rentivo.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+class MembershipCache(TTLCache):
+    """Cross-request cache of user id -> {organization id: role}.
+
+    Entries are dropped by ``OrganizationService`` and ``InviteService``
+    whenever a membership changes. Other processes only see a change once the
+    TTL runs out, so the cache is off unless ``RENTIVO_AUTHZ_CACHE_TTL`` is set.
+    """
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.invalidate(user_id)
+
+    def invalidate_org(self, org_id: int) -> None:
+        self.invalidate_where(lambda roles: org_id in roles)
+
+
+membership_cache = MembershipCache(ttl=settings.authz_cache_ttl, maxsize=settings.authz_cache_size)
+
+
 class AuthorizationService:
-    def __init__(self, org_repo: OrganizationRepository | None = None) -> None:
+    """Billing permission checks.
+
+    A user's organization roles are loaded with one query the first time they
+    are needed and reused for the lifetime of the service, which the web app
+    scopes to a single request.
+    """
+
+    def __init__(self, org_repo: OrganizationRepository | None = None, cache: MembershipCache | None = None) -> None:
         self.org_repo = org_repo
+        self.cache = cache
+        self._roles: dict[int, dict[int, str]] = {}
+
+    def _org_roles(self, user_id: int) -> dict[int, str]:
+        roles = self._roles.get(user_id)
+        if roles is None:
+            roles = self.cache.get(user_id) if self.cache is not None else None
+            if roles is None:
+                roles = self.org_repo.list_roles_for_user(user_id)
+                if self.cache is not None:
+                    self.cache.put(user_id, roles)
+            self._roles[user_id] = roles
+        return roles
 
     def get_role_for_billing(self, user_id: int, billing: Billing) -> str | None:
         if billing.owner_type == "user" and billing.owner_id == user_id:
             logger.debug("user=%s billing=%s role=owner", user_id, billing.id)
             return "owner"
         if billing.owner_type == "organization" and self.org_repo is not None:
-            member = self.org_repo.get_member(billing.owner_id, user_id)
-            if member is not None:
-                logger.debug("user=%s billing=%s role=%s", user_id, billing.id, member.role)
-                return member.role
+            role = self._org_roles(user_id).get(billing.owner_id)
+            if role is not None:
+                logger.debug("user=%s billing=%s role=%s", user_id, billing.id, role)
+                return role
         logger.debug("user=%s billing=%s role=None", user_id, billing.id)
         return None
 
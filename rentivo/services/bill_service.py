@@ -1,16 +1,30 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
 import logging
+import tempfile
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from io import SEEK_END, BytesIO
+from typing import BinaryIO
 
 from rentivo.constants import SP_TZ
-from rentivo.models.bill import Bill, BillLineItem
+from rentivo.models.bill import Bill, BillLineItem, BillPdfStatus, BillSummary
 from rentivo.models.billing import Billing, ItemType
+from rentivo.models.page import Page
 from rentivo.models.receipt import ALLOWED_RECEIPT_TYPES, MAX_RECEIPT_SIZE, Receipt
 from rentivo.pdf.invoice import InvoicePDF
-from rentivo.pdf.merger import merge_receipts
+from rentivo.pdf.merger import IMAGE_CONTENT_TYPES, merge_receipts_into, normalize_receipt
+from rentivo.pdf.optimizer import optimize_pdf_file
 from rentivo.pix import generate_pix_payload, generate_pix_qrcode_png
 from rentivo.repositories.base import BillRepository, ReceiptRepository
+from rentivo.services.job_service import JobService
 from rentivo.settings import settings
 from rentivo.storage.base import StorageBackend
 
@@ -24,6 +38,49 @@ CONTENT_TYPE_EXTENSIONS = {
 }
 
 
+class ReceiptFetchMetrics:
+    """Process-wide receipt downloads made while building bill PDFs, for ``/internal/metrics``."""
+
+    # Upper bounds, in seconds, of the fetch latency histogram
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.fetches = 0
+            self.failures = 0
+            self.seconds = 0.0
+            self.buckets = [0] * (len(self.BUCKETS) + 1)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.fetches += 1
+            self.seconds += seconds
+            self.buckets[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "fetches": self.fetches,
+                "failures": self.failures,
+                "seconds": self.seconds,
+                # Cumulative counts per upper bound, as Prometheus histograms expect
+                "buckets": [
+                    (bound, sum(self.buckets[: i + 1])) for i, bound in enumerate((*self.BUCKETS, float("inf")))
+                ],
+            }
+
+
+receipt_fetch_metrics = ReceiptFetchMetrics()
+
+
 def _storage_key(billing_uuid: str, bill_uuid: str) -> str:
     prefix = settings.storage_prefix
     if prefix:
@@ -31,6 +88,34 @@ def _storage_key(billing_uuid: str, bill_uuid: str) -> str:
     return f"{billing_uuid}/{bill_uuid}.pdf"
 
 
+def _spooled_file() -> BinaryIO:
+    """Temp file that stays in memory up to ``pdf_spool_max_bytes`` and spills to disk beyond."""
+    return tempfile.SpooledTemporaryFile(max_size=settings.pdf_spool_max_bytes)  # type: ignore[return-value]
+
+
+def _close_fetched(future: Future[BinaryIO]) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+_HASH_CHUNK_SIZE = 256 * 1024
+
+
+def _rewound(stream: BinaryIO) -> BinaryIO:
+    stream.seek(0)
+    return stream
+
+
+def _sha256_of(stream: BinaryIO) -> str:
+    """SHA-256 of ``stream`` from its start, read in chunks; leaves it rewound."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    while chunk := stream.read(_HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
 def _receipt_storage_key(billing_uuid: str, bill_uuid: str, receipt_uuid: str, content_type: str) -> str:
     ext = CONTENT_TYPE_EXTENSIONS.get(content_type, "")
     prefix = settings.storage_prefix
@@ -39,6 +124,13 @@ def _receipt_storage_key(billing_uuid: str, bill_uuid: str, receipt_uuid: str, c
     return f"{billing_uuid}/{bill_uuid}/receipts/{receipt_uuid}{ext}"
 
 
+def _normalized_receipt_key(receipt_key: str, content_hash: str) -> str:
+    """Key of the PDF rendering of an image receipt: next to the original, keyed by the image's SHA-256."""
+    folder = receipt_key.rsplit("/", 1)[0] if "/" in receipt_key else ""
+    name = f"normalized/{content_hash}.pdf"
+    return f"{folder}/{name}" if folder else name
+
+
 class BillService:
     def __init__(
         self,
@@ -46,16 +138,100 @@ class BillService:
         storage: StorageBackend,
         receipt_repo: ReceiptRepository | None = None,
         theme_service: object | None = None,
+        job_service: JobService | None = None,
     ) -> None:
         self.bill_repo = bill_repo
         self.storage = storage
         self.receipt_repo = receipt_repo
         self.theme_service = theme_service
+        self.job_service = job_service
         self.pdf_generator = InvoicePDF()
+        self._pdf_batch_depth = 0
+        self._dirty_pdfs: dict[int, tuple[Bill, Billing]] = {}
+
+    @contextmanager
+    def batch_pdf_regeneration(self) -> Iterator[None]:
+        """Coalesce PDF regenerations inside the block into one render per bill.
+
+        Bill and receipt changes made inside the block only mark the bill PDF
+        dirty; each dirty bill is rendered once when the outermost block exits,
+        so uploading N receipts costs one render and merge instead of N.
+
+        Changes saved before the block raised still get their render. If that
+        render fails too, its error is logged and the block's error propagates.
+        """
+        self._pdf_batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._pdf_batch_depth -= 1
+            if self._pdf_batch_depth == 0:
+                try:
+                    self.flush_pdf_regeneration()
+                except Exception:
+                    logger.exception("Failed to regenerate PDFs after the batch was aborted")
+            raise
+        self._pdf_batch_depth -= 1
+        if self._pdf_batch_depth == 0:
+            self.flush_pdf_regeneration()
+
+    def flush_pdf_regeneration(self) -> None:
+        """Render every bill PDF marked dirty by the current batch."""
+        dirty, self._dirty_pdfs = self._dirty_pdfs, {}
+        for bill, billing in dirty.values():
+            self._dispatch_pdf(bill, billing)
+
+    def is_pdf_pending(self, bill: Bill) -> bool:
+        """True if the bill PDF is stale: waiting for the current batch to flush or for a worker."""
+        if bill.pdf_status == BillPdfStatus.PENDING.value:
+            return True
+        return bill.id is not None and bill.id in self._dirty_pdfs
+
+    def schedule_pdf(self, bill: Bill, billing: Billing) -> None:
+        """Bring the bill PDF up to date.
+
+        Inside a batch the bill is only marked dirty. Otherwise the render is
+        queued for ``rentivo worker`` when a job service is configured, or
+        done inline.
+        """
+        if self._pdf_batch_depth and bill.id is not None:
+            self._dirty_pdfs[bill.id] = (bill, billing)
+            logger.debug("PDF regeneration deferred for bill %s", bill.uuid)
+            return
+        self._dispatch_pdf(bill, billing)
+
+    def _dispatch_pdf(self, bill: Bill, billing: Billing) -> None:
+        if self.job_service is None or bill.id is None:
+            self._generate_and_store_pdf(bill, billing)
+            return
+        # PENDING is committed before the job exists: a worker that claims the job right
+        # away must not have its READY overwritten by a late PENDING
+        previous_status = bill.pdf_status
+        self.bill_repo.update_pdf_status(bill.id, BillPdfStatus.PENDING.value)
+        bill.pdf_status = BillPdfStatus.PENDING.value
+        try:
+            self.job_service.enqueue_bill_pdf(bill.id)
+            return
+        except Exception:
+            # Without a job nothing would ever clear PENDING, so render here instead
+            logger.exception("Could not queue PDF job for bill %s, rendering inline", bill.uuid)
+        try:
+            self._generate_and_store_pdf(bill, billing)
+        except Exception:
+            self.bill_repo.update_pdf_status(bill.id, previous_status)
+            bill.pdf_status = previous_status
+            raise
 
     @staticmethod
-    def _get_pix_data(billing: Billing, total_centavos: int) -> tuple[bytes | None, str, str]:
-        """Resolve PIX config and return (qrcode_png, pix_key, pix_payload)."""
+    def _get_pix_data(
+        billing: Billing,
+        total_centavos: int,
+        storage: StorageBackend | None = None,
+    ) -> tuple[bytes | None, str, str]:
+        """Resolve PIX config and return (qrcode_png, pix_key, pix_payload).
+
+        ``storage``, when given, is used as a shared tier of the QR code cache.
+        """
         pix_key = billing.pix_key or settings.pix_key
         if not pix_key:
             return None, "", ""
@@ -78,34 +254,170 @@ class BillService:
             merchant_city=merchant_city,
             amount=amount,
             payload=payload,
+            storage=storage,
         )
         return png, pix_key, payload
 
-    def _fetch_receipt_data(self, bill: Bill) -> list[tuple[bytes, str]]:
-        """Fetch receipt file data for a bill, for merging into the PDF."""
+    def _store_normalized_receipt(
+        self, receipt_key: str, source: BinaryIO, content_type: str
+    ) -> tuple[str, bytes] | None:
+        """Render an image receipt to a single-page PDF and store it next to the original.
+
+        The image is decoded straight from ``source`` (an upload spool or a
+        fetched file), not copied into memory first. Returns the key and PDF
+        bytes, or None for PDF receipts (used as they are) and images that
+        could not be converted.
+        """
+        if content_type not in IMAGE_CONTENT_TYPES:
+            return None
+        try:
+            key = _normalized_receipt_key(receipt_key, _sha256_of(source))
+            pdf_bytes = normalize_receipt(source, content_type, settings.receipt_image_dpi)
+            self.storage.save(key, pdf_bytes)
+        except Exception:
+            logger.exception("Failed to normalize receipt %s, it will be converted at merge time", receipt_key)
+            return None
+        logger.debug("Normalized receipt %s stored at %s", receipt_key, key)
+        return key, pdf_bytes
+
+    def _spool_from_storage(self, key: str) -> BinaryIO:
+        spool = _spooled_file()
+        try:
+            self.storage.read_into(key, spool)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+    def _fetch_receipt_file(self, receipt: Receipt, latencies: list[float]) -> BinaryIO:
+        """Download what gets merged for ``receipt``: its PDF rendering if it has one, else the original.
+
+        Runs on the prefetch pool, so it only touches storage. Files are
+        streamed into a spooled temp file, so a large scan spills to disk
+        instead of being held in memory.
+        """
+        key = receipt.normalized_key or receipt.storage_key
+        started = time.perf_counter()
+        source = self._spool_from_storage(key)
+        elapsed = time.perf_counter() - started
+        latencies.append(elapsed)
+        receipt_fetch_metrics.record(elapsed)
+        logger.debug("Fetched receipt %s (key=%s) in %.0f ms", receipt.uuid, key, elapsed * 1000)
+        return source
+
+    def _prepare_receipt(self, receipt: Receipt, source: BinaryIO) -> tuple[BinaryIO, str]:
+        """File and content type to merge for a fetched receipt.
+
+        Image receipts uploaded before receipts were normalized are rendered
+        here, on the caller's thread, which owns the repository connection.
+        """
+        if receipt.normalized_key:
+            return source, "application/pdf"
+        if receipt.content_type not in IMAGE_CONTENT_TYPES:
+            return source, receipt.content_type
+        normalized = self._store_normalized_receipt(receipt.storage_key, source, receipt.content_type)
+        if normalized is None:
+            return _rewound(source), receipt.content_type
+        source.close()
+        # Uploaded before receipts were normalized: remember the rendering for next time
+        key, pdf_bytes = normalized
+        if self.receipt_repo is not None and receipt.id is not None:
+            self.receipt_repo.set_normalized_key(receipt.id, key)
+        return BytesIO(pdf_bytes), "application/pdf"
+
+    def _list_receipts(self, bill: Bill) -> list[Receipt]:
         if self.receipt_repo is None or bill.id is None:
             return []
-        receipts = self.receipt_repo.list_by_bill(bill.id)
-        result: list[tuple[bytes, str]] = []
-        for receipt in receipts:
+        return self.receipt_repo.list_by_bill(bill.id)
+
+    def _iter_receipt_files(self, receipts: list[Receipt]) -> Iterator[tuple[BinaryIO, str]]:
+        """Fetch receipts for merging into the PDF, in order.
+
+        Up to ``receipt_fetch_concurrency`` downloads run ahead of the merge
+        on a thread pool; a receipt that fails to download is logged and
+        skipped. Each file is closed when the merge asks for the next one.
+        Image receipts come as the single-page PDFs rendered at upload, so a
+        regeneration never re-encodes them.
+        """
+        workers = max(1, settings.receipt_fetch_concurrency)
+        latencies: list[float] = []
+        remaining = iter(receipts)
+        pending: deque[tuple[Receipt, Future[BinaryIO]]] = deque()
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="receipt-fetch") as pool:
+
+            def _submit_next() -> None:
+                receipt = next(remaining, None)
+                if receipt is not None:
+                    pending.append((receipt, pool.submit(self._fetch_receipt_file, receipt, latencies)))
+
+            for _ in range(workers):
+                _submit_next()
             try:
-                data = self.storage.get(receipt.storage_key)
-                result.append((data, receipt.content_type))
-            except Exception:
-                logger.exception(
-                    "Failed to fetch receipt %s (key=%s), skipping",
-                    receipt.uuid,
-                    receipt.storage_key,
-                )
-        return result
+                while pending:
+                    receipt, future = pending.popleft()
+                    _submit_next()
+                    try:
+                        source, content_type = self._prepare_receipt(receipt, future.result())
+                    except Exception:
+                        receipt_fetch_metrics.record_failure()
+                        logger.warning(
+                            "Skipping receipt id=%s (%s) of bill id=%s in its PDF: fetch failed (key=%s)",
+                            receipt.id,
+                            receipt.uuid,
+                            receipt.bill_id,
+                            receipt.normalized_key or receipt.storage_key,
+                            exc_info=True,
+                        )
+                        continue
+                    with source:
+                        yield source, content_type
+            finally:
+                # Merge stopped early: drop downloads that haven't started, close the others
+                for _, future in pending:
+                    if not future.cancel():
+                        future.add_done_callback(_close_fetched)
+
+        if latencies:
+            logger.info(
+                "Fetched %d receipt(s) in %.0f ms (slowest %.0f ms, %d in parallel)",
+                len(latencies),
+                (time.perf_counter() - started) * 1000,
+                max(latencies) * 1000,
+                workers,
+            )
+
+    def _generate_and_store_pdf(
+        self,
+        bill: Bill,
+        billing: Billing,
+        timings: dict[str, float] | None = None,
+    ) -> str:
+        """Generate PDF, save to storage, and update bill's pdf_path. Returns the storage path.
+
+        When ``timings`` is given, the seconds spent in each stage are added to it.
+        """
+        stage_times = timings if timings is not None else {}
+        started = time.perf_counter()
+
+        def _lap(stage: str) -> None:
+            nonlocal started
+            now = time.perf_counter()
+            stage_times[stage] = stage_times.get(stage, 0.0) + (now - started)
+            started = now
 
-    def _generate_and_store_pdf(self, bill: Bill, billing: Billing) -> str:
-        """Generate PDF, save to storage, and update bill's pdf_path. Returns the storage path."""
         theme = None
         if self.theme_service is not None:
             theme = self.theme_service.resolve_theme_for_billing(billing)
 
-        pix_png, pix_key, pix_payload = self._get_pix_data(billing, bill.total_amount)
+        pix_png, pix_key, pix_payload = self._get_pix_data(
+            billing,
+            bill.total_amount,
+            storage=self.storage if settings.pix_qr_cache_storage else None,
+        )
+        _lap("prepare")
         pdf_bytes = self.pdf_generator.generate(
             bill,
             billing.name,
@@ -114,20 +426,45 @@ class BillService:
             pix_payload=pix_payload,
             theme=theme,
         )
-
-        # Merge receipts if available
-        receipt_data = self._fetch_receipt_data(bill)
-        if receipt_data:
-            pdf_bytes = merge_receipts(pdf_bytes, receipt_data)
+        _lap("render")
 
         key = _storage_key(billing.uuid, bill.uuid)
-        path = self.storage.save(key, pdf_bytes)
+        # The merged document goes through temp files, not bytes: receipts are
+        # streamed in one at a time and the result is uploaded from disk
+        with _spooled_file() as merged, _spooled_file() as optimized:
+            receipts = self._list_receipts(bill)
+            if not receipts or not merge_receipts_into(
+                pdf_bytes, self._iter_receipt_files(receipts), merged, settings.receipt_image_dpi
+            ):
+                merged.write(pdf_bytes)
+            generated_size = merged.tell()
+            _lap("merge")
+
+            stored = merged
+            if settings.pdf_optimize:
+                if optimize_pdf_file(merged, optimized):
+                    stored = optimized
+                _lap("optimize")
+                logger.info(
+                    "PDF for bill %s optimized: %d -> %d bytes in %.0f ms",
+                    bill.uuid,
+                    generated_size,
+                    stored.seek(0, SEEK_END),
+                    stage_times["optimize"] * 1000,
+                )
+
+            stored.seek(0)
+            path = self.storage.save_stream(key, stored)
         logger.info("PDF stored at %s for bill %s", key, bill.uuid)
 
         if bill.id is None:
             raise ValueError("Cannot update pdf_path for bill without an id")
         self.bill_repo.update_pdf_path(bill.id, path)
         bill.pdf_path = path
+        if bill.pdf_status != BillPdfStatus.READY.value:
+            self.bill_repo.update_pdf_status(bill.id, BillPdfStatus.READY.value)
+            bill.pdf_status = BillPdfStatus.READY.value
+        _lap("store")
         return path
 
     def generate_bill(
@@ -191,7 +528,7 @@ class BillService:
             total,
         )
 
-        self._generate_and_store_pdf(bill, billing)
+        self.schedule_pdf(bill, billing)
 
         return bill
 
@@ -211,14 +548,14 @@ class BillService:
         bill = self.bill_repo.update(bill)
         logger.info("Bill updated: id=%s, total=%d", bill.id, bill.total_amount)
 
-        self._generate_and_store_pdf(bill, billing)
+        self.schedule_pdf(bill, billing)
 
         return bill
 
-    def regenerate_pdf(self, bill: Bill, billing: Billing) -> Bill:
+    def regenerate_pdf(self, bill: Bill, billing: Billing, timings: dict[str, float] | None = None) -> Bill:
         """Regenerate the PDF using current billing info (PIX key, etc.)."""
         logger.info("Regenerating PDF for bill uuid=%s", bill.uuid)
-        self._generate_and_store_pdf(bill, billing)
+        self._generate_and_store_pdf(bill, billing, timings=timings)
         return bill
 
     def get_invoice_url(self, pdf_path: str | None) -> str:
@@ -232,6 +569,18 @@ class BillService:
         logger.debug("Listed %d bills for billing=%s", len(result), billing_id)
         return result
 
+    def list_bills_page(self, billing_id: int, limit: int, cursor: str | None = None) -> Page[Bill]:
+        """One page of bills; raises ValueError on a malformed cursor."""
+        result = self.bill_repo.list_by_billing_page(billing_id, limit, cursor)
+        logger.debug("Listed %d bills for billing=%s (cursor=%s)", len(result.items), billing_id, cursor)
+        return result
+
+    def list_bill_summaries_page(self, billing_id: int, limit: int, cursor: str | None = None) -> Page[BillSummary]:
+        """One page of bill headers (no line items); raises ValueError on a malformed cursor."""
+        result = self.bill_repo.list_summaries_by_billing_page(billing_id, limit, cursor)
+        logger.debug("Listed %d bill summaries for billing=%s (cursor=%s)", len(result.items), billing_id, cursor)
+        return result
+
     def change_status(self, bill: Bill, new_status: str) -> Bill:
         from rentivo.models.bill import BillStatus
 
@@ -270,6 +619,50 @@ class BillService:
         content_type: str,
     ) -> Receipt:
         """Upload a receipt file and attach it to a bill, then regenerate the PDF."""
+        return self._attach_receipt(
+            bill,
+            billing,
+            filename,
+            content_type,
+            len(file_bytes),
+            lambda key: self.storage.save(key, file_bytes, content_type=content_type),
+            lambda: BytesIO(file_bytes),
+        )
+
+    def add_receipt_stream(
+        self,
+        bill: Bill,
+        billing: Billing,
+        filename: str,
+        stream: BinaryIO,
+        content_type: str,
+        size: int,
+    ) -> Receipt:
+        """Like ``add_receipt``, but copies the file from ``stream`` to storage in chunks.
+
+        ``size`` is the number of bytes the stream will yield (already known from
+        the multipart parser), so limits are enforced before anything is stored.
+        """
+        return self._attach_receipt(
+            bill,
+            billing,
+            filename,
+            content_type,
+            size,
+            lambda key: self.storage.save_stream(key, stream, content_type=content_type),
+            lambda: _rewound(stream),
+        )
+
+    def _attach_receipt(
+        self,
+        bill: Bill,
+        billing: Billing,
+        filename: str,
+        content_type: str,
+        size: int,
+        store: Callable[[str], object],
+        reopen: Callable[[], BinaryIO],
+    ) -> Receipt:
         if self.receipt_repo is None:
             raise RuntimeError("Receipt repository not configured")
         if bill.id is None:
@@ -277,9 +670,9 @@ class BillService:
 
         if content_type not in ALLOWED_RECEIPT_TYPES:
             raise ValueError(f"Unsupported file type: {content_type}")
-        if len(file_bytes) > MAX_RECEIPT_SIZE:
+        if size > MAX_RECEIPT_SIZE:
             raise ValueError("File too large")
-        if not file_bytes:
+        if not size:
             raise ValueError("Empty file")
 
         from ulid import ULID
@@ -291,22 +684,27 @@ class BillService:
         existing = self.receipt_repo.list_by_bill(bill.id)
         sort_order = max((r.sort_order for r in existing), default=-1) + 1
 
-        # Store file
-        self.storage.save(storage_key, file_bytes, content_type=content_type)
+        # Store file, plus its PDF rendering for images so merges never re-encode them
+        store(storage_key)
+        normalized_key = None
+        if content_type in IMAGE_CONTENT_TYPES:
+            normalized = self._store_normalized_receipt(storage_key, reopen(), content_type)
+            normalized_key = normalized[0] if normalized else None
 
         receipt = Receipt(
             bill_id=bill.id,
             filename=filename,
             storage_key=storage_key,
+            normalized_key=normalized_key,
             content_type=content_type,
-            file_size=len(file_bytes),
+            file_size=size,
             sort_order=sort_order,
         )
         receipt = self.receipt_repo.create(receipt)
         logger.info("Receipt added: uuid=%s bill=%s file=%s", receipt.uuid, bill.uuid, filename)
 
         # Regenerate the merged PDF
-        self._generate_and_store_pdf(bill, billing)
+        self.schedule_pdf(bill, billing)
 
         return receipt
 
@@ -321,7 +719,7 @@ class BillService:
         logger.info("Receipt deleted: uuid=%s bill=%s", receipt.uuid, bill.uuid)
 
         # Regenerate PDF without this receipt
-        self._generate_and_store_pdf(bill, billing)
+        self.schedule_pdf(bill, billing)
 
     def list_receipts(self, bill_id: int) -> list[Receipt]:
         """List receipts for a bill."""
@@ -355,4 +753,4 @@ class BillService:
         self.receipt_repo.update_sort_orders(updates)
         logger.info("Receipts reordered: bill=%s", bill.uuid)
 
-        self._generate_and_store_pdf(bill, billing)
+        self.schedule_pdf(bill, billing)
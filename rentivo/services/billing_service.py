@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import logging
 
-from rentivo.models.billing import Billing, BillingItem
+from rentivo.models.billing import Billing, BillingItem, BillingSummary
+from rentivo.models.page import Page
 from rentivo.repositories.base import BillingRepository
 
 logger = logging.getLogger(__name__)
@@ -43,6 +44,20 @@ class BillingService:
         logger.debug("Listed %d billings for user=%s", len(result), user_id)
         return result
 
+    def list_billings_for_user_page(self, user_id: int, limit: int, cursor: str | None = None) -> Page[Billing]:
+        """One page of the user's billings; raises ValueError on a malformed cursor."""
+        result = self.repo.list_for_user_page(user_id, limit, cursor)
+        logger.debug("Listed %d billings for user=%s (cursor=%s)", len(result.items), user_id, cursor)
+        return result
+
+    def list_billing_summaries_for_user_page(
+        self, user_id: int, limit: int, cursor: str | None = None
+    ) -> Page[BillingSummary]:
+        """One page of billing headers with counts; raises ValueError on a malformed cursor."""
+        result = self.repo.list_summaries_for_user_page(user_id, limit, cursor)
+        logger.debug("Listed %d billing summaries for user=%s (cursor=%s)", len(result.items), user_id, cursor)
+        return result
+
     def get_billing(self, billing_id: int) -> Billing | None:
         result = self.repo.get_by_id(billing_id)
         logger.debug("get_billing id=%s found=%s", billing_id, result is not None)
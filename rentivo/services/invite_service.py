@@ -2,15 +2,22 @@ from __future__ import annotations
 
 import logging
 
+from rentivo.cache import TTLCache
 from rentivo.models.invite import Invite, InviteStatus
 from rentivo.repositories.base import (
     InviteRepository,
     OrganizationRepository,
     UserRepository,
 )
+from rentivo.services.authorization_service import membership_cache
+from rentivo.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Pending invite count per user, shown as a badge on every page. Invalidated
+# locally on send/accept/decline; other processes catch up within the TTL.
+invite_count_cache = TTLCache(ttl=settings.invite_count_cache_ttl, maxsize=settings.invite_count_cache_size)
+
 
 class InviteService:
     def __init__(
@@ -56,6 +63,7 @@ class InviteService:
             status=InviteStatus.PENDING.value,
         )
         created = self.invite_repo.create(invite)
+        invite_count_cache.invalidate(user.id)
         logger.info("Invite sent: org=%s user=%s role=%s", org_id, username, role)
         return created
 
@@ -76,7 +84,9 @@ class InviteService:
             raise ValueError("Invite is no longer pending")
 
         self.org_repo.add_member(invite.organization_id, invite.invited_user_id, invite.role)
+        membership_cache.invalidate_user(invite.invited_user_id)
         self.invite_repo.update_status(invite.id, InviteStatus.ACCEPTED.value)
+        invite_count_cache.invalidate(user_id)
         logger.info("Invite accepted: uuid=%s user=%s", invite_uuid, user_id)
 
     def decline_invite(self, invite_uuid: str, user_id: int) -> None:
@@ -96,6 +106,7 @@ class InviteService:
             raise ValueError("Invite is no longer pending")
 
         self.invite_repo.update_status(invite.id, InviteStatus.DECLINED.value)
+        invite_count_cache.invalidate(user_id)
         logger.info("Invite declined: uuid=%s user=%s", invite_uuid, user_id)
 
     def list_pending(self, user_id: int) -> list[Invite]:
@@ -109,6 +120,9 @@ class InviteService:
         return result
 
     def count_pending(self, user_id: int) -> int:
-        count = self.invite_repo.count_pending_for_user(user_id)
-        logger.debug("Counted %d pending invites for user=%s", count, user_id)
+        count = invite_count_cache.get(user_id)
+        if count is None:
+            count = self.invite_repo.count_pending_for_user(user_id)
+            invite_count_cache.put(user_id, count)
+            logger.debug("Counted %d pending invites for user=%s", count, user_id)
         return count
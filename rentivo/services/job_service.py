@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+
+from rentivo.constants import SP_TZ
+from rentivo.models.job import Job, JobKind
+from rentivo.repositories.base import JobRepository
+from rentivo.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Exponential retry delay after ``attempts`` failed attempts, capped at the configured maximum."""
+    seconds = settings.job_backoff_seconds * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.job_backoff_max_seconds))
+
+
+class JobService:
+    def __init__(self, job_repo: JobRepository) -> None:
+        self.job_repo = job_repo
+
+    def enqueue(self, kind: str, payload: dict, *, dedupe_key: str | None = None) -> Job:
+        job = self.job_repo.enqueue(
+            Job(kind=kind, payload=payload, dedupe_key=dedupe_key, max_attempts=settings.job_max_attempts)
+        )
+        logger.info("Job enqueued: id=%s kind=%s dedupe_key=%s", job.id, kind, dedupe_key)
+        return job
+
+    def enqueue_bill_pdf(self, bill_id: int) -> Job:
+        """Queue a PDF render for a bill; repeated requests coalesce while the job is still queued."""
+        return self.enqueue(JobKind.BILL_PDF, {"bill_id": bill_id}, dedupe_key=f"bill-pdf:{bill_id}")
+
+    def reap_stale(self) -> list[Job]:
+        """Recover jobs whose worker stopped refreshing its lock (crashed or hung).
+
+        Jobs with attempts left are requeued; the rest are failed and returned so
+        the caller can run the handler's ``give_up``.
+        """
+        locked_before = datetime.now(SP_TZ) - timedelta(seconds=settings.job_lock_timeout_seconds)
+        failed = self.job_repo.fail_stale(locked_before, "Job lock expired (worker lost or timed out)")
+        for job in failed:
+            logger.error(
+                "Job failed permanently: id=%s kind=%s attempts=%d: lock expired", job.id, job.kind, job.attempts
+            )
+        requeued = self.job_repo.requeue_stale(locked_before)
+        if requeued:
+            logger.warning("Requeued %d stale job(s)", requeued)
+        return failed
+
+    def claim(self, worker_id: str, limit: int) -> list[Job]:
+        """Claim up to ``limit`` due jobs for ``worker_id``."""
+        return self.job_repo.claim(worker_id, limit, datetime.now(SP_TZ))
+
+    def heartbeat(self, job: Job) -> bool:
+        """Refresh the lock on a running job. Returns False if another worker has taken it over."""
+        if job.id is None:
+            raise ValueError("Cannot refresh job without an id")
+        if self.job_repo.heartbeat(job.id, job.locked_by, datetime.now(SP_TZ)):
+            return True
+        logger.warning("Job lost its lock: id=%s kind=%s worker=%s", job.id, job.kind, job.locked_by)
+        return False
+
+    def complete(self, job: Job) -> None:
+        if job.id is None:
+            raise ValueError("Cannot complete job without an id")
+        if not self.job_repo.mark_done(job.id, job.locked_by):
+            logger.warning("Job finished after losing its lock, result not recorded: id=%s kind=%s", job.id, job.kind)
+            return
+        logger.info("Job done: id=%s kind=%s attempts=%d", job.id, job.kind, job.attempts)
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Record a failed attempt. Returns False only when the job has failed permanently.
+
+        A job whose lock was lost meanwhile belongs to another worker (or the
+        reaper), so nothing is written and True is returned.
+        """
+        if job.id is None:
+            raise ValueError("Cannot fail job without an id")
+        retry_at = datetime.now(SP_TZ) + backoff_delay(job.attempts) if job.attempts < job.max_attempts else None
+        if not self.job_repo.mark_failed(job.id, job.locked_by, error, retry_at):
+            logger.warning("Job failed after losing its lock, not recorded: id=%s kind=%s: %s", job.id, job.kind, error)
+            return True
+        if retry_at is not None:
+            logger.warning(
+                "Job failed: id=%s kind=%s attempt=%d/%d, retrying at %s: %s",
+                job.id,
+                job.kind,
+                job.attempts,
+                job.max_attempts,
+                retry_at.isoformat(),
+                error,
+            )
+            return True
+        logger.error("Job failed permanently: id=%s kind=%s attempts=%d: %s", job.id, job.kind, job.attempts, error)
+        return False
+
+    def stats(self) -> dict[str, int]:
+        return self.job_repo.count_by_status()
@@ -4,6 +4,7 @@ import logging
 
 from rentivo.models.organization import Organization, OrganizationMember, OrgRole
 from rentivo.repositories.base import OrganizationRepository
+from rentivo.services.authorization_service import membership_cache
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,7 @@ class OrganizationService:
         org = Organization(name=name, created_by=created_by)
         created = self.repo.create(org)
         self.repo.add_member(created.id, created_by, OrgRole.ADMIN.value)
+        membership_cache.invalidate_user(created_by)
         logger.info(
             "Organization created: id=%s name=%s by user=%s",
             created.id,
@@ -46,6 +48,7 @@ class OrganizationService:
 
     def delete_organization(self, org_id: int) -> None:
         self.repo.delete(org_id)
+        membership_cache.invalidate_org(org_id)
         logger.info("Organization %s soft-deleted", org_id)
 
     def get_member(self, org_id: int, user_id: int) -> OrganizationMember | None:
@@ -59,14 +62,18 @@ class OrganizationService:
         return result
 
     def add_member(self, org_id: int, user_id: int, role: str) -> OrganizationMember:
-        return self.repo.add_member(org_id, user_id, role)
+        member = self.repo.add_member(org_id, user_id, role)
+        membership_cache.invalidate_user(user_id)
+        return member
 
     def remove_member(self, org_id: int, user_id: int) -> None:
         self.repo.remove_member(org_id, user_id)
+        membership_cache.invalidate_user(user_id)
         logger.info("Removed user %s from org %s", user_id, org_id)
 
     def update_member_role(self, org_id: int, user_id: int, role: str) -> None:
         self.repo.update_member_role(org_id, user_id, role)
+        membership_cache.invalidate_user(user_id)
         logger.info("Updated role for user %s in org %s to %s", user_id, org_id, role)
 
     def set_enforce_mfa(self, org_id: int, enforce: bool) -> Organization:
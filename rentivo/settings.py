@@ -12,6 +12,12 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_prefix="RENTIVO_", extra="ignore")
 
     db_url: str = "mysql://rentivo:rentivo@db:3306/rentivo"
+    db_read_url: str = ""  # read replica for web repository reads; empty reads from db_url
+    db_pool_size: int = 20  # connections kept open per process
+    db_max_overflow: int = 20  # extra connections opened under load, closed when returned
+    db_pool_timeout: float = 30.0  # seconds to wait for a free connection before failing
+    db_pool_recycle: int = 1800  # seconds before a pooled connection is replaced
+    db_ping_idle_seconds: float = 30.0  # ping pooled connections unused for this long on checkout; 0 pings every time
 
     storage_backend: str = "local"
     storage_local_path: str = "./invoices"
@@ -27,6 +33,20 @@ class Settings(BaseSettings):
     pix_key: str = ""
     pix_merchant_name: str = ""
     pix_merchant_city: str = ""
+    pix_qr_cache_size: int = 256
+    pix_qr_cache_storage: bool = False
+
+    pdf_jobs_enabled: bool = False
+    pdf_optimize: bool = False  # compress, deduplicate and strip unused resources before storing bill PDFs
+    pdf_spool_max_bytes: int = 8 * 1024 * 1024  # receipts and merged PDFs above this spill from memory to temp files
+    receipt_fetch_concurrency: int = 4  # receipts downloaded in parallel while a bill PDF is built
+    receipt_image_dpi: int = 200  # image receipts are downscaled to this resolution on the A4 page; 0 keeps full size
+    job_max_attempts: int = 5
+    job_backoff_seconds: int = 10
+    job_backoff_max_seconds: int = 900
+    job_lock_timeout_seconds: int = 600
+    worker_concurrency: int = 2
+    worker_poll_interval: float = 1.0
 
     log_level: str = "INFO"
     log_json: bool = False
@@ -35,7 +55,21 @@ class Settings(BaseSettings):
     webauthn_rp_name: str = "Landlord"
     webauthn_origin: str = "http://localhost:8000"
 
+    metrics_token: str = ""  # bearer token for /internal/metrics; empty disables the endpoint
+
     secret_key: str = _INSECURE_DEFAULT_KEY
+    web_threadpool_size: int = 40  # threads serving sync routes per uvicorn worker
+
+    authz_cache_ttl: int = 0  # seconds; 0 keeps organization roles cached per request only
+    authz_cache_size: int = 1024
+
+    invite_count_cache_ttl: int = 0  # seconds the pending invite badge may lag behind other processes; 0 disables
+    invite_count_cache_size: int = 4096
+    invite_count_async: bool = False  # load the badge from /invites/count after the page renders
+
+    session_backend: str = "cookie"  # cookie, database, memory or shared
+    session_max_age: int = 1209600  # 14 days in seconds
+    session_cache_size: int = 10000  # sessions kept by the memory backend
 
     def get_secret_key(self) -> str:
         if self.secret_key == _INSECURE_DEFAULT_KEY:
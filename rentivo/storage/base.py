@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import BinaryIO
 
 
 class StorageBackend(ABC):
@@ -7,11 +8,27 @@ class StorageBackend(ABC):
         """Save data and return the storage path/URL."""
         ...
 
+    def save_stream(self, key: str, stream: BinaryIO, content_type: str = "application/pdf") -> str:
+        """Save the contents of a readable binary stream and return the storage path/URL.
+
+        Backends override this to copy in chunks; the default reads the whole stream.
+        """
+        return self.save(key, stream.read(), content_type=content_type)
+
     @abstractmethod
     def get(self, key: str) -> bytes:
         """Retrieve file data by key."""
         ...
 
+    def read_into(self, key: str, stream: BinaryIO) -> int:
+        """Write the stored data into a writable binary stream and return the number of bytes written.
+
+        Backends override this to copy in chunks; the default loads the whole file.
+        """
+        data = self.get(key)
+        stream.write(data)
+        return len(data)
+
     @abstractmethod
     def get_url(self, key: str) -> str:
         """Return a presigned URL (S3) or absolute file path (local)."""
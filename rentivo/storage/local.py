@@ -1,10 +1,14 @@
 import logging
+import shutil
 from pathlib import Path
+from typing import BinaryIO
 
 from rentivo.storage.base import StorageBackend
 
 logger = logging.getLogger(__name__)
 
+_COPY_CHUNK_SIZE = 256 * 1024
+
 
 class LocalStorage(StorageBackend):
     def __init__(self, base_dir: str) -> None:
@@ -19,12 +23,30 @@ class LocalStorage(StorageBackend):
         logger.debug("Saved %s (%d bytes) to %s", key, len(data), resolved)
         return resolved
 
+    def save_stream(self, key: str, stream: BinaryIO, content_type: str = "application/pdf") -> str:
+        path = self.base_dir / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            shutil.copyfileobj(stream, f, _COPY_CHUNK_SIZE)
+            size = f.tell()
+        resolved = str(path.resolve())
+        logger.debug("Streamed %s (%d bytes) to %s", key, size, resolved)
+        return resolved
+
     def get(self, key: str) -> bytes:
         path = self.base_dir / key
         resolved = path.resolve()
         logger.debug("Reading %s from %s", key, resolved)
         return resolved.read_bytes()
 
+    def read_into(self, key: str, stream: BinaryIO) -> int:
+        resolved = (self.base_dir / key).resolve()
+        logger.debug("Streaming %s from %s", key, resolved)
+        start = stream.tell()
+        with resolved.open("rb") as f:
+            shutil.copyfileobj(f, stream, _COPY_CHUNK_SIZE)
+        return stream.tell() - start
+
     def get_url(self, key: str) -> str:
         resolved = str((self.base_dir / key).resolve())
         logger.debug("Resolved URL for %s: %s", key, resolved)
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import logging
+from typing import BinaryIO
 
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
 except ImportError:  # pragma: no cover
     boto3 = None  # type: ignore[assignment]
+    TransferConfig = None  # type: ignore[assignment,misc]
 
 from rentivo.storage.base import StorageBackend
 
 logger = logging.getLogger(__name__)
 
+# Transfers above the threshold go through S3 multipart (ranged GETs for downloads) in chunks of this size
+_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
 
 class S3Storage(StorageBackend):
     def __init__(
@@ -48,12 +54,43 @@ class S3Storage(StorageBackend):
         logger.info("Uploaded %s to s3://%s/%s (%d bytes)", key, self.bucket, key, len(data))
         return key
 
+    def save_stream(self, key: str, stream: BinaryIO, content_type: str = "application/pdf") -> str:
+        self.client.upload_fileobj(
+            stream,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type},
+            Config=TransferConfig(
+                multipart_threshold=_MULTIPART_CHUNK_SIZE,
+                multipart_chunksize=_MULTIPART_CHUNK_SIZE,
+                use_threads=False,
+            ),
+        )
+        logger.info("Streamed %s to s3://%s/%s", key, self.bucket, key)
+        return key
+
     def get(self, key: str) -> bytes:
         response = self.client.get_object(Bucket=self.bucket, Key=key)
         data = response["Body"].read()
         logger.debug("Downloaded %s from s3://%s/%s (%d bytes)", key, self.bucket, key, len(data))
         return data
 
+    def read_into(self, key: str, stream: BinaryIO) -> int:
+        start = stream.tell()
+        self.client.download_fileobj(
+            self.bucket,
+            key,
+            stream,
+            Config=TransferConfig(
+                multipart_threshold=_MULTIPART_CHUNK_SIZE,
+                multipart_chunksize=_MULTIPART_CHUNK_SIZE,
+                use_threads=False,
+            ),
+        )
+        size = stream.tell() - start
+        logger.debug("Streamed %s from s3://%s/%s (%d bytes)", key, self.bucket, key, size)
+        return size
+
     def get_url(self, key: str) -> str:
         url = self.client.generate_presigned_url(
             "get_object",
@@ -0,0 +1,217 @@
+"""Background job worker.
+
+Polls the ``jobs`` table and runs queued jobs (currently bill PDF renders) in a
+bounded thread pool, one DB connection per job. Failed jobs are retried with
+exponential backoff. While a job runs the worker refreshes its lock every
+third of ``RENTIVO_JOB_LOCK_TIMEOUT_SECONDS``; jobs whose lock goes stale
+(crashed or hung worker) are requeued, or failed once out of attempts.
+
+Usage:
+    rentivo worker
+    rentivo worker --concurrency 4
+    rentivo worker --once   # drain the queue and exit
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from sqlalchemy import Connection
+from sqlalchemy.engine import Engine
+
+from rentivo.db import resilient_connect
+from rentivo.models.bill import BillPdfStatus
+from rentivo.models.job import Job, JobKind
+from rentivo.repositories.sqlalchemy import (
+    SQLAlchemyBillingRepository,
+    SQLAlchemyBillRepository,
+    SQLAlchemyJobRepository,
+    SQLAlchemyReceiptRepository,
+    SQLAlchemyThemeRepository,
+)
+from rentivo.services.bill_service import BillService
+from rentivo.services.job_service import JobService
+from rentivo.services.theme_service import ThemeService
+from rentivo.settings import settings
+from rentivo.storage.factory import get_storage
+
+logger = logging.getLogger(__name__)
+
+
+class BillPdfHandler:
+    """Render, merge and store a bill PDF."""
+
+    def run(self, conn: Connection, payload: dict) -> None:
+        bill_repo = SQLAlchemyBillRepository(conn)
+        bill = bill_repo.get_by_id(payload["bill_id"])
+        if bill is None:
+            logger.info("Bill %s no longer exists, skipping PDF job", payload["bill_id"])
+            return
+        billing = SQLAlchemyBillingRepository(conn).get_by_id(bill.billing_id)
+        if billing is None:
+            logger.info("Billing %s no longer exists, skipping PDF job for bill %s", bill.billing_id, bill.uuid)
+            return
+
+        service = BillService(
+            bill_repo,
+            get_storage(),
+            SQLAlchemyReceiptRepository(conn),
+            theme_service=ThemeService(SQLAlchemyThemeRepository(conn)),
+        )
+        service.regenerate_pdf(bill, billing)
+
+    def give_up(self, conn: Connection, payload: dict) -> None:
+        SQLAlchemyBillRepository(conn).update_pdf_status(payload["bill_id"], BillPdfStatus.FAILED.value)
+
+
+HANDLERS = {JobKind.BILL_PDF: BillPdfHandler()}
+
+
+class Worker:
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        worker_id: str | None = None,
+        handlers: dict | None = None,
+        heartbeat_interval: float | None = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.engine = engine
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers = HANDLERS if handlers is None else handlers
+        if heartbeat_interval is None:
+            heartbeat_interval = settings.job_lock_timeout_seconds / 3
+        self.heartbeat_interval = heartbeat_interval
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop claiming new jobs; in-flight jobs are allowed to finish."""
+        self._stop.set()
+
+    def run(self, *, once: bool = False) -> int:
+        """Process jobs until stopped (or, with ``once``, until the queue is empty). Returns jobs processed."""
+        logger.info("Worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        processed = 0
+        in_flight: dict[Future, Job] = {}
+        last_heartbeat = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="rentivo-job") as pool:
+            while not self._stop.is_set():
+                free = self.concurrency - len(in_flight)
+                jobs = self._claim(free) if free > 0 else []
+                for job in jobs:
+                    in_flight[pool.submit(self._execute, job)] = job
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    processed += self._reap(in_flight, done)
+                elif once:
+                    break
+                else:
+                    self._stop.wait(self.poll_interval)
+
+                if in_flight and time.monotonic() - last_heartbeat >= self.heartbeat_interval:
+                    self._heartbeat(list(in_flight.values()))
+                    last_heartbeat = time.monotonic()
+
+            while in_flight:
+                done, _ = wait(in_flight, timeout=self.heartbeat_interval, return_when=FIRST_COMPLETED)
+                processed += self._reap(in_flight, done)
+                if in_flight and not done:
+                    self._heartbeat(list(in_flight.values()))
+        logger.info("Worker %s stopped after %d job(s)", self.worker_id, processed)
+        return processed
+
+    @staticmethod
+    def _reap(in_flight: dict[Future, Job], done: set[Future]) -> int:
+        for future in done:
+            del in_flight[future]
+        return len(done)
+
+    def _heartbeat(self, jobs: list[Job]) -> None:
+        """Refresh the locks of running jobs so they aren't taken for abandoned."""
+        try:
+            with resilient_connect(self.engine) as conn:
+                job_service = JobService(SQLAlchemyJobRepository(conn))
+                for job in jobs:
+                    job_service.heartbeat(job)
+        except Exception:
+            logger.exception("Failed to refresh job locks")
+
+    def _claim(self, limit: int) -> list[Job]:
+        try:
+            with resilient_connect(self.engine) as conn:
+                job_service = JobService(SQLAlchemyJobRepository(conn))
+                for job in job_service.reap_stale():
+                    handler = self.handlers.get(job.kind)
+                    if handler is not None:
+                        handler.give_up(conn, job.payload)
+                return job_service.claim(self.worker_id, limit)
+        except Exception:
+            logger.exception("Failed to claim jobs")
+            return []
+
+    def _execute(self, job: Job) -> None:
+        with resilient_connect(self.engine) as conn:
+            job_service = JobService(SQLAlchemyJobRepository(conn))
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                job_service.fail(job.model_copy(update={"max_attempts": job.attempts}), f"Unknown job kind: {job.kind}")
+                return
+            try:
+                handler.run(conn, job.payload)
+            except Exception as exc:
+                logger.exception("Job %s (%s) raised", job.id, job.kind)
+                conn.rollback()
+                if not job_service.fail(job, f"{type(exc).__name__}: {exc}"):
+                    handler.give_up(conn, job.payload)
+                return
+            job_service.complete(job)
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="rentivo worker", description="Executa os jobs em segundo plano.")
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.worker_concurrency, help="jobs executados em paralelo"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=settings.worker_poll_interval, help="segundos entre consultas"
+    )
+    parser.add_argument("--once", action="store_true", help="esvazia a fila e encerra")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    from rentivo.db import get_engine
+    from rentivo.logging import configure_logging
+
+    args = _parse_args(argv)
+    configure_logging()
+    worker = Worker(get_engine(), concurrency=args.concurrency, poll_interval=args.poll_interval)
+
+    def _handle_signal(signum, frame) -> None:
+        logger.info("Received signal %s, finishing in-flight jobs", signum)
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+    worker.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,10 @@ from sqlalchemy.engine import Engine
 
 from rentivo.models.bill import Bill, BillLineItem
 from rentivo.models.billing import Billing, BillingItem, ItemType
+from rentivo.services.authorization_service import membership_cache
+from rentivo.services.invite_service import invite_count_cache
 
-# Matches Alembic head: a7b8c9d0e1f2 (replace UUID4 with ULID)
+# Matches Alembic head: d1e2f3a4b5c6 (add normalized_key to receipts)
 SCHEMA_DDL = """
 CREATE TABLE billings (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -24,6 +26,10 @@ CREATE TABLE billings (
     deleted_at DATETIME
 );
 
+CREATE INDEX ix_billings_owner_live_created ON billings (owner_type, owner_id, deleted_at, created_at);
+
+CREATE INDEX ix_billings_live_created ON billings (deleted_at, created_at);
+
 CREATE TABLE billing_items (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     billing_id INTEGER NOT NULL REFERENCES billings(id) ON DELETE CASCADE,
@@ -33,6 +39,8 @@ CREATE TABLE billing_items (
     sort_order INTEGER NOT NULL DEFAULT 0
 );
 
+CREATE INDEX ix_billing_items_billing_sort ON billing_items (billing_id, sort_order);
+
 CREATE TABLE bills (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     billing_id INTEGER NOT NULL REFERENCES billings(id),
@@ -44,10 +52,15 @@ CREATE TABLE bills (
     due_date TEXT,
     status TEXT NOT NULL DEFAULT 'draft',
     status_updated_at DATETIME,
+    pdf_status TEXT NOT NULL DEFAULT 'ready',
     created_at DATETIME NOT NULL,
     deleted_at DATETIME
 );
 
+CREATE INDEX ix_bills_billing_live_month ON bills (billing_id, deleted_at, reference_month, id, status);
+
+CREATE INDEX ix_bills_status ON bills (status);
+
 CREATE TABLE bill_line_items (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     bill_id INTEGER NOT NULL REFERENCES bills(id) ON DELETE CASCADE,
@@ -57,6 +70,8 @@ CREATE TABLE bill_line_items (
     sort_order INTEGER NOT NULL DEFAULT 0
 );
 
+CREATE INDEX ix_bill_line_items_bill_sort ON bill_line_items (bill_id, sort_order);
+
 CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT NOT NULL UNIQUE,
@@ -85,6 +100,8 @@ CREATE TABLE organization_members (
     UNIQUE(organization_id, user_id)
 );
 
+CREATE INDEX ix_org_members_user_org_role ON organization_members (user_id, organization_id, role);
+
 CREATE TABLE invites (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     uuid VARCHAR(26) NOT NULL UNIQUE,
@@ -97,6 +114,8 @@ CREATE TABLE invites (
     responded_at DATETIME
 );
 
+CREATE INDEX ix_invites_user_status ON invites (invited_user_id, status);
+
 CREATE TABLE audit_logs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     uuid VARCHAR(26) NOT NULL UNIQUE,
@@ -113,18 +132,29 @@ CREATE TABLE audit_logs (
     created_at DATETIME NOT NULL
 );
 
+CREATE INDEX ix_audit_logs_event_type ON audit_logs (event_type);
+
+CREATE INDEX ix_audit_logs_entity_created ON audit_logs (entity_type, entity_id, created_at);
+
+CREATE INDEX ix_audit_logs_actor_created ON audit_logs (actor_id, created_at);
+
+CREATE INDEX ix_audit_logs_created_at ON audit_logs (created_at);
+
 CREATE TABLE receipts (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     uuid VARCHAR(26) NOT NULL UNIQUE,
     bill_id INTEGER NOT NULL REFERENCES bills(id) ON DELETE CASCADE,
     filename TEXT NOT NULL,
     storage_key TEXT NOT NULL,
+    normalized_key TEXT,
     content_type TEXT NOT NULL,
     file_size INTEGER NOT NULL DEFAULT 0,
     sort_order INTEGER NOT NULL DEFAULT 0,
     created_at DATETIME NOT NULL
 );
 
+CREATE INDEX ix_receipts_bill_sort ON receipts (bill_id, sort_order);
+
 CREATE TABLE user_totp (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id INTEGER NOT NULL UNIQUE REFERENCES users(id) ON DELETE CASCADE,
@@ -142,6 +172,8 @@ CREATE TABLE user_recovery_codes (
     created_at DATETIME NOT NULL
 );
 
+CREATE INDEX ix_user_recovery_codes_user_id ON user_recovery_codes (user_id);
+
 CREATE TABLE user_passkeys (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     uuid VARCHAR(26) NOT NULL UNIQUE,
@@ -155,6 +187,8 @@ CREATE TABLE user_passkeys (
     last_used_at DATETIME
 );
 
+CREATE INDEX ix_user_passkeys_user_id ON user_passkeys (user_id);
+
 CREATE TABLE themes (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     uuid VARCHAR(26) NOT NULL UNIQUE,
@@ -172,9 +206,76 @@ CREATE TABLE themes (
     created_at DATETIME NOT NULL,
     updated_at DATETIME NOT NULL
 );
+
+-- UNIQUE in MySQL, non-unique here so repository tests can create duplicate owners
+CREATE INDEX ix_themes_owner ON themes (owner_type, owner_id);
+
+CREATE TABLE jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uuid VARCHAR(26) NOT NULL UNIQUE,
+    kind VARCHAR(50) NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key VARCHAR(100),
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after DATETIME NOT NULL,
+    locked_by VARCHAR(100) NOT NULL DEFAULT '',
+    locked_at DATETIME,
+    last_error TEXT,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+);
+
+CREATE INDEX ix_jobs_status_run_after ON jobs (status, run_after);
+
+CREATE INDEX ix_jobs_dedupe_key ON jobs (dedupe_key);
+
+CREATE TABLE sessions (
+    session_key VARCHAR(64) PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+);
+
+CREATE INDEX ix_sessions_expires_at ON sessions (expires_at);
 """
 
 
+@pytest.fixture(autouse=True)
+def _clear_process_caches():
+    """Process-wide caches are keyed by ids that repeat across each test's fresh DB."""
+    invite_count_cache.clear()
+    membership_cache.clear()
+    yield
+
+
+@pytest.fixture()
+def bench_report(request) -> list[str]:
+    """Lines a ``benchmark``-marked test wants shown in the summary at the end of the run."""
+    lines: list[str] = []
+    request.node.user_properties.append(("benchmark", lines))
+    return lines
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    # Reads user_properties off the test reports so the numbers survive pytest-xdist
+    reports = [
+        (report.nodeid, value)
+        for report in terminalreporter.stats.get("passed", [])
+        if report.when == "call"
+        for name, value in report.user_properties
+        if name == "benchmark"
+    ]
+    if not reports:
+        return
+    terminalreporter.section("benchmarks")
+    for nodeid, lines in reports:
+        terminalreporter.write_line(nodeid)
+        for line in lines:
+            terminalreporter.write_line(f"  {line}")
+
+
 @pytest.fixture()
 def db_engine() -> Engine:
     engine = create_engine("sqlite:///:memory:")
@@ -1,6 +1,15 @@
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from fpdf import FPDF
+from pypdf import PdfReader
+
 from rentivo.models.bill import Bill, BillLineItem
 from rentivo.models.billing import ItemType
-from rentivo.pdf.invoice import InvoicePDF
+from rentivo.pdf.invoice import FONTS_DIR, FontRegistry, InvoicePDF, font_registry
 from rentivo.pix import generate_pix_qrcode_png
 
 
@@ -122,3 +131,112 @@ class TestInvoicePDF:
             pix_payload="",
         )
         assert result[:5] == b"%PDF-"
+
+
+def _make_bill(**overrides):
+    return TestInvoicePDF()._make_bill(**overrides)
+
+
+def _page_text(pdf_bytes):
+    return PdfReader(BytesIO(pdf_bytes)).pages[0].extract_text()
+
+
+class TestFontRegistry:
+    def test_fonts_parsed_once_per_process(self):
+        registry = FontRegistry()
+        pdf_gen = InvoicePDF()
+        pdf_gen._font_registry = registry
+        with patch.object(FPDF, "add_font", autospec=True, side_effect=FPDF.add_font) as add_font:
+            pdf_gen.generate(_make_bill(), "Apt 101")
+            first_calls = add_font.call_count
+            pdf_gen.generate(_make_bill(), "Apt 102")
+            pdf_gen.generate(_make_bill(), "Apt 103")
+
+        assert first_calls == 3
+        assert add_font.call_count == 3
+        assert len(registry) == 3
+
+    def test_cached_output_matches_uncached(self):
+        from rentivo.models.theme import DEFAULT_THEME
+
+        theme = DEFAULT_THEME.model_copy(update={"header_font": "Lora", "text_font": "Nunito"})
+        bill = _make_bill(notes="Observação: água e condomínio")
+
+        fpdf_init = FPDF.__init__
+
+        def init_with_fixed_date(self, *args, **kwargs):
+            fpdf_init(self, *args, **kwargs)
+            self.set_creation_date(datetime(2025, 3, 1, tzinfo=timezone.utc))
+
+        # Cached fonts are copies of fpdf2 internals, so subsetted output must stay byte-identical
+        with patch.object(FPDF, "__init__", init_with_fixed_date):
+            cached = InvoicePDF().generate(bill, "Apt 101 — Cobrança", theme=theme)
+            uncached = InvoicePDF(cache_fonts=False).generate(bill, "Apt 101 — Cobrança", theme=theme)
+
+        assert cached == uncached
+
+    def test_documents_get_independent_subsets(self):
+        registry = FontRegistry()
+        first, second = FPDF(), FPDF()
+        path = FONTS_DIR / "Montserrat-Regular.ttf"
+        registry.add_font(first, "Montserrat", "", path)
+        registry.add_font(second, "Montserrat", "", path)
+
+        a, b = first.fonts["montserrat"], second.fonts["montserrat"]
+        assert a.subset is not b.subset
+        assert a.ttfont is not b.ttfont
+        assert a.cmap is b.cmap
+
+        first.add_page()
+        first.set_font("Montserrat", "", 12)
+        first.cell(0, 10, "Çãõ")
+        first.output()
+        assert len(b.subset) < len(a.subset)
+
+    def test_add_font_ignores_already_registered_key(self):
+        registry = FontRegistry()
+        pdf = FPDF()
+        path = FONTS_DIR / "Roboto-Regular.ttf"
+        registry.add_font(pdf, "Roboto", "", path)
+        font = pdf.fonts["roboto"]
+        registry.add_font(pdf, "Roboto", "", path)
+        assert pdf.fonts["roboto"] is font
+
+    def test_clear(self):
+        registry = FontRegistry()
+        registry.add_font(FPDF(), "Roboto", "B", FONTS_DIR / "Roboto-Bold.ttf")
+        registry.clear()
+        assert len(registry) == 0
+
+
+@pytest.mark.benchmark
+class TestInvoiceRenderBenchmark:
+    """Per-invoice render time with and without the font cache."""
+
+    ROUNDS = 5
+
+    def _per_invoice_ms(self, pdf_gen):
+        bill = _make_bill()
+        pdf_gen.generate(bill, "warm-up")
+        start = time.perf_counter()
+        for _ in range(self.ROUNDS):
+            pdf_gen.generate(bill, "Apt 101")
+        return (time.perf_counter() - start) / self.ROUNDS * 1000
+
+    def _font_setup_ms(self, add_font):
+        files = [("Montserrat", "", "Montserrat-Regular.ttf"), ("Montserrat", "B", "Montserrat-Bold.ttf")]
+        start = time.perf_counter()
+        for _ in range(self.ROUNDS):
+            pdf = FPDF()
+            for family, style, filename in files:
+                add_font(pdf, family, style, FONTS_DIR / filename)
+        return (time.perf_counter() - start) / self.ROUNDS * 1000
+
+    def test_render_time_with_and_without_font_cache(self, bench_report):
+        uncached = self._per_invoice_ms(InvoicePDF(cache_fonts=False))
+        cached = self._per_invoice_ms(InvoicePDF())
+        setup_uncached = self._font_setup_ms(lambda pdf, family, style, path: pdf.add_font(family, style, str(path)))
+        setup_cached = self._font_setup_ms(font_registry.add_font)
+
+        bench_report.append(f"invoice render: uncached={uncached:.1f}ms cached={cached:.1f}ms per invoice")
+        bench_report.append(f"font setup: uncached={setup_uncached:.2f}ms cached={setup_cached:.2f}ms per document")
@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import tempfile
+import time
+import tracemalloc
 from io import BytesIO
 
+import pytest
 from fpdf import FPDF
 from PIL import Image
 from pypdf import PdfReader
 
-from rentivo.pdf.merger import _image_to_pdf, merge_receipts
+from rentivo.pdf.merger import _image_to_pdf, merge_receipts, merge_receipts_into, normalize_receipt
 
 
 def _make_pdf(num_pages: int = 1) -> bytes:
@@ -53,6 +57,24 @@ def _make_landscape_image() -> bytes:
     return buf.getvalue()
 
 
+def _make_photo(size: tuple[int, int], fmt: str = "JPEG", mode: str = "RGB") -> bytes:
+    """Create a noisy, photo-like image (compresses like a phone picture of a receipt)."""
+    noise = Image.effect_noise(size, 40)
+    img = Image.merge("RGB", (noise, noise.rotate(90, expand=False), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    if mode != "RGB":
+        img = img.convert(mode)
+    buf = BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _embedded_image(pdf_bytes: bytes) -> dict:
+    """The single image XObject on the first page of ``pdf_bytes``."""
+    xobjects = PdfReader(BytesIO(pdf_bytes)).pages[0]["/Resources"]["/XObject"]
+    (name,) = list(xobjects)
+    return xobjects[name].get_object()
+
+
 class TestMergeReceipts:
     def test_no_receipts_returns_original(self):
         invoice = _make_pdf(2)
@@ -117,6 +139,44 @@ class TestMergeReceipts:
         assert result == bad_invoice
 
 
+def _closing_receipts(receipts: list[tuple[bytes, str]]):
+    """Yield receipts as temp files, closing each one before the next is produced."""
+    for data, content_type in receipts:
+        with tempfile.TemporaryFile() as f:
+            f.write(data)
+            f.seek(0)
+            yield f, content_type
+
+
+class TestMergeReceiptsInto:
+    def test_writes_merged_pdf_to_output(self):
+        output = BytesIO()
+        receipts = [(_make_pdf(2), "application/pdf"), (_make_jpeg(), "image/jpeg")]
+
+        assert merge_receipts_into(_make_pdf(1), _closing_receipts(receipts), output) is True
+        assert len(PdfReader(BytesIO(output.getvalue())).pages) == 4
+
+    def test_receipt_files_can_be_closed_as_iteration_moves_on(self):
+        receipts = [(_make_pdf(1), "application/pdf")] * 3
+        with tempfile.TemporaryFile() as output:
+            merge_receipts_into(_make_pdf(1), _closing_receipts(receipts), output)
+            output.seek(0)
+            assert len(PdfReader(output).pages) == 4
+
+    def test_unreadable_invoice_leaves_output_untouched(self):
+        output = BytesIO()
+        assert (
+            merge_receipts_into(b"not-a-pdf", _closing_receipts([(_make_pdf(1), "application/pdf")]), output) is False
+        )
+        assert output.getvalue() == b""
+
+    def test_bad_receipt_skipped(self):
+        output = BytesIO()
+        receipts = [(b"not-a-pdf", "application/pdf"), (b"x", "text/plain"), (_make_pdf(1), "application/pdf")]
+        merge_receipts_into(_make_pdf(1), _closing_receipts(receipts), output)
+        assert len(PdfReader(BytesIO(output.getvalue())).pages) == 2
+
+
 class TestImageToPdf:
     def test_portrait_image(self):
         # 200x300 = portrait
@@ -154,3 +214,184 @@ class TestImageToPdf:
         result = _image_to_pdf(buf.getvalue())
         reader = PdfReader(BytesIO(result))
         assert len(reader.pages) == 1
+
+    def test_small_jpeg_is_embedded_unchanged(self):
+        jpeg = _make_photo((600, 800))
+        image = _embedded_image(_image_to_pdf(jpeg))
+
+        assert image["/Filter"] == "/DCTDecode"
+        assert image.get_data() == jpeg
+
+    def test_small_jpeg_page_costs_about_the_jpeg_size(self):
+        jpeg = _make_photo((600, 800))
+        result = _image_to_pdf(jpeg)
+
+        assert len(result) < len(jpeg) + 4 * 1024
+        assert len(result) < len(_legacy_image_to_pdf(jpeg))
+
+    def test_grayscale_jpeg_is_embedded_unchanged(self):
+        jpeg = _make_photo((600, 800), mode="L")
+        image = _embedded_image(_image_to_pdf(jpeg))
+
+        assert image["/Filter"] == "/DCTDecode"
+        assert image["/ColorSpace"] == "/DeviceGray"
+
+    def test_large_jpeg_is_downscaled_to_dpi(self):
+        # Portrait A4 minus margins fits 3:4 at 190x253.3mm, i.e. about 1496x1995 px at 200 dpi
+        jpeg = _make_photo((3000, 4000))
+        image = _embedded_image(_image_to_pdf(jpeg, max_dpi=200))
+
+        assert image["/Filter"] == "/DCTDecode"
+        assert (image["/Width"], image["/Height"]) == (1496, 1995)
+
+    def test_zero_dpi_keeps_full_resolution(self):
+        jpeg = _make_photo((3000, 4000))
+        image = _embedded_image(_image_to_pdf(jpeg, max_dpi=0))
+
+        assert (image["/Width"], image["/Height"]) == (3000, 4000)
+        assert image.get_data() == jpeg
+
+    def test_large_png_is_downscaled_losslessly(self):
+        png = _make_photo((4000, 3000), fmt="PNG")
+        image = _embedded_image(_image_to_pdf(png, max_dpi=100))
+
+        assert image["/Filter"] == "/FlateDecode"
+        assert (image["/Width"], image["/Height"]) == (998, 749)
+
+    def test_downscaling_keeps_page_placement(self):
+        jpeg = _make_photo((3000, 4000))
+        full = PdfReader(BytesIO(_image_to_pdf(jpeg, max_dpi=0))).pages[0]
+        reduced = PdfReader(BytesIO(_image_to_pdf(jpeg, max_dpi=100))).pages[0]
+
+        assert reduced.mediabox == full.mediabox
+        assert reduced.get_contents().get_data() == full.get_contents().get_data()
+
+
+class TestNormalizeReceipt:
+    def test_image_becomes_single_page_pdf(self):
+        result = normalize_receipt(_make_jpeg(), "image/jpeg")
+        assert len(PdfReader(BytesIO(result)).pages) == 1
+
+    def test_pdf_is_returned_unchanged(self):
+        pdf = _make_pdf(3)
+        assert normalize_receipt(pdf, "application/pdf") is pdf
+
+    def test_unsupported_type_raises(self):
+        with pytest.raises(ValueError, match="Unsupported content type"):
+            normalize_receipt(b"GIF89a", "image/gif")
+
+    def test_normalized_image_merges_like_the_original(self):
+        png = _make_png()
+        normalized = normalize_receipt(png, "image/png")
+
+        direct = PdfReader(BytesIO(merge_receipts(_make_pdf(1), [(png, "image/png")])))
+        cached = PdfReader(BytesIO(merge_receipts(_make_pdf(1), [(normalized, "application/pdf")])))
+
+        assert len(cached.pages) == len(direct.pages) == 2
+        assert cached.pages[1].mediabox == direct.pages[1].mediabox
+
+
+def _legacy_image_to_pdf(image_bytes: bytes) -> bytes:
+    """The previous conversion: decode every image and embed it as a full-size PNG."""
+    img = Image.open(BytesIO(image_bytes))
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    pdf = FPDF(orientation="P", unit="mm", format="A4")
+    pdf.add_page()
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    buf.seek(0)
+    pdf.image(buf, x=10, y=10, w=190)
+    return bytes(pdf.output())
+
+
+@pytest.mark.benchmark
+class TestImageEmbedBenchmark:
+    """Output size and CPU time of image receipt conversion, old vs new."""
+
+    CORPUS = {
+        "phone photo 12MP": ((3024, 4032), "JPEG"),
+        "scanned page 300dpi": ((2480, 3508), "JPEG"),
+        "small photo": ((720, 960), "JPEG"),
+        "screenshot": ((1170, 2532), "PNG"),
+    }
+
+    def _run(self, convert, data: bytes) -> tuple[int, float]:
+        start = time.process_time()
+        size = len(convert(data))
+        return size, (time.process_time() - start) * 1000
+
+    def test_size_and_cpu_savings(self, bench_report):
+        totals = {"old": [0, 0.0], "new": [0, 0.0]}
+        bench_report.append("image receipt -> PDF page (old -> new)")
+        for name, (size, fmt) in self.CORPUS.items():
+            data = _make_photo(size, fmt=fmt)
+            old_bytes, old_ms = self._run(_legacy_image_to_pdf, data)
+            new_bytes, new_ms = self._run(_image_to_pdf, data)
+            for key, (b, ms) in (("old", (old_bytes, old_ms)), ("new", (new_bytes, new_ms))):
+                totals[key][0] += b
+                totals[key][1] += ms
+            bench_report.append(
+                f"{name:>20}: {old_bytes / 1024:8.0f}KiB {old_ms:7.0f}ms -> {new_bytes / 1024:8.0f}KiB {new_ms:7.0f}ms"
+            )
+
+        (old_total, old_ms), (new_total, new_ms) = totals["old"], totals["new"]
+        bench_report.append(
+            f"{'total':>20}: {old_total / 1024:8.0f}KiB {old_ms:7.0f}ms -> {new_total / 1024:8.0f}KiB {new_ms:7.0f}ms"
+        )
+
+
+@pytest.mark.benchmark
+class TestMergeMemoryBenchmark:
+    """Peak Python memory of merging large receipts, all in memory vs streamed through temp files.
+
+    Reported for N and 2N receipts: the streamed merge still grows with the
+    document, since the writer holds every page until it writes.
+    """
+
+    RECEIPTS = 6
+
+    def _scan(self) -> bytes:
+        # A single-page "scanned" PDF of roughly a megabyte
+        return _image_to_pdf(_make_photo((1200, 1600)), max_dpi=0)
+
+    def _peak_mib(self, run) -> float:
+        tracemalloc.start()
+        try:
+            run()
+            return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        finally:
+            tracemalloc.stop()
+
+    def test_peak_memory_in_memory_vs_streamed(self, tmp_path, bench_report):
+        scan = self._scan()
+        paths = []
+        for i in range(self.RECEIPTS * 2):
+            path = tmp_path / f"receipt-{i}.pdf"
+            path.write_bytes(scan)
+            paths.append(path)
+        invoice = _make_pdf(1)
+        del scan
+
+        def _in_memory(receipt_paths):
+            receipts = [(path.read_bytes(), "application/pdf") for path in receipt_paths]
+            merge_receipts(invoice, receipts)
+
+        def _streamed(receipt_paths):
+            def _files():
+                for path in receipt_paths:
+                    with path.open("rb") as f:
+                        yield f, "application/pdf"
+
+            with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as output:
+                merge_receipts_into(invoice, _files(), output)
+
+        for count in (self.RECEIPTS, self.RECEIPTS * 2):
+            receipt_paths = paths[:count]
+            in_memory = self._peak_mib(lambda: _in_memory(receipt_paths))
+            streamed = self._peak_mib(lambda: _streamed(receipt_paths))
+            size = sum(path.stat().st_size for path in receipt_paths) / 1024 / 1024
+            bench_report.append(
+                f"merge {count:2d} receipts ({size:5.1f}MiB):"
+                f" peak in-memory={in_memory:5.1f}MiB streamed={streamed:5.1f}MiB"
+            )
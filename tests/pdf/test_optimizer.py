@@ -0,0 +1,132 @@
+"""Tests for rentivo.pdf.optimizer — the bill PDF post-processing stage."""
+
+from __future__ import annotations
+
+import time
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from fpdf import FPDF
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import NameObject
+
+from rentivo.pdf.invoice import InvoicePDF
+from rentivo.pdf.merger import merge_receipts
+from rentivo.pdf.optimizer import OptimizeMetrics, optimize_pdf
+from tests.pdf.test_invoice import _make_bill
+
+
+def _make_photo() -> bytes:
+    buf = BytesIO()
+    Image.effect_noise((400, 500), 40).convert("RGB").save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def _make_raw_pdf(num_pages: int = 2) -> bytes:
+    """A PDF with uncompressed page content, as some scanners and old tools write them."""
+    pdf = FPDF()
+    pdf.compress = False
+    for i in range(num_pages):
+        pdf.add_page()
+        pdf.set_font("Helvetica", size=12)
+        pdf.multi_cell(0, 10, f"Recibo {i + 1} " * 80)
+    return bytes(pdf.output())
+
+
+def _images(pdf_bytes: bytes) -> list:
+    reader = PdfReader(BytesIO(pdf_bytes))
+    return [
+        xobject.get_object().indirect_reference.idnum
+        for page in reader.pages
+        for xobject in page["/Resources"].get("/XObject", {}).values()
+    ]
+
+
+class TestOptimizePdf:
+    def test_compresses_raw_content_streams(self):
+        raw = _make_raw_pdf()
+        optimized = optimize_pdf(raw, OptimizeMetrics())
+
+        assert len(optimized) < len(raw)
+        reader = PdfReader(BytesIO(optimized))
+        assert all(page["/Contents"].get_object()["/Filter"] == "/FlateDecode" for page in reader.pages)
+        assert "Recibo 2" in reader.pages[1].extract_text()
+
+    def test_deduplicates_identical_images(self):
+        photo = _make_photo()
+        merged = merge_receipts(_make_raw_pdf(1), [(photo, "image/jpeg"), (photo, "image/jpeg")])
+        assert len(set(_images(merged))) == 2
+
+        optimized = optimize_pdf(merged, OptimizeMetrics())
+
+        assert len(set(_images(optimized))) == 1
+        assert len(PdfReader(BytesIO(optimized)).pages) == 3
+        assert len(optimized) < len(merged) - len(photo) / 2
+
+    def test_strips_unused_resources(self):
+        photo = _make_photo()
+        source = PdfReader(BytesIO(merge_receipts(_make_raw_pdf(1), [(photo, "image/jpeg")])))
+        writer = PdfWriter()
+        # Text page that also lists the photo in its resources without drawing it
+        text_page = writer.add_page(source.pages[0])
+        writer.add_page(source.pages[1])
+        text_page["/Resources"][NameObject("/XObject")] = source.pages[1]["/Resources"]["/XObject"]
+        buf = BytesIO()
+        writer.write(buf)
+
+        optimized = PdfReader(BytesIO(optimize_pdf(buf.getvalue(), OptimizeMetrics())))
+
+        assert "/XObject" not in optimized.pages[0]["/Resources"] or not optimized.pages[0]["/Resources"]["/XObject"]
+        assert len(optimized.pages[1]["/Resources"]["/XObject"]) == 1
+
+    def test_keeps_fonts_of_shared_resources(self):
+        invoice = InvoicePDF().generate(_make_bill(), "Apt 101")
+        optimized = optimize_pdf(invoice, OptimizeMetrics())
+
+        assert "FATURA" in PdfReader(BytesIO(optimized)).pages[0].extract_text()
+
+    def test_returns_input_when_not_smaller(self):
+        pdf = _make_raw_pdf()
+        metrics = OptimizeMetrics()
+        with patch("rentivo.pdf.optimizer._rewrite", side_effect=lambda source, output: output.write(pdf + b"\n")):
+            assert optimize_pdf(pdf, metrics) is pdf
+        assert metrics.snapshot()["bytes_out"] == len(pdf)
+
+    def test_invalid_pdf_is_returned_and_counted(self):
+        metrics = OptimizeMetrics()
+        assert optimize_pdf(b"not-a-pdf", metrics) == b"not-a-pdf"
+        assert metrics.snapshot()["failures"] == 1
+
+    def test_records_sizes(self):
+        metrics = OptimizeMetrics()
+        raw = _make_raw_pdf()
+        optimized = optimize_pdf(raw, metrics)
+
+        stats = metrics.snapshot()
+        assert (stats["documents"], stats["bytes_in"], stats["bytes_out"]) == (1, len(raw), len(optimized))
+        assert stats["seconds"] > 0
+
+
+@pytest.mark.benchmark
+class TestOptimizeBenchmark:
+    """Stored bytes and added time per invoice with the optimisation stage."""
+
+    def test_size_and_time_per_invoice(self, bench_report):
+        invoice = InvoicePDF().generate(_make_bill(), "Apt 101")
+        photo = _make_photo()
+        cases = {
+            "invoice only": invoice,
+            "invoice + raw pdf": merge_receipts(invoice, [(_make_raw_pdf(3), "application/pdf")]),
+            "invoice + same photo x3": merge_receipts(invoice, [(photo, "image/jpeg")] * 3),
+        }
+        bench_report.append("bill PDF optimisation")
+        for name, pdf in cases.items():
+            started = time.perf_counter()
+            optimized = optimize_pdf(pdf, OptimizeMetrics())
+            ms = (time.perf_counter() - started) * 1000
+            bench_report.append(
+                f"{name:>24}: {len(pdf) / 1024:7.1f}KiB -> {len(optimized) / 1024:7.1f}KiB in {ms:6.1f}ms"
+            )
+            assert len(optimized) <= len(pdf)
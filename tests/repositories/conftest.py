@@ -1,11 +1,13 @@
 import pytest
-from sqlalchemy import Connection
+from sqlalchemy import Connection, event
 
 from rentivo.repositories.sqlalchemy import (
     SQLAlchemyBillingRepository,
     SQLAlchemyBillRepository,
     SQLAlchemyInviteRepository,
+    SQLAlchemyJobRepository,
     SQLAlchemyOrganizationRepository,
+    SQLAlchemySessionRepository,
     SQLAlchemyThemeRepository,
     SQLAlchemyUserRepository,
 )
@@ -39,3 +41,26 @@ def invite_repo(db_connection: Connection) -> SQLAlchemyInviteRepository:
 @pytest.fixture()
 def theme_repo(db_connection: Connection) -> SQLAlchemyThemeRepository:
     return SQLAlchemyThemeRepository(db_connection)
+
+
+@pytest.fixture()
+def job_repo(db_connection: Connection) -> SQLAlchemyJobRepository:
+    return SQLAlchemyJobRepository(db_connection)
+
+
+@pytest.fixture()
+def session_repo(db_connection: Connection) -> SQLAlchemySessionRepository:
+    return SQLAlchemySessionRepository(db_connection)
+
+
+@pytest.fixture()
+def statements(db_connection: Connection) -> list[str]:
+    """Record every SQL statement sent to the DB while the test runs."""
+    recorded: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(db_connection, "before_cursor_execute", _record)
+    yield recorded
+    event.remove(db_connection, "before_cursor_execute", _record)
@@ -108,6 +108,16 @@ class TestAuditLogRepoQueries:
             assert r.entity_type == "billing"
             assert r.entity_id == 1
 
+    def test_list_by_entity_page(self, audit_repo):
+        created = [audit_repo.create(_sample_audit_log(entity_type="bill", entity_id=5)) for _ in range(3)]
+        audit_repo.create(_sample_audit_log(entity_type="bill", entity_id=6))
+
+        first = audit_repo.list_by_entity_page("bill", 5, 2)
+        second = audit_repo.list_by_entity_page("bill", 5, 2, first.next_cursor)
+
+        assert [a.id for a in first.items + second.items] == [a.id for a in reversed(created)]
+        assert second.next_cursor is None
+
     def test_list_by_entity_empty(self, audit_repo):
         assert audit_repo.list_by_entity("billing", 999) == []
 
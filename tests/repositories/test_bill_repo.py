@@ -49,6 +49,103 @@ class TestBillRepoCRUD:
         billing = self._create_billing(billing_repo, sample_billing)
         assert bill_repo.list_by_billing(billing.id) == []
 
+    def test_list_by_billing_page_walks_all_pages(self, bill_repo, billing_repo, sample_billing, sample_bill):
+        billing = self._create_billing(billing_repo, sample_billing)
+        months = ["2024-11", "2024-12", "2025-01", "2025-02", "2025-02"]
+        for month in months:
+            bill_repo.create(sample_bill(billing_id=billing.id, reference_month=month))
+
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            page = bill_repo.list_by_billing_page(billing.id, 2, cursor)
+            seen.extend(page.items)
+            pages += 1
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+
+        assert pages == 3
+        assert [b.reference_month for b in seen] == sorted(months, reverse=True)
+        assert len({b.id for b in seen}) == 5
+        assert all(len(b.line_items) == 2 for b in seen)
+
+    def test_list_by_billing_page_exact_fit_has_no_next(self, bill_repo, billing_repo, sample_billing, sample_bill):
+        billing = self._create_billing(billing_repo, sample_billing)
+        bill_repo.create(sample_bill(billing_id=billing.id, reference_month="2025-01"))
+        bill_repo.create(sample_bill(billing_id=billing.id, reference_month="2025-02"))
+
+        page = bill_repo.list_by_billing_page(billing.id, 2)
+        assert len(page.items) == 2
+        assert page.next_cursor is None
+
+    def test_list_summaries_by_billing_page(self, bill_repo, billing_repo, sample_billing, sample_bill, statements):
+        billing = self._create_billing(billing_repo, sample_billing)
+        for month in ["2025-01", "2025-02", "2025-03"]:
+            bill_repo.create(sample_bill(billing_id=billing.id, reference_month=month))
+        statements.clear()
+
+        first = bill_repo.list_summaries_by_billing_page(billing.id, 2)
+        second = bill_repo.list_summaries_by_billing_page(billing.id, 2, first.next_cursor)
+
+        # Header columns only: one query per page, no line item fetch
+        assert len(statements) == 2
+        assert "bill_line_items" not in " ".join(statements)
+        assert [s.reference_month for s in first.items + second.items] == ["2025-03", "2025-02", "2025-01"]
+        assert first.items[0].total_amount == 295000
+        assert first.items[0].due_date == "10/04/2025"
+        assert second.next_cursor is None
+
+    def test_list_by_billing_page_invalid_cursor(self, bill_repo):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            bill_repo.list_by_billing_page(1, 10, "not-a-cursor")
+
+    def test_list_after_id_pages_by_id(self, bill_repo, billing_repo, sample_billing, sample_bill):
+        billing = self._create_billing(billing_repo, sample_billing)
+        created = [
+            bill_repo.create(sample_bill(billing_id=billing.id, reference_month=f"2025-0{m}")) for m in range(1, 6)
+        ]
+
+        first = bill_repo.list_after_id(0, 2)
+        second = bill_repo.list_after_id(first[-1].id, 2)
+        third = bill_repo.list_after_id(second[-1].id, 2)
+
+        assert [b.id for b in first + second + third] == [b.id for b in created]
+        assert len(third) == 1
+        assert len(first[0].line_items) == 2
+        assert bill_repo.list_after_id(third[-1].id, 2) == []
+
+    def test_list_after_id_filters(self, bill_repo, billing_repo, org_repo, user_repo, sample_billing, sample_bill):
+        from rentivo.models.organization import Organization
+        from rentivo.models.user import User
+
+        user = user_repo.create(User(username="owner", password_hash="x"))
+        org = org_repo.create(Organization(name="Org", created_by=user.id))
+        own = self._create_billing(billing_repo, sample_billing)
+        org_billing = billing_repo.create(sample_billing(owner_type="organization", owner_id=org.id))
+        jan = bill_repo.create(sample_bill(billing_id=own.id, reference_month="2025-01"))
+        bill_repo.create(sample_bill(billing_id=own.id, reference_month="2025-03"))
+        org_bill = bill_repo.create(sample_bill(billing_id=org_billing.id, reference_month="2025-02"))
+        bill_repo.update_status(jan.id, "paid", datetime.now(SP_TZ))
+
+        assert [b.id for b in bill_repo.list_after_id(0, 10, billing_id=org_billing.id)] == [org_bill.id]
+        assert [b.id for b in bill_repo.list_after_id(0, 10, organization_id=org.id)] == [org_bill.id]
+        assert [b.id for b in bill_repo.list_after_id(0, 10, status="paid")] == [jan.id]
+        months = bill_repo.list_after_id(0, 10, month_from="2025-02", month_to="2025-02")
+        assert [b.id for b in months] == [org_bill.id]
+
+    def test_list_after_id_skips_deleted(self, bill_repo, billing_repo, sample_billing, sample_bill):
+        billing = self._create_billing(billing_repo, sample_billing)
+        deleted_billing = self._create_billing(billing_repo, sample_billing)
+        kept = bill_repo.create(sample_bill(billing_id=billing.id))
+        removed = bill_repo.create(sample_bill(billing_id=billing.id, reference_month="2025-04"))
+        bill_repo.create(sample_bill(billing_id=deleted_billing.id))
+        bill_repo.delete(removed.id)
+        billing_repo.delete(deleted_billing.id)
+
+        assert [b.id for b in bill_repo.list_after_id(0, 10)] == [kept.id]
+
     def test_update(self, bill_repo, billing_repo, sample_billing, sample_bill):
         billing = self._create_billing(billing_repo, sample_billing)
         created = bill_repo.create(sample_bill(billing_id=billing.id))
@@ -110,17 +207,113 @@ class TestBillRepoEdgeCases:
     def _create_billing(self, billing_repo, sample_billing):
         return billing_repo.create(sample_billing())
 
-    def test_create_runtime_error(self, bill_repo, billing_repo, sample_billing, sample_bill):
+    def test_create_returns_aggregate_without_reread(self, bill_repo, billing_repo, sample_billing, sample_bill):
         billing = self._create_billing(billing_repo, sample_billing)
-        bill = sample_bill(billing_id=billing.id)
-        with patch.object(bill_repo, "get_by_id", return_value=None):
-            with pytest.raises(RuntimeError, match="Failed to retrieve bill after create"):
-                bill_repo.create(bill)
+        with patch.object(bill_repo, "get_by_id", side_effect=AssertionError("re-read")):
+            created = bill_repo.create(sample_bill(billing_id=billing.id))
 
-    def test_update_runtime_error(self, bill_repo, billing_repo, sample_billing, sample_bill):
+        fetched = bill_repo.get_by_id(created.id)
+        assert [li.id for li in created.line_items] == [li.id for li in fetched.line_items]
+        assert all(li.bill_id == created.id for li in created.line_items)
+        assert created.uuid == fetched.uuid
+        assert created.status == fetched.status
+        assert created.created_at is not None
+
+    def test_update_returns_aggregate_without_reread(self, bill_repo, billing_repo, sample_billing, sample_bill):
         billing = self._create_billing(billing_repo, sample_billing)
         created = bill_repo.create(sample_bill(billing_id=billing.id))
         created.notes = "Updated"
-        with patch.object(bill_repo, "get_by_id", return_value=None):
-            with pytest.raises(RuntimeError, match="Failed to retrieve bill after update"):
-                bill_repo.update(created)
+        with patch.object(bill_repo, "get_by_id", side_effect=AssertionError("re-read")):
+            updated = bill_repo.update(created)
+
+        fetched = bill_repo.get_by_id(created.id)
+        assert updated.notes == fetched.notes == "Updated"
+        assert [li.id for li in updated.line_items] == [li.id for li in fetched.line_items]
+
+    def test_update_without_id(self, bill_repo, sample_bill):
+        with pytest.raises(ValueError, match="without an id"):
+            bill_repo.update(sample_bill())
+
+    def test_get_by_uuid_is_single_query(self, bill_repo, billing_repo, sample_billing, sample_bill, statements):
+        billing = self._create_billing(billing_repo, sample_billing)
+        created = bill_repo.create(sample_bill(billing_id=billing.id))
+        statements.clear()
+
+        fetched = bill_repo.get_by_uuid(created.uuid)
+
+        assert len(statements) == 1
+        assert [li.description for li in fetched.line_items] == ["Aluguel", "Água"]
+
+    def test_get_by_id_without_line_items(self, bill_repo, billing_repo, sample_billing, sample_bill):
+        billing = self._create_billing(billing_repo, sample_billing)
+        created = bill_repo.create(sample_bill(billing_id=billing.id, line_items=[]))
+        fetched = bill_repo.get_by_id(created.id)
+        assert fetched is not None
+        assert fetched.line_items == []
+
+
+class TestBillLineItemWrites:
+    """Item writes are batched: round trips do not grow with the number of line items.
+
+    Before batching, create issued 1 + N statements and update 2 + N (delete-all then
+    re-insert); with 30 items that is 31 and 32 round trips.
+    """
+
+    @staticmethod
+    def _items(count, amount=1000):
+        return [
+            BillLineItem(description=f"Item {i}", amount=amount, item_type=ItemType.FIXED, sort_order=i)
+            for i in range(count)
+        ]
+
+    def test_create_round_trips_are_constant(self, bill_repo, billing_repo, sample_billing, sample_bill, statements):
+        billing = billing_repo.create(sample_billing())
+        statements.clear()
+
+        created = bill_repo.create(sample_bill(billing_id=billing.id, line_items=self._items(30)))
+
+        # INSERT bill, executemany INSERT items, SELECT new item ids
+        assert len(statements) == 3
+        assert len({li.id for li in created.line_items}) == 30
+        assert [li.id for li in created.line_items] == [li.id for li in bill_repo.get_by_id(created.id).line_items]
+
+    def test_update_writes_only_changed_rows(self, bill_repo, billing_repo, sample_billing, sample_bill, statements):
+        billing = billing_repo.create(sample_billing())
+        created = bill_repo.create(sample_bill(billing_id=billing.id, line_items=self._items(30)))
+        original_ids = [li.id for li in created.line_items]
+        created.line_items[5].amount = 9999
+        statements.clear()
+
+        updated = bill_repo.update(created)
+
+        # UPDATE bill, SELECT existing items, executemany UPDATE changed item
+        assert len(statements) == 3
+        assert [li.id for li in updated.line_items] == original_ids
+        assert bill_repo.get_by_id(created.id).line_items[5].amount == 9999
+
+    def test_update_unchanged_items_issue_no_item_writes(
+        self, bill_repo, billing_repo, sample_billing, sample_bill, statements
+    ):
+        billing = billing_repo.create(sample_billing())
+        created = bill_repo.create(sample_bill(billing_id=billing.id, line_items=self._items(10)))
+        statements.clear()
+
+        bill_repo.update(created)
+
+        assert len(statements) == 2
+
+    def test_update_grows_and_shrinks(self, bill_repo, billing_repo, sample_billing, sample_bill):
+        billing = billing_repo.create(sample_billing())
+        created = bill_repo.create(sample_bill(billing_id=billing.id, line_items=self._items(3)))
+        kept_ids = [li.id for li in created.line_items]
+
+        created.line_items = self._items(5)
+        grown = bill_repo.update(created)
+        assert [li.id for li in grown.line_items][:3] == kept_ids
+        assert len({li.id for li in grown.line_items}) == 5
+
+        grown.line_items = self._items(2, amount=500)
+        shrunk = bill_repo.update(grown)
+        fetched = bill_repo.get_by_id(created.id)
+        assert [li.id for li in shrunk.line_items] == kept_ids[:2]
+        assert [(li.id, li.amount) for li in fetched.line_items] == [(kept_ids[0], 500), (kept_ids[1], 500)]
@@ -48,6 +48,47 @@ class TestBillingRepoCRUD:
     def test_list_all_empty(self, billing_repo: SQLAlchemyBillingRepository):
         assert billing_repo.list_all() == []
 
+    def test_list_all_page(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
+        created = [billing_repo.create(sample_billing(name=f"Apt {i}")) for i in range(3)]
+
+        first = billing_repo.list_all_page(2)
+        second = billing_repo.list_all_page(2, first.next_cursor)
+
+        assert first.next_cursor is not None
+        assert second.next_cursor is None
+        assert [b.id for b in first.items + second.items] == [b.id for b in reversed(created)]
+        assert len(first.items[0].items) == 2
+
+    def test_list_for_user_page(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
+        mine = [billing_repo.create(sample_billing(owner_type="user", owner_id=1)) for _ in range(3)]
+        billing_repo.create(sample_billing(owner_type="user", owner_id=2))
+
+        first = billing_repo.list_for_user_page(1, 2)
+        second = billing_repo.list_for_user_page(1, 2, first.next_cursor)
+
+        assert [b.id for b in first.items + second.items] == [b.id for b in reversed(mine)]
+        assert second.next_cursor is None
+
+    def test_list_summaries_for_user_page(
+        self, billing_repo: SQLAlchemyBillingRepository, bill_repo, sample_billing, sample_bill, statements
+    ):
+        with_bills = billing_repo.create(sample_billing(owner_type="user", owner_id=1))
+        empty = billing_repo.create(sample_billing(owner_type="user", owner_id=1, items=[]))
+        bill_repo.create(sample_bill(billing_id=with_bills.id, reference_month="2025-01"))
+        latest = bill_repo.create(sample_bill(billing_id=with_bills.id, reference_month="2025-02"))
+        bill_repo.update_status(latest.id, "paid", latest.created_at)
+        statements.clear()
+
+        page = billing_repo.list_summaries_for_user_page(1, 10)
+
+        assert len(statements) == 1
+        by_id = {s.id: s for s in page.items}
+        assert [s.id for s in page.items] == [empty.id, with_bills.id]
+        assert (by_id[with_bills.id].item_count, by_id[with_bills.id].bill_count) == (2, 2)
+        assert by_id[with_bills.id].latest_bill_status == "paid"
+        assert (by_id[empty.id].item_count, by_id[empty.id].bill_count) == (0, 0)
+        assert by_id[empty.id].latest_bill_status is None
+
     def test_list_all_returns_items(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
         billing_repo.create(sample_billing())
         billings = billing_repo.list_all()
@@ -79,14 +120,108 @@ class TestBillingRepoCRUD:
 
 
 class TestBillingRepoEdgeCases:
-    def test_create_runtime_error(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
-        with patch.object(billing_repo, "get_by_id", return_value=None):
-            with pytest.raises(RuntimeError, match="Failed to retrieve billing after create"):
-                billing_repo.create(sample_billing())
+    def test_create_returns_aggregate_without_reread(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
+        with patch.object(billing_repo, "get_by_id", side_effect=AssertionError("re-read")):
+            created = billing_repo.create(sample_billing())
+
+        fetched = billing_repo.get_by_id(created.id)
+        assert [i.id for i in created.items] == [i.id for i in fetched.items]
+        assert all(i.billing_id == created.id for i in created.items)
+        assert created.uuid == fetched.uuid
 
-    def test_update_runtime_error(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
+    def test_update_returns_aggregate_without_reread(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
         created = billing_repo.create(sample_billing())
         created.name = "Updated"
-        with patch.object(billing_repo, "get_by_id", return_value=None):
-            with pytest.raises(RuntimeError, match="Failed to retrieve billing after update"):
-                billing_repo.update(created)
+        with patch.object(billing_repo, "get_by_id", side_effect=AssertionError("re-read")):
+            updated = billing_repo.update(created)
+
+        fetched = billing_repo.get_by_id(created.id)
+        assert updated.name == fetched.name == "Updated"
+        assert [i.id for i in updated.items] == [i.id for i in fetched.items]
+
+    def test_update_without_id(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
+        with pytest.raises(ValueError, match="without an id"):
+            billing_repo.update(sample_billing())
+
+    def test_get_by_id_is_single_query(self, billing_repo: SQLAlchemyBillingRepository, sample_billing, statements):
+        created = billing_repo.create(sample_billing())
+        statements.clear()
+
+        fetched = billing_repo.get_by_id(created.id)
+
+        assert len(statements) == 1
+        assert [i.description for i in fetched.items] == ["Aluguel", "Água"]
+
+    def test_get_by_uuid_without_items(self, billing_repo: SQLAlchemyBillingRepository, sample_billing):
+        created = billing_repo.create(sample_billing(items=[]))
+        fetched = billing_repo.get_by_uuid(created.uuid)
+        assert fetched is not None
+        assert fetched.items == []
+
+
+class TestBillingItemWrites:
+    @staticmethod
+    def _items(count):
+        return [
+            BillingItem(description=f"Item {i}", amount=1000, item_type=ItemType.FIXED, sort_order=i)
+            for i in range(count)
+        ]
+
+    def test_create_round_trips_are_constant(
+        self, billing_repo: SQLAlchemyBillingRepository, sample_billing, statements
+    ):
+        created = billing_repo.create(sample_billing(items=self._items(30)))
+
+        # INSERT billing, executemany INSERT items, SELECT new item ids
+        assert len(statements) == 3
+        assert [i.id for i in created.items] == [i.id for i in billing_repo.get_by_id(created.id).items]
+
+    def test_update_diffs_items_by_sort_order(
+        self, billing_repo: SQLAlchemyBillingRepository, sample_billing, statements
+    ):
+        created = billing_repo.create(sample_billing(items=self._items(4)))
+        original_ids = [i.id for i in created.items]
+        created.items = self._items(3)
+        created.items[1].description = "Changed"
+        statements.clear()
+
+        updated = billing_repo.update(created)
+
+        # UPDATE billing, SELECT existing, DELETE removed, executemany UPDATE changed
+        assert len(statements) == 4
+        assert [i.id for i in updated.items] == original_ids[:3]
+        fetched = billing_repo.get_by_id(created.id)
+        assert [i.description for i in fetched.items] == ["Item 0", "Changed", "Item 2"]
+
+
+class TestKeysetCursor:
+    def test_round_trip_keeps_datetimes_typed(self):
+        from datetime import datetime
+
+        from rentivo.repositories.sqlalchemy import _decode_cursor, _encode_cursor
+
+        stamp = datetime(2025, 3, 1, 12, 30)
+        assert _decode_cursor(_encode_cursor(stamp, 7)) == (stamp, 7)
+        assert _decode_cursor(_encode_cursor("2025-03", 8)) == ("2025-03", 8)
+
+    def test_rejects_malformed(self):
+        import base64
+
+        from rentivo.repositories.sqlalchemy import _decode_cursor
+
+        with pytest.raises(ValueError):
+            _decode_cursor("%%%")
+        with pytest.raises(ValueError):
+            _decode_cursor(base64.urlsafe_b64encode(b'["2025-03", "x"]').decode())
+
+    @pytest.mark.parametrize(
+        "payload",
+        [b'[{"x": 1}, 1]', b'[{"dt": 5}, 1]', b'[{"dt": "nope"}, 1]', b"[[1, 2], 1]", b'["a", true]', b"[true, 1]"],
+    )
+    def test_rejects_crafted_payloads(self, payload):
+        import base64
+
+        from rentivo.repositories.sqlalchemy import _decode_cursor
+
+        with pytest.raises(ValueError):
+            _decode_cursor(base64.urlsafe_b64encode(payload).decode())
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+
+from rentivo.constants import SP_TZ
+from rentivo.models.job import Job, JobStatus
+
+NOW = datetime(2025, 3, 1, 12, 0, tzinfo=SP_TZ)
+
+
+def _job(**overrides) -> Job:
+    defaults = dict(kind="bill.pdf", payload={"bill_id": 1}, run_after=NOW - timedelta(seconds=1))
+    defaults.update(overrides)
+    return Job(**defaults)
+
+
+class TestJobRepoEnqueue:
+    def test_enqueue_and_get(self, job_repo):
+        job = job_repo.enqueue(_job(max_attempts=3))
+        assert job.id is not None
+        assert job.uuid != ""
+
+        fetched = job_repo.get_by_id(job.id)
+        assert fetched.kind == "bill.pdf"
+        assert fetched.payload == {"bill_id": 1}
+        assert fetched.status == JobStatus.QUEUED.value
+        assert fetched.attempts == 0
+        assert fetched.max_attempts == 3
+
+    def test_get_by_id_not_found(self, job_repo):
+        assert job_repo.get_by_id(9999) is None
+
+    def test_dedupe_returns_queued_job(self, job_repo):
+        first = job_repo.enqueue(_job(dedupe_key="bill-pdf:1"))
+        second = job_repo.enqueue(_job(dedupe_key="bill-pdf:1"))
+        assert second.id == first.id
+        assert job_repo.count_by_status() == {"queued": 1}
+
+    def test_dedupe_ignores_running_job(self, job_repo):
+        first = job_repo.enqueue(_job(dedupe_key="bill-pdf:1"))
+        job_repo.claim("w1", 10, NOW)
+        second = job_repo.enqueue(_job(dedupe_key="bill-pdf:1"))
+        assert second.id != first.id
+
+    def test_no_dedupe_key_always_inserts(self, job_repo):
+        job_repo.enqueue(_job())
+        job_repo.enqueue(_job())
+        assert job_repo.count_by_status() == {"queued": 2}
+
+
+class TestJobRepoClaim:
+    def test_claim_marks_running(self, job_repo):
+        job = job_repo.enqueue(_job())
+        claimed = job_repo.claim("w1", 10, NOW)
+
+        assert [j.id for j in claimed] == [job.id]
+        assert claimed[0].status == JobStatus.RUNNING.value
+        assert claimed[0].locked_by == "w1"
+        assert claimed[0].attempts == 1
+
+    def test_claim_skips_future_jobs(self, job_repo):
+        job_repo.enqueue(_job(run_after=NOW + timedelta(minutes=5)))
+        assert job_repo.claim("w1", 10, NOW) == []
+
+    def test_claim_respects_limit_and_order(self, job_repo):
+        late = job_repo.enqueue(_job(run_after=NOW - timedelta(seconds=1)))
+        early = job_repo.enqueue(_job(run_after=NOW - timedelta(minutes=1)))
+        job_repo.enqueue(_job())
+
+        claimed = job_repo.claim("w1", 2, NOW)
+        assert [j.id for j in claimed] == [early.id, late.id]
+
+    def test_claimed_job_not_claimed_again(self, job_repo):
+        job_repo.enqueue(_job())
+        assert len(job_repo.claim("w1", 10, NOW)) == 1
+        assert job_repo.claim("w2", 10, NOW) == []
+
+
+class TestJobRepoFinish:
+    def test_mark_done(self, job_repo):
+        job = job_repo.enqueue(_job())
+        job_repo.claim("w1", 1, NOW)
+        assert job_repo.mark_done(job.id, "w1") is True
+
+        fetched = job_repo.get_by_id(job.id)
+        assert fetched.status == JobStatus.DONE.value
+        assert fetched.locked_by == ""
+        assert fetched.locked_at is None
+
+    def test_mark_failed_with_retry_requeues(self, job_repo):
+        job = job_repo.enqueue(_job())
+        job_repo.claim("w1", 1, NOW)
+        retry_at = NOW + timedelta(seconds=30)
+        assert job_repo.mark_failed(job.id, "w1", "boom", retry_at) is True
+
+        fetched = job_repo.get_by_id(job.id)
+        assert fetched.status == JobStatus.QUEUED.value
+        assert fetched.last_error == "boom"
+        assert job_repo.claim("w1", 1, NOW) == []
+        assert len(job_repo.claim("w1", 1, retry_at)) == 1
+
+    def test_mark_failed_permanently(self, job_repo):
+        job = job_repo.enqueue(_job())
+        job_repo.claim("w1", 1, NOW)
+        assert job_repo.mark_failed(job.id, "w1", "boom", None) is True
+
+        assert job_repo.get_by_id(job.id).status == JobStatus.FAILED.value
+        assert job_repo.count_by_status() == {"failed": 1}
+
+    def test_finish_requires_lock_owner(self, job_repo):
+        job = job_repo.enqueue(_job())
+        job_repo.claim("w1", 1, NOW - timedelta(hours=1))
+        job_repo.requeue_stale(NOW - timedelta(minutes=10))
+        job_repo.claim("w2", 1, NOW)
+
+        assert job_repo.mark_done(job.id, "w1") is False
+        assert job_repo.mark_failed(job.id, "w1", "boom", None) is False
+        fetched = job_repo.get_by_id(job.id)
+        assert (fetched.status, fetched.locked_by) == (JobStatus.RUNNING.value, "w2")
+
+
+class TestJobRepoHeartbeat:
+    def test_refreshes_lock(self, job_repo):
+        job = job_repo.enqueue(_job(run_after=NOW - timedelta(hours=2)))
+        job_repo.claim("w1", 1, NOW - timedelta(hours=1))
+
+        assert job_repo.heartbeat(job.id, "w1", NOW) is True
+        assert job_repo.requeue_stale(NOW - timedelta(minutes=10)) == 0
+        assert job_repo.get_by_id(job.id).status == JobStatus.RUNNING.value
+
+    def test_other_worker_cannot_refresh(self, job_repo):
+        job = job_repo.enqueue(_job())
+        job_repo.claim("w1", 1, NOW)
+        assert job_repo.heartbeat(job.id, "w2", NOW) is False
+
+    def test_finished_job_cannot_refresh(self, job_repo):
+        job = job_repo.enqueue(_job())
+        job_repo.claim("w1", 1, NOW)
+        job_repo.mark_done(job.id, "w1")
+        assert job_repo.heartbeat(job.id, "w1", NOW) is False
+
+
+class TestJobRepoRequeueStale:
+    def test_requeues_only_old_locks(self, job_repo):
+        stale = job_repo.enqueue(_job(run_after=NOW - timedelta(hours=2)))
+        job_repo.claim("w1", 1, NOW - timedelta(hours=1))
+        fresh = job_repo.enqueue(_job())
+        job_repo.claim("w2", 1, NOW)
+
+        assert job_repo.requeue_stale(NOW - timedelta(minutes=10)) == 1
+        assert job_repo.get_by_id(stale.id).status == JobStatus.QUEUED.value
+        assert job_repo.get_by_id(fresh.id).status == JobStatus.RUNNING.value
+
+    def test_nothing_to_requeue(self, job_repo):
+        assert job_repo.requeue_stale(NOW) == 0
+
+    def test_exhausted_jobs_are_failed_not_requeued(self, job_repo):
+        exhausted = job_repo.enqueue(_job(max_attempts=1, run_after=NOW - timedelta(hours=2)))
+        retryable = job_repo.enqueue(_job(max_attempts=3, run_after=NOW - timedelta(hours=2)))
+        job_repo.claim("w1", 2, NOW - timedelta(hours=1))
+        locked_before = NOW - timedelta(minutes=10)
+
+        failed = job_repo.fail_stale(locked_before, "lock expired")
+        assert [j.id for j in failed] == [exhausted.id]
+        assert failed[0].payload == {"bill_id": 1}
+        assert job_repo.requeue_stale(locked_before) == 1
+
+        stored = job_repo.get_by_id(exhausted.id)
+        assert (stored.status, stored.last_error, stored.locked_by) == (JobStatus.FAILED.value, "lock expired", "")
+        assert job_repo.get_by_id(retryable.id).status == JobStatus.QUEUED.value
+
+    def test_fail_stale_ignores_fresh_locks(self, job_repo):
+        job_repo.enqueue(_job(max_attempts=1))
+        job_repo.claim("w1", 1, NOW)
+        assert job_repo.fail_stale(NOW - timedelta(minutes=10), "lock expired") == []
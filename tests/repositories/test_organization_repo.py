@@ -104,6 +104,18 @@ class TestOrganizationMemberOps:
         member = org_repo.get_member(org.id, user.id)
         assert member.role == "admin"
 
+    def test_list_roles_for_user(self, org_repo, user_repo):
+        user = _create_user(user_repo)
+        other = _create_user(user_repo, "other")
+        first = org_repo.create(Organization(name="A", created_by=user.id))
+        second = org_repo.create(Organization(name="B", created_by=user.id))
+        org_repo.add_member(first.id, user.id, "admin")
+        org_repo.add_member(second.id, user.id, "viewer")
+        org_repo.add_member(second.id, other.id, "manager")
+
+        assert org_repo.list_roles_for_user(user.id) == {first.id: "admin", second.id: "viewer"}
+        assert org_repo.list_roles_for_user(9999) == {}
+
 
 class TestOrganizationRepoEdgeCases:
     def test_create_runtime_error(self, org_repo, user_repo):
@@ -0,0 +1,118 @@
+"""Query-plan snapshots for the hot repository queries.
+
+Each case runs a repository method, captures the SELECTs it sends and runs
+``EXPLAIN QUERY PLAN`` on them against the test schema (which mirrors the
+Alembic head, indexes included). A case fails when a query stops using the
+expected index, falls back to a table scan or needs a temporary B-tree to
+sort. When a query or index changes on purpose, update its snapshot here.
+"""
+
+from collections.abc import Callable
+
+import pytest
+from sqlalchemy import Connection, event
+
+from rentivo.repositories.sqlalchemy import (
+    SQLAlchemyAuditLogRepository,
+    SQLAlchemyBillingRepository,
+    SQLAlchemyBillRepository,
+    SQLAlchemyOrganizationRepository,
+    SQLAlchemyReceiptRepository,
+    SQLAlchemyThemeRepository,
+)
+
+# case id -> (repository call, indexes the plan must use)
+HOT_QUERIES: dict[str, tuple[Callable[[Connection], object], set[str]]] = {
+    "bills.list_by_billing": (
+        lambda conn: SQLAlchemyBillRepository(conn).list_by_billing(1),
+        {"ix_bills_billing_live_month"},
+    ),
+    "bills.list_by_billing_page": (
+        lambda conn: SQLAlchemyBillRepository(conn).list_by_billing_page(1, 20),
+        {"ix_bills_billing_live_month"},
+    ),
+    "bills.list_summaries_by_billing_page": (
+        lambda conn: SQLAlchemyBillRepository(conn).list_summaries_by_billing_page(1, 20),
+        {"ix_bills_billing_live_month"},
+    ),
+    "bills.get_by_id": (
+        lambda conn: SQLAlchemyBillRepository(conn).get_by_id(1),
+        {"ix_bill_line_items_bill_sort"},
+    ),
+    "billings.get_by_id": (
+        lambda conn: SQLAlchemyBillingRepository(conn).get_by_id(1),
+        {"ix_billing_items_billing_sort"},
+    ),
+    "billings.list_all_page": (
+        lambda conn: SQLAlchemyBillingRepository(conn).list_all_page(20),
+        {"ix_billings_live_created"},
+    ),
+    "billings.list_for_user_page": (
+        lambda conn: SQLAlchemyBillingRepository(conn).list_for_user_page(1, 20),
+        {"ix_billings_live_created", "ix_org_members_user_org_role"},
+    ),
+    "billings.list_summaries_for_user_page": (
+        lambda conn: SQLAlchemyBillingRepository(conn).list_summaries_for_user_page(1, 20),
+        {
+            "ix_billings_live_created",
+            "ix_org_members_user_org_role",
+            "ix_billing_items_billing_sort",
+            "ix_bills_billing_live_month",
+        },
+    ),
+    "themes.get_by_owner": (
+        lambda conn: SQLAlchemyThemeRepository(conn).get_by_owner("user", 1),
+        {"ix_themes_owner"},
+    ),
+    "organization_members.list_roles_for_user": (
+        lambda conn: SQLAlchemyOrganizationRepository(conn).list_roles_for_user(1),
+        {"ix_org_members_user_org_role"},
+    ),
+    "receipts.list_by_bill": (
+        lambda conn: SQLAlchemyReceiptRepository(conn).list_by_bill(1),
+        {"ix_receipts_bill_sort"},
+    ),
+    "audit_logs.list_by_entity_page": (
+        lambda conn: SQLAlchemyAuditLogRepository(conn).list_by_entity_page("bill", 1, 20),
+        {"ix_audit_logs_entity_created"},
+    ),
+    "audit_logs.list_by_actor": (
+        lambda conn: SQLAlchemyAuditLogRepository(conn).list_by_actor(1),
+        {"ix_audit_logs_actor_created"},
+    ),
+}
+
+
+def _capture_selects(conn: Connection, call: Callable[[Connection], object]) -> list[tuple[str, tuple]]:
+    captured: list[tuple[str, tuple]] = []
+
+    def _before(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(conn.engine, "before_cursor_execute", _before)
+    try:
+        call(conn)
+    finally:
+        event.remove(conn.engine, "before_cursor_execute", _before)
+    return captured
+
+
+def _plan(conn: Connection, statement: str, parameters: tuple) -> list[str]:
+    return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+@pytest.mark.parametrize("case", sorted(HOT_QUERIES))
+def test_hot_query_uses_indexes(db_connection: Connection, case: str):
+    call, expected = HOT_QUERIES[case]
+    statements = _capture_selects(db_connection, call)
+    assert statements, f"{case} ran no SELECT"
+
+    details = [detail for statement, params in statements for detail in _plan(db_connection, statement, params)]
+
+    scans = [d for d in details if d.startswith("SCAN ")]
+    assert not scans, f"{case} scans a table: {details}"
+    sorts = [d for d in details if "TEMP B-TREE" in d]
+    assert not sorts, f"{case} sorts without an index: {details}"
+    used = {word for d in details for word in d.split() if word.startswith("ix_")}
+    assert expected <= used, f"{case} no longer uses {sorted(expected - used)}: {details}"
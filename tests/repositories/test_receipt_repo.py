@@ -183,3 +183,14 @@ class TestReceiptRepoCRUD:
         assert results[0].filename == "c.pdf"
         assert results[1].filename == "b.pdf"
         assert results[2].filename == "a.pdf"
+
+    def test_set_normalized_key(self, receipt_repo, billing_with_bill):
+        _, bill = billing_with_bill
+        created = receipt_repo.create(
+            Receipt(bill_id=bill.id, filename="a.jpg", storage_key="b/r/a.jpg", content_type="image/jpeg", file_size=1)
+        )
+        assert created.normalized_key is None
+
+        receipt_repo.set_normalized_key(created.id, "b/r/normalized/abc.pdf")
+
+        assert receipt_repo.get_by_id(created.id).normalized_key == "b/r/normalized/abc.pdf"
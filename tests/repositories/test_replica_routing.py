@@ -0,0 +1,142 @@
+"""Read-replica routing, with the primary and the replica as two SQLite files."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from rentivo.db import ResilientConnection, RoutingConnection
+from rentivo.models.billing import Billing, BillingItem, ItemType
+from rentivo.repositories.sqlalchemy import SQLAlchemyBillingRepository, SQLAlchemyUserRepository
+from rentivo.services.user_service import UserService
+from tests.conftest import SCHEMA_DDL
+
+
+def _sqlite_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        for statement in SCHEMA_DDL.strip().split(";"):
+            if statement.strip():
+                conn.execute(text(statement.strip()))
+        conn.commit()
+    return engine
+
+
+def _billing(name: str) -> Billing:
+    return Billing(
+        name=name,
+        items=[BillingItem(description="Aluguel", amount=100000, item_type=ItemType.FIXED)],
+    )
+
+
+@pytest.fixture()
+def engines(tmp_path):
+    primary = _sqlite_engine(tmp_path / "primary.db")
+    replica = _sqlite_engine(tmp_path / "replica.db")
+    # Same row on both sides, but the replica has not caught up with the rename
+    with primary.connect() as conn:
+        SQLAlchemyBillingRepository(conn).create(_billing("Apt 101 (renamed)"))
+    with replica.connect() as conn:
+        SQLAlchemyBillingRepository(conn).create(_billing("Apt 101"))
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture()
+def routing(engines):
+    conn = RoutingConnection(*engines)
+    yield conn
+    conn.close()
+
+
+class TestRoutingConnection:
+    def test_get_and_list_read_from_replica(self, routing):
+        repo = SQLAlchemyBillingRepository(routing)
+
+        assert repo.get_by_id(1).name == "Apt 101"
+        assert [b.name for b in repo.list_all()] == ["Apt 101"]
+        assert not routing.sticky
+
+    def test_create_reads_back_from_primary(self, routing):
+        repo = SQLAlchemyBillingRepository(routing)
+
+        created = repo.create(_billing("Apt 202"))
+
+        assert routing.sticky
+        assert repo.get_by_id(created.id).name == "Apt 202"
+        assert repo.get_by_id(1).name == "Apt 101 (renamed)"
+
+    def test_write_makes_later_reads_sticky(self, routing):
+        repo = SQLAlchemyBillingRepository(routing)
+        assert repo.get_by_id(1).name == "Apt 101"
+
+        repo.delete(1)
+
+        assert repo.get_by_id(1) is None
+
+    def test_undecorated_repository_reads_primary(self, engines, routing):
+        primary, _ = engines
+        with primary.connect() as conn:
+            UserService(SQLAlchemyUserRepository(conn)).create_user("maria", "secret")
+
+        assert SQLAlchemyUserRepository(routing).get_by_username("maria") is not None
+        assert not routing.sticky
+
+    def test_unreachable_replica_falls_back_to_primary(self, engines, tmp_path):
+        primary, _ = engines
+        broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        routing = RoutingConnection(primary, broken)
+
+        assert SQLAlchemyBillingRepository(routing).get_by_id(1).name == "Apt 101 (renamed)"
+        assert routing.sticky
+        routing.close()
+
+    def test_connections_opened_lazily_and_closed(self, engines):
+        routing = RoutingConnection(*engines)
+        assert routing._primary is None and routing._replica is None
+
+        SQLAlchemyBillingRepository(routing).list_all()
+        assert routing._primary is None
+        assert isinstance(routing._replica, ResilientConnection)
+
+        replica_conn = routing._replica
+        routing.close()
+        assert replica_conn.closed
+
+    def test_plain_connection_unaffected(self, engines):
+        primary, _ = engines
+        with primary.connect() as conn:
+            assert SQLAlchemyBillingRepository(conn).get_by_id(1).name == "Apt 101 (renamed)"
+
+
+class TestWebRouting:
+    def test_get_request_uses_replica(self):
+        from starlette.requests import Request
+
+        import web.deps as deps
+
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+        request.state.db_conn = None
+        with (
+            patch.object(deps.settings, "db_read_url", "sqlite:///replica.db"),
+            patch.object(deps, "get_engine"),
+            patch.object(deps, "get_read_engine"),
+        ):
+            assert isinstance(deps._get_conn(request), RoutingConnection)
+
+    def test_post_request_uses_primary(self):
+        from starlette.requests import Request
+
+        import web.deps as deps
+
+        request = Request({"type": "http", "method": "POST", "path": "/", "headers": []})
+        request.state.db_conn = None
+        with (
+            patch.object(deps.settings, "db_read_url", "sqlite:///replica.db"),
+            patch.object(deps, "get_engine") as get_engine,
+        ):
+            conn = deps._get_conn(request)
+
+        assert isinstance(conn, ResilientConnection)
+        get_engine.return_value.connect.assert_called_once_with()
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from rentivo.constants import SP_TZ
+from rentivo.models.session import StoredSession
+
+NOW = datetime(2025, 3, 1, 12, 0, tzinfo=SP_TZ)
+
+
+def _session(key: str = "a" * 64, **overrides) -> StoredSession:
+    defaults = dict(session_key=key, data={"user_id": 1, "_messages": []}, expires_at=NOW + timedelta(days=14))
+    defaults.update(overrides)
+    return StoredSession(**defaults)
+
+
+class TestSessionRepo:
+    def test_save_and_get(self, session_repo):
+        session_repo.save(_session())
+
+        fetched = session_repo.get("a" * 64, NOW)
+        assert fetched.data == {"user_id": 1, "_messages": []}
+        assert fetched.expires_at.replace(tzinfo=None) == (NOW + timedelta(days=14)).replace(tzinfo=None)
+
+    def test_get_missing(self, session_repo):
+        assert session_repo.get("missing", NOW) is None
+
+    def test_get_expired(self, session_repo):
+        session_repo.save(_session(expires_at=NOW - timedelta(seconds=1)))
+        assert session_repo.get("a" * 64, NOW) is None
+
+    def test_save_replaces(self, session_repo):
+        session_repo.save(_session())
+        session_repo.save(_session(data={"user_id": 2}))
+
+        assert session_repo.get("a" * 64, NOW).data == {"user_id": 2}
+
+    def test_delete(self, session_repo):
+        session_repo.save(_session())
+        session_repo.delete("a" * 64)
+        assert session_repo.get("a" * 64, NOW) is None
+
+    def test_delete_expired(self, session_repo):
+        session_repo.save(_session("a" * 64, expires_at=NOW - timedelta(hours=1)))
+        session_repo.save(_session("b" * 64))
+
+        assert session_repo.delete_expired(NOW) == 1
+        assert session_repo.get("b" * 64, NOW) is not None
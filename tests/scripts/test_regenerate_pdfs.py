@@ -1,7 +1,29 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from unittest.mock import patch
 
+import pytest
+
 from rentivo.models.bill import Bill, BillLineItem
 from rentivo.models.billing import Billing, BillingItem, ItemType
+from rentivo.models.organization import Organization
+
+MODULE = "rentivo.scripts.regenerate_pdfs"
+
+
+def _thread_pool(max_workers, mp_context=None, initializer=None):
+    """Stand-in for ProcessPoolExecutor so mocks are shared with the 'workers'."""
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=initializer)
+
+
+@pytest.fixture(autouse=True)
+def _reset_worker_service():
+    import rentivo.scripts.regenerate_pdfs as mod
+
+    mod._worker_service = None
+    yield
+    mod._worker_service = None
 
 
 class TestRegeneratePdfs:
@@ -13,10 +35,10 @@ class TestRegeneratePdfs:
             items=[BillingItem(description="Rent", amount=100000, item_type=ItemType.FIXED)],
         )
 
-    def _make_bill(self):
+    def _make_bill(self, bill_id=1):
         return Bill(
-            id=1,
-            uuid="bill-uuid",
+            id=bill_id,
+            uuid=f"bill-uuid-{bill_id}",
             billing_id=1,
             reference_month="2025-03",
             total_amount=100000,
@@ -26,76 +48,343 @@ class TestRegeneratePdfs:
             ],
         )
 
-    @patch("rentivo.scripts.regenerate_pdfs.initialize_db")
-    @patch("rentivo.scripts.regenerate_pdfs.get_billing_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_bill_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_receipt_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_storage")
+    @staticmethod
+    def _pages(*pages):
+        """Build a list_after_id side effect that serves the pages, then empty results."""
+        pages = list(pages)
+
+        def _side_effect(after_id, limit, **filters):
+            return pages.pop(0) if pages else []
+
+        return _side_effect
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
     def test_dry_run(self, mock_storage, mock_receipt_repo, mock_bill_repo, mock_billing_repo, mock_init_db):
         from rentivo.scripts.regenerate_pdfs import main
 
-        billing = self._make_billing()
-        bill = self._make_bill()
-        mock_billing_repo.return_value.list_all.return_value = [billing]
-        mock_bill_repo.return_value.list_by_billing.return_value = [bill]
+        mock_billing_repo.return_value.get_by_id.return_value = self._make_billing()
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages([self._make_bill()])
         mock_storage.return_value.get_url.return_value = "https://example.com/file.pdf"
 
-        with patch("sys.argv", ["prog", "--dry-run"]):
-            main()
+        main(["--dry-run"])
 
-        mock_storage.return_value.save.assert_not_called()
+        mock_storage.return_value.save_stream.assert_not_called()
 
-    @patch("rentivo.scripts.regenerate_pdfs.initialize_db")
-    @patch("rentivo.scripts.regenerate_pdfs.get_billing_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_bill_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_receipt_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_storage")
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_theme_repository")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
     @patch("rentivo.services.bill_service.BillService._get_pix_data")
     @patch("rentivo.services.bill_service.InvoicePDF")
     def test_regeneration(
-        self, mock_pdf_cls, mock_pix, mock_storage, mock_receipt_repo, mock_bill_repo, mock_billing_repo, mock_init_db
+        self,
+        mock_pdf_cls,
+        mock_pix,
+        mock_storage,
+        mock_receipt_repo,
+        mock_bill_repo,
+        mock_billing_repo,
+        mock_theme_repo,
+        mock_init_db,
+        tmp_path,
     ):
         from rentivo.scripts.regenerate_pdfs import main
 
-        billing = self._make_billing()
-        bill = self._make_bill()
-        mock_billing_repo.return_value.list_all.return_value = [billing]
-        mock_bill_repo.return_value.list_by_billing.return_value = [bill]
+        mock_billing_repo.return_value.get_by_id.return_value = self._make_billing()
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages([self._make_bill()])
+        mock_receipt_repo.return_value.list_by_bill.return_value = []
+        mock_theme_repo.return_value.get_by_owner.return_value = None
         mock_pix.return_value = (None, "", "")
         mock_pdf_cls.return_value.generate.return_value = b"%PDF-fake"
-        mock_storage.return_value.save.return_value = "/new/path.pdf"
-        mock_storage.return_value.get_url.return_value = "https://example.com/new.pdf"
+        mock_storage.return_value.save_stream.return_value = "/new/path.pdf"
 
-        with patch("sys.argv", ["prog"]):
-            main()
+        checkpoint = tmp_path / "ckpt.json"
+        main(["--workers", "1", "--checkpoint", str(checkpoint)])
 
-        mock_storage.return_value.save.assert_called_once()
+        mock_storage.return_value.save_stream.assert_called_once()
         mock_bill_repo.return_value.update_pdf_path.assert_called_once()
+        assert not checkpoint.exists()
 
-    @patch("rentivo.scripts.regenerate_pdfs.initialize_db")
-    @patch("rentivo.scripts.regenerate_pdfs.get_billing_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_bill_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_receipt_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_storage")
-    def test_no_billings(self, mock_storage, mock_receipt_repo, mock_bill_repo, mock_billing_repo, mock_init_db):
+    @patch(f"{MODULE}.ProcessPoolExecutor", side_effect=_thread_pool)
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_theme_repository")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
+    @patch("rentivo.services.bill_service.BillService._get_pix_data")
+    @patch("rentivo.services.bill_service.InvoicePDF")
+    def test_parallel_regeneration_streams_batches(
+        self,
+        mock_pdf_cls,
+        mock_pix,
+        mock_storage,
+        mock_receipt_repo,
+        mock_bill_repo,
+        mock_billing_repo,
+        mock_theme_repo,
+        mock_init_db,
+        mock_pool,
+        tmp_path,
+    ):
         from rentivo.scripts.regenerate_pdfs import main
 
-        mock_billing_repo.return_value.list_all.return_value = []
+        mock_billing_repo.return_value.get_by_id.return_value = self._make_billing()
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages(
+            [self._make_bill(1), self._make_bill(2)],
+            [self._make_bill(3), self._make_bill(4)],
+            [self._make_bill(5)],
+        )
+        mock_receipt_repo.return_value.list_by_bill.return_value = []
+        mock_theme_repo.return_value.get_by_owner.return_value = None
+        mock_pix.return_value = (None, "", "")
+        mock_pdf_cls.return_value.generate.return_value = b"%PDF-fake"
+        mock_storage.return_value.save_stream.return_value = "/new/path.pdf"
 
-        with patch("sys.argv", ["prog"]):
-            main()
+        main(["--workers", "2", "--batch-size", "2", "--checkpoint", str(tmp_path / "ckpt.json")])
 
-    @patch("rentivo.scripts.regenerate_pdfs.initialize_db")
-    @patch("rentivo.scripts.regenerate_pdfs.get_billing_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_bill_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_receipt_repository")
-    @patch("rentivo.scripts.regenerate_pdfs.get_storage")
-    def test_no_bills(self, mock_storage, mock_receipt_repo, mock_bill_repo, mock_billing_repo, mock_init_db):
+        assert mock_storage.return_value.save_stream.call_count == 5
+        after_ids = [c.args[0] for c in mock_bill_repo.return_value.list_after_id.call_args_list]
+        assert after_ids == [0, 2, 4]
+        # Each billing is looked up once, not once per bill
+        mock_billing_repo.return_value.get_by_id.assert_called_once_with(1)
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_theme_repository")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
+    @patch("rentivo.services.bill_service.BillService._get_pix_data")
+    @patch("rentivo.services.bill_service.InvoicePDF")
+    def test_resumes_from_checkpoint(
+        self,
+        mock_pdf_cls,
+        mock_pix,
+        mock_storage,
+        mock_receipt_repo,
+        mock_bill_repo,
+        mock_billing_repo,
+        mock_theme_repo,
+        mock_init_db,
+        tmp_path,
+    ):
+        from rentivo.scripts.regenerate_pdfs import main
+
+        checkpoint = tmp_path / "ckpt.json"
+        checkpoint.write_text(
+            json.dumps(
+                {
+                    "filters": {"month_from": None, "month_to": None, "status": None},
+                    "watermark": 41,
+                    "completed": 41,
+                    "failed": [],
+                }
+            )
+        )
+        mock_billing_repo.return_value.get_by_id.return_value = self._make_billing()
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages([self._make_bill(42)])
+        mock_receipt_repo.return_value.list_by_bill.return_value = []
+        mock_theme_repo.return_value.get_by_owner.return_value = None
+        mock_pix.return_value = (None, "", "")
+        mock_pdf_cls.return_value.generate.return_value = b"%PDF-fake"
+        mock_storage.return_value.save_stream.return_value = "/new/path.pdf"
+
+        main(["--workers", "1", "--checkpoint", str(checkpoint)])
+
+        assert mock_bill_repo.return_value.list_after_id.call_args_list[0].args[0] == 41
+        mock_storage.return_value.save_stream.assert_called_once()
+        assert not checkpoint.exists()
+
+    @patch(f"{MODULE}.ProcessPoolExecutor", side_effect=_thread_pool)
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_theme_repository")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
+    def test_crashed_parallel_run_saves_checkpoint_and_resumes(
+        self,
+        mock_storage,
+        mock_receipt_repo,
+        mock_bill_repo,
+        mock_billing_repo,
+        mock_theme_repo,
+        mock_init_db,
+        mock_pool,
+        tmp_path,
+    ):
         from rentivo.scripts.regenerate_pdfs import main
 
-        billing = self._make_billing()
-        mock_billing_repo.return_value.list_all.return_value = [billing]
-        mock_bill_repo.return_value.list_by_billing.return_value = []
+        all_bills = [self._make_bill(bill_id) for bill_id in range(1, 9)]
+        mock_billing_repo.return_value.get_by_id.return_value = self._make_billing()
+        mock_bill_repo.return_value.list_after_id.side_effect = lambda after_id, limit, **filters: [
+            b for b in all_bills if b.id > after_id
+        ][:limit]
+        checkpoint = tmp_path / "ckpt.json"
+
+        def _crash_on_five(bill, billing):
+            if bill.id == 5:
+                raise BrokenProcessPool("worker died")
+            return bill.id, {}, None
+
+        with patch(f"{MODULE}._regenerate_one", side_effect=_crash_on_five):
+            with pytest.raises(BrokenProcessPool):
+                main(["--workers", "2", "--batch-size", "2", "--checkpoint", str(checkpoint)])
+
+        saved = json.loads(checkpoint.read_text())
+        # Bill 5 never finished, so the watermark must not move past it
+        assert saved["watermark"] < 5
+
+        with patch(f"{MODULE}._regenerate_one", side_effect=lambda bill, billing: (bill.id, {}, None)) as mock_regen:
+            main(["--workers", "2", "--batch-size", "2", "--checkpoint", str(checkpoint)])
+
+        assert mock_bill_repo.return_value.list_after_id.call_args_list[-1].args[0] >= saved["watermark"]
+        resumed = sorted(c.args[0].id for c in mock_regen.call_args_list)
+        assert resumed == list(range(saved["watermark"] + 1, 9))
+        assert not checkpoint.exists()
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    def test_database_error_saves_checkpoint(self, mock_bill_repo, mock_billing_repo, mock_init_db, tmp_path):
+        from rentivo.scripts.regenerate_pdfs import main
+
+        mock_bill_repo.return_value.list_after_id.side_effect = OSError("connection lost")
+        checkpoint = tmp_path / "ckpt.json"
+
+        with pytest.raises(OSError):
+            main(["--workers", "1", "--checkpoint", str(checkpoint)])
+
+        assert json.loads(checkpoint.read_text())["watermark"] == 0
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_theme_repository")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
+    def test_checkpoint_with_other_filters_is_ignored(
+        self,
+        mock_storage,
+        mock_receipt_repo,
+        mock_bill_repo,
+        mock_billing_repo,
+        mock_theme_repo,
+        mock_init_db,
+        tmp_path,
+    ):
+        from rentivo.scripts.regenerate_pdfs import main
+
+        checkpoint = tmp_path / "ckpt.json"
+        checkpoint.write_text(json.dumps({"filters": {"status": "paid"}, "watermark": 99}))
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages()
+
+        main(["--workers", "1", "--checkpoint", str(checkpoint)])
+
+        assert mock_bill_repo.return_value.list_after_id.call_args_list[0].args[0] == 0
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_theme_repository")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
+    def test_failure_is_reported_and_run_continues(
+        self,
+        mock_storage,
+        mock_receipt_repo,
+        mock_bill_repo,
+        mock_billing_repo,
+        mock_theme_repo,
+        mock_init_db,
+        tmp_path,
+    ):
+        from rentivo.scripts.regenerate_pdfs import main
+
+        mock_billing_repo.return_value.get_by_id.return_value = self._make_billing()
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages([self._make_bill(1), self._make_bill(2)])
+
+        with patch("rentivo.services.bill_service.BillService.regenerate_pdf") as mock_regen:
+            mock_regen.side_effect = [RuntimeError("boom"), None]
+            main(["--workers", "1", "--checkpoint", str(tmp_path / "ckpt.json")])
+
+        assert mock_regen.call_count == 2
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_organization_repository")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_storage")
+    def test_filters_are_passed_to_repository(
+        self, mock_storage, mock_bill_repo, mock_billing_repo, mock_org_repo, mock_init_db
+    ):
+        from rentivo.scripts.regenerate_pdfs import main
+
+        mock_billing_repo.return_value.get_by_uuid.return_value = self._make_billing()
+        mock_org_repo.return_value.get_by_uuid.return_value = Organization(id=7, name="Org", created_by=1)
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages()
+
+        main(
+            [
+                "--dry-run",
+                "--billing",
+                "billing-uuid",
+                "--organization",
+                "org-uuid",
+                "--from",
+                "2025-01",
+                "--to",
+                "2025-06",
+                "--status",
+                "paid",
+            ]
+        )
+
+        mock_bill_repo.return_value.list_after_id.assert_called_once_with(
+            0,
+            200,
+            month_from="2025-01",
+            month_to="2025-06",
+            status="paid",
+            billing_id=1,
+            organization_id=7,
+        )
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    def test_unknown_billing_uuid(self, mock_bill_repo, mock_billing_repo, mock_init_db):
+        from rentivo.scripts.regenerate_pdfs import main
+
+        mock_billing_repo.return_value.get_by_uuid.return_value = None
+
+        main(["--billing", "missing"])
+
+        mock_bill_repo.return_value.list_after_id.assert_not_called()
+
+    @patch(f"{MODULE}.initialize_db")
+    @patch(f"{MODULE}.get_billing_repository")
+    @patch(f"{MODULE}.get_bill_repository")
+    @patch(f"{MODULE}.get_receipt_repository")
+    @patch(f"{MODULE}.get_storage")
+    def test_no_bills(self, mock_storage, mock_receipt_repo, mock_bill_repo, mock_billing_repo, mock_init_db, tmp_path):
+        from rentivo.scripts.regenerate_pdfs import main
+
+        mock_bill_repo.return_value.list_after_id.side_effect = self._pages()
+
+        main(["--workers", "1", "--checkpoint", str(tmp_path / "ckpt.json")])
+
+        mock_storage.return_value.save_stream.assert_not_called()
+
+    def test_invalid_workers(self):
+        from rentivo.scripts.regenerate_pdfs import main
 
-        with patch("sys.argv", ["prog"]):
-            main()
+        with pytest.raises(SystemExit):
+            main(["--workers", "0"])
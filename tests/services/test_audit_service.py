@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 
 from rentivo.models.audit_log import AuditEventType, AuditLog
+from rentivo.models.page import Page
 from rentivo.services.audit_service import AuditService
 
 
@@ -123,6 +124,12 @@ class TestAuditServiceQueries:
         assert len(result) == 1
         self.mock_repo.list_by_entity.assert_called_once_with("billing", 1)
 
+    def test_list_by_entity_page(self):
+        self.mock_repo.list_by_entity_page.return_value = Page(items=[AuditLog(id=1, event_type="billing.create")])
+        result = self.service.list_by_entity_page("billing", 1, 20, "c")
+        assert len(result.items) == 1
+        self.mock_repo.list_by_entity_page.assert_called_once_with("billing", 1, 20, "c")
+
     def test_list_by_actor(self):
         self.mock_repo.list_by_actor.return_value = [
             AuditLog(id=1, event_type="billing.create"),
@@ -1,8 +1,7 @@
 from unittest.mock import MagicMock
 
 from rentivo.models.billing import Billing
-from rentivo.models.organization import OrganizationMember
-from rentivo.services.authorization_service import AuthorizationService
+from rentivo.services.authorization_service import AuthorizationService, MembershipCache
 
 
 class TestAuthorizationService:
@@ -16,12 +15,12 @@ class TestAuthorizationService:
 
     def test_non_owner_cannot_view(self):
         billing = Billing(name="Test", owner_type="user", owner_id=1)
-        self.mock_org_repo.get_member.return_value = None
+        self.mock_org_repo.list_roles_for_user.return_value = {}
         assert self.service.can_view_billing(2, billing) is False
 
     def test_org_member_can_view(self):
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = OrganizationMember(organization_id=10, user_id=2, role="viewer")
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "viewer"}
         assert self.service.can_view_billing(2, billing) is True
 
     def test_owner_can_edit(self):
@@ -30,17 +29,17 @@ class TestAuthorizationService:
 
     def test_org_admin_can_edit(self):
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = OrganizationMember(organization_id=10, user_id=2, role="admin")
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "admin"}
         assert self.service.can_edit_billing(2, billing) is True
 
     def test_org_viewer_cannot_edit(self):
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = OrganizationMember(organization_id=10, user_id=2, role="viewer")
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "viewer"}
         assert self.service.can_edit_billing(2, billing) is False
 
     def test_org_manager_cannot_edit(self):
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = OrganizationMember(organization_id=10, user_id=2, role="manager")
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "manager"}
         assert self.service.can_edit_billing(2, billing) is False
 
     def test_owner_can_delete(self):
@@ -53,12 +52,12 @@ class TestAuthorizationService:
 
     def test_org_manager_can_manage_bills(self):
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = OrganizationMember(organization_id=10, user_id=2, role="manager")
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "manager"}
         assert self.service.can_manage_bills(2, billing) is True
 
     def test_org_viewer_cannot_manage_bills(self):
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = OrganizationMember(organization_id=10, user_id=2, role="viewer")
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "viewer"}
         assert self.service.can_manage_bills(2, billing) is False
 
     def test_owner_can_transfer(self):
@@ -79,7 +78,7 @@ class TestAuthorizationService:
 
     def test_get_role_org_member(self):
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = OrganizationMember(organization_id=10, user_id=2, role="manager")
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "manager"}
         assert self.service.get_role_for_billing(2, billing) == "manager"
 
     def test_get_role_none(self):
@@ -94,5 +93,74 @@ class TestAuthorizationService:
     def test_org_member_not_found(self):
         """Cover branch 21->26: org billing, org_repo present, but member is None."""
         billing = Billing(name="Test", owner_type="organization", owner_id=10)
-        self.mock_org_repo.get_member.return_value = None
+        self.mock_org_repo.list_roles_for_user.return_value = {}
         assert self.service.get_role_for_billing(2, billing) is None
+
+
+class TestAuthorizationMemoization:
+    def setup_method(self):
+        self.mock_org_repo = MagicMock()
+        self.mock_org_repo.list_roles_for_user.return_value = {10: "manager", 11: "viewer"}
+
+    def test_roles_loaded_once_per_service(self):
+        service = AuthorizationService(self.mock_org_repo)
+        billing = Billing(name="Test", owner_type="organization", owner_id=10)
+        other = Billing(name="Other", owner_type="organization", owner_id=11)
+
+        assert service.can_view_billing(2, billing) is True
+        assert service.get_role_for_billing(2, billing) == "manager"
+        assert service.can_manage_bills(2, billing) is True
+        assert service.can_edit_billing(2, other) is False
+
+        self.mock_org_repo.list_roles_for_user.assert_called_once_with(2)
+        self.mock_org_repo.get_member.assert_not_called()
+
+    def test_roles_loaded_per_user(self):
+        service = AuthorizationService(self.mock_org_repo)
+        billing = Billing(name="Test", owner_type="organization", owner_id=10)
+        service.can_view_billing(2, billing)
+        service.can_view_billing(3, billing)
+        assert self.mock_org_repo.list_roles_for_user.call_count == 2
+
+    def test_owned_billing_needs_no_query(self):
+        service = AuthorizationService(self.mock_org_repo)
+        service.can_edit_billing(1, Billing(name="Test", owner_type="user", owner_id=1))
+        self.mock_org_repo.list_roles_for_user.assert_not_called()
+
+    def test_shared_cache_spans_services(self):
+        cache = MembershipCache(ttl=60)
+        billing = Billing(name="Test", owner_type="organization", owner_id=10)
+
+        AuthorizationService(self.mock_org_repo, cache=cache).can_view_billing(2, billing)
+        assert AuthorizationService(self.mock_org_repo, cache=cache).get_role_for_billing(2, billing) == "manager"
+
+        self.mock_org_repo.list_roles_for_user.assert_called_once_with(2)
+        assert cache.stats()["hits"] == 1
+
+    def test_disabled_cache_queries_every_service(self):
+        cache = MembershipCache(ttl=0)
+        billing = Billing(name="Test", owner_type="organization", owner_id=10)
+
+        AuthorizationService(self.mock_org_repo, cache=cache).can_view_billing(2, billing)
+        AuthorizationService(self.mock_org_repo, cache=cache).can_view_billing(2, billing)
+
+        assert self.mock_org_repo.list_roles_for_user.call_count == 2
+        assert cache.stats()["size"] == 0
+
+
+class TestMembershipCache:
+    def test_invalidate_user(self):
+        cache = MembershipCache(ttl=30)
+        cache.put(1, {10: "admin"})
+        cache.put(2, {10: "viewer"})
+        cache.invalidate_user(1)
+        assert cache.get(1) is None
+        assert cache.get(2) == {10: "viewer"}
+
+    def test_invalidate_org(self):
+        cache = MembershipCache(ttl=30)
+        cache.put(1, {10: "admin"})
+        cache.put(2, {11: "viewer"})
+        cache.invalidate_org(10)
+        assert cache.get(1) is None
+        assert cache.get(2) == {11: "viewer"}
@@ -6,8 +6,16 @@ import pytest
 from rentivo.constants import SP_TZ
 from rentivo.models.bill import Bill, BillLineItem
 from rentivo.models.billing import Billing, BillingItem, ItemType
+from rentivo.models.page import Page
 from rentivo.models.receipt import Receipt
-from rentivo.services.bill_service import BillService, _receipt_storage_key, _storage_key
+from rentivo.services.bill_service import (
+    BillService,
+    ReceiptFetchMetrics,
+    _normalized_receipt_key,
+    _receipt_storage_key,
+    _storage_key,
+)
+from rentivo.storage.local import LocalStorage
 
 
 class TestStorageKey:
@@ -49,7 +57,7 @@ class TestBillService:
                 BillLineItem(description="Water", amount=10000, item_type=ItemType.VARIABLE, sort_order=1),
             ],
         )
-        self.mock_storage.save.return_value = "/path/to/file.pdf"
+        self.mock_storage.save_stream.return_value = "/path/to/file.pdf"
 
         with patch.object(self.service, "pdf_generator") as mock_pdf:
             mock_pdf.generate.return_value = b"%PDF-fake"
@@ -86,14 +94,14 @@ class TestBillService:
             total_amount=100000,
             line_items=line_items,
         )
-        self.mock_storage.save.return_value = "/new/path.pdf"
+        self.mock_storage.save_stream.return_value = "/new/path.pdf"
 
         with patch.object(self.service, "pdf_generator") as mock_pdf:
             mock_pdf.generate.return_value = b"%PDF-fake"
             self.service.update_bill(bill, billing, line_items, "notes", "10/04/2025")
 
         self.mock_repo.update.assert_called_once()
-        self.mock_storage.save.assert_called_once()
+        self.mock_storage.save_stream.assert_called_once()
 
     def test_regenerate_pdf(self):
         bill = Bill(
@@ -104,7 +112,7 @@ class TestBillService:
             total_amount=100000,
         )
         billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
-        self.mock_storage.save.return_value = "/regen/path.pdf"
+        self.mock_storage.save_stream.return_value = "/regen/path.pdf"
 
         with patch.object(self.service, "pdf_generator") as mock_pdf:
             mock_pdf.generate.return_value = b"%PDF-fake"
@@ -153,6 +161,17 @@ class TestBillService:
         self.service.list_bills(1)
         self.mock_repo.list_by_billing.assert_called_once_with(1)
 
+    def test_list_bills_page(self):
+        self.mock_repo.list_by_billing_page.return_value = Page(items=[], next_cursor=None)
+        result = self.service.list_bills_page(1, 24, "cursor")
+        assert result.items == []
+        self.mock_repo.list_by_billing_page.assert_called_once_with(1, 24, "cursor")
+
+    def test_list_bill_summaries_page(self):
+        self.mock_repo.list_summaries_by_billing_page.return_value = Page(items=[])
+        self.service.list_bill_summaries_page(1, 24)
+        self.mock_repo.list_summaries_by_billing_page.assert_called_once_with(1, 24, None)
+
     def test_get_bill(self):
         self.mock_repo.get_by_id.return_value = None
         self.service.get_bill(1)
@@ -222,6 +241,24 @@ class TestGetPixData:
 
         assert png is None
 
+    def test_storage_used_as_qrcode_cache_tier(self):
+        from rentivo.pix import qrcode_cache
+
+        qrcode_cache.clear()
+        billing = Billing(name="Apt", pix_key="tier@pix.com")
+        storage = MagicMock()
+        storage.get.side_effect = FileNotFoundError
+        with patch("rentivo.services.bill_service.settings") as mock_settings:
+            mock_settings.pix_merchant_name = "Rentivo"
+            mock_settings.pix_merchant_city = "Sao Paulo"
+            png, _, _ = BillService._get_pix_data(billing, 12345, storage=storage)
+
+        storage.save.assert_called_once()
+        key, data = storage.save.call_args.args
+        assert key.endswith(".png") and "pix-qr/" in key
+        assert data == png
+        qrcode_cache.clear()
+
 
 class TestBillServiceValueErrors:
     """Test ValueError checks for id=None on various methods."""
@@ -297,6 +334,153 @@ class TestReceiptStorageKey:
         assert key == "bu/bi/receipts/ru"
 
 
+class TestBatchPdfRegeneration:
+    def setup_method(self):
+        self.mock_repo = MagicMock()
+        self.mock_storage = MagicMock()
+        self.mock_receipt_repo = MagicMock()
+        self.mock_receipt_repo.list_by_bill.return_value = []
+        self.mock_receipt_repo.create.side_effect = lambda r: r
+        self.service = BillService(self.mock_repo, self.mock_storage, self.mock_receipt_repo)
+        self.bill = Bill(id=1, uuid="bill-uuid", billing_id=1, reference_month="2025-03", total_amount=100000)
+        self.billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
+
+    def _add(self, name):
+        self.service.add_receipt(self.bill, self.billing, name, b"%PDF-x", "application/pdf")
+
+    def test_receipts_in_batch_render_once(self):
+        with patch.object(self.service, "_generate_and_store_pdf") as render:
+            with self.service.batch_pdf_regeneration():
+                for name in ("a.pdf", "b.pdf", "c.pdf"):
+                    self._add(name)
+                assert self.service.is_pdf_pending(self.bill)
+                render.assert_not_called()
+        render.assert_called_once_with(self.bill, self.billing)
+        assert not self.service.is_pdf_pending(self.bill)
+
+    def test_without_batch_renders_immediately(self):
+        with patch.object(self.service, "_generate_and_store_pdf") as render:
+            self._add("a.pdf")
+            self._add("b.pdf")
+        assert render.call_count == 2
+
+    def test_nested_batches_flush_on_outermost_exit(self):
+        with patch.object(self.service, "_generate_and_store_pdf") as render:
+            with self.service.batch_pdf_regeneration():
+                with self.service.batch_pdf_regeneration():
+                    self._add("a.pdf")
+                render.assert_not_called()
+                self.service.delete_receipt(Receipt(id=5, bill_id=1, filename="a.pdf"), self.bill, self.billing)
+        render.assert_called_once()
+
+    def test_batch_flushes_when_block_raises(self):
+        with patch.object(self.service, "_generate_and_store_pdf") as render:
+            with pytest.raises(RuntimeError):
+                with self.service.batch_pdf_regeneration():
+                    self._add("a.pdf")
+                    raise RuntimeError("upload aborted")
+        render.assert_called_once()
+
+    def test_flush_error_does_not_mask_block_error(self, caplog):
+        with patch.object(self.service, "_generate_and_store_pdf", side_effect=OSError("storage down")):
+            with pytest.raises(RuntimeError, match="upload aborted"):
+                with self.service.batch_pdf_regeneration():
+                    self._add("a.pdf")
+                    raise RuntimeError("upload aborted")
+        assert "Failed to regenerate PDFs after the batch was aborted" in caplog.text
+
+    def test_flush_error_propagates_after_successful_block(self):
+        with patch.object(self.service, "_generate_and_store_pdf", side_effect=OSError("storage down")):
+            with pytest.raises(OSError, match="storage down"):
+                with self.service.batch_pdf_regeneration():
+                    self._add("a.pdf")
+
+    def test_generate_bill_with_receipts_renders_once(self):
+        self.mock_repo.create.side_effect = lambda b: b.model_copy(update={"id": 7, "uuid": "new"})
+        with patch.object(self.service, "_generate_and_store_pdf") as render:
+            with self.service.batch_pdf_regeneration():
+                bill = self.service.generate_bill(self.billing, "2025-04", {}, [("Extra", 100)])
+                self.service.add_receipt(bill, self.billing, "a.pdf", b"%PDF-x", "application/pdf")
+        render.assert_called_once()
+        assert render.call_args.args[0].id == 7
+
+
+class TestJobDispatch:
+    def setup_method(self):
+        self.mock_repo = MagicMock()
+        self.mock_storage = MagicMock()
+        self.mock_receipt_repo = MagicMock()
+        self.mock_receipt_repo.list_by_bill.return_value = []
+        self.mock_receipt_repo.create.side_effect = lambda r: r
+        self.mock_job_service = MagicMock()
+        self.service = BillService(
+            self.mock_repo, self.mock_storage, self.mock_receipt_repo, job_service=self.mock_job_service
+        )
+        self.bill = Bill(id=1, uuid="bill-uuid", billing_id=1, reference_month="2025-03", total_amount=100000)
+        self.billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
+
+    def test_schedule_enqueues_instead_of_rendering(self):
+        with patch.object(self.service, "_generate_and_store_pdf") as render:
+            self.service.schedule_pdf(self.bill, self.billing)
+        render.assert_not_called()
+        self.mock_job_service.enqueue_bill_pdf.assert_called_once_with(1)
+        self.mock_repo.update_pdf_status.assert_called_once_with(1, "pending")
+        assert self.bill.pdf_status == "pending"
+        assert self.service.is_pdf_pending(self.bill)
+
+    def test_marks_pending_before_enqueueing(self):
+        calls = MagicMock()
+        calls.attach_mock(self.mock_repo.update_pdf_status, "update_pdf_status")
+        calls.attach_mock(self.mock_job_service.enqueue_bill_pdf, "enqueue_bill_pdf")
+
+        self.service.schedule_pdf(self.bill, self.billing)
+
+        assert [c[0] for c in calls.mock_calls] == ["update_pdf_status", "enqueue_bill_pdf"]
+
+    def test_enqueue_failure_renders_inline(self):
+        self.mock_job_service.enqueue_bill_pdf.side_effect = RuntimeError("database is locked")
+        with patch.object(self.service, "pdf_generator") as mock_pdf:
+            mock_pdf.generate.return_value = b"%PDF-fake"
+            self.service.schedule_pdf(self.bill, self.billing)
+        self.mock_storage.save_stream.assert_called_once()
+        assert self.mock_repo.update_pdf_status.call_args_list[-1].args == (1, "ready")
+        assert self.bill.pdf_status == "ready"
+        assert not self.service.is_pdf_pending(self.bill)
+
+    def test_enqueue_and_inline_failure_restores_status(self):
+        self.mock_job_service.enqueue_bill_pdf.side_effect = RuntimeError("database is locked")
+        with patch.object(self.service, "_generate_and_store_pdf", side_effect=RuntimeError("storage down")):
+            with pytest.raises(RuntimeError, match="storage down"):
+                self.service.schedule_pdf(self.bill, self.billing)
+        assert self.mock_repo.update_pdf_status.call_args_list[-1].args == (1, "ready")
+        assert self.bill.pdf_status == "ready"
+        assert not self.service.is_pdf_pending(self.bill)
+
+    def test_batch_enqueues_once(self):
+        with patch.object(self.service, "_generate_and_store_pdf") as render:
+            with self.service.batch_pdf_regeneration():
+                for name in ("a.pdf", "b.pdf"):
+                    self.service.add_receipt(self.bill, self.billing, name, b"%PDF-x", "application/pdf")
+        render.assert_not_called()
+        self.mock_job_service.enqueue_bill_pdf.assert_called_once_with(1)
+
+    def test_regenerate_pdf_still_renders_inline(self):
+        self.bill.pdf_status = "pending"
+        with patch.object(self.service, "pdf_generator") as mock_pdf:
+            mock_pdf.generate.return_value = b"%PDF-fake"
+            self.service.regenerate_pdf(self.bill, self.billing)
+        self.mock_job_service.enqueue_bill_pdf.assert_not_called()
+        self.mock_repo.update_pdf_status.assert_called_once_with(1, "ready")
+        assert self.bill.pdf_status == "ready"
+        assert not self.service.is_pdf_pending(self.bill)
+
+    def test_ready_bill_does_not_touch_pdf_status(self):
+        with patch.object(self.service, "pdf_generator") as mock_pdf:
+            mock_pdf.generate.return_value = b"%PDF-fake"
+            self.service.regenerate_pdf(self.bill, self.billing)
+        self.mock_repo.update_pdf_status.assert_not_called()
+
+
 class TestReceiptMethods:
     """Test receipt-related methods on BillService."""
 
@@ -333,8 +517,9 @@ class TestReceiptMethods:
             result = self.service.add_receipt(bill, billing, "receipt.pdf", b"pdf-data", "application/pdf")
 
         assert result.filename == "receipt.pdf"
-        # Storage save called twice: once for receipt file, once for regenerated PDF
-        assert self.mock_storage.save.call_count == 2
+        # Receipt file saved, then the regenerated PDF streamed
+        self.mock_storage.save.assert_called_once()
+        self.mock_storage.save_stream.assert_called_once()
         self.mock_receipt_repo.create.assert_called_once()
 
     def test_add_receipt_sort_order_increments(self):
@@ -405,6 +590,35 @@ class TestReceiptMethods:
         with pytest.raises(ValueError, match="Empty file"):
             self.service.add_receipt(bill, billing, "f.pdf", b"", "application/pdf")
 
+    def test_add_receipt_stream(self):
+        import io
+
+        bill = Bill(id=1, uuid="bill-uuid", billing_id=1, reference_month="2025-03")
+        billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
+        self.mock_receipt_repo.list_by_bill.return_value = []
+        self.mock_receipt_repo.create.side_effect = lambda r: r
+        stream = io.BytesIO(b"%PDF-data")
+
+        with patch.object(self.service, "_generate_and_store_pdf"):
+            receipt = self.service.add_receipt_stream(bill, billing, "r.pdf", stream, "application/pdf", 9)
+
+        self.mock_storage.save_stream.assert_called_once_with(
+            receipt.storage_key, stream, content_type="application/pdf"
+        )
+        self.mock_storage.save.assert_not_called()
+        assert receipt.file_size == 9
+
+    def test_add_receipt_stream_too_large_is_not_stored(self):
+        import io
+
+        bill = Bill(id=1, uuid="u", billing_id=1, reference_month="2025-03")
+        billing = Billing(id=1, uuid="bu", name="A")
+        with pytest.raises(ValueError, match="File too large"):
+            self.service.add_receipt_stream(
+                bill, billing, "f.pdf", io.BytesIO(b""), "application/pdf", 10 * 1024 * 1024 + 1
+            )
+        self.mock_storage.save_stream.assert_not_called()
+
     def test_delete_receipt(self):
         bill = Bill(
             id=1,
@@ -538,74 +752,383 @@ class TestPdfGenerationWithReceipts:
         self.mock_receipt_repo = MagicMock()
         self.service = BillService(self.mock_repo, self.mock_storage, self.mock_receipt_repo)
 
+    def _bill(self, bill_id: int | None = 1) -> Bill:
+        return Bill(id=bill_id, uuid="bill-uuid", billing_id=1, reference_month="2025-03", total_amount=100000)
+
+    def _stored_pdf(self) -> dict:
+        """Capture what _generate_and_store_pdf streams to storage."""
+        stored: dict = {}
+
+        def _save_stream(key, stream, content_type="application/pdf"):
+            stored[key] = stream.read()
+            return "/out.pdf"
+
+        self.mock_storage.save_stream.side_effect = _save_stream
+        return stored
+
     def test_pdf_generation_fetches_and_merges_receipts(self):
-        bill = Bill(
-            id=1,
-            uuid="bill-uuid",
-            billing_id=1,
-            reference_month="2025-03",
-            total_amount=100000,
-        )
         billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
-
         self.mock_receipt_repo.list_by_bill.return_value = [
             Receipt(id=1, bill_id=1, filename="r.pdf", storage_key="key/r.pdf", content_type="application/pdf"),
         ]
-        self.mock_storage.get.return_value = b"%PDF-receipt"
-        self.mock_storage.save.return_value = "/out.pdf"
+        self.mock_storage.read_into.side_effect = lambda key, stream: stream.write(b"%PDF-receipt")
+        stored = self._stored_pdf()
+
+        def _merge(invoice, receipts, output, max_dpi):
+            output.write(invoice + b"+" + b"+".join(source.read() for source, _ in receipts))
+            return True
 
         with patch.object(self.service, "pdf_generator") as mock_pdf:
             mock_pdf.generate.return_value = b"%PDF-invoice"
-            with patch("rentivo.services.bill_service.merge_receipts") as mock_merge:
-                mock_merge.return_value = b"%PDF-merged"
-                self.service._generate_and_store_pdf(bill, billing)
+            with patch("rentivo.services.bill_service.merge_receipts_into", side_effect=_merge) as mock_merge:
+                self.service._generate_and_store_pdf(self._bill(), billing)
 
         mock_merge.assert_called_once()
-        self.mock_storage.get.assert_called_once_with("key/r.pdf")
+        self.mock_storage.read_into.assert_called_once()
+        assert self.mock_storage.read_into.call_args.args[0] == "key/r.pdf"
+        assert list(stored.values()) == [b"%PDF-invoice+%PDF-receipt"]
+        self.mock_storage.save.assert_not_called()
 
     def test_pdf_generation_no_receipts_skips_merge(self):
-        bill = Bill(
-            id=1,
-            uuid="bill-uuid",
-            billing_id=1,
-            reference_month="2025-03",
-            total_amount=100000,
-        )
         billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
-
         self.mock_receipt_repo.list_by_bill.return_value = []
-        self.mock_storage.save.return_value = "/out.pdf"
+        stored = self._stored_pdf()
 
         with patch.object(self.service, "pdf_generator") as mock_pdf:
             mock_pdf.generate.return_value = b"%PDF-invoice"
-            with patch("rentivo.services.bill_service.merge_receipts") as mock_merge:
-                self.service._generate_and_store_pdf(bill, billing)
+            with patch("rentivo.services.bill_service.merge_receipts_into") as mock_merge:
+                self.service._generate_and_store_pdf(self._bill(), billing)
 
         mock_merge.assert_not_called()
+        assert list(stored.values()) == [b"%PDF-invoice"]
 
-    def test_fetch_receipt_data_handles_storage_error(self):
-        bill = Bill(
-            id=1,
-            uuid="bill-uuid",
-            billing_id=1,
-            reference_month="2025-03",
-            total_amount=100000,
-        )
+    def test_unreadable_invoice_is_stored_alone(self):
+        billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
         self.mock_receipt_repo.list_by_bill.return_value = [
             Receipt(id=1, bill_id=1, filename="r.pdf", storage_key="key/r.pdf", content_type="application/pdf"),
         ]
-        self.mock_storage.get.side_effect = Exception("download failed")
+        stored = self._stored_pdf()
+
+        with patch.object(self.service, "pdf_generator") as mock_pdf:
+            mock_pdf.generate.return_value = b"not-a-pdf"
+            self.service._generate_and_store_pdf(self._bill(), billing)
+
+        assert list(stored.values()) == [b"not-a-pdf"]
+
+    def test_yielded_receipts_are_closed_as_iteration_moves_on(self):
+        receipts = [
+            Receipt(id=i, bill_id=1, filename=f"r{i}.pdf", storage_key=f"k{i}", content_type="application/pdf")
+            for i in range(3)
+        ]
+        self.mock_storage.read_into.side_effect = lambda key, stream: stream.write(key.encode())
+
+        opened = []
+        for source, _ in self.service._iter_receipt_files(receipts):
+            assert all(previous.closed for previous in opened)
+            opened.append(source)
+            assert source.read() == f"k{len(opened) - 1}".encode()
+
+        assert len(opened) == 3
+        assert all(source.closed for source in opened)
+
+    def test_large_receipt_spills_to_disk(self):
+        receipt = Receipt(id=1, bill_id=1, filename="r.pdf", storage_key="k", content_type="application/pdf")
+        self.mock_storage.read_into.side_effect = lambda key, stream: stream.write(b"x" * 2048)
+
+        with patch("rentivo.services.bill_service.settings.pdf_spool_max_bytes", 1024):
+            source = self.service._fetch_receipt_file(receipt, [])
+
+        with source:
+            assert source._rolled
+            assert len(source.read()) == 2048
+
+    def _pdf_receipts(self, count: int) -> list[Receipt]:
+        return [
+            Receipt(
+                id=i, uuid=f"r{i}", bill_id=1, filename="r.pdf", storage_key=f"k{i}", content_type="application/pdf"
+            )
+            for i in range(count)
+        ]
+
+    def test_receipts_are_fetched_concurrently(self):
+        import threading
+
+        barrier = threading.Barrier(3, timeout=5)
+
+        def _read_into(key, stream):
+            barrier.wait()  # only passes when three downloads are in flight at once
+            stream.write(key.encode())
+
+        self.mock_storage.read_into.side_effect = _read_into
+        with patch("rentivo.services.bill_service.settings.receipt_fetch_concurrency", 3):
+            data = [f.read() for f, _ in self.service._iter_receipt_files(self._pdf_receipts(3))]
+
+        assert data == [b"k0", b"k1", b"k2"]
+
+    def test_concurrent_fetch_keeps_order_and_skips_failures(self):
+        import time as time_module
+
+        def _read_into(key, stream):
+            if key == "k2":
+                raise OSError("download failed")
+            # Earlier receipts finish last
+            time_module.sleep((5 - int(key[1:])) * 0.01)
+            stream.write(key.encode())
+
+        self.mock_storage.read_into.side_effect = _read_into
+        with patch("rentivo.services.bill_service.settings.receipt_fetch_concurrency", 4):
+            data = [f.read() for f, _ in self.service._iter_receipt_files(self._pdf_receipts(6))]
+
+        assert data == [b"k0", b"k1", b"k3", b"k4", b"k5"]
+
+    def test_prefetch_is_bounded(self):
+        import threading
+
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def _read_into(key, stream):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            stream.write(key.encode())
+            with lock:
+                in_flight -= 1
+
+        self.mock_storage.read_into.side_effect = _read_into
+        with patch("rentivo.services.bill_service.settings.receipt_fetch_concurrency", 2):
+            files = self.service._iter_receipt_files(self._pdf_receipts(8))
+            first, _ = next(files)
+            assert self.mock_storage.read_into.call_count <= 3
+            files.close()
+
+        assert first.closed
+        assert peak <= 2
+
+    def test_stopping_early_closes_prefetched_files(self):
+        fetched = []
+
+        def _read_into(key, stream):
+            fetched.append(stream)
+            stream.write(key.encode())
+
+        self.mock_storage.read_into.side_effect = _read_into
+        with patch("rentivo.services.bill_service.settings.receipt_fetch_concurrency", 3):
+            files = self.service._iter_receipt_files(self._pdf_receipts(3))
+            next(files)
+            files.close()
+
+        assert len(fetched) == 3
+        assert all(stream.closed for stream in fetched)
+
+    def test_fetch_latency_is_logged(self, caplog):
+        import logging
+
+        self.mock_storage.read_into.side_effect = lambda key, stream: stream.write(b"x")
+        with caplog.at_level(logging.DEBUG, logger="rentivo.services.bill_service"):
+            list(self.service._iter_receipt_files(self._pdf_receipts(2)))
+
+        messages = [r.getMessage() for r in caplog.records]
+        assert any(m.startswith("Fetched receipt r1 (key=k1) in ") for m in messages)
+        assert any(m.startswith("Fetched 2 receipt(s) in ") and "slowest" in m for m in messages)
+
+    def _generate_with_optimize(self, enabled: bool, timings: dict[str, float]):
+        self.mock_receipt_repo.list_by_bill.return_value = []
+        stored = self._stored_pdf()
+
+        def _optimize(source, output):
+            source.seek(0)
+            assert source.read() == b"%PDF-invoice"
+            output.write(b"%PDF-small")
+            return True
+
+        with (
+            patch.object(self.service, "pdf_generator") as mock_pdf,
+            patch("rentivo.services.bill_service.settings.pdf_optimize", enabled),
+            patch("rentivo.services.bill_service.optimize_pdf_file", side_effect=_optimize) as optimize,
+        ):
+            mock_pdf.generate.return_value = b"%PDF-invoice"
+            self.service._generate_and_store_pdf(
+                self._bill(), Billing(id=1, uuid="billing-uuid", name="Apt 101"), timings=timings
+            )
+        return optimize, list(stored.values())
+
+    def test_optimize_stage_runs_when_enabled(self):
+        timings: dict[str, float] = {}
+        optimize, stored = self._generate_with_optimize(True, timings)
+
+        optimize.assert_called_once()
+        assert stored == [b"%PDF-small"]
+        assert "optimize" in timings
+
+    def test_optimize_stage_skipped_by_default(self):
+        timings: dict[str, float] = {}
+        optimize, stored = self._generate_with_optimize(False, timings)
+
+        optimize.assert_not_called()
+        assert stored == [b"%PDF-invoice"]
+        assert "optimize" not in timings
+
+    def test_receipt_storage_error_is_skipped(self):
+        receipts = [
+            Receipt(id=1, bill_id=1, filename="r.pdf", storage_key="key/r.pdf", content_type="application/pdf"),
+        ]
+        self.mock_storage.read_into.side_effect = Exception("download failed")
+
+        assert list(self.service._iter_receipt_files(receipts)) == []  # Error is caught and skipped
 
-        result = self.service._fetch_receipt_data(bill)
-        assert result == []  # Error is caught and skipped
+    def test_skipped_receipt_is_logged_and_counted(self, caplog):
+        import logging
 
-    def test_fetch_receipt_data_no_receipt_repo(self):
+        receipts = [
+            Receipt(id=4, uuid="r4", bill_id=9, filename="r.pdf", storage_key="k4", content_type="application/pdf"),
+        ]
+        self.mock_storage.read_into.side_effect = Exception("download failed")
+        metrics = ReceiptFetchMetrics()
+        with (
+            patch("rentivo.services.bill_service.receipt_fetch_metrics", metrics),
+            caplog.at_level(logging.WARNING, logger="rentivo.services.bill_service"),
+        ):
+            assert list(self.service._iter_receipt_files(receipts)) == []
+
+        [record] = [r for r in caplog.records if r.levelno == logging.WARNING]
+        assert "receipt id=4 (r4) of bill id=9" in record.getMessage()
+        assert record.exc_info is not None
+        assert (metrics.snapshot()["failures"], metrics.snapshot()["fetches"]) == (1, 0)
+
+    def test_fetch_latency_is_recorded(self):
+        self.mock_storage.read_into.side_effect = lambda key, stream: stream.write(b"x")
+        metrics = ReceiptFetchMetrics()
+        with patch("rentivo.services.bill_service.receipt_fetch_metrics", metrics):
+            list(self.service._iter_receipt_files(self._pdf_receipts(2)))
+
+        snapshot = metrics.snapshot()
+        assert (snapshot["fetches"], snapshot["failures"]) == (2, 0)
+        assert snapshot["buckets"][-1] == (float("inf"), 2)
+
+    def test_list_receipts_no_receipt_repo(self):
         service = BillService(self.mock_repo, self.mock_storage)
-        bill = Bill(id=1, uuid="u", billing_id=1, reference_month="2025-03")
-        result = service._fetch_receipt_data(bill)
-        assert result == []
+        assert service._list_receipts(self._bill()) == []
 
-    def test_fetch_receipt_data_bill_id_none(self):
-        bill = Bill(id=None, uuid="u", billing_id=1, reference_month="2025-03")
-        result = self.service._fetch_receipt_data(bill)
-        assert result == []
+    def test_list_receipts_bill_id_none(self):
+        assert self.service._list_receipts(self._bill(bill_id=None)) == []
+
+
+def _jpeg_bytes() -> bytes:
+    from io import BytesIO
+
+    from PIL import Image
+
+    buf = BytesIO()
+    Image.new("RGB", (40, 60), color="red").save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+class TestNormalizedReceipts:
+    """Image receipts are rendered to PDF once, at upload, and merged from that copy."""
+
+    def setup_method(self):
+        self.mock_repo = MagicMock()
+        self.mock_receipt_repo = MagicMock()
+        self.mock_receipt_repo.list_by_bill.return_value = []
+        self.mock_receipt_repo.create.side_effect = lambda r: r
+        self.bill = Bill(id=1, uuid="bill-uuid", billing_id=1, reference_month="2025-03", total_amount=100000)
+        self.billing = Billing(id=1, uuid="billing-uuid", name="Apt 101")
+
+    def _service(self, storage):
+        return BillService(self.mock_repo, storage, self.mock_receipt_repo)
+
+    def test_normalized_key_is_content_addressed_next_to_original(self):
+        assert _normalized_receipt_key("bu/bi/receipts/r.jpg", "abc") == "bu/bi/receipts/normalized/abc.pdf"
+        assert _normalized_receipt_key("r.jpg", "abc") == "normalized/abc.pdf"
+
+    def test_image_upload_stores_pdf_rendering(self, tmp_path):
+        import hashlib
+
+        storage = LocalStorage(str(tmp_path))
+        jpeg = _jpeg_bytes()
+        with patch.object(BillService, "_generate_and_store_pdf"):
+            receipt = self._service(storage).add_receipt(self.bill, self.billing, "r.jpg", jpeg, "image/jpeg")
+
+        digest = hashlib.sha256(jpeg).hexdigest()
+        assert receipt.normalized_key == f"bills/billing-uuid/bill-uuid/receipts/normalized/{digest}.pdf"
+        assert storage.get(receipt.normalized_key).startswith(b"%PDF")
+
+    def test_streamed_image_upload_stores_pdf_rendering(self, tmp_path):
+        import io
+
+        storage = LocalStorage(str(tmp_path))
+        jpeg = _jpeg_bytes()
+        with patch.object(BillService, "_generate_and_store_pdf"):
+            receipt = self._service(storage).add_receipt_stream(
+                self.bill, self.billing, "r.jpg", io.BytesIO(jpeg), "image/jpeg", len(jpeg)
+            )
+
+        assert storage.get(receipt.storage_key) == jpeg
+        assert storage.get(receipt.normalized_key).startswith(b"%PDF")
+
+    def test_streamed_image_is_normalized_from_the_upload_file(self, tmp_path):
+        import io
+
+        storage = LocalStorage(str(tmp_path))
+        upload = io.BytesIO(_jpeg_bytes())
+        with (
+            patch.object(BillService, "_generate_and_store_pdf"),
+            patch("rentivo.services.bill_service.normalize_receipt", return_value=b"%PDF-n") as normalize,
+        ):
+            self._service(storage).add_receipt_stream(
+                self.bill, self.billing, "r.jpg", upload, "image/jpeg", len(upload.getvalue())
+            )
+
+        source, content_type, _ = normalize.call_args.args
+        assert (source, content_type) == (upload, "image/jpeg")
+
+    def test_pdf_upload_has_no_rendering(self):
+        storage = MagicMock()
+        with patch.object(BillService, "_generate_and_store_pdf"):
+            receipt = self._service(storage).add_receipt(self.bill, self.billing, "r.pdf", b"%PDF-x", "application/pdf")
+
+        assert receipt.normalized_key is None
+        storage.save.assert_called_once()
+
+    def test_unconvertible_image_is_still_attached(self):
+        storage = MagicMock()
+        with patch.object(BillService, "_generate_and_store_pdf"):
+            receipt = self._service(storage).add_receipt(self.bill, self.billing, "r.png", b"not-png", "image/png")
+
+        assert receipt.normalized_key is None
+        self.mock_receipt_repo.create.assert_called_once()
+
+    def test_merge_uses_rendering_without_reencoding(self):
+        storage = MagicMock()
+        storage.read_into.side_effect = lambda key, stream: stream.write(b"%PDF-normalized")
+        receipt = Receipt(
+            id=1,
+            bill_id=1,
+            filename="r.jpg",
+            storage_key="k/r.jpg",
+            normalized_key="k/normalized/h.pdf",
+            content_type="image/jpeg",
+        )
+
+        with patch("rentivo.services.bill_service.normalize_receipt") as normalize:
+            data = [(f.read(), ct) for f, ct in self._service(storage)._iter_receipt_files([receipt])]
+
+        assert data == [(b"%PDF-normalized", "application/pdf")]
+        assert storage.read_into.call_args.args[0] == "k/normalized/h.pdf"
+        storage.get.assert_not_called()
+        normalize.assert_not_called()
+
+    def test_legacy_image_receipt_is_normalized_once(self, tmp_path):
+        storage = LocalStorage(str(tmp_path))
+        storage.save("k/r.jpg", _jpeg_bytes())
+        receipt = Receipt(id=7, bill_id=1, filename="r.jpg", storage_key="k/r.jpg", content_type="image/jpeg")
+
+        data = [(f.read(), ct) for f, ct in self._service(storage)._iter_receipt_files([receipt])]
+
+        assert data[0][1] == "application/pdf"
+        receipt_id, key = self.mock_receipt_repo.set_normalized_key.call_args.args
+        assert receipt_id == 7
+        assert storage.get(key) == data[0][0]
@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 
-from rentivo.models.billing import Billing, BillingItem, ItemType
+from rentivo.models.billing import Billing, BillingItem, BillingSummary, ItemType
+from rentivo.models.page import Page
 from rentivo.services.billing_service import BillingService
 
 
@@ -68,6 +69,19 @@ class TestBillingService:
         assert len(result) == 1
         self.mock_repo.list_for_user.assert_called_once_with(1)
 
+    def test_list_billings_for_user_page(self):
+        self.mock_repo.list_for_user_page.return_value = Page(items=[Billing(name="A")], next_cursor="next")
+        result = self.service.list_billings_for_user_page(1, 30)
+        assert result.next_cursor == "next"
+        self.mock_repo.list_for_user_page.assert_called_once_with(1, 30, None)
+
+    def test_list_billing_summaries_for_user_page(self):
+        summary = BillingSummary(id=1, uuid="u", name="A", item_count=2)
+        self.mock_repo.list_summaries_for_user_page.return_value = Page(items=[summary])
+        result = self.service.list_billing_summaries_for_user_page(1, 30, "c")
+        assert result.items == [summary]
+        self.mock_repo.list_summaries_for_user_page.assert_called_once_with(1, 30, "c")
+
     def test_transfer_to_organization(self):
         self.mock_repo.get_by_id.return_value = Billing(id=1, name="A", owner_type="user", owner_id=1)
         self.service.transfer_to_organization(1, 5)
@@ -1,11 +1,11 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from rentivo.models.invite import Invite
 from rentivo.models.organization import OrganizationMember
 from rentivo.models.user import User
-from rentivo.services.invite_service import InviteService
+from rentivo.services.invite_service import InviteService, invite_count_cache
 
 
 class TestInviteService:
@@ -45,9 +45,11 @@ class TestInviteService:
         self.mock_invite_repo.get_by_uuid.return_value = Invite(
             id=1, uuid="abc", organization_id=1, invited_user_id=2, role="viewer", status="pending"
         )
-        self.service.accept_invite("abc", 2)
+        with patch("rentivo.services.invite_service.membership_cache") as cache:
+            self.service.accept_invite("abc", 2)
         self.mock_org_repo.add_member.assert_called_once_with(1, 2, "viewer")
         self.mock_invite_repo.update_status.assert_called_once_with(1, "accepted")
+        cache.invalidate_user.assert_called_once_with(2)
 
     def test_accept_invite_wrong_user(self):
         self.mock_invite_repo.get_by_uuid.return_value = Invite(
@@ -102,3 +104,36 @@ class TestInviteService:
     def test_count_pending(self):
         self.mock_invite_repo.count_pending_for_user.return_value = 3
         assert self.service.count_pending(1) == 3
+
+    def test_count_pending_is_cached(self):
+        self.mock_invite_repo.count_pending_for_user.return_value = 3
+        with patch.object(invite_count_cache, "ttl", 60):
+            assert self.service.count_pending(1) == 3
+            assert self.service.count_pending(1) == 3
+        self.mock_invite_repo.count_pending_for_user.assert_called_once_with(1)
+
+    def test_count_pending_cache_disabled_by_default(self):
+        self.mock_invite_repo.count_pending_for_user.return_value = 3
+        self.service.count_pending(1)
+        self.service.count_pending(1)
+        assert self.mock_invite_repo.count_pending_for_user.call_count == 2
+
+    def test_send_invite_invalidates_count(self):
+        self.mock_user_repo.get_by_username.return_value = User(id=2, username="bob", password_hash="h")
+        self.mock_org_repo.get_member.return_value = None
+        self.mock_invite_repo.has_pending_invite.return_value = False
+        self.mock_invite_repo.count_pending_for_user.side_effect = [0, 1]
+
+        with patch.object(invite_count_cache, "ttl", 60):
+            assert self.service.count_pending(2) == 0
+            self.service.send_invite(1, "bob", "viewer", 1)
+            assert self.service.count_pending(2) == 1
+
+    def test_accept_and_decline_invalidate_count(self):
+        self.mock_invite_repo.get_by_uuid.return_value = Invite(
+            id=1, uuid="abc", organization_id=1, invited_user_id=2, role="viewer", status="pending"
+        )
+        with patch("rentivo.services.invite_service.invite_count_cache") as cache:
+            self.service.accept_invite("abc", 2)
+            self.service.decline_invite("abc", 2)
+        assert [c.args for c in cache.invalidate.call_args_list] == [(2,), (2,)]
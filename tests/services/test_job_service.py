@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from rentivo.models.job import Job
+from rentivo.services.job_service import JobService, backoff_delay
+
+
+class TestBackoffDelay:
+    @pytest.mark.parametrize(
+        "attempts, seconds",
+        [(0, 10), (1, 10), (2, 20), (3, 40), (4, 80), (10, 900)],
+    )
+    def test_exponential_with_cap(self, attempts, seconds):
+        with patch("rentivo.services.job_service.settings") as mock_settings:
+            mock_settings.job_backoff_seconds = 10
+            mock_settings.job_backoff_max_seconds = 900
+            assert backoff_delay(attempts) == timedelta(seconds=seconds)
+
+
+class TestJobService:
+    def setup_method(self):
+        self.mock_repo = MagicMock()
+        self.mock_repo.enqueue.side_effect = lambda job: job.model_copy(update={"id": 1})
+        self.service = JobService(self.mock_repo)
+
+    def test_enqueue_bill_pdf(self):
+        job = self.service.enqueue_bill_pdf(42)
+        assert job.id == 1
+        queued = self.mock_repo.enqueue.call_args.args[0]
+        assert queued.kind == "bill.pdf"
+        assert queued.payload == {"bill_id": 42}
+        assert queued.dedupe_key == "bill-pdf:42"
+
+    def test_enqueue_uses_configured_max_attempts(self):
+        with patch("rentivo.services.job_service.settings") as mock_settings:
+            mock_settings.job_max_attempts = 7
+            self.service.enqueue("x", {})
+        assert self.mock_repo.enqueue.call_args.args[0].max_attempts == 7
+
+    def test_reap_stale_requeues_and_fails_exhausted(self):
+        exhausted = Job(id=7, kind="x", attempts=5, max_attempts=5)
+        self.mock_repo.fail_stale.return_value = [exhausted]
+        self.mock_repo.requeue_stale.return_value = 2
+        assert self.service.reap_stale() == [exhausted]
+        locked_before = self.mock_repo.fail_stale.call_args.args[0]
+        self.mock_repo.requeue_stale.assert_called_once_with(locked_before)
+        assert datetime.now(locked_before.tzinfo) - locked_before >= timedelta(seconds=600)
+
+    def test_claim(self):
+        self.mock_repo.claim.return_value = []
+        assert self.service.claim("w1", 3) == []
+        worker_id, limit, now = self.mock_repo.claim.call_args.args
+        assert (worker_id, limit) == ("w1", 3)
+        assert isinstance(now, datetime)
+        self.mock_repo.requeue_stale.assert_not_called()
+
+    def test_heartbeat(self):
+        self.mock_repo.heartbeat.return_value = True
+        assert self.service.heartbeat(Job(id=5, kind="x", locked_by="w1")) is True
+        job_id, worker_id, _ = self.mock_repo.heartbeat.call_args.args
+        assert (job_id, worker_id) == (5, "w1")
+
+    def test_heartbeat_reports_lost_lock(self):
+        self.mock_repo.heartbeat.return_value = False
+        assert self.service.heartbeat(Job(id=5, kind="x", locked_by="w1")) is False
+
+    def test_complete(self):
+        self.service.complete(Job(id=5, kind="x", locked_by="w1"))
+        self.mock_repo.mark_done.assert_called_once_with(5, "w1")
+
+    def test_complete_without_id(self):
+        with pytest.raises(ValueError):
+            self.service.complete(Job(kind="x"))
+
+    def test_fail_schedules_retry(self):
+        job = Job(id=5, kind="x", attempts=2, max_attempts=5, locked_by="w1")
+        assert self.service.fail(job, "boom") is True
+        job_id, worker_id, error, retry_at = self.mock_repo.mark_failed.call_args.args
+        assert (job_id, worker_id, error) == (5, "w1", "boom")
+        assert retry_at is not None
+
+    def test_fail_gives_up_after_max_attempts(self):
+        job = Job(id=5, kind="x", attempts=5, max_attempts=5, locked_by="w1")
+        assert self.service.fail(job, "boom") is False
+        self.mock_repo.mark_failed.assert_called_once_with(5, "w1", "boom", None)
+
+    def test_fail_after_losing_lock_does_not_give_up(self):
+        self.mock_repo.mark_failed.return_value = False
+        job = Job(id=5, kind="x", attempts=5, max_attempts=5, locked_by="w1")
+        assert self.service.fail(job, "boom") is True
+
+    def test_fail_without_id(self):
+        with pytest.raises(ValueError):
+            self.service.fail(Job(kind="x"), "boom")
+
+    def test_stats(self):
+        self.mock_repo.count_by_status.return_value = {"queued": 3}
+        assert self.service.stats() == {"queued": 3}
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -78,3 +78,27 @@ class TestOrganizationService:
         self.mock_repo.get_by_id.return_value = None
         with pytest.raises(ValueError, match="Organização não encontrada"):
             self.service.set_enforce_mfa(999, True)
+
+
+class TestOrganizationServiceInvalidatesMemberships:
+    def setup_method(self):
+        self.mock_repo = MagicMock()
+        self.service = OrganizationService(self.mock_repo)
+
+    def test_create_organization(self):
+        self.mock_repo.create.return_value = Organization(id=1, name="Test Org", created_by=5)
+        with patch("rentivo.services.organization_service.membership_cache") as cache:
+            self.service.create_organization("Test Org", 5)
+        cache.invalidate_user.assert_called_once_with(5)
+
+    def test_member_changes(self):
+        with patch("rentivo.services.organization_service.membership_cache") as cache:
+            self.service.add_member(1, 2, "viewer")
+            self.service.update_member_role(1, 3, "admin")
+            self.service.remove_member(1, 4)
+        assert [c.args for c in cache.invalidate_user.call_args_list] == [(2,), (3,), (4,)]
+
+    def test_delete_organization(self):
+        with patch("rentivo.services.organization_service.membership_cache") as cache:
+            self.service.delete_organization(7)
+        cache.invalidate_org.assert_called_once_with(7)
@@ -37,3 +37,25 @@ class TestLocalStorage:
         storage.save("test/img.jpg", b"jpeg-data", content_type="image/jpeg")
         assert (tmp_path / "test" / "img.jpg").exists()
         assert (tmp_path / "test" / "img.jpg").read_bytes() == b"jpeg-data"
+
+    def test_save_stream_copies_file(self, tmp_path):
+        import io
+
+        storage = LocalStorage(str(tmp_path))
+        data = b"x" * (600 * 1024)
+        path = storage.save_stream("a/stream.pdf", io.BytesIO(data))
+
+        assert (tmp_path / "a" / "stream.pdf").read_bytes() == data
+        assert path == str((tmp_path / "a" / "stream.pdf").resolve())
+
+    def test_read_into_copies_file(self, tmp_path):
+        import io
+
+        storage = LocalStorage(str(tmp_path))
+        data = b"x" * (600 * 1024)
+        storage.save("a/big.pdf", data)
+        stream = io.BytesIO(b"head")
+        stream.seek(0, io.SEEK_END)
+
+        assert storage.read_into("a/big.pdf", stream) == len(data)
+        assert stream.getvalue() == b"head" + data
@@ -41,6 +41,46 @@ class TestS3Storage:
         )
         assert result == "path/to/file.pdf"
 
+    @patch("rentivo.storage.s3.boto3")
+    def test_save_stream_uses_managed_upload(self, mock_boto3):
+        import io
+
+        mock_client = MagicMock()
+        mock_boto3.client.return_value = mock_client
+
+        from rentivo.storage.s3 import S3Storage
+
+        storage = S3Storage(bucket="my-bucket", region="us-east-1", access_key_id="key", secret_access_key="secret")
+        stream = io.BytesIO(b"data")
+        result = storage.save_stream("path/to/receipt.jpg", stream, content_type="image/jpeg")
+
+        args, kwargs = mock_client.upload_fileobj.call_args
+        assert args == (stream, "my-bucket", "path/to/receipt.jpg")
+        assert kwargs["ExtraArgs"] == {"ContentType": "image/jpeg"}
+        assert kwargs["Config"].multipart_chunksize == 8 * 1024 * 1024
+        mock_client.put_object.assert_not_called()
+        assert result == "path/to/receipt.jpg"
+
+    @patch("rentivo.storage.s3.boto3")
+    def test_read_into_uses_managed_download(self, mock_boto3):
+        import io
+
+        mock_client = MagicMock()
+        mock_client.download_fileobj.side_effect = lambda bucket, key, stream, Config: stream.write(b"data")
+        mock_boto3.client.return_value = mock_client
+
+        from rentivo.storage.s3 import S3Storage
+
+        storage = S3Storage(bucket="my-bucket", region="us-east-1", access_key_id="key", secret_access_key="secret")
+        stream = io.BytesIO()
+        size = storage.read_into("path/to/receipt.pdf", stream)
+
+        args, kwargs = mock_client.download_fileobj.call_args
+        assert args == ("my-bucket", "path/to/receipt.pdf", stream)
+        assert kwargs["Config"].use_threads is False
+        mock_client.get_object.assert_not_called()
+        assert (size, stream.getvalue()) == (4, b"data")
+
     @patch("rentivo.storage.s3.boto3")
     def test_get_url_generates_presigned(self, mock_boto3):
         mock_client = MagicMock()
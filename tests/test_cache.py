@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+from rentivo.cache import TTLCache
+
+
+class TestTTLCache:
+    def test_entries_expire(self):
+        cache = TTLCache(ttl=30)
+        with patch("rentivo.cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with patch("rentivo.cache.time.monotonic", return_value=129.0):
+            assert cache.get("a") == 1
+        with patch("rentivo.cache.time.monotonic", return_value=131.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(ttl=30, maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+    def test_disabled(self):
+        cache = TTLCache(ttl=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+        assert cache.stats()["misses"] == 0
+
+    def test_invalidate(self):
+        cache = TTLCache(ttl=30)
+        cache.put("a", 1)
+        cache.invalidate("a")
+        cache.invalidate("missing")
+        assert cache.get("a") is None
+
+    def test_invalidate_where(self):
+        cache = TTLCache(ttl=30)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.invalidate_where(lambda value: value > 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_stats_and_clear(self):
+        cache = TTLCache(ttl=30, maxsize=5)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 5}
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 5}
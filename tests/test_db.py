@@ -1,6 +1,11 @@
+import time
 from unittest.mock import MagicMock, patch
 
+import pytest
+from sqlalchemy import Connection, create_engine, exc, text
+
 import rentivo.db as db_module
+from rentivo.db import InstrumentedQueuePool
 
 
 class TestGetEngine:
@@ -27,7 +32,8 @@ class TestGetConnection:
         mock_engine.connect.return_value = mock_conn
         with patch.object(db_module, "get_engine", return_value=mock_engine):
             conn = db_module.get_connection()
-            assert conn is mock_conn
+            assert isinstance(conn, db_module.ResilientConnection)
+            assert conn.connection is mock_conn.connection
 
     def test_returns_cached_connection(self, monkeypatch):
         sentinel = MagicMock()
@@ -61,3 +67,220 @@ class TestGetAlembicConfig:
         assert cfg is not None
         # Verify it was called with the project root path
         mock_exists.assert_called_once()
+
+
+class TestPoolMetrics:
+    def _engine(self, tmp_path, metrics, **kwargs):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=kwargs.pop("max_overflow", 0),
+            pool_timeout=kwargs.pop("pool_timeout", 0.05),
+        )
+        db_module.instrument_pool(engine, metrics)
+        return engine
+
+    def test_counts_checkouts_and_connects(self, tmp_path, monkeypatch):
+        metrics = db_module.PoolMetrics()
+        monkeypatch.setattr(db_module, "pool_metrics", metrics)
+        engine = self._engine(tmp_path, metrics)
+
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        snapshot = metrics.snapshot()
+        assert snapshot["checkouts"] == 3
+        assert snapshot["checkins"] == 3
+        assert snapshot["connects"] == 1
+        assert snapshot["size"] == 1
+        assert snapshot["idle"] == 1
+        assert snapshot["checked_out"] == 0
+        assert snapshot["wait_buckets"][-1] == (float("inf"), 3)
+
+    def test_records_timeout(self, tmp_path, monkeypatch):
+        metrics = db_module.PoolMetrics()
+        monkeypatch.setattr(db_module, "pool_metrics", metrics)
+        engine = self._engine(tmp_path, metrics)
+
+        with engine.connect():
+            assert metrics.snapshot()["checked_out"] == 1
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        snapshot = metrics.snapshot()
+        assert snapshot["timeouts"] == 1
+        assert snapshot["checkouts"] == 1
+        assert snapshot["wait_seconds"] >= 0.05
+
+    def test_counts_overflow_connects(self, tmp_path, monkeypatch):
+        metrics = db_module.PoolMetrics()
+        monkeypatch.setattr(db_module, "pool_metrics", metrics)
+        engine = self._engine(tmp_path, metrics, max_overflow=1)
+
+        with engine.connect(), engine.connect():
+            assert metrics.snapshot()["overflow"] == 1
+
+        snapshot = metrics.snapshot()
+        assert snapshot["connects"] == 2
+        assert snapshot["overflow_connects"] == 1
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = db_module.PoolMetrics()
+        metrics.record_checkout(0.0005)
+        metrics.record_checkout(0.02)
+        metrics.record_checkout(30.0)
+
+        buckets = dict(metrics.snapshot()["wait_buckets"])
+        assert buckets[0.001] == 1
+        assert buckets[0.025] == 2
+        assert buckets[10.0] == 2
+        assert buckets[float("inf")] == 3
+
+    def test_get_engine_configures_server_pool(self, monkeypatch):
+        monkeypatch.setattr(db_module, "_engine", None)
+        with (
+            patch.object(db_module, "settings") as mock_settings,
+            patch.object(db_module, "create_engine") as mock_create,
+            patch.object(db_module, "instrument_pool"),
+            patch.object(db_module, "enable_adaptive_ping") as mock_ping,
+        ):
+            mock_settings.db_url = "mysql+pymysql://u:p@db/rentivo"
+            mock_settings.db_pool_size = 7
+            mock_settings.db_max_overflow = 3
+            mock_settings.db_pool_timeout = 2.5
+            mock_settings.db_pool_recycle = 600
+            mock_settings.db_ping_idle_seconds = 15
+            db_module.get_engine()
+
+        kwargs = mock_create.call_args.kwargs
+        assert kwargs["poolclass"] is InstrumentedQueuePool
+        assert (kwargs["pool_size"], kwargs["max_overflow"], kwargs["pool_timeout"]) == (7, 3, 2.5)
+        assert kwargs["pool_recycle"] == 600
+        assert "pool_pre_ping" not in kwargs
+        mock_ping.assert_called_once_with(mock_create.return_value, 15, db_module.pool_metrics)
+
+    def test_read_engine_defaults_to_primary(self, monkeypatch):
+        sentinel = MagicMock()
+        monkeypatch.setattr(db_module, "_engine", sentinel)
+        with patch.object(db_module.settings, "db_read_url", ""):
+            assert db_module.get_read_engine() is sentinel
+
+    def test_read_engine_uses_replica_pool(self, monkeypatch):
+        monkeypatch.setattr(db_module, "_read_engine", None)
+        with (
+            patch.object(db_module.settings, "db_read_url", "mysql+pymysql://u:p@replica/rentivo"),
+            patch.object(db_module, "create_engine") as mock_create,
+            patch.object(db_module, "instrument_pool") as mock_instrument,
+            patch.object(db_module, "enable_adaptive_ping"),
+        ):
+            engine = db_module.get_read_engine()
+
+        assert engine is mock_create.return_value
+        assert mock_create.call_args.args[0] == "mysql+pymysql://u:p@replica/rentivo"
+        assert mock_create.call_args.kwargs["poolclass"] is db_module.ReplicaQueuePool
+        mock_instrument.assert_called_once_with(engine, db_module.replica_pool_metrics)
+
+
+class TestAdaptivePing:
+    def _engine(self, tmp_path, metrics, idle_seconds=30.0):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'ping.db'}", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+        )
+        db_module.enable_adaptive_ping(engine, idle_seconds, metrics)
+        return engine
+
+    def _kill_pooled_connection(self, engine):
+        with engine.connect() as conn:
+            raw = conn.connection.dbapi_connection
+        raw.close()
+
+    def test_recently_used_connection_skips_ping(self, tmp_path):
+        metrics = db_module.PoolMetrics()
+        engine = self._engine(tmp_path, metrics)
+
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        snapshot = metrics.snapshot()
+        assert snapshot["pings"] == 0
+        assert snapshot["pings_skipped"] == 3
+
+    def test_idle_connection_is_pinged(self, tmp_path):
+        metrics = db_module.PoolMetrics()
+        engine = self._engine(tmp_path, metrics, idle_seconds=10)
+        with engine.connect():
+            pass
+
+        with patch("rentivo.db.time.monotonic", return_value=time.monotonic() + 60):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        assert metrics.snapshot()["pings"] == 1
+
+    def test_dead_idle_connection_is_replaced(self, tmp_path):
+        metrics = db_module.PoolMetrics()
+        engine = self._engine(tmp_path, metrics, idle_seconds=10)
+        self._kill_pooled_connection(engine)
+
+        with patch("rentivo.db.time.monotonic", return_value=time.monotonic() + 60):
+            with engine.connect() as conn:
+                assert conn.execute(text("SELECT 1")).scalar() == 1
+
+        snapshot = metrics.snapshot()
+        assert snapshot["ping_failures"] == 1
+
+    def test_unpinged_dead_connection_retried_once(self, tmp_path, monkeypatch):
+        metrics = db_module.PoolMetrics()
+        monkeypatch.setattr(db_module, "pool_metrics", metrics)
+        engine = self._engine(tmp_path, metrics)
+        self._kill_pooled_connection(engine)
+
+        with db_module.resilient_connect(engine) as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+
+        snapshot = metrics.snapshot()
+        assert snapshot["pings"] == 0
+        assert snapshot["retries"] == 1
+
+    def test_no_retry_mid_transaction(self, tmp_path, monkeypatch):
+        metrics = db_module.PoolMetrics()
+        monkeypatch.setattr(db_module, "pool_metrics", metrics)
+        engine = self._engine(tmp_path, metrics)
+
+        with db_module.resilient_connect(engine) as conn:
+            conn.execute(text("SELECT 1"))
+            conn.connection.dbapi_connection.close()
+            with pytest.raises(exc.DBAPIError) as excinfo:
+                conn.execute(text("SELECT 1"))
+
+        assert excinfo.value.connection_invalidated
+        assert metrics.snapshot()["retries"] == 0
+
+    def test_other_errors_are_not_retried(self, tmp_path, monkeypatch):
+        metrics = db_module.PoolMetrics()
+        monkeypatch.setattr(db_module, "pool_metrics", metrics)
+        engine = self._engine(tmp_path, metrics)
+
+        with db_module.resilient_connect(engine) as conn:
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+
+        assert metrics.snapshot()["retries"] == 0
+
+    def test_engine_uses_stock_connection_class(self, tmp_path):
+        engine = self._engine(tmp_path, db_module.PoolMetrics())
+        with engine.connect() as conn:
+            assert type(conn) is Connection
+
+    def test_zero_threshold_pings_every_checkout(self, tmp_path):
+        metrics = db_module.PoolMetrics()
+        engine = self._engine(tmp_path, metrics, idle_seconds=0)
+
+        for _ in range(2):
+            with engine.connect():
+                pass
+
+        assert metrics.snapshot()["pings"] == 2
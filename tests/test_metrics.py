@@ -0,0 +1,37 @@
+from rentivo.metrics import MetricsWriter
+
+
+class TestMetricsWriter:
+    def test_gauge_and_counter(self):
+        writer = MetricsWriter()
+        writer.gauge("pool_size", "Pool size.", 5)
+        writer.counter("requests_total", "Requests.", 2.5)
+
+        assert writer.render() == (
+            "# HELP rentivo_pool_size Pool size.\n"
+            "# TYPE rentivo_pool_size gauge\n"
+            "rentivo_pool_size 5\n"
+            "# HELP rentivo_requests_total Requests.\n"
+            "# TYPE rentivo_requests_total counter\n"
+            "rentivo_requests_total 2.5\n"
+        )
+
+    def test_labels_are_escaped(self):
+        writer = MetricsWriter(prefix="")
+        writer.family("hits", "counter", "Hits.", [({"cache": 'a"b\\c'}, 1), ({"cache": "x"}, True)])
+
+        lines = writer.render().splitlines()
+        assert lines[2] == 'hits{cache="a\\"b\\\\c"} 1'
+        assert lines[3] == 'hits{cache="x"} 1'
+
+    def test_histogram(self):
+        writer = MetricsWriter(prefix="")
+        writer.histogram("wait_seconds", "Wait.", [(0.1, 1), (1.0, 3), (float("inf"), 4)], 2.75, 4)
+
+        assert writer.render().splitlines()[2:] == [
+            'wait_seconds_bucket{le="0.1"} 1',
+            'wait_seconds_bucket{le="1.0"} 3',
+            'wait_seconds_bucket{le="+Inf"} 4',
+            "wait_seconds_sum 2.75",
+            "wait_seconds_count 4",
+        ]
@@ -1,12 +1,31 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
 from rentivo.pix import (
+    QRCodeCache,
     _crc16_ccitt,
     _strip_accents,
     _tlv,
+    decode_pix_payload,
     generate_pix_payload,
+    generate_pix_payloads,
     generate_pix_qrcode_png,
+    is_valid_pix_payload,
+    qrcode_cache,
 )
 
 
+def _bitwise_crc16(data: str) -> str:
+    crc = 0xFFFF
+    for byte in data.encode("ascii"):
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return f"{crc:04X}"
+
+
 class TestTlv:
     def test_simple(self):
         assert _tlv("00", "01") == "000201"
@@ -23,6 +42,14 @@ class TestCrc16Ccitt:
         assert len(result) == 4
         assert result == result.upper()
 
+    def test_check_value(self):
+        # Standard CRC-16/CCITT-FALSE check value
+        assert _crc16_ccitt("123456789") == "29B1"
+
+    @pytest.mark.parametrize("data", ["", "A", "000201", "0002012636br.gov.bcb.pix0114+55119999999996304"])
+    def test_matches_bitwise_reference(self, data):
+        assert _crc16_ccitt(data) == _bitwise_crc16(data)
+
 
 class TestStripAccents:
     def test_no_accents(self):
@@ -118,3 +145,152 @@ class TestGeneratePixQrcodePng:
             amount=100.00,
         )
         assert result[:4] == b"\x89PNG"
+
+
+class TestGeneratePixPayloads:
+    def test_matches_single_payloads(self):
+        entries = [("a@pix.com", 150.5), ("+5511999999999", None), ("b@pix.com", 0)]
+        batch = generate_pix_payloads(entries, merchant_name="José", merchant_city="São Paulo", txid="TX1")
+        single = [
+            generate_pix_payload(pix_key=k, merchant_name="José", merchant_city="São Paulo", amount=a, txid="TX1")
+            for k, a in entries
+        ]
+        assert batch == single
+
+    def test_empty(self):
+        assert generate_pix_payloads([], merchant_name="A", merchant_city="B") == []
+
+
+class TestDecodePixPayload:
+    def _payload(self, **overrides):
+        kwargs = dict(pix_key="k@pix.com", merchant_name="Test", merchant_city="City", amount=10.0)
+        kwargs.update(overrides)
+        return generate_pix_payload(**kwargs)
+
+    def test_round_trip(self):
+        decoded = decode_pix_payload(self._payload(txid="ABC"))
+        assert decoded["26"] == {"00": "br.gov.bcb.pix", "01": "k@pix.com"}
+        assert decoded["54"] == "10.00"
+        assert decoded["59"] == "Test"
+        assert decoded["60"] == "City"
+        assert decoded["62"] == {"05": "ABC"}
+
+    def test_open_amount_has_no_amount_field(self):
+        assert "54" not in decode_pix_payload(self._payload(amount=None))
+
+    def test_lowercase_crc_accepted(self):
+        payload = self._payload()
+        assert is_valid_pix_payload(payload[:-4] + payload[-4:].lower())
+
+    def test_crc_mismatch(self):
+        payload = self._payload()
+        tampered = payload.replace("10.00", "99.00")
+        with pytest.raises(ValueError, match="CRC mismatch"):
+            decode_pix_payload(tampered)
+
+    @pytest.mark.parametrize("payload", ["", "abc", "0002016304ZZZZ", "Pagamento çã6304ABCD"])
+    def test_invalid_payloads(self, payload):
+        assert not is_valid_pix_payload(payload)
+
+    def _with_crc(self, body):
+        body += "6304"
+        return body + _crc16_ccitt(body)
+
+    def test_malformed_tlv(self):
+        with pytest.raises(ValueError, match="Malformed"):
+            decode_pix_payload(self._with_crc("0002012xx"))
+
+    def test_overrunning_field(self):
+        with pytest.raises(ValueError, match="overruns"):
+            decode_pix_payload(self._with_crc("000201269"))
+
+    def test_wrong_format_indicator(self):
+        with pytest.raises(ValueError, match="format indicator"):
+            decode_pix_payload(self._with_crc("000202"))
+
+    def test_missing_pix_account(self):
+        with pytest.raises(ValueError, match="merchant account"):
+            decode_pix_payload(self._with_crc("00020126080004abcd"))
+
+
+@pytest.fixture
+def empty_qrcode_cache():
+    qrcode_cache.clear()
+    yield qrcode_cache
+    qrcode_cache.clear()
+
+
+class TestQRCodeCache:
+    def _png(self, **overrides):
+        kwargs = dict(pix_key="k@pix.com", merchant_name="Test", merchant_city="City", amount=10.0)
+        kwargs.update(overrides)
+        return generate_pix_qrcode_png(**kwargs)
+
+    def test_identical_payload_rendered_once(self, empty_qrcode_cache):
+        with patch("rentivo.pix._render_qrcode_png", return_value=b"png") as render:
+            assert self._png() == b"png"
+            assert self._png() == b"png"
+        render.assert_called_once()
+        assert empty_qrcode_cache.stats()["hits"] == 1
+        assert empty_qrcode_cache.stats()["misses"] == 1
+
+    def test_different_amount_or_size_is_a_miss(self, empty_qrcode_cache):
+        self._png()
+        self._png(amount=11.0)
+        self._png(box_size=5)
+        assert empty_qrcode_cache.stats()["misses"] == 3
+        assert len(empty_qrcode_cache) == 3
+
+    def test_cached_png_matches_fresh_render(self, empty_qrcode_cache):
+        first = self._png()
+        assert self._png() == first
+        assert first[:4] == b"\x89PNG"
+
+    def test_lru_eviction(self):
+        cache = QRCodeCache(maxsize=2)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.get("a")
+        cache.put("c", b"3")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1"
+        assert cache.get("c") == b"3"
+
+    def test_zero_size_disables_memory_tier(self):
+        cache = QRCodeCache(maxsize=0)
+        cache.put("a", b"1")
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_storage_tier_hit(self):
+        cache = QRCodeCache()
+        storage = MagicMock()
+        storage.get.return_value = b"stored"
+        assert cache.get("abc", storage) == b"stored"
+        storage.get.assert_called_once_with(QRCodeCache.storage_key("abc"))
+        assert cache.get("abc", storage) == b"stored"
+        storage.get.assert_called_once()
+        assert cache.stats() == {"hits": 1, "storage_hits": 1, "misses": 0, "size": 1, "maxsize": 256}
+
+    def test_storage_tier_miss_then_persist(self):
+        cache = QRCodeCache()
+        storage = MagicMock()
+        storage.get.side_effect = FileNotFoundError
+        assert cache.get("abc", storage) is None
+        cache.put("abc", b"png", storage)
+        storage.save.assert_called_once_with(QRCodeCache.storage_key("abc"), b"png", content_type="image/png")
+        assert cache.stats()["misses"] == 1
+
+    def test_storage_save_failure_is_not_fatal(self):
+        cache = QRCodeCache()
+        storage = MagicMock()
+        storage.save.side_effect = RuntimeError("s3 down")
+        cache.put("abc", b"png", storage)
+        assert cache.get("abc") == b"png"
+
+    def test_storage_key_uses_prefix(self):
+        with patch("rentivo.pix.settings") as mock_settings:
+            mock_settings.storage_prefix = ""
+            assert QRCodeCache.storage_key("abc") == "pix-qr/abc.png"
+            mock_settings.storage_prefix = "bills"
+            assert QRCodeCache.storage_key("abc") == "bills/pix-qr/abc.png"
@@ -0,0 +1,177 @@
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from rentivo.constants import SP_TZ
+from rentivo.models.job import Job, JobStatus
+from rentivo.repositories.sqlalchemy import (
+    SQLAlchemyBillingRepository,
+    SQLAlchemyBillRepository,
+    SQLAlchemyJobRepository,
+)
+from rentivo.services.job_service import JobService
+from rentivo.storage.local import LocalStorage
+from rentivo.worker import BillPdfHandler, Worker, _parse_args
+from tests.conftest import SCHEMA_DDL, _sample_bill, _sample_billing
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    # File-backed so each worker thread gets its own connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    with engine.connect() as conn:
+        for statement in SCHEMA_DDL.strip().split(";"):
+            stmt = statement.strip()
+            if stmt:
+                conn.execute(text(stmt))
+        conn.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def bill(engine):
+    with engine.connect() as conn:
+        billing = SQLAlchemyBillingRepository(conn).create(_sample_billing())
+        return SQLAlchemyBillRepository(conn).create(_sample_bill(billing_id=billing.id))
+
+
+def _enqueue(engine, kind, payload, max_attempts=5) -> Job:
+    with engine.connect() as conn:
+        return SQLAlchemyJobRepository(conn).enqueue(Job(kind=kind, payload=payload, max_attempts=max_attempts))
+
+
+def _get_job(engine, job_id) -> Job:
+    with engine.connect() as conn:
+        return SQLAlchemyJobRepository(conn).get_by_id(job_id)
+
+
+class TestWorker:
+    def test_runs_bill_pdf_job(self, engine, bill, tmp_path):
+        with engine.connect() as conn:
+            SQLAlchemyBillRepository(conn).update_pdf_status(bill.id, "pending")
+            job = JobService(SQLAlchemyJobRepository(conn)).enqueue_bill_pdf(bill.id)
+
+        with patch("rentivo.worker.get_storage", return_value=LocalStorage(str(tmp_path))):
+            processed = Worker(engine, concurrency=2, poll_interval=0.01).run(once=True)
+
+        assert processed == 1
+        assert _get_job(engine, job.id).status == JobStatus.DONE.value
+        with engine.connect() as conn:
+            stored = SQLAlchemyBillRepository(conn).get_by_id(bill.id)
+        assert stored.pdf_status == "ready"
+        assert stored.pdf_path
+
+    def test_drains_more_jobs_than_concurrency(self, engine):
+        handler = MagicMock()
+        jobs = [_enqueue(engine, "test", {"n": n}) for n in range(5)]
+
+        processed = Worker(engine, concurrency=2, poll_interval=0.01, handlers={"test": handler}).run(once=True)
+
+        assert processed == 5
+        assert handler.run.call_count == 5
+        assert all(_get_job(engine, j.id).status == JobStatus.DONE.value for j in jobs)
+
+    def test_failure_is_retried_later(self, engine):
+        handler = MagicMock()
+        handler.run.side_effect = RuntimeError("boom")
+        job = _enqueue(engine, "test", {})
+
+        Worker(engine, poll_interval=0.01, handlers={"test": handler}).run(once=True)
+
+        stored = _get_job(engine, job.id)
+        assert stored.status == JobStatus.QUEUED.value
+        assert stored.attempts == 1
+        assert stored.last_error == "RuntimeError: boom"
+        assert stored.run_after > stored.updated_at
+        handler.give_up.assert_not_called()
+
+    def test_last_attempt_gives_up(self, engine):
+        handler = MagicMock()
+        handler.run.side_effect = RuntimeError("boom")
+        job = _enqueue(engine, "test", {"bill_id": 1}, max_attempts=1)
+
+        Worker(engine, poll_interval=0.01, handlers={"test": handler}).run(once=True)
+
+        assert _get_job(engine, job.id).status == JobStatus.FAILED.value
+        handler.give_up.assert_called_once()
+        assert handler.give_up.call_args.args[1] == {"bill_id": 1}
+
+    def test_unknown_kind_fails_permanently(self, engine):
+        job = _enqueue(engine, "nope", {})
+
+        Worker(engine, poll_interval=0.01, handlers={}).run(once=True)
+
+        stored = _get_job(engine, job.id)
+        assert stored.status == JobStatus.FAILED.value
+        assert "Unknown job kind" in stored.last_error
+
+    def test_stale_exhausted_job_gives_up(self, engine):
+        handler = MagicMock()
+        an_hour_ago = datetime.now(SP_TZ) - timedelta(hours=1)
+        with engine.connect() as conn:
+            job_repo = SQLAlchemyJobRepository(conn)
+            job = job_repo.enqueue(Job(kind="test", payload={"bill_id": 1}, max_attempts=1, run_after=an_hour_ago))
+            job_repo.claim("dead-worker", 1, an_hour_ago)
+
+        Worker(engine, poll_interval=0.01, handlers={"test": handler}).run(once=True)
+
+        assert _get_job(engine, job.id).status == JobStatus.FAILED.value
+        handler.run.assert_not_called()
+        handler.give_up.assert_called_once()
+        assert handler.give_up.call_args.args[1] == {"bill_id": 1}
+
+    def test_long_job_keeps_its_lock(self, engine):
+        job = _enqueue(engine, "test", {})
+        locks = []
+
+        def slow(conn, payload):
+            locks.append(_get_job(engine, job.id).locked_at)
+            time.sleep(0.2)
+            locks.append(_get_job(engine, job.id).locked_at)
+
+        handler = MagicMock()
+        handler.run.side_effect = slow
+        Worker(engine, poll_interval=0.01, heartbeat_interval=0.02, handlers={"test": handler}).run(once=True)
+
+        assert _get_job(engine, job.id).status == JobStatus.DONE.value
+        assert locks[1] > locks[0]
+
+    def test_stop_before_run(self, engine):
+        _enqueue(engine, "test", {})
+        worker = Worker(engine, poll_interval=0.01, handlers={"test": MagicMock()})
+        worker.stop()
+        assert worker.run() == 0
+
+    def test_invalid_concurrency(self, engine):
+        with pytest.raises(ValueError):
+            Worker(engine, concurrency=0)
+
+
+class TestBillPdfHandler:
+    def test_missing_bill_is_skipped(self, engine):
+        with engine.connect() as conn:
+            BillPdfHandler().run(conn, {"bill_id": 9999})
+
+    def test_give_up_marks_bill_failed(self, engine, bill):
+        with engine.connect() as conn:
+            BillPdfHandler().give_up(conn, {"bill_id": bill.id})
+            assert SQLAlchemyBillRepository(conn).get_by_id(bill.id).pdf_status == "failed"
+
+
+class TestParseArgs:
+    def test_defaults(self):
+        args = _parse_args([])
+        assert args.concurrency >= 1
+        assert args.once is False
+
+    def test_overrides(self):
+        args = _parse_args(["--concurrency", "4", "--poll-interval", "0.5", "--once"])
+        assert (args.concurrency, args.poll_interval, args.once) == (4, 0.5, True)
+
+    def test_rejects_zero_concurrency(self):
+        with pytest.raises(SystemExit):
+            _parse_args(["--concurrency", "0"])
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import re
 
 import pytest
@@ -121,6 +122,19 @@ def get_csrf_token(client) -> str:
     return ""
 
 
+def run_in_loop(coro):
+    """Run a coroutine on a private event loop.
+
+    ``asyncio.run`` clears the thread's current loop afterwards, which breaks
+    tests that still use ``asyncio.get_event_loop()``.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
 @pytest.fixture(autouse=True)
 def web_test_db(monkeypatch):
     """Set up in-memory DB and patch the web app to use it."""
@@ -130,6 +144,10 @@ def web_test_db(monkeypatch):
 
     monkeypatch.setattr(deps_module, "get_engine", lambda: engine)
 
+    import web.sessions as sessions_module
+
+    monkeypatch.setattr(sessions_module, "get_engine", lambda: engine)
+
     import web.app as app_module
 
     monkeypatch.setattr(app_module, "initialize_db", lambda: None)
@@ -1,5 +1,7 @@
 from unittest.mock import MagicMock, patch
 
+from sqlalchemy import text
+
 from rentivo.models.audit_log import AuditEventType
 from rentivo.models.bill import Bill
 from rentivo.models.user import User
@@ -139,6 +141,59 @@ class TestBillRegeneratePdf:
         assert response.status_code == 302
 
 
+class TestBillPdfJobs:
+    def _jobs(self, test_engine):
+        with test_engine.connect() as conn:
+            return conn.execute(text("SELECT kind, payload, status FROM jobs")).fetchall()
+
+    def test_regenerate_enqueues_job(self, auth_client, test_engine, tmp_path, csrf_token):
+        billing = create_billing_in_db(test_engine)
+        with (
+            patch("web.deps.get_storage", return_value=LocalStorage(str(tmp_path))),
+            patch("web.deps.settings.pdf_jobs_enabled", True),
+        ):
+            bill = generate_bill_in_db(test_engine, billing, tmp_path)
+            response = auth_client.post(
+                f"/billings/{billing.uuid}/bills/{bill.uuid}/regenerate-pdf",
+                data={"csrf_token": csrf_token},
+                follow_redirects=True,
+            )
+        assert response.status_code == 200
+        assert "PDF em processamento" in response.text
+        assert self._jobs(test_engine) == [("bill.pdf", f'{{"bill_id": {bill.id}}}', "queued")]
+
+    def test_upload_multiple_files_enqueues_one_job(self, auth_client, test_engine, tmp_path, csrf_token):
+        billing = create_billing_in_db(test_engine)
+        with (
+            patch("web.deps.get_storage", return_value=LocalStorage(str(tmp_path))),
+            patch("web.deps.settings.pdf_jobs_enabled", True),
+        ):
+            bill = generate_bill_in_db(test_engine, billing, tmp_path)
+            response = auth_client.post(
+                f"/billings/{billing.uuid}/bills/{bill.uuid}/receipts/upload",
+                data={"csrf_token": csrf_token},
+                files=[
+                    ("receipt_files", ("a.pdf", b"%PDF-a", "application/pdf")),
+                    ("receipt_files", ("b.pdf", b"%PDF-b", "application/pdf")),
+                ],
+                follow_redirects=False,
+            )
+        assert response.status_code == 302
+        assert len(self._jobs(test_engine)) == 1
+
+    def test_invoice_pending_without_pdf_redirects(self, auth_client, test_engine, tmp_path):
+        billing = create_billing_in_db(test_engine)
+        bill = generate_bill_in_db(test_engine, billing, tmp_path)
+        with test_engine.connect() as conn:
+            conn.execute(
+                text("UPDATE bills SET pdf_path = NULL, pdf_status = 'pending' WHERE id = :id"), {"id": bill.id}
+            )
+            conn.commit()
+        response = auth_client.get(f"/billings/{billing.uuid}/bills/{bill.uuid}/invoice", follow_redirects=False)
+        assert response.status_code == 302
+        assert response.headers["location"] == f"/billings/{billing.uuid}/bills/{bill.uuid}"
+
+
 class TestBillChangeStatus:
     def test_change_status(self, auth_client, test_engine, tmp_path, csrf_token):
         billing = create_billing_in_db(test_engine)
@@ -616,6 +671,28 @@ class TestReceiptUploadMultiple:
         logs = get_audit_logs(test_engine, AuditEventType.RECEIPT_UPLOAD)
         assert len(logs) >= 2
 
+    def test_upload_multiple_files_renders_pdf_once(self, auth_client, test_engine, tmp_path, csrf_token):
+        from rentivo.services.bill_service import BillService
+
+        billing = create_billing_in_db(test_engine)
+        with patch("web.deps.get_storage", return_value=LocalStorage(str(tmp_path))):
+            bill = generate_bill_in_db(test_engine, billing, tmp_path)
+            with patch.object(
+                BillService, "_generate_and_store_pdf", autospec=True, side_effect=BillService._generate_and_store_pdf
+            ) as render:
+                response = auth_client.post(
+                    f"/billings/{billing.uuid}/bills/{bill.uuid}/receipts/upload",
+                    data={"csrf_token": csrf_token},
+                    files=[
+                        ("receipt_files", ("a.pdf", b"%PDF-a", "application/pdf")),
+                        ("receipt_files", ("b.pdf", b"%PDF-b", "application/pdf")),
+                        ("receipt_files", ("c.pdf", b"%PDF-c", "application/pdf")),
+                    ],
+                    follow_redirects=False,
+                )
+        assert response.status_code == 302
+        assert render.call_count == 1
+
     def test_upload_all_skipped(self, auth_client, test_engine, tmp_path, csrf_token):
         """All files are invalid type — skipped > 0, attached == 0."""
         billing = create_billing_in_db(test_engine)
@@ -1,9 +1,23 @@
+import base64
+import re
 from unittest.mock import MagicMock, patch
 
+import pytest
+from sqlalchemy import event
+
+from rentivo.models.bill import Bill
 from rentivo.models.billing import Billing
 from rentivo.models.user import User
-from rentivo.repositories.sqlalchemy import SQLAlchemyUserRepository
+from rentivo.repositories.sqlalchemy import SQLAlchemyBillRepository, SQLAlchemyUserRepository
 from tests.web.conftest import create_billing_in_db, create_org_in_db, get_test_user_id
+from web.routes.billing import BILLINGS_PAGE_SIZE, BILLS_PAGE_SIZE
+
+# Well-formed base64/JSON cursors whose contents _encode_cursor never produces
+CRAFTED_CURSORS = [b'[{"x": 1}, 1]', b'[{"dt": 5}, 1]', b"[[1, 2], 1]", b'["a", true]']
+
+
+def _cursor(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
 
 
 def _create_other_user_billing(test_engine):
@@ -25,6 +39,31 @@ class TestBillingList:
         assert response.status_code == 200
         assert "Apt 101" in response.text
 
+    def test_list_paginates(self, auth_client, test_engine):
+        for i in range(BILLINGS_PAGE_SIZE + 1):
+            create_billing_in_db(test_engine, name=f"Billing {i:03d}")
+
+        first = auth_client.get("/billings/")
+        assert "Billing 000" not in first.text
+        match = re.search(r"\?cursor=([\w-]+)", first.text)
+        assert match is not None
+
+        second = auth_client.get(f"/billings/?cursor={match.group(1)}")
+        assert "Billing 000" in second.text
+
+    @pytest.mark.parametrize("payload", CRAFTED_CURSORS)
+    def test_list_crafted_cursor_shows_first_page(self, auth_client, test_engine, payload):
+        create_billing_in_db(test_engine)
+        response = auth_client.get(f"/billings/?cursor={_cursor(payload)}")
+        assert response.status_code == 200
+        assert "Apt 101" in response.text
+
+    def test_list_invalid_cursor(self, auth_client, test_engine):
+        create_billing_in_db(test_engine)
+        response = auth_client.get("/billings/?cursor=%%%")
+        assert response.status_code == 200
+        assert "Apt 101" in response.text
+
 
 class TestBillingCreate:
     def test_create_form(self, auth_client):
@@ -104,6 +143,61 @@ class TestBillingDetail:
         response = auth_client.get("/billings/nonexistent", follow_redirects=False)
         assert response.status_code == 302
 
+    def test_detail_paginates_bills(self, auth_client, test_engine):
+        billing = create_billing_in_db(test_engine)
+        with test_engine.connect() as conn:
+            repo = SQLAlchemyBillRepository(conn)
+            for i in range(BILLS_PAGE_SIZE + 1):
+                repo.create(Bill(billing_id=billing.id, reference_month=f"{2000 + i}-01"))
+
+        first = auth_client.get(f"/billings/{billing.uuid}")
+        assert "2000" not in first.text
+        assert f"{2000 + BILLS_PAGE_SIZE}" in first.text
+        match = re.search(r"\?cursor=([\w-]+)", first.text)
+        assert match is not None
+
+        second = auth_client.get(f"/billings/{billing.uuid}?cursor={match.group(1)}")
+        assert second.status_code == 200
+        assert "2000" in second.text
+        assert "?cursor=" not in second.text
+        assert (
+            f'href="/billings/{billing.uuid}" class="btn btn--sm">&larr; Mais recentes (primeira página)' in second.text
+        )
+
+    @pytest.mark.parametrize("payload", CRAFTED_CURSORS)
+    def test_detail_crafted_cursor_shows_first_page(self, auth_client, test_engine, payload):
+        billing = create_billing_in_db(test_engine)
+        with test_engine.connect() as conn:
+            bill = SQLAlchemyBillRepository(conn).create(Bill(billing_id=billing.id, reference_month="2025-03"))
+        response = auth_client.get(f"/billings/{billing.uuid}?cursor={_cursor(payload)}")
+        assert response.status_code == 200
+        assert f"/bills/{bill.uuid}" in response.text
+
+    def test_detail_invalid_cursor_shows_first_page(self, auth_client, test_engine):
+        billing = create_billing_in_db(test_engine)
+        response = auth_client.get(f"/billings/{billing.uuid}?cursor=garbage")
+        assert response.status_code == 200
+
+    def test_org_detail_loads_memberships_once(self, auth_client, test_engine):
+        """can_view, get_role and can_transfer share one organization_members query."""
+        user_id = get_test_user_id(test_engine)
+        org = create_org_in_db(test_engine, "My Org", user_id)
+        billing = create_billing_in_db(test_engine, owner_type="organization", owner_id=org.id)
+
+        statements: list[str] = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", _record)
+        try:
+            response = auth_client.get(f"/billings/{billing.uuid}")
+        finally:
+            event.remove(test_engine, "before_cursor_execute", _record)
+
+        assert response.status_code == 200
+        assert len([s for s in statements if "FROM organization_members" in s]) == 1
+
 
 class TestBillingEdit:
     def test_edit_form(self, auth_client, test_engine):
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from rentivo.db import pool_metrics
+
+
+class TestMetricsEndpoint:
+    def test_disabled_without_token(self, client):
+        with patch("web.routes.internal.settings.metrics_token", ""):
+            response = client.get("/internal/metrics", headers={"Authorization": "Bearer "})
+        assert response.status_code == 404
+
+    def test_rejects_wrong_token(self, client):
+        with patch("web.routes.internal.settings.metrics_token", "s3cret"):
+            response = client.get("/internal/metrics", headers={"Authorization": "Bearer nope"})
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+    def test_rejects_missing_token(self, client):
+        with patch("web.routes.internal.settings.metrics_token", "s3cret"):
+            response = client.get("/internal/metrics", follow_redirects=False)
+        assert response.status_code == 401
+
+    def test_renders_prometheus_text(self, client):
+        pool_metrics.record_checkout(0.002)
+        with patch("web.routes.internal.settings.metrics_token", "s3cret"):
+            response = client.get("/internal/metrics", headers={"Authorization": "Bearer s3cret"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert "# TYPE rentivo_db_pool_checkout_seconds histogram" in body
+        assert 'rentivo_db_pool_checkout_seconds_bucket{le="+Inf"}' in body
+        assert "rentivo_web_threadpool_size " in body
+        assert 'rentivo_cache_hits_total{cache="invite_count"}' in body
+        assert "# TYPE rentivo_jobs gauge" in body
+        assert "rentivo_pdf_optimize_bytes_out_total " in body
+        assert "# TYPE rentivo_receipt_fetch_seconds histogram" in body
+        assert "rentivo_receipt_fetch_failures_total " in body
+
+    def test_does_not_touch_session(self, client):
+        with (
+            patch("web.routes.internal.settings.metrics_token", "s3cret"),
+            patch("web.sessions.DatabaseSessionBackend.load") as load,
+        ):
+            response = client.get("/internal/metrics", headers={"Authorization": "Bearer s3cret"})
+
+        assert response.status_code == 200
+        load.assert_not_called()
@@ -1,3 +1,8 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
 from rentivo.models.invite import Invite
 from rentivo.models.user import User
 from rentivo.repositories.sqlalchemy import (
@@ -5,6 +10,7 @@ from rentivo.repositories.sqlalchemy import (
     SQLAlchemyOrganizationRepository,
     SQLAlchemyUserRepository,
 )
+from rentivo.services.invite_service import invite_count_cache
 from tests.web.conftest import create_org_in_db, get_test_user_id
 
 
@@ -123,3 +129,65 @@ class TestInviteAcceptMFAEnforcement:
         response = auth_client.get("/billings/", follow_redirects=False)
         assert response.status_code == 302
         assert "/security/totp/setup" in response.headers["location"]
+
+
+def _setup_invite_uncached(test_engine):
+    """Like _setup_invite, but drop the count of 0 the login redirect cached (the invite bypasses the service)."""
+    result = _setup_invite(test_engine)
+    invite_count_cache.clear()
+    return result
+
+
+class TestInviteCount:
+    @pytest.fixture()
+    def cached_count(self):
+        with patch.object(invite_count_cache, "ttl", 60):
+            yield
+
+    def _count_queries(self, test_engine, fn):
+        statements: list[str] = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", _record)
+        try:
+            fn()
+        finally:
+            event.remove(test_engine, "before_cursor_execute", _record)
+        return len([s for s in statements if "COUNT(*)" in s and "invites" in s])
+
+    def test_count_endpoint(self, auth_client, test_engine):
+        _setup_invite_uncached(test_engine)
+        response = auth_client.get("/invites/count")
+        assert response.status_code == 200
+        assert response.json() == {"count": 1}
+        assert response.headers["cache-control"] == "no-store"
+
+    def test_badge_count_cached_across_renders(self, cached_count, auth_client, test_engine):
+        _setup_invite_uncached(test_engine)
+
+        first = self._count_queries(test_engine, lambda: auth_client.get("/billings/"))
+        second = self._count_queries(test_engine, lambda: auth_client.get("/billings/"))
+
+        assert (first, second) == (1, 0)
+        assert "Convites (1)" in auth_client.get("/billings/").text
+
+    def test_accept_refreshes_badge(self, cached_count, auth_client, test_engine, csrf_token):
+        org, invite = _setup_invite_uncached(test_engine)
+        assert "Convites (1)" in auth_client.get("/billings/").text
+
+        auth_client.post(f"/invites/{invite.uuid}/accept", data={"csrf_token": csrf_token})
+
+        page = auth_client.get("/billings/").text
+        assert "Convites (1)" not in page
+
+    def test_async_mode_skips_count_on_render(self, auth_client, test_engine):
+        _setup_invite_uncached(test_engine)
+        with patch("web.deps.settings.invite_count_async", True):
+            queries = self._count_queries(test_engine, lambda: auth_client.get("/billings/"))
+            page = auth_client.get("/billings/").text
+
+        assert queries == 0
+        assert "data-invite-count" in page
+        assert auth_client.get("/invites/count").json() == {"count": 1}
@@ -44,7 +44,7 @@ class TestExceptionHandler:
         client.post("/login", data={"username": "erruser", "password": "errpass"})
 
         with patch(
-            "web.deps.SQLAlchemyBillingRepository.list_for_user",
+            "web.deps.SQLAlchemyBillingRepository.list_summaries_for_user_page",
             side_effect=RuntimeError("Unexpected DB crash"),
         ):
             response = client.get("/billings/")
@@ -1,8 +1,35 @@
 """Tests for CSRF middleware edge cases."""
 
 import asyncio
+import time
+from unittest.mock import patch
 
-from web.csrf import CSRFMiddleware
+import pytest
+from starlette.requests import Request
+
+from rentivo.storage.local import LocalStorage
+from tests.web.conftest import get_csrf_token, run_in_loop
+from web.csrf import CSRF_SCAN_LIMIT, CSRFMiddleware, _scan_multipart_token, _scan_urlencoded_token
+
+BOUNDARY = "csrfboundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def _part(name: str, data: bytes, filename: str | None = None) -> bytes:
+    disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+    return f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + data + b"\r\n"
+
+
+def _receive_from(body: bytes, chunk_size: int = 1024):
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    calls = {"n": 0}
+
+    async def receive():
+        i = calls["n"]
+        calls["n"] += 1
+        return {"type": "http.request", "body": chunks[i], "more_body": i < len(chunks) - 1}
+
+    return receive, calls, len(chunks)
 
 
 class TestCSRFMismatch:
@@ -59,3 +86,226 @@ class TestCSRFNonHTTPScope:
 
         asyncio.get_event_loop().run_until_complete(middleware(scope, None, None))
         assert called
+
+
+class TestMultipartTokenScan:
+    def test_reads_only_until_token(self):
+        body = _part("csrf_token", b"abc") + _part("file", b"x" * 200_000, "big.pdf") + f"--{BOUNDARY}--\r\n".encode()
+        receive, calls, total = _receive_from(body)
+
+        token, consumed = run_in_loop(_scan_multipart_token(CONTENT_TYPE, receive))
+
+        assert token == "abc"
+        assert calls["n"] == len(consumed) == 1
+        assert total > 100
+
+    def test_token_after_file_part_is_not_found(self):
+        body = _part("file", b"x" * 10, "a.pdf") + _part("csrf_token", b"abc") + f"--{BOUNDARY}--\r\n".encode()
+        receive, _, _ = _receive_from(body, chunk_size=16)
+
+        token, consumed = run_in_loop(_scan_multipart_token(CONTENT_TYPE, receive))
+
+        assert token == ""
+        assert b"".join(m["body"] for m in consumed) in body
+
+    def test_scan_stops_at_limit(self):
+        body = _part("notes", b"n" * (CSRF_SCAN_LIMIT * 2)) + _part("csrf_token", b"abc")
+        receive, calls, total = _receive_from(body)
+
+        token, _ = run_in_loop(_scan_multipart_token(CONTENT_TYPE, receive))
+
+        assert token == ""
+        assert calls["n"] < total
+
+    def test_missing_boundary(self):
+        receive, calls, _ = _receive_from(b"whatever")
+        assert run_in_loop(_scan_multipart_token("multipart/form-data", receive)) == ("", [])
+        assert calls["n"] == 0
+
+    def test_wrong_multipart_token_redirects(self, auth_client, test_engine, tmp_path):
+        from tests.web.conftest import create_billing_in_db, generate_bill_in_db
+
+        billing = create_billing_in_db(test_engine)
+        bill = generate_bill_in_db(test_engine, billing, tmp_path)
+        url = f"/billings/{billing.uuid}/bills/{bill.uuid}/receipts/upload"
+        files = {"receipt_files": ("a.pdf", b"%PDF", "application/pdf")}
+
+        with patch("web.deps.get_storage", return_value=LocalStorage(str(tmp_path))):
+            rejected = auth_client.post(url, data={"csrf_token": "wrong"}, files=files, follow_redirects=False)
+            accepted = auth_client.post(
+                url, data={"csrf_token": get_csrf_token(auth_client)}, files=files, follow_redirects=False
+            )
+
+        assert rejected.headers["location"] == "/"
+        assert accepted.headers["location"].endswith(f"/bills/{bill.uuid}/edit")
+
+
+class TestUrlencodedTokenScan:
+    def _scan(self, body: bytes, chunk_size: int = 1024):
+        receive, calls, _ = _receive_from(body, chunk_size)
+        token, consumed = run_in_loop(_scan_urlencoded_token(receive))
+        return token, consumed, calls["n"]
+
+    def test_token_first_reads_one_chunk(self):
+        body = b"csrf_token=abc&" + b"&".join(b"f%d=v" % i for i in range(20_000))
+        token, consumed, calls = self._scan(body)
+        assert token == "abc"
+        assert calls == len(consumed) == 1
+
+    def test_route_still_sees_the_whole_form(self):
+        from web.csrf import _replay
+
+        body = b"csrf_token=tok&" + b"&".join(b"f%d=%s" % (i, b"v" * 100) for i in range(500))
+        receive, _, _ = _receive_from(body, chunk_size=4096)
+        scope = {"type": "http", "method": "POST", "headers": [(b"content-type", b"application/x-www-form-urlencoded")]}
+
+        async def scan_then_parse():
+            token, consumed = await _scan_urlencoded_token(receive)
+            form = await Request(scope, _replay(consumed, receive)).form()
+            return token, dict(form)
+
+        token, form = run_in_loop(scan_then_parse())
+
+        assert token == "tok"
+        assert len(form) == 501
+        assert form["f499"] == "v" * 100
+
+    def test_token_split_across_chunks(self):
+        token, consumed, _ = self._scan(b"notes=hello&csrf_token=abcdef&x=1", chunk_size=5)
+        assert token == "abcdef"
+        assert b"".join(m["body"] for m in consumed).startswith(b"notes=hello&csrf_token=abcdef&")
+
+    def test_token_is_last_field(self):
+        assert self._scan(b"a=1&b=2&csrf_token=tok", chunk_size=4)[0] == "tok"
+
+    def test_value_is_unquoted(self):
+        assert self._scan(b"csrf_token=a%2Bb+c")[0] == "a+b c"
+
+    def test_missing_token(self):
+        assert self._scan(b"a=1&b=2")[0] == ""
+
+    def test_empty_body(self):
+        assert self._scan(b"")[0] == ""
+
+    def test_scan_stops_at_limit(self):
+        body = b"notes=" + b"n" * (CSRF_SCAN_LIMIT * 2) + b"&csrf_token=tok"
+        token, _, calls = self._scan(body)
+        assert token == ""
+        assert calls < len(body) // 1024
+
+
+class TestCSRFHeader:
+    def _reorder_url(self, test_engine, tmp_path):
+        from tests.web.conftest import create_billing_in_db, generate_bill_in_db
+
+        billing = create_billing_in_db(test_engine)
+        bill = generate_bill_in_db(test_engine, billing, tmp_path)
+        return f"/billings/{billing.uuid}/bills/{bill.uuid}/receipts/reorder"
+
+    def test_valid_header_on_json_request(self, auth_client, test_engine, tmp_path, csrf_token):
+        url = self._reorder_url(test_engine, tmp_path)
+        with patch("web.deps.get_storage", return_value=LocalStorage(str(tmp_path))):
+            response = auth_client.post(url, json={"order": []}, headers={"X-CSRF-Token": csrf_token})
+        assert response.status_code == 200
+
+    def test_invalid_header_rejected(self, auth_client, test_engine, tmp_path):
+        response = auth_client.post(
+            self._reorder_url(test_engine, tmp_path), json={"order": []}, headers={"X-CSRF-Token": "wrong"}
+        )
+        assert response.status_code == 403
+        assert "error" in response.json()
+
+    def test_valid_header_on_form_skips_body(self, auth_client, csrf_token):
+        """A form without csrf_token in its body is accepted when the header carries the token."""
+        response = auth_client.post(
+            "/security/change-password",
+            data={"current_password": "testpass", "new_password": "new", "confirm_password": "new"},
+            headers={"X-CSRF-Token": csrf_token},
+            follow_redirects=False,
+        )
+        assert response.status_code == 302
+        assert response.headers["location"] == "/security"
+
+    def test_header_overrides_body_token(self, auth_client, csrf_token):
+        response = auth_client.post(
+            "/security/change-password",
+            data={"csrf_token": csrf_token},
+            headers={"X-CSRF-Token": "wrong"},
+            follow_redirects=False,
+        )
+        assert response.status_code == 403
+
+
+@pytest.mark.benchmark
+class TestCSRFBenchmark:
+    """CSRF check latency for a large urlencoded POST.
+
+    Compares the old check (buffer the body, parse the whole form) with the
+    body scanner and the header path. Each variant is followed by the route's
+    own form parse, as in a real request.
+    """
+
+    ROUNDS = 20
+    # Starlette's default form limit is 1000 fields
+    FIELDS = 450
+
+    def _body(self) -> bytes:
+        fields = b"&".join(
+            b"extras-%d-description=%s&extras-%d-amount=1.234%%2C56" % (i, b"Taxa+extra+" * 20, i)
+            for i in range(self.FIELDS)
+        )
+        return b"csrf_token=tok&" + fields
+
+    @staticmethod
+    async def _legacy_check(scope, receive):
+        request = Request(scope, receive)
+        body = await request.body()
+        form = await request.form()
+        token = str(form.get("csrf_token", ""))
+        await form.close()
+        return token, [{"type": "http.request", "body": body, "more_body": False}]
+
+    @staticmethod
+    async def _scan_check(scope, receive):
+        return await _scan_urlencoded_token(receive)
+
+    @staticmethod
+    async def _header_check(scope, receive):
+        return scope["headers"][1][1].decode(), []
+
+    def _per_request_ms(self, check) -> float:
+        from web.csrf import _replay
+
+        body = self._body()
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "headers": [(b"content-type", b"application/x-www-form-urlencoded"), (b"x-csrf-token", b"tok")],
+        }
+
+        async def one_request():
+            receive, _, _ = _receive_from(body, chunk_size=64 * 1024)
+            token, consumed = await check(scope, receive)
+            assert token == "tok"
+            form = await Request(scope, _replay(consumed, receive)).form()
+            assert len(form) == self.FIELDS * 2 + 1
+            await form.close()
+
+        async def rounds():
+            await one_request()
+            start = time.perf_counter()
+            for _ in range(self.ROUNDS):
+                await one_request()
+            return (time.perf_counter() - start) / self.ROUNDS * 1000
+
+        return run_in_loop(rounds())
+
+    def test_post_latency_before_and_after(self, bench_report):
+        legacy = self._per_request_ms(self._legacy_check)
+        scanned = self._per_request_ms(self._scan_check)
+        header = self._per_request_ms(self._header_check)
+
+        bench_report.append(
+            f"CSRF + form parse, {len(self._body()) // 1024} KiB form: "
+            f"full parse={legacy:.2f}ms body scan={scanned:.2f}ms header={header:.2f}ms per request"
+        )
@@ -1,9 +1,24 @@
 """Tests for web middleware and deps edge cases."""
 
 import asyncio
+import inspect
+import threading
+import time
 from unittest.mock import patch
 
-from web.deps import AuthMiddleware, DBConnectionMiddleware
+import anyio
+import httpx
+import pytest
+
+from tests.web.conftest import run_in_loop
+from web.deps import (
+    AuthMiddleware,
+    DBConnectionMiddleware,
+    ThreadPoolMetrics,
+    configure_threadpool,
+    run_blocking,
+    threadpool_metrics,
+)
 
 
 class TestAuthMiddlewareNonHTTP:
@@ -45,3 +60,118 @@ class TestRenderInviteCountException:
         ):
             response = auth_client.get("/billings/")
         assert response.status_code == 200
+
+
+class TestSyncRoutes:
+    def test_no_async_route_handlers(self):
+        """Route handlers must be plain ``def`` so blocking service calls run in the thread pool."""
+        from fastapi.routing import APIRoute
+
+        from web.app import app
+
+        async_routes = [
+            route.path
+            for route in app.routes
+            if isinstance(route, APIRoute) and inspect.iscoroutinefunction(route.endpoint)
+        ]
+        assert async_routes == []
+
+    def test_blocking_requests_run_concurrently(self, client):
+        """A slow handler no longer stalls the event loop for other requests."""
+        from web.app import app
+
+        def slow_render(request, template_name, context=None):
+            time.sleep(0.3)
+            from starlette.responses import HTMLResponse
+
+            return HTMLResponse("ok")
+
+        async def fire():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await asyncio.gather(*(ac.get("/login") for _ in range(4)))
+
+        with patch("web.auth.render", side_effect=slow_render):
+            started = time.perf_counter()
+            responses = run_in_loop(fire())
+            elapsed = time.perf_counter() - started
+
+        assert [r.status_code for r in responses] == [200] * 4
+        assert elapsed < 1.0
+
+
+class TestRunBlocking:
+    def test_runs_in_worker_thread_and_records_wait(self):
+        threadpool_metrics.reset()
+        loop_thread = threading.get_ident()
+
+        async def main():
+            return await run_blocking(lambda x, y=0: (threading.get_ident(), x + y), 1, y=2)
+
+        thread_id, result = run_in_loop(main())
+        assert result == 3
+        assert thread_id != loop_thread
+        assert threadpool_metrics.snapshot()["blocking_calls"] == 1
+
+    def test_propagates_exceptions(self):
+        def boom():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError, match="db down"):
+            run_in_loop(run_blocking(boom))
+
+
+class TestThreadPoolMetrics:
+    def test_configure_threadpool_resizes_limiter(self):
+        async def main():
+            configure_threadpool(3)
+            return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+        assert run_in_loop(main()) == 3
+        assert threadpool_metrics.snapshot()["size"] == 3
+
+    def test_snapshot_before_first_request(self):
+        assert ThreadPoolMetrics().snapshot()["size"] == 0
+
+    def test_configure_threadpool_rejects_zero(self):
+        with pytest.raises(ValueError):
+            run_in_loop(_call(configure_threadpool, 0))
+
+    def test_observe_counts_saturation(self):
+        metrics = ThreadPoolMetrics()
+
+        async def main():
+            configure_threadpool(1)
+            started = anyio.Event()
+            release = threading.Event()
+
+            def hold():
+                anyio.from_thread.run_sync(started.set)
+                release.wait(5)
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(anyio.to_thread.run_sync, hold)
+                await started.wait()
+                metrics.observe()
+                release.set()
+            metrics.observe()
+
+        with patch("web.deps.logger") as mock_logger:
+            run_in_loop(main())
+
+        snap = metrics.snapshot()
+        assert snap["requests"] == 2
+        assert snap["saturated"] == 1
+        assert snap["peak_in_use"] == 1
+        mock_logger.warning.assert_called_once()
+
+    def test_reset(self):
+        metrics = ThreadPoolMetrics()
+        metrics.record_wait(0.5)
+        metrics.reset()
+        assert metrics.blocking_calls == 0
+        assert metrics.blocking_wait_max == 0.0
+
+
+async def _call(func, *args):
+    return func(*args)
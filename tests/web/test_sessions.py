@@ -0,0 +1,372 @@
+"""Tests for server-side sessions: backends, lazy loading and write-back."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from rentivo.models.session import StoredSession
+from rentivo.settings import settings
+from web.deps import run_blocking
+from web.sessions import (
+    DatabaseSessionBackend,
+    KeyValueSessionBackend,
+    LocalKeyValueStore,
+    MemorySessionBackend,
+    ServerSessionMiddleware,
+    _now,
+    _session_key,
+    get_session_backend,
+    load_session,
+)
+
+
+class CountingBackend(MemorySessionBackend):
+    """Memory backend that records every call, optionally marked as blocking."""
+
+    def __init__(self, blocking: bool = False) -> None:
+        super().__init__()
+        self.blocking = blocking
+        self.calls: list[str] = []
+
+    def load(self, session_key):
+        self.calls.append("load")
+        return super().load(session_key)
+
+    def save(self, session):
+        self.calls.append("save")
+        super().save(session)
+
+    def delete(self, session_key):
+        self.calls.append("delete")
+        super().delete(session_key)
+
+
+def _login(request):
+    request.session.clear()
+    request.session["user_id"] = 1
+    return PlainTextResponse("ok")
+
+
+def _whoami(request):
+    return JSONResponse({"user_id": request.session.get("user_id")})
+
+
+def _flash(request):
+    request.session.setdefault("_messages", []).append("hi")
+    return PlainTextResponse("ok")
+
+
+def _logout(request):
+    request.session.clear()
+    return PlainTextResponse("ok")
+
+
+async def _async_whoami(request):
+    await load_session(request.scope)
+    return JSONResponse({"user_id": request.session.get("user_id")})
+
+
+def _static(request):
+    return PlainTextResponse("asset")
+
+
+def _client(backend, **kwargs) -> TestClient:
+    app = Starlette(
+        routes=[
+            Route("/login", _login, methods=["POST"]),
+            Route("/whoami", _whoami),
+            Route("/async-whoami", _async_whoami),
+            Route("/flash", _flash, methods=["POST"]),
+            Route("/logout", _logout, methods=["POST"]),
+            Route("/plain", _static),
+            Route("/static/app.css", _static),
+        ]
+    )
+    app.add_middleware(ServerSessionMiddleware, backend=backend, **kwargs)
+    return TestClient(app)
+
+
+class TestServerSessionMiddleware:
+    def test_login_sets_opaque_cookie(self):
+        backend = CountingBackend()
+        client = _client(backend)
+
+        response = client.post("/login")
+
+        session_id = response.cookies["session"]
+        assert len(session_id) == 43
+        assert "user_id" not in session_id
+        assert backend.load(_session_key(session_id)).data == {"user_id": 1}
+        assert client.get("/whoami").json() == {"user_id": 1}
+
+    def test_unmodified_session_is_not_written(self):
+        backend = CountingBackend()
+        client = _client(backend)
+        client.post("/login")
+        backend.calls.clear()
+
+        response = client.get("/whoami")
+
+        assert backend.calls == ["load"]
+        assert "set-cookie" not in response.headers
+
+    def test_untouched_session_is_not_loaded(self):
+        backend = CountingBackend()
+        client = _client(backend)
+        client.post("/login")
+        backend.calls.clear()
+
+        client.get("/plain")
+
+        assert backend.calls == []
+
+    def test_nested_change_is_written(self):
+        backend = CountingBackend()
+        client = _client(backend)
+        client.post("/login")
+        session_id = client.cookies["session"]
+
+        client.post("/flash")
+
+        assert backend.load(_session_key(session_id)).data["_messages"] == ["hi"]
+
+    def test_no_cookie_and_empty_session_sets_nothing(self):
+        backend = CountingBackend()
+        response = _client(backend).get("/whoami")
+
+        assert backend.calls == []
+        assert "set-cookie" not in response.headers
+
+    def test_clear_rotates_session_id(self):
+        backend = CountingBackend()
+        client = _client(backend)
+        client.post("/login")
+        first = client.cookies["session"]
+
+        client.post("/login")
+        second = client.cookies["session"]
+
+        assert second != first
+        assert backend.load(_session_key(first)) is None
+
+    def test_logout_deletes_session_and_cookie(self):
+        backend = CountingBackend()
+        client = _client(backend)
+        client.post("/login")
+        session_id = client.cookies["session"]
+
+        response = client.post("/logout")
+
+        assert backend.load(_session_key(session_id)) is None
+        assert "1970" in response.headers["set-cookie"]
+        assert client.get("/whoami").json() == {"user_id": None}
+
+    def test_unknown_id_is_not_adopted(self):
+        backend = CountingBackend()
+        client = _client(backend)
+        client.cookies.set("session", "x" * 43, domain="testserver.local")
+
+        client.post("/flash")
+
+        assert client.cookies["session"] != "x" * 43
+        assert backend.load(_session_key("x" * 43)) is None
+
+    def test_legacy_signed_cookie_is_dropped(self):
+        backend = CountingBackend()
+        client = _client(backend)
+        client.cookies["session"] = "eyJ1c2VyX2lkIjogMX0=.ZZZ.signature"
+
+        response = client.get("/plain")
+
+        assert backend.calls == []
+        assert "1970" in response.headers["set-cookie"]
+
+    def test_expiry_refreshed_past_half_life(self):
+        backend = CountingBackend()
+        client = _client(backend, max_age=100)
+        client.post("/login")
+        key = _session_key(client.cookies["session"])
+        stored = backend.load(key)
+        backend.save(stored.model_copy(update={"expires_at": _now() + timedelta(seconds=10)}))
+        backend.calls.clear()
+
+        response = client.get("/whoami")
+
+        assert backend.calls == ["load", "save"]
+        assert "Max-Age=100" in response.headers["set-cookie"]
+
+    def test_blocking_backend_loaded_on_first_access(self):
+        backend = CountingBackend(blocking=True)
+        client = _client(backend)
+        client.post("/login")
+        backend.calls.clear()
+
+        client.get("/static/app.css")
+        client.get("/plain")
+        assert backend.calls == []
+
+        assert client.get("/whoami").json() == {"user_id": 1}
+        assert backend.calls == ["load"]
+
+    def test_load_session_reads_blocking_backend_in_thread_pool(self):
+        backend = CountingBackend(blocking=True)
+        client = _client(backend)
+        client.post("/login")
+        backend.calls.clear()
+
+        with patch("web.sessions.run_blocking", side_effect=run_blocking) as blocking:
+            assert client.get("/async-whoami").json() == {"user_id": 1}
+
+        blocking.assert_called_once()
+        assert backend.calls == ["load"]
+
+    def test_https_only_marks_cookie_secure(self):
+        response = _client(CountingBackend(), https_only=True).post("/login")
+        assert "secure" in response.headers["set-cookie"]
+
+
+class TestMemorySessionBackend:
+    def _session(self, key: str, **overrides) -> StoredSession:
+        defaults = dict(session_key=key, data={"user_id": 1}, expires_at=_now() + timedelta(hours=1))
+        defaults.update(overrides)
+        return StoredSession(**defaults)
+
+    def test_evicts_least_recently_used(self):
+        backend = MemorySessionBackend(max_entries=2)
+        backend.save(self._session("a"))
+        backend.save(self._session("b"))
+        backend.load("a")
+        backend.save(self._session("c"))
+
+        assert backend.load("b") is None
+        assert backend.load("a") is not None
+        assert len(backend) == 2
+
+    def test_expired_session_is_dropped(self):
+        backend = MemorySessionBackend()
+        backend.save(self._session("a", expires_at=_now() - timedelta(seconds=1)))
+
+        assert backend.load("a") is None
+        assert len(backend) == 0
+
+    def test_returns_independent_copies(self):
+        backend = MemorySessionBackend()
+        backend.save(self._session("a"))
+        backend.load("a").data["user_id"] = 2
+
+        assert backend.load("a").data == {"user_id": 1}
+
+    def test_rejects_empty_cache(self):
+        with pytest.raises(ValueError):
+            MemorySessionBackend(max_entries=0)
+
+
+class TestKeyValueSessionBackend:
+    def test_roundtrip_with_ttl(self):
+        store = LocalKeyValueStore()
+        backend = KeyValueSessionBackend(store, blocking=False)
+        session = StoredSession(session_key="k", data={"a": 1}, expires_at=_now() + timedelta(seconds=60))
+
+        with patch.object(store, "set", wraps=store.set) as set_mock:
+            backend.save(session)
+
+        assert set_mock.call_args.args[0] == "rentivo:session:k"
+        assert 58 <= set_mock.call_args.kwargs["ex"] <= 60
+        assert backend.load("k").data == {"a": 1}
+
+        backend.delete("k")
+        assert backend.load("k") is None
+
+    def test_local_store_expires_keys(self):
+        store = LocalKeyValueStore()
+        with patch("web.sessions.time.monotonic", return_value=1000.0):
+            store.set("k", "v", ex=10)
+        with patch("web.sessions.time.monotonic", return_value=1011.0):
+            assert store.get("k") is None
+
+    def test_local_store_delete_counts(self):
+        store = LocalKeyValueStore()
+        store.set("a", b"1")
+        assert store.delete("a", "b") == 1
+
+
+class TestGetSessionBackend:
+    @pytest.mark.parametrize(
+        ("name", "cls"),
+        [("database", DatabaseSessionBackend), ("memory", MemorySessionBackend), ("shared", KeyValueSessionBackend)],
+    )
+    def test_backends(self, name, cls):
+        with patch("web.sessions.settings.session_backend", name):
+            assert isinstance(get_session_backend(), cls)
+
+    def test_unknown_backend(self):
+        with patch("web.sessions.settings.session_backend", "nope"):
+            with pytest.raises(ValueError, match="Unsupported session backend"):
+                get_session_backend()
+
+
+@pytest.fixture()
+def database_sessions(monkeypatch):
+    """Run the web app with the database backend instead of the default signed cookie."""
+    from web.app import app
+
+    middleware = [
+        Middleware(ServerSessionMiddleware, backend=DatabaseSessionBackend(), max_age=settings.session_max_age)
+        if entry.cls is SessionMiddleware
+        else entry
+        for entry in app.user_middleware
+    ]
+    monkeypatch.setattr(app, "user_middleware", middleware)
+    # Rebuilt from user_middleware on the next request; restored (with the list) afterwards
+    monkeypatch.setattr(app, "middleware_stack", None)
+
+
+@pytest.mark.usefixtures("database_sessions")
+class TestDatabaseSessions:
+    """The web app with the database backend, against the test DB."""
+
+    def _rows(self, engine):
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT session_key, data FROM sessions")).fetchall()
+
+    def test_login_stores_session_row(self, auth_client, test_engine):
+        session_id = auth_client.cookies["session"]
+
+        rows = self._rows(test_engine)
+        assert [row[0] for row in rows] == [_session_key(session_id)]
+        assert '"username": "testuser"' in rows[0][1]
+
+    def test_logout_removes_session_row(self, auth_client, test_engine, csrf_token):
+        auth_client.post("/logout", data={"csrf_token": csrf_token}, follow_redirects=False)
+        assert self._rows(test_engine) == []
+
+    def test_static_request_skips_session_store(self, auth_client):
+        with patch.object(DatabaseSessionBackend, "load") as load:
+            response = auth_client.get("/static/favicon.svg")
+
+        load.assert_not_called()
+        assert "set-cookie" not in response.headers
+
+    def test_authenticated_page_loads_session_once(self, auth_client):
+        with patch.object(
+            DatabaseSessionBackend, "load", autospec=True, side_effect=DatabaseSessionBackend.load
+        ) as load:
+            response = auth_client.get("/billings/")
+
+        assert response.status_code == 200
+        assert load.call_count == 1
+
+    def test_purges_expired_rows(self, test_engine):
+        backend = DatabaseSessionBackend(purge_interval=0)
+        backend.save(StoredSession(session_key="old", data={"a": 1}, expires_at=_now() - timedelta(days=1)))
+        backend.save(StoredSession(session_key="new", data={"a": 1}, expires_at=_now() + timedelta(days=1)))
+
+        assert [row[0] for row in self._rows(test_engine)] == ["new"]
@@ -0,0 +1,86 @@
+"""Tests for the streaming receipt multipart parser."""
+
+import pytest
+from starlette.datastructures import Headers
+
+from tests.web.conftest import run_in_loop
+from web.uploads import ReceiptMultiPartParser
+
+BOUNDARY = "testboundary"
+
+
+def _body(*parts: tuple[str, str | None, str | None, bytes]) -> bytes:
+    chunks = []
+    for name, filename, content_type, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        head = f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            head += f"Content-Type: {content_type}\r\n"
+        chunks.append(head.encode() + b"\r\n" + data + b"\r\n")
+    chunks.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(chunks)
+
+
+def _parse(body: bytes, chunk_size: int = 1024, **kwargs):
+    async def stream():
+        for i in range(0, len(body), chunk_size):
+            yield body[i : i + chunk_size]
+
+    headers = Headers({"content-type": f"multipart/form-data; boundary={BOUNDARY}"})
+    parser = ReceiptMultiPartParser(headers, stream(), **kwargs)
+    return run_in_loop(parser.parse())
+
+
+class TestReceiptMultiPartParser:
+    def test_accepted_file_is_spooled(self):
+        form = _parse(_body(("csrf_token", None, None, b"tok"), ("receipt_files", "a.pdf", "application/pdf", b"%PDF")))
+        upload = form["receipt_files"]
+        assert form["csrf_token"] == "tok"
+        assert upload.size == 4
+        assert upload.file.read() == b"%PDF"
+
+    def test_oversized_file_is_dropped_while_streaming(self):
+        data = b"x" * 5000
+        form = _parse(_body(("receipt_files", "big.pdf", "application/pdf", data)), max_file_size=2048)
+        upload = form["receipt_files"]
+        assert upload.size == 5000
+        assert upload.file.read() == b""
+
+    def test_disallowed_type_is_not_spooled(self):
+        form = _parse(_body(("receipt_files", "a.gif", "image/gif", b"GIF89a" * 100)))
+        upload = form["receipt_files"]
+        assert upload.size == 600
+        assert upload.file.read() == b""
+
+    def test_mixed_files_keep_valid_ones(self):
+        form = _parse(
+            _body(
+                ("receipt_files", "big.pdf", "application/pdf", b"x" * 3000),
+                ("receipt_files", "ok.png", "image/png", b"png-bytes"),
+            ),
+            chunk_size=256,
+            max_file_size=2048,
+        )
+        big, ok = form.getlist("receipt_files")
+        assert (big.size, big.file.read()) == (3000, b"")
+        assert (ok.size, ok.file.read()) == (9, b"png-bytes")
+
+    def test_headers_split_across_chunks(self):
+        form = _parse(
+            _body(
+                ("receipt_files", "a.gif", "image/gif", b"GIF89a"),
+                ("receipt_files", "ok.pdf", "application/pdf", b"%PDF-1.7"),
+            ),
+            chunk_size=5,
+        )
+        gif, pdf = form.getlist("receipt_files")
+        assert (gif.size, gif.file.read()) == (6, b"")
+        assert (pdf.content_type, pdf.size, pdf.file.read()) == ("application/pdf", 8, b"%PDF-1.7")
+
+    def test_invalid_multipart_raises(self):
+        from starlette.formparsers import MultiPartException
+
+        with pytest.raises(MultiPartException):
+            _parse(b"--testboundary\r\nno-disposition\r\n\r\nx\r\n--testboundary--\r\n")
@@ -21,13 +21,21 @@ from rentivo.models import format_brl, format_brl_input
 from rentivo.settings import settings
 from web.auth import router as auth_router
 from web.csrf import CSRFMiddleware
-from web.deps import AuthMiddleware, DBConnectionMiddleware, MFAEnforcementMiddleware
+from web.deps import (
+    AuthMiddleware,
+    DBConnectionMiddleware,
+    MFAEnforcementMiddleware,
+    ThreadPoolMetricsMiddleware,
+    configure_threadpool,
+)
 from web.routes.bill import router as bill_router
 from web.routes.billing import router as billing_router
+from web.routes.internal import router as internal_router
 from web.routes.invite import router as invite_router
 from web.routes.organization import router as organization_router
 from web.routes.security import router as security_router
 from web.routes.theme import router as theme_router
+from web.sessions import ServerSessionMiddleware, get_session_backend
 
 configure_logging()
 logger = logging.getLogger(__name__)
@@ -50,6 +58,7 @@ ASSET_VERSION = _build_asset_version()
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     initialize_db()
+    configure_threadpool(settings.web_threadpool_size)
     # Re-apply logging config — Alembic's fileConfig may have overridden it
     reconfigure()
     logger.info("Application started")
@@ -62,7 +71,11 @@ app.add_middleware(DBConnectionMiddleware)
 app.add_middleware(CSRFMiddleware)
 app.add_middleware(MFAEnforcementMiddleware)
 app.add_middleware(AuthMiddleware)
-app.add_middleware(SessionMiddleware, secret_key=settings.get_secret_key())
+if settings.session_backend == "cookie":
+    app.add_middleware(SessionMiddleware, secret_key=settings.get_secret_key(), max_age=settings.session_max_age)
+else:
+    app.add_middleware(ServerSessionMiddleware, backend=get_session_backend(), max_age=settings.session_max_age)
+app.add_middleware(ThreadPoolMetricsMiddleware)
 
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 
@@ -79,10 +92,11 @@ app.include_router(organization_router)
 app.include_router(invite_router)
 app.include_router(security_router)
 app.include_router(theme_router)
+app.include_router(internal_router)
 
 
 @app.exception_handler(StarletteHTTPException)
-async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+def http_exception_handler(request: Request, exc: StarletteHTTPException):
     if exc.status_code == 404:
         from web.csrf import get_csrf_token
         from web.flash import get_flashed_messages
@@ -114,7 +128,7 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 
 
 @app.get("/")
-async def home(request: Request):
+def home(request: Request):
     if request.session.get("user_id"):
         return RedirectResponse("/billings/", status_code=302)
     return templates.TemplateResponse(
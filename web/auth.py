@@ -3,12 +3,13 @@ from __future__ import annotations
 import logging
 import time
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
+from starlette.datastructures import FormData
 
 from rentivo.models.audit_log import AuditEventType
 from rentivo.services.audit_serializers import serialize_user
-from web.deps import get_audit_service, get_mfa_service, get_user_service, render
+from web.deps import form_data, get_audit_service, get_mfa_service, get_user_service, render
 
 logger = logging.getLogger(__name__)
 
@@ -69,18 +70,17 @@ def _clear_mfa_attempts(ip: str) -> None:
 
 
 @router.get("/signup")
-async def signup_page(request: Request):
+def signup_page(request: Request):
     if request.session.get("user_id"):
         return RedirectResponse("/billings/", status_code=302)
     return render(request, "signup.html")
 
 
 @router.post("/signup")
-async def signup(request: Request):
+def signup(request: Request, form: FormData = Depends(form_data)):
     if request.session.get("user_id"):
         return RedirectResponse("/billings/", status_code=302)
 
-    form = await request.form()
     username = str(form.get("username", "")).strip()
     email = str(form.get("email", "")).strip()
     password = str(form.get("password", ""))
@@ -121,14 +121,14 @@ async def signup(request: Request):
 
 
 @router.get("/login")
-async def login_page(request: Request):
+def login_page(request: Request):
     if request.session.get("user_id"):
         return RedirectResponse("/billings/", status_code=302)
     return render(request, "login.html")
 
 
 @router.post("/login")
-async def login(request: Request):
+def login(request: Request, form: FormData = Depends(form_data)):
     client_ip = request.client.host if request.client else "unknown"
 
     if _is_rate_limited(client_ip):
@@ -141,7 +141,6 @@ async def login(request: Request):
             },
         )
 
-    form = await request.form()
     username = form.get("username", "")
     password = form.get("password", "")
 
@@ -216,7 +215,7 @@ async def login(request: Request):
 
 
 @router.get("/mfa-verify")
-async def mfa_verify_page(request: Request):
+def mfa_verify_page(request: Request):
     if not request.session.get("mfa_pending_user_id"):
         return RedirectResponse("/login", status_code=302)
 
@@ -234,7 +233,7 @@ async def mfa_verify_page(request: Request):
 
 
 @router.post("/mfa-verify")
-async def mfa_verify(request: Request):
+def mfa_verify(request: Request, form: FormData = Depends(form_data)):
     user_id = request.session.get("mfa_pending_user_id")
     username = request.session.get("mfa_pending_username")
     if not user_id:
@@ -253,7 +252,6 @@ async def mfa_verify(request: Request):
             },
         )
 
-    form = await request.form()
     code = str(form.get("code", "")).strip()
     method = str(form.get("method", "totp"))
 
@@ -322,12 +320,12 @@ async def mfa_verify(request: Request):
 
 
 @router.get("/change-password")
-async def change_password_redirect(request: Request):
+def change_password_redirect(request: Request):
     return RedirectResponse("/security", status_code=302)
 
 
 @router.post("/logout")
-async def logout(request: Request):
+def logout(request: Request):
     user_id = request.session.get("user_id")
     username = request.session.get("username")
 
@@ -5,25 +5,40 @@ and verified on POST/PUT/DELETE/PATCH requests.
 
 Uses a pure ASGI middleware (not BaseHTTPMiddleware) to avoid consuming the
 request body — downstream handlers can still read request.form().
+
+Requests from our own JS send the token in the ``X-CSRF-Token`` header and
+are verified without touching the body. Plain HTML forms fall back to the
+body: the middleware reads only until the ``csrf_token`` field (the first
+field of every form) has been seen, then replays those chunks followed by
+the rest of the live stream.
 """
 
 from __future__ import annotations
 
 import logging
 import secrets
-from typing import Any
+from urllib.parse import unquote_plus
 
+import python_multipart
 from fastapi import Request
-from fastapi.responses import RedirectResponse
-from starlette.types import ASGIApp, Receive, Scope, Send
+from fastapi.responses import JSONResponse, RedirectResponse
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import parse_options_header
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from web.flash import flash
+from web.sessions import load_session
 
 logger = logging.getLogger(__name__)
 
 SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
 EXEMPT_PATHS = {"/login", "/signup", "/static", "/security/passkeys", "/mfa-verify"}
 
+CSRF_HEADER = "x-csrf-token"
+
+# Give up looking for the token after this many bytes of form body
+CSRF_SCAN_LIMIT = 64 * 1024
+
 
 def get_csrf_token(request: Request) -> str:
     """Get or create a CSRF token for the current session."""
@@ -43,11 +58,129 @@ def _verify_csrf_token(request: Request, form_token: str) -> bool:
     return secrets.compare_digest(session_token, form_token)
 
 
+class _MultipartTokenScanner:
+    """Feed multipart chunks until the ``csrf_token`` field is complete.
+
+    Stops (without a token) at the first file part or after
+    ``CSRF_SCAN_LIMIT`` bytes, so a request never gets buffered beyond
+    its leading form fields.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        self.token: str | None = None
+        self.done = False
+        self._header_name = b""
+        self._disposition = b""
+        self._is_token = False
+        self._value = bytearray()
+        self._scanned = 0
+        self._parser = python_multipart.MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_end": self._on_end,
+            },
+        )
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done:
+            return
+        self._scanned += len(chunk)
+        try:
+            self._parser.write(chunk)
+        except FormParserError:
+            self.done = True
+        if self._scanned > CSRF_SCAN_LIMIT:
+            self.done = True
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._header_name = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if b"filename" in options:
+            self.done = True
+        self._is_token = options.get(b"name") == b"csrf_token"
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._is_token and not self.done:
+            self._value += data[start:end]
+
+    def _on_part_end(self) -> None:
+        if self._is_token and not self.done:
+            self.token = self._value.decode("utf-8", "replace")
+            self.done = True
+
+    def _on_end(self) -> None:
+        self.done = True
+
+
+async def _scan_multipart_token(content_type: str, receive: Receive) -> tuple[str, list[Message]]:
+    """Read just enough of a multipart body to find the CSRF token; return it and the messages consumed."""
+    consumed: list[Message] = []
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if not boundary:
+        return "", consumed
+    scanner = _MultipartTokenScanner(boundary)
+    while not scanner.done:
+        message = await receive()
+        consumed.append(message)
+        if message["type"] != "http.request":
+            break
+        scanner.feed(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return scanner.token or "", consumed
+
+
+async def _scan_urlencoded_token(receive: Receive) -> tuple[str, list[Message]]:
+    """Read an urlencoded body only until the ``csrf_token`` pair is complete."""
+    consumed: list[Message] = []
+    buffer = b""
+    start = 0
+    while True:
+        message = await receive()
+        consumed.append(message)
+        if message["type"] != "http.request":
+            return "", consumed
+        buffer += message.get("body", b"")
+        more_body = message.get("more_body", False)
+        # Only pairs terminated by "&" (or by the end of the body) are complete
+        while (end := buffer.find(b"&", start)) != -1 or not more_body:
+            pair = buffer[start:] if end == -1 else buffer[start:end]
+            name, _, value = pair.partition(b"=")
+            if name == b"csrf_token":
+                return unquote_plus(value.decode("latin-1")), consumed
+            if end == -1:
+                return "", consumed
+            start = end + 1
+        if len(buffer) > CSRF_SCAN_LIMIT:
+            return "", consumed
+
+
 class CSRFMiddleware:
     """Pure ASGI middleware for CSRF verification.
 
-    Reads the request body to extract the csrf_token, then replays the body
-    so downstream handlers can read it again via request.form().
+    Checks the ``X-CSRF-Token`` header when present; otherwise scans the
+    start of the form body for csrf_token and replays what it read so
+    downstream handlers can parse the body via request.form().
     """
 
     def __init__(self, app: ASGIApp) -> None:
@@ -69,15 +202,28 @@ class CSRFMiddleware:
             await self.app(scope, receive, send)
             return
 
+        await load_session(scope)
+        header_token = request.headers.get(CSRF_HEADER)
+        if header_token is not None:
+            if not _verify_csrf_token(request, header_token):
+                logger.warning("CSRF header token mismatch for %s %s", request.method, path)
+                response = JSONResponse({"error": "Sessão expirada. Recarregue a página."}, status_code=403)
+                await response(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+            return
+
         content_type = request.headers.get("content-type", "")
         if "multipart/form-data" not in content_type and "application/x-www-form-urlencoded" not in content_type:
             logger.debug("CSRF bypass: non-form content type for %s %s", request.method, path)
             await self.app(scope, receive, send)
             return
-        body = await request.body()
-        form = await request.form()
-        form_token = str(form.get("csrf_token", ""))
-        await form.close()
+        if "multipart/form-data" in content_type:
+            form_token, consumed = await _scan_multipart_token(content_type, receive)
+            downstream_receive = _replay(consumed, receive)
+        else:
+            form_token, consumed = await _scan_urlencoded_token(receive)
+            downstream_receive = _replay(consumed, receive)
 
         if not _verify_csrf_token(request, form_token):
             logger.warning("CSRF token mismatch for %s %s", request.method, path)
@@ -87,8 +233,16 @@ class CSRFMiddleware:
             await response(scope, receive, send)
             return
 
-        # Replay body so downstream handlers can read request.form()
-        async def replay_receive() -> dict[str, Any]:
-            return {"type": "http.request", "body": body, "more_body": False}
+        await self.app(scope, downstream_receive, send)
+
+
+def _replay(messages: list[Message], receive: Receive) -> Receive:
+    """Receive callable that yields already-consumed messages first, then reads from ``receive``."""
+    pending = list(messages)
+
+    async def replay_receive() -> Message:
+        if pending:
+            return pending.pop(0)
+        return await receive()
 
-        await self.app(scope, replay_receive, send)
+    return replay_receive
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from collections.abc import Callable
 from functools import cache
+from typing import TypeVar
 
+import anyio
+import anyio.to_thread
 from fastapi import Request
 from fastapi.responses import RedirectResponse
+from starlette.datastructures import FormData
 from starlette.responses import Response
 from starlette.types import ASGIApp, Receive, Scope, Send
 
-from rentivo.db import get_engine
+from rentivo.db import RoutingConnection, get_engine, get_read_engine, resilient_connect
 from rentivo.repositories.sqlalchemy import (
     SQLAlchemyAuditLogRepository,
     SQLAlchemyBillingRepository,
     SQLAlchemyBillRepository,
     SQLAlchemyInviteRepository,
+    SQLAlchemyJobRepository,
     SQLAlchemyMFATOTPRepository,
     SQLAlchemyOrganizationRepository,
     SQLAlchemyPasskeyRepository,
@@ -23,20 +31,25 @@ from rentivo.repositories.sqlalchemy import (
     SQLAlchemyUserRepository,
 )
 from rentivo.services.audit_service import AuditService
-from rentivo.services.authorization_service import AuthorizationService
+from rentivo.services.authorization_service import AuthorizationService, membership_cache
 from rentivo.services.bill_service import BillService
 from rentivo.services.billing_service import BillingService
 from rentivo.services.invite_service import InviteService
+from rentivo.services.job_service import JobService
 from rentivo.services.mfa_service import MFAService
 from rentivo.services.organization_service import OrganizationService
 from rentivo.services.theme_service import ThemeService
 from rentivo.services.user_service import UserService
+from rentivo.settings import settings
 from rentivo.storage.factory import get_storage
 from web.flash import get_flashed_messages
 
 logger = logging.getLogger(__name__)
 
-PUBLIC_PREFIX_PATHS = {"/login", "/signup", "/static", "/mfa-verify", "/security/passkeys/auth"}
+T = TypeVar("T")
+
+# /internal endpoints authenticate with their own token instead of a session
+PUBLIC_PREFIX_PATHS = {"/login", "/signup", "/static", "/mfa-verify", "/security/passkeys/auth", "/internal"}
 PUBLIC_EXACT_PATHS = {"/"}
 
 # Paths that MFA-enforcement redirect allows even when mfa_setup_required is set
@@ -63,6 +76,12 @@ def _path_matches_route(scope: Scope) -> bool:
     return first_segment in _get_route_prefixes(app)
 
 
+async def _load_session(scope: Scope) -> None:
+    from web.sessions import load_session  # web.sessions imports this module
+
+    await load_session(scope)
+
+
 class AuthMiddleware:
     """Pure ASGI middleware for authentication checks."""
 
@@ -79,6 +98,7 @@ class AuthMiddleware:
         if path in PUBLIC_EXACT_PATHS or any(path.startswith(p) for p in PUBLIC_PREFIX_PATHS):
             await self.app(scope, receive, send)
             return
+        await _load_session(scope)
         if not request.session.get("user_id"):
             if not _path_matches_route(scope):
                 await self.app(scope, receive, send)
@@ -110,6 +130,7 @@ class MFAEnforcementMiddleware:
             await self.app(scope, receive, send)
             return
 
+        await _load_session(scope)
         user_id = request.session.get("user_id")
         if not user_id:
             await self.app(scope, receive, send)
@@ -124,6 +145,128 @@ class MFAEnforcementMiddleware:
         await self.app(scope, receive, send)
 
 
+class ThreadPoolMetrics:
+    """Saturation counters for the worker thread pool shared by sync routes and ``run_blocking``.
+
+    Route handlers are plain ``def`` functions, so Starlette runs each one on
+    anyio's default thread limiter. Its size comes from
+    ``RENTIVO_WEB_THREADPOOL_SIZE``; requests that arrive while every thread
+    is busy queue behind the limiter and are counted as saturated.
+    """
+
+    _WARN_INTERVAL = 60.0
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.saturated = 0
+        self.peak_in_use = 0
+        self.blocking_calls = 0
+        self.blocking_wait_seconds = 0.0
+        self.blocking_wait_max = 0.0
+        self._last_warning = 0.0
+        self._limiter: anyio.CapacityLimiter | None = None
+
+    def bind(self, limiter: anyio.CapacityLimiter) -> None:
+        """Remember the event loop's limiter so ``snapshot`` can be read from any thread."""
+        self._limiter = limiter
+
+    def observe(self) -> None:
+        """Sample the limiter when a request enters the app."""
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        self._limiter = limiter
+        in_use, size = limiter.borrowed_tokens, limiter.total_tokens
+        with self._lock:
+            self.requests += 1
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            if in_use < size:
+                return
+            self.saturated += 1
+            now = time.monotonic()
+            warn = now - self._last_warning >= self._WARN_INTERVAL
+            if warn:
+                self._last_warning = now
+        if warn:
+            logger.warning(
+                "Thread pool saturated: %d/%d threads busy, %d waiting",
+                in_use,
+                size,
+                limiter.statistics().tasks_waiting,
+            )
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.blocking_calls += 1
+            self.blocking_wait_seconds += seconds
+            self.blocking_wait_max = max(self.blocking_wait_max, seconds)
+
+    def snapshot(self) -> dict[str, float]:
+        limiter = self._limiter
+        with self._lock:
+            return {
+                "size": limiter.total_tokens if limiter else 0,
+                "in_use": limiter.borrowed_tokens if limiter else 0,
+                "waiting": limiter.statistics().tasks_waiting if limiter else 0,
+                "peak_in_use": self.peak_in_use,
+                "requests": self.requests,
+                "saturated": self.saturated,
+                "blocking_calls": self.blocking_calls,
+                "blocking_wait_seconds": round(self.blocking_wait_seconds, 6),
+                "blocking_wait_max": round(self.blocking_wait_max, 6),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = self.saturated = self.peak_in_use = self.blocking_calls = 0
+            self.blocking_wait_seconds = self.blocking_wait_max = 0.0
+
+
+threadpool_metrics = ThreadPoolMetrics()
+
+
+def configure_threadpool(size: int) -> None:
+    """Resize the thread pool used for sync routes. Must be called from the event loop."""
+    if size < 1:
+        raise ValueError("thread pool size must be >= 1")
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = size
+    threadpool_metrics.bind(limiter)
+    logger.info("Web thread pool size set to %d", size)
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call (DB, bcrypt, boto3) in the thread pool from async code."""
+    submitted = time.perf_counter()
+
+    def _call() -> T:
+        threadpool_metrics.record_wait(time.perf_counter() - submitted)
+        return func(*args, **kwargs)
+
+    return await anyio.to_thread.run_sync(_call)
+
+
+async def form_data(request: Request) -> FormData:
+    """Dependency: parse the request form on the event loop so the route itself can be sync."""
+    return await request.form()
+
+
+async def request_body(request: Request) -> bytes:
+    """Dependency: read the raw request body on the event loop so the route itself can be sync."""
+    return await request.body()
+
+
+class ThreadPoolMetricsMiddleware:
+    """Pure ASGI middleware — samples thread pool saturation for every HTTP request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            threadpool_metrics.observe()
+        await self.app(scope, receive, send)
+
+
 class DBConnectionMiddleware:
     """Pure ASGI middleware — creates a single DB connection per request."""
 
@@ -142,15 +285,23 @@ class DBConnectionMiddleware:
         finally:
             conn = getattr(request.state, "db_conn", None)
             if conn is not None:
-                conn.close()
+                await run_blocking(conn.close)
                 logger.debug("DB connection closed for %s %s", request.method, request.url.path)
 
 
 def _get_conn(request: Request):
-    """Lazy per-request connection — created on first use, closed by middleware."""
+    """Lazy per-request connection — created on first use, closed by middleware.
+
+    With a read replica configured, GET requests get a ``RoutingConnection``
+    that sends repository reads to the replica. Other methods stay on the
+    primary, so a form post never edits a copy that lags behind.
+    """
     if request.state.db_conn is None:
         logger.debug("Creating DB connection for %s %s", request.method, request.url.path)
-        request.state.db_conn = get_engine().connect()
+        if settings.db_read_url and request.method in ("GET", "HEAD"):
+            request.state.db_conn = RoutingConnection(get_engine(), get_read_engine())
+        else:
+            request.state.db_conn = resilient_connect(get_engine())
     return request.state.db_conn
 
 
@@ -165,9 +316,14 @@ def get_bill_service(request: Request) -> BillService:
         get_storage(),
         SQLAlchemyReceiptRepository(conn),
         theme_service=get_theme_service(request),
+        job_service=get_job_service(request) if settings.pdf_jobs_enabled else None,
     )
 
 
+def get_job_service(request: Request) -> JobService:
+    return JobService(SQLAlchemyJobRepository(_get_conn(request)))
+
+
 def get_theme_service(request: Request) -> ThemeService:
     return ThemeService(SQLAlchemyThemeRepository(_get_conn(request)))
 
@@ -190,7 +346,12 @@ def get_invite_service(request: Request) -> InviteService:
 
 
 def get_authorization_service(request: Request) -> AuthorizationService:
-    return AuthorizationService(SQLAlchemyOrganizationRepository(_get_conn(request)))
+    """One service per request, so a user's organization roles are queried at most once per request."""
+    service = getattr(request.state, "authorization_service", None)
+    if service is None:
+        service = AuthorizationService(SQLAlchemyOrganizationRepository(_get_conn(request)), cache=membership_cache)
+        request.state.authorization_service = service
+    return service
 
 
 def get_audit_service(request: Request) -> AuditService:
@@ -221,12 +382,14 @@ def render(request: Request, template_name: str, context: dict | None = None) ->
 
     user_id = request.session.get("user_id")
     if user_id and "pending_invite_count" not in ctx:
-        try:
-            conn = _get_conn(request)
-            invite_repo = SQLAlchemyInviteRepository(conn)
-            ctx["pending_invite_count"] = invite_repo.count_pending_for_user(user_id)
-        except Exception:
-            ctx["pending_invite_count"] = 0
+        if settings.invite_count_async:
+            # None renders a placeholder that app.js fills from /invites/count
+            ctx["pending_invite_count"] = None
+        else:
+            try:
+                ctx["pending_invite_count"] = get_invite_service(request).count_pending(user_id)
+            except Exception:
+                ctx["pending_invite_count"] = 0
     else:
         ctx.setdefault("pending_invite_count", 0)
 
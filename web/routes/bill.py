@@ -1,20 +1,30 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
-from starlette.datastructures import UploadFile
+from starlette.datastructures import FormData, UploadFile
 
 from rentivo.models.audit_log import AuditEventType
 from rentivo.models.bill import BillLineItem
 from rentivo.models.billing import ItemType
 from rentivo.models.receipt import ALLOWED_RECEIPT_TYPES, MAX_RECEIPT_SIZE
 from rentivo.services.audit_serializers import serialize_bill
-from web.deps import get_audit_service, get_authorization_service, get_bill_service, get_billing_service, render
+from web.deps import (
+    form_data,
+    get_audit_service,
+    get_authorization_service,
+    get_bill_service,
+    get_billing_service,
+    render,
+    request_body,
+)
 from web.flash import flash
 from web.forms import parse_brl, parse_formset
+from web.uploads import receipt_form_data
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +32,7 @@ router = APIRouter(prefix="/billings/{billing_uuid}/bills")
 
 
 @router.get("/generate")
-async def bill_generate_form(request: Request, billing_uuid: str):
+def bill_generate_form(request: Request, billing_uuid: str):
     logger.info("GET /bills/%s/generate — rendering form", billing_uuid)
     billing_service = get_billing_service(request)
     auth_service = get_authorization_service(request)
@@ -39,7 +49,7 @@ async def bill_generate_form(request: Request, billing_uuid: str):
 
 
 @router.post("/generate")
-async def bill_generate(request: Request, billing_uuid: str):
+def bill_generate(request: Request, billing_uuid: str, form: FormData = Depends(receipt_form_data)):
     logger.info("POST /bills/%s/generate — generating bill", billing_uuid)
     billing_service = get_billing_service(request)
     bill_service = get_bill_service(request)
@@ -56,7 +66,6 @@ async def bill_generate(request: Request, billing_uuid: str):
         flash(request, "Acesso negado.", "danger")
         return RedirectResponse(f"/billings/{billing_uuid}", status_code=302)
 
-    form = await request.form()
     reference_month = str(form.get("reference_month", "")).strip()
     due_date = str(form.get("due_date", "")).strip()
     notes = str(form.get("notes", "")).strip()
@@ -92,36 +101,39 @@ async def bill_generate(request: Request, billing_uuid: str):
         len(extras),
     )
 
-    bill = bill_service.generate_bill(
-        billing=billing,
-        reference_month=reference_month,
-        variable_amounts=variable_amounts,
-        extras=extras,
-        notes=notes,
-        due_date=due_date,
-    )
-    logger.info("Bill generated: uuid=%s total=%d", bill.uuid, bill.total_amount)
-
-    # Attach uploaded receipt files
-    receipt_files = form.getlist("receipt_files")
-    attached_receipts = []
-    for upload in receipt_files:
-        if not isinstance(upload, UploadFile) or not upload.filename:
-            continue
-        file_bytes = await upload.read()
-        content_type = upload.content_type or ""
-        if not file_bytes or content_type not in ALLOWED_RECEIPT_TYPES:
-            continue
-        if len(file_bytes) > MAX_RECEIPT_SIZE:
-            continue
-        receipt = bill_service.add_receipt(
-            bill=bill,
+    # One PDF render for the bill and all attached receipts
+    with bill_service.batch_pdf_regeneration():
+        bill = bill_service.generate_bill(
             billing=billing,
-            filename=upload.filename,
-            file_bytes=file_bytes,
-            content_type=content_type,
+            reference_month=reference_month,
+            variable_amounts=variable_amounts,
+            extras=extras,
+            notes=notes,
+            due_date=due_date,
         )
-        attached_receipts.append(receipt)
+        logger.info("Bill generated: uuid=%s total=%d", bill.uuid, bill.total_amount)
+
+        # Attach uploaded receipt files
+        receipt_files = form.getlist("receipt_files")
+        attached_receipts = []
+        for upload in receipt_files:
+            if not isinstance(upload, UploadFile) or not upload.filename:
+                continue
+            size = upload.size or 0
+            content_type = upload.content_type or ""
+            if not size or content_type not in ALLOWED_RECEIPT_TYPES:
+                continue
+            if size > MAX_RECEIPT_SIZE:
+                continue
+            receipt = bill_service.add_receipt_stream(
+                bill=bill,
+                billing=billing,
+                filename=upload.filename,
+                stream=upload.file,
+                content_type=content_type,
+                size=size,
+            )
+            attached_receipts.append(receipt)
     if attached_receipts:
         logger.info("Attached %d receipts to bill uuid=%s", len(attached_receipts), bill.uuid)
 
@@ -159,7 +171,7 @@ async def bill_generate(request: Request, billing_uuid: str):
 
 
 @router.get("/{bill_uuid}")
-async def bill_detail(request: Request, billing_uuid: str, bill_uuid: str):
+def bill_detail(request: Request, billing_uuid: str, bill_uuid: str):
     logger.info("GET /bills/%s — loading detail", bill_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
@@ -198,7 +210,7 @@ async def bill_detail(request: Request, billing_uuid: str, bill_uuid: str):
 
 
 @router.get("/{bill_uuid}/edit")
-async def bill_edit_form(request: Request, billing_uuid: str, bill_uuid: str):
+def bill_edit_form(request: Request, billing_uuid: str, bill_uuid: str):
     logger.info("GET /bills/%s/edit — loading edit form", bill_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
@@ -219,7 +231,7 @@ async def bill_edit_form(request: Request, billing_uuid: str, bill_uuid: str):
 
 
 @router.post("/{bill_uuid}/edit")
-async def bill_edit(request: Request, billing_uuid: str, bill_uuid: str):
+def bill_edit(request: Request, billing_uuid: str, bill_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /bills/%s/edit — updating bill", bill_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
@@ -238,7 +250,6 @@ async def bill_edit(request: Request, billing_uuid: str, bill_uuid: str):
 
     previous_state = serialize_bill(bill)
 
-    form = await request.form()
     due_date = str(form.get("due_date", "")).strip()
     notes = str(form.get("notes", "")).strip()
 
@@ -306,7 +317,7 @@ async def bill_edit(request: Request, billing_uuid: str, bill_uuid: str):
 
 
 @router.post("/{bill_uuid}/regenerate-pdf")
-async def bill_regenerate_pdf(request: Request, billing_uuid: str, bill_uuid: str):
+def bill_regenerate_pdf(request: Request, billing_uuid: str, bill_uuid: str):
     logger.info("POST /bills/%s/regenerate-pdf", bill_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
@@ -324,8 +335,8 @@ async def bill_regenerate_pdf(request: Request, billing_uuid: str, bill_uuid: st
         return RedirectResponse("/", status_code=302)
 
     old_pdf_path = bill.pdf_path
-    bill_service.regenerate_pdf(bill, billing)
-    logger.info("PDF regenerated for bill uuid=%s", bill_uuid)
+    bill_service.schedule_pdf(bill, billing)
+    logger.info("PDF regeneration requested for bill uuid=%s pending=%s", bill_uuid, bill.pdf_status)
 
     user_id = request.session.get("user_id")
     audit = get_audit_service(request)
@@ -341,12 +352,15 @@ async def bill_regenerate_pdf(request: Request, billing_uuid: str, bill_uuid: st
         new_state={"pdf_path": bill.pdf_path},
     )
 
-    flash(request, "PDF regenerado com sucesso!", "success")
+    if bill_service.is_pdf_pending(bill):
+        flash(request, "O PDF está sendo regenerado e ficará disponível em instantes.", "success")
+    else:
+        flash(request, "PDF regenerado com sucesso!", "success")
     return RedirectResponse(f"/billings/{billing_uuid}/bills/{bill.uuid}", status_code=302)
 
 
 @router.post("/{bill_uuid}/change-status")
-async def bill_change_status(request: Request, billing_uuid: str, bill_uuid: str):
+def bill_change_status(request: Request, billing_uuid: str, bill_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /bills/%s/change-status", bill_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
@@ -368,7 +382,6 @@ async def bill_change_status(request: Request, billing_uuid: str, bill_uuid: str
         flash(request, "Acesso negado.", "danger")
         return RedirectResponse(f"/billings/{billing_uuid}", status_code=302)
 
-    form = await request.form()
     new_status = str(form.get("status", "")).strip()
     previous_status = bill.status
 
@@ -398,7 +411,7 @@ async def bill_change_status(request: Request, billing_uuid: str, bill_uuid: str
 
 
 @router.post("/{bill_uuid}/delete")
-async def bill_delete(request: Request, billing_uuid: str, bill_uuid: str):
+def bill_delete(request: Request, billing_uuid: str, bill_uuid: str):
     logger.info("POST /bills/%s/delete", bill_uuid)
     bill_service = get_bill_service(request)
 
@@ -434,10 +447,13 @@ async def bill_delete(request: Request, billing_uuid: str, bill_uuid: str):
 
 
 @router.get("/{bill_uuid}/invoice")
-async def bill_invoice(request: Request, billing_uuid: str, bill_uuid: str):
+def bill_invoice(request: Request, billing_uuid: str, bill_uuid: str):
     logger.info("GET /bills/%s/invoice — serving PDF", bill_uuid)
     bill_service = get_bill_service(request)
     bill = bill_service.get_bill_by_uuid(bill_uuid)
+    if bill and not bill.pdf_path and bill_service.is_pdf_pending(bill):
+        flash(request, "O PDF ainda está sendo gerado. Tente novamente em instantes.", "warning")
+        return RedirectResponse(f"/billings/{billing_uuid}/bills/{bill_uuid}", status_code=302)
     if not bill or not bill.pdf_path:
         logger.warning("Bill not found or no PDF: uuid=%s", bill_uuid)
         flash(request, "Fatura sem PDF.", "danger")
@@ -456,7 +472,7 @@ async def bill_invoice(request: Request, billing_uuid: str, bill_uuid: str):
 
 
 @router.get("/{bill_uuid}/receipts/{receipt_uuid}")
-async def receipt_view(request: Request, billing_uuid: str, bill_uuid: str, receipt_uuid: str):
+def receipt_view(request: Request, billing_uuid: str, bill_uuid: str, receipt_uuid: str):
     logger.info("GET /bills/%s/receipts/%s — serving file", bill_uuid, receipt_uuid)
     bill_service = get_bill_service(request)
 
@@ -474,12 +490,11 @@ async def receipt_view(request: Request, billing_uuid: str, bill_uuid: str, rece
 
 
 @router.post("/{bill_uuid}/receipts/upload")
-async def receipt_upload(request: Request, billing_uuid: str, bill_uuid: str):
+def receipt_upload(request: Request, billing_uuid: str, bill_uuid: str, form: FormData = Depends(receipt_form_data)):
     logger.info("POST /bills/%s/receipts/upload", bill_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
 
-    form = await request.form()
     redirect_url = str(form.get("next", "")).strip() or f"/billings/{billing_uuid}/bills/{bill_uuid}/edit"
 
     bill = bill_service.get_bill_by_uuid(bill_uuid)
@@ -504,47 +519,49 @@ async def receipt_upload(request: Request, billing_uuid: str, bill_uuid: str):
     attached = 0
     skipped = 0
     audit = get_audit_service(request)
-    for upload in valid_uploads:
-        file_bytes = await upload.read()
-        content_type = upload.content_type or ""
-
-        if content_type not in ALLOWED_RECEIPT_TYPES:
-            logger.warning("Invalid file type: %s", content_type)
-            skipped += 1
-            continue
-        if not file_bytes:
-            skipped += 1
-            continue
-        if len(file_bytes) > MAX_RECEIPT_SIZE:
-            skipped += 1
-            continue
-
-        receipt = bill_service.add_receipt(
-            bill=bill,
-            billing=billing,
-            filename=upload.filename,
-            file_bytes=file_bytes,
-            content_type=content_type,
-        )
-        logger.info("Receipt uploaded for bill uuid=%s", bill_uuid)
-        attached += 1
-
-        audit.safe_log(
-            AuditEventType.RECEIPT_UPLOAD,
-            actor_id=request.session.get("user_id"),
-            actor_username=request.session.get("username", ""),
-            source="web",
-            entity_type="receipt",
-            entity_id=receipt.id,
-            entity_uuid=receipt.uuid,
-            new_state={
-                "filename": receipt.filename,
-                "content_type": receipt.content_type,
-                "file_size": receipt.file_size,
-                "bill_uuid": bill_uuid,
-                "billing_uuid": billing_uuid,
-            },
-        )
+    with bill_service.batch_pdf_regeneration():
+        for upload in valid_uploads:
+            size = upload.size or 0
+            content_type = upload.content_type or ""
+
+            if content_type not in ALLOWED_RECEIPT_TYPES:
+                logger.warning("Invalid file type: %s", content_type)
+                skipped += 1
+                continue
+            if not size:
+                skipped += 1
+                continue
+            if size > MAX_RECEIPT_SIZE:
+                skipped += 1
+                continue
+
+            receipt = bill_service.add_receipt_stream(
+                bill=bill,
+                billing=billing,
+                filename=upload.filename,
+                stream=upload.file,
+                content_type=content_type,
+                size=size,
+            )
+            logger.info("Receipt uploaded for bill uuid=%s", bill_uuid)
+            attached += 1
+
+            audit.safe_log(
+                AuditEventType.RECEIPT_UPLOAD,
+                actor_id=request.session.get("user_id"),
+                actor_username=request.session.get("username", ""),
+                source="web",
+                entity_type="receipt",
+                entity_id=receipt.id,
+                entity_uuid=receipt.uuid,
+                new_state={
+                    "filename": receipt.filename,
+                    "content_type": receipt.content_type,
+                    "file_size": receipt.file_size,
+                    "bill_uuid": bill_uuid,
+                    "billing_uuid": billing_uuid,
+                },
+            )
 
     if attached == 1:
         flash(request, "Comprovante anexado com sucesso!", "success")
@@ -556,12 +573,13 @@ async def receipt_upload(request: Request, billing_uuid: str, bill_uuid: str):
 
 
 @router.post("/{bill_uuid}/receipts/{receipt_uuid}/delete")
-async def receipt_delete(request: Request, billing_uuid: str, bill_uuid: str, receipt_uuid: str):
+def receipt_delete(
+    request: Request, billing_uuid: str, bill_uuid: str, receipt_uuid: str, form: FormData = Depends(form_data)
+):
     logger.info("POST /bills/%s/receipts/%s/delete", bill_uuid, receipt_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
 
-    form = await request.form()
     redirect_url = str(form.get("next", "")).strip() or f"/billings/{billing_uuid}/bills/{bill_uuid}/edit"
 
     bill = bill_service.get_bill_by_uuid(bill_uuid)
@@ -609,7 +627,7 @@ async def receipt_delete(request: Request, billing_uuid: str, bill_uuid: str, re
 
 
 @router.post("/{bill_uuid}/receipts/reorder")
-async def receipt_reorder(request: Request, billing_uuid: str, bill_uuid: str):
+def receipt_reorder(request: Request, billing_uuid: str, bill_uuid: str, raw_body: bytes = Depends(request_body)):
     logger.info("POST /bills/%s/receipts/reorder", bill_uuid)
     bill_service = get_bill_service(request)
     billing_service = get_billing_service(request)
@@ -628,7 +646,7 @@ async def receipt_reorder(request: Request, billing_uuid: str, bill_uuid: str):
         return JSONResponse({"error": "Acesso negado."}, status_code=403)
 
     try:
-        body = await request.json()
+        body = json.loads(raw_body)
         receipt_uuids = body.get("order", [])
     except Exception:
         return JSONResponse({"error": "JSON inválido."}, status_code=400)
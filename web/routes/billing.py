@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import logging
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
+from starlette.datastructures import FormData
 
 from rentivo.models.audit_log import AuditEventType
 from rentivo.models.billing import BillingItem, ItemType
 from rentivo.services.audit_serializers import serialize_billing
 from web.deps import (
+    form_data,
     get_audit_service,
     get_authorization_service,
     get_bill_service,
@@ -23,27 +25,38 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/billings")
 
+BILLINGS_PAGE_SIZE = 30
+BILLS_PAGE_SIZE = 24
+
 
 @router.get("/")
-async def billing_list(request: Request):
+def billing_list(request: Request, cursor: str | None = None):
     logger.info("GET /billings/ — listing billings")
     service = get_billing_service(request)
     user_id = request.session.get("user_id")
-    billings = service.list_billings_for_user(user_id)
-    logger.info("Found %d billings", len(billings))
-    return render(request, "billing/list.html", {"billings": billings})
+    try:
+        page = service.list_billing_summaries_for_user_page(user_id, BILLINGS_PAGE_SIZE, cursor)
+    except ValueError:
+        logger.warning("Invalid billings cursor, showing first page")
+        cursor = None
+        page = service.list_billing_summaries_for_user_page(user_id, BILLINGS_PAGE_SIZE)
+    logger.info("Found %d billings", len(page.items))
+    return render(
+        request,
+        "billing/list.html",
+        {"billings": page.items, "next_cursor": page.next_cursor, "cursor": cursor},
+    )
 
 
 @router.get("/create")
-async def billing_create_form(request: Request):
+def billing_create_form(request: Request):
     logger.info("GET /billings/create — rendering form")
     return render(request, "billing/create.html")
 
 
 @router.post("/create")
-async def billing_create(request: Request):
+def billing_create(request: Request, form: FormData = Depends(form_data)):
     logger.info("POST /billings/create — creating billing")
-    form = await request.form()
     name = str(form.get("name", "")).strip()
     description = str(form.get("description", "")).strip()
     pix_key = str(form.get("pix_key", "")).strip()
@@ -109,7 +122,7 @@ async def billing_create(request: Request):
 
 
 @router.get("/{billing_uuid}")
-async def billing_detail(request: Request, billing_uuid: str):
+def billing_detail(request: Request, billing_uuid: str, cursor: str | None = None):
     logger.info("GET /billings/%s — loading detail", billing_uuid)
     billing_service = get_billing_service(request)
     bill_service = get_bill_service(request)
@@ -134,8 +147,13 @@ async def billing_detail(request: Request, billing_uuid: str):
         flash(request, "Cobrança inválida.", "danger")
         return RedirectResponse("/", status_code=302)
 
-    bills = bill_service.list_bills(billing.id)
-    logger.info("Found %d bills for billing id=%s", len(bills), billing.id)
+    try:
+        page = bill_service.list_bill_summaries_page(billing.id, BILLS_PAGE_SIZE, cursor)
+    except ValueError:
+        logger.warning("Invalid bills cursor for billing id=%s, showing first page", billing.id)
+        cursor = None
+        page = bill_service.list_bill_summaries_page(billing.id, BILLS_PAGE_SIZE)
+    logger.info("Found %d bills for billing id=%s", len(page.items), billing.id)
 
     # Load user's orgs for transfer dropdown
     org_service = get_organization_service(request)
@@ -149,7 +167,9 @@ async def billing_detail(request: Request, billing_uuid: str):
         "billing/detail.html",
         {
             "billing": billing,
-            "bills": bills,
+            "bills": page.items,
+            "next_cursor": page.next_cursor,
+            "cursor": cursor,
             "role": role,
             "user_orgs": user_orgs,
         },
@@ -157,7 +177,7 @@ async def billing_detail(request: Request, billing_uuid: str):
 
 
 @router.get("/{billing_uuid}/edit")
-async def billing_edit_form(request: Request, billing_uuid: str):
+def billing_edit_form(request: Request, billing_uuid: str):
     logger.info("GET /billings/%s/edit — loading edit form", billing_uuid)
     service = get_billing_service(request)
     auth_service = get_authorization_service(request)
@@ -174,7 +194,7 @@ async def billing_edit_form(request: Request, billing_uuid: str):
 
 
 @router.post("/{billing_uuid}/edit")
-async def billing_edit(request: Request, billing_uuid: str):
+def billing_edit(request: Request, billing_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /billings/%s/edit — updating billing", billing_uuid)
     service = get_billing_service(request)
     auth_service = get_authorization_service(request)
@@ -190,7 +210,6 @@ async def billing_edit(request: Request, billing_uuid: str):
 
     previous_state = serialize_billing(billing)
 
-    form = await request.form()
     billing.name = str(form.get("name", "")).strip()
     billing.description = str(form.get("description", "")).strip()
     billing.pix_key = str(form.get("pix_key", "")).strip()
@@ -237,7 +256,7 @@ async def billing_edit(request: Request, billing_uuid: str):
 
 
 @router.post("/{billing_uuid}/transfer")
-async def billing_transfer(request: Request, billing_uuid: str):
+def billing_transfer(request: Request, billing_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /billings/%s/transfer", billing_uuid)
     billing_service = get_billing_service(request)
     auth_service = get_authorization_service(request)
@@ -249,7 +268,6 @@ async def billing_transfer(request: Request, billing_uuid: str):
     if not auth_service.can_transfer_billing(user_id, billing):
         flash(request, "Acesso negado.", "danger")
         return RedirectResponse(f"/billings/{billing_uuid}", status_code=302)
-    form = await request.form()
     org_id = str(form.get("organization_id", "")).strip()
     if not org_id:
         flash(request, "Selecione uma organização.", "danger")
@@ -279,7 +297,7 @@ async def billing_transfer(request: Request, billing_uuid: str):
 
 
 @router.post("/{billing_uuid}/delete")
-async def billing_delete(request: Request, billing_uuid: str):
+def billing_delete(request: Request, billing_uuid: str):
     logger.info("POST /billings/%s/delete — deleting billing", billing_uuid)
     service = get_billing_service(request)
     auth_service = get_authorization_service(request)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request
+from starlette.responses import PlainTextResponse, Response
+
+from rentivo.db import pool_metrics, replica_pool_metrics
+from rentivo.metrics import CONTENT_TYPE, MetricsWriter
+from rentivo.pdf.optimizer import optimize_metrics
+from rentivo.pix import qrcode_cache
+from rentivo.services.authorization_service import membership_cache
+from rentivo.services.bill_service import receipt_fetch_metrics
+from rentivo.services.invite_service import invite_count_cache
+from rentivo.settings import settings
+from web.deps import get_job_service, threadpool_metrics
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/internal")
+
+
+def _write_db_pool(writer: MetricsWriter, pool: dict, prefix: str = "db_pool") -> None:
+    writer.gauge(f"{prefix}_size", "Connections the pool keeps open.", pool["size"])
+    writer.gauge(f"{prefix}_checked_out", "Connections currently checked out.", pool["checked_out"])
+    writer.gauge(f"{prefix}_idle", "Idle connections in the pool.", pool["idle"])
+    writer.gauge(f"{prefix}_overflow", "Open connections beyond the pool size.", pool["overflow"])
+    writer.counter(f"{prefix}_checkouts_total", "Connections checked out.", pool["checkouts"])
+    writer.counter(f"{prefix}_checkins_total", "Connections returned to the pool.", pool["checkins"])
+    writer.counter(f"{prefix}_connects_total", "New DBAPI connections opened.", pool["connects"])
+    writer.counter(
+        f"{prefix}_overflow_connects_total", "Connections opened beyond the pool size.", pool["overflow_connects"]
+    )
+    writer.counter(f"{prefix}_invalidations_total", "Connections invalidated (disconnects).", pool["invalidations"])
+    writer.counter(f"{prefix}_timeouts_total", "Checkouts that timed out waiting for a connection.", pool["timeouts"])
+    writer.counter(f"{prefix}_pings_total", "Liveness pings sent on checkout.", pool["pings"])
+    writer.counter(
+        f"{prefix}_pings_skipped_total", "Checkouts that skipped the ping (recently used).", pool["pings_skipped"]
+    )
+    writer.counter(f"{prefix}_ping_failures_total", "Pings that found a dead connection.", pool["ping_failures"])
+    writer.counter(f"{prefix}_retries_total", "Statements re-run after losing the connection.", pool["retries"])
+    writer.histogram(
+        f"{prefix}_checkout_seconds",
+        "Time engine.connect() waited for a connection.",
+        pool["wait_buckets"],
+        pool["wait_seconds"],
+        pool["checkouts"] + pool["timeouts"],
+    )
+
+
+def _write_threadpool(writer: MetricsWriter) -> None:
+    threads = threadpool_metrics.snapshot()
+    writer.gauge("web_threadpool_size", "Threads serving route handlers.", threads["size"])
+    writer.gauge("web_threadpool_in_use", "Threads currently busy.", threads["in_use"])
+    writer.gauge("web_threadpool_waiting", "Tasks waiting for a free thread.", threads["waiting"])
+    writer.gauge("web_threadpool_peak_in_use", "Most threads seen busy at once.", threads["peak_in_use"])
+    writer.counter("web_requests_total", "HTTP requests received.", threads["requests"])
+    writer.counter(
+        "web_requests_saturated_total", "Requests that arrived with every thread busy.", threads["saturated"]
+    )
+    writer.counter("web_blocking_calls_total", "Blocking calls sent to the thread pool.", threads["blocking_calls"])
+    writer.counter(
+        "web_blocking_wait_seconds_total", "Time blocking calls waited for a thread.", threads["blocking_wait_seconds"]
+    )
+
+
+def _write_caches(writer: MetricsWriter) -> None:
+    caches = {
+        "pix_qr": qrcode_cache.stats(),
+        "org_roles": membership_cache.stats(),
+        "invite_count": invite_count_cache.stats(),
+    }
+    writer.family("cache_hits_total", "counter", "Cache hits.", [({"cache": k}, v["hits"]) for k, v in caches.items()])
+    writer.family(
+        "cache_misses_total", "counter", "Cache misses.", [({"cache": k}, v["misses"]) for k, v in caches.items()]
+    )
+    writer.family("cache_entries", "gauge", "Cached entries.", [({"cache": k}, v["size"]) for k, v in caches.items()])
+
+
+def _write_pdf_optimize(writer: MetricsWriter) -> None:
+    stats = optimize_metrics.snapshot()
+    writer.counter(
+        "pdf_optimize_documents_total", "Bill PDFs passed through the optimisation stage.", stats["documents"]
+    )
+    writer.counter("pdf_optimize_failures_total", "PDFs stored unoptimized after an error.", stats["failures"])
+    writer.counter("pdf_optimize_bytes_in_total", "Bytes of PDFs before optimisation.", stats["bytes_in"])
+    writer.counter("pdf_optimize_bytes_out_total", "Bytes of PDFs stored after optimisation.", stats["bytes_out"])
+    writer.counter("pdf_optimize_seconds_total", "Time spent optimizing PDFs.", stats["seconds"])
+
+
+def _write_receipt_fetches(writer: MetricsWriter) -> None:
+    stats = receipt_fetch_metrics.snapshot()
+    writer.counter(
+        "receipt_fetch_failures_total",
+        "Receipts left out of a bill PDF because they failed to download.",
+        stats["failures"],
+    )
+    writer.histogram(
+        "receipt_fetch_seconds",
+        "Time to download a receipt from storage while building a bill PDF.",
+        stats["buckets"],
+        stats["seconds"],
+        stats["fetches"],
+    )
+
+
+def _write_jobs(writer: MetricsWriter, request: Request) -> None:
+    try:
+        counts = get_job_service(request).stats()
+    except Exception:
+        logger.warning("Failed to read job counts for metrics", exc_info=True)
+        return
+    writer.family(
+        "jobs", "gauge", "Background jobs by status.", [({"status": k}, v) for k, v in sorted(counts.items())]
+    )
+
+
+@router.get("/metrics")
+def metrics(request: Request):
+    """Prometheus scrape endpoint, authenticated with ``RENTIVO_METRICS_TOKEN`` as a bearer token."""
+    token = settings.metrics_token
+    if not token:
+        raise HTTPException(status_code=404)
+    provided = request.headers.get("authorization", "")
+    if not secrets.compare_digest(provided.encode(), f"Bearer {token}".encode()):
+        logger.warning("Rejected metrics scrape from %s", request.client.host if request.client else "?")
+        return PlainTextResponse("Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+
+    writer = MetricsWriter()
+    _write_db_pool(writer, pool_metrics.snapshot())
+    if settings.db_read_url:
+        _write_db_pool(writer, replica_pool_metrics.snapshot(), "db_replica_pool")
+    _write_threadpool(writer)
+    _write_caches(writer)
+    _write_pdf_optimize(writer)
+    _write_receipt_fetches(writer)
+    _write_jobs(writer, request)
+    return Response(writer.render(), media_type=CONTENT_TYPE)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 
 from fastapi import APIRouter, Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 
 from rentivo.models.audit_log import AuditEventType
 from web.deps import get_audit_service, get_invite_service, get_mfa_service, render
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/invites")
 
 
 @router.get("/")
-async def invite_list(request: Request):
+def invite_list(request: Request):
     logger.info("GET /invites/ — listing pending invites")
     user_id = request.session.get("user_id")
     service = get_invite_service(request)
@@ -24,8 +24,16 @@ async def invite_list(request: Request):
     return render(request, "invite/list.html", {"invites": invites})
 
 
+@router.get("/count")
+def invite_count(request: Request):
+    """Pending invite count for the topbar badge (see RENTIVO_INVITE_COUNT_ASYNC)."""
+    user_id = request.session.get("user_id")
+    count = get_invite_service(request).count_pending(user_id)
+    return JSONResponse({"count": count}, headers={"Cache-Control": "no-store"})
+
+
 @router.post("/{invite_uuid}/accept")
-async def invite_accept(request: Request, invite_uuid: str):
+def invite_accept(request: Request, invite_uuid: str):
     logger.info("POST /invites/%s/accept", invite_uuid)
     user_id = request.session.get("user_id")
     service = get_invite_service(request)
@@ -59,7 +67,7 @@ async def invite_accept(request: Request, invite_uuid: str):
 
 
 @router.post("/{invite_uuid}/decline")
-async def invite_decline(request: Request, invite_uuid: str):
+def invite_decline(request: Request, invite_uuid: str):
     logger.info("POST /invites/%s/decline", invite_uuid)
     user_id = request.session.get("user_id")
     service = get_invite_service(request)
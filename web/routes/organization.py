@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import logging
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
+from starlette.datastructures import FormData
 
 from rentivo.models.audit_log import AuditEventType
 from rentivo.models.organization import OrgRole
 from rentivo.services.audit_serializers import serialize_invite, serialize_organization
 from web.deps import (
+    form_data,
     get_audit_service,
     get_authorization_service,
     get_billing_service,
@@ -25,7 +27,7 @@ router = APIRouter(prefix="/organizations")
 
 
 @router.get("/")
-async def organization_list(request: Request):
+def organization_list(request: Request):
     logger.info("GET /organizations/ — listing organizations")
     user_id = request.session.get("user_id")
     service = get_organization_service(request)
@@ -35,15 +37,14 @@ async def organization_list(request: Request):
 
 
 @router.get("/create")
-async def organization_create_form(request: Request):
+def organization_create_form(request: Request):
     logger.info("GET /organizations/create — rendering form")
     return render(request, "organization/create.html")
 
 
 @router.post("/create")
-async def organization_create(request: Request):
+def organization_create(request: Request, form: FormData = Depends(form_data)):
     logger.info("POST /organizations/create — creating organization")
-    form = await request.form()
     name = str(form.get("name", "")).strip()
     if not name:
         logger.warning("Organization create rejected: empty name")
@@ -71,7 +72,7 @@ async def organization_create(request: Request):
 
 
 @router.get("/{org_uuid}")
-async def organization_detail(request: Request, org_uuid: str):
+def organization_detail(request: Request, org_uuid: str):
     logger.info("GET /organizations/%s — loading detail", org_uuid)
     service = get_organization_service(request)
     org = service.get_by_uuid(org_uuid)
@@ -117,7 +118,7 @@ async def organization_detail(request: Request, org_uuid: str):
 
 
 @router.get("/{org_uuid}/edit")
-async def organization_edit_form(request: Request, org_uuid: str):
+def organization_edit_form(request: Request, org_uuid: str):
     logger.info("GET /organizations/%s/edit — loading edit form", org_uuid)
     service = get_organization_service(request)
     org = service.get_by_uuid(org_uuid)
@@ -137,7 +138,7 @@ async def organization_edit_form(request: Request, org_uuid: str):
 
 
 @router.post("/{org_uuid}/edit")
-async def organization_edit(request: Request, org_uuid: str):
+def organization_edit(request: Request, org_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /organizations/%s/edit — updating organization", org_uuid)
     service = get_organization_service(request)
     org = service.get_by_uuid(org_uuid)
@@ -155,7 +156,6 @@ async def organization_edit(request: Request, org_uuid: str):
 
     previous_state = serialize_organization(org)
 
-    form = await request.form()
     org.name = str(form.get("name", "")).strip()
     if not org.name:
         logger.warning("Organization edit rejected: empty name for uuid=%s", org_uuid)
@@ -183,7 +183,7 @@ async def organization_edit(request: Request, org_uuid: str):
 
 
 @router.post("/{org_uuid}/delete")
-async def organization_delete(request: Request, org_uuid: str):
+def organization_delete(request: Request, org_uuid: str):
     logger.info("POST /organizations/%s/delete — deleting organization", org_uuid)
     service = get_organization_service(request)
     org = service.get_by_uuid(org_uuid)
@@ -220,7 +220,7 @@ async def organization_delete(request: Request, org_uuid: str):
 
 
 @router.post("/{org_uuid}/members/{member_user_id}/role")
-async def member_change_role(request: Request, org_uuid: str, member_user_id: int):
+def member_change_role(request: Request, org_uuid: str, member_user_id: int, form: FormData = Depends(form_data)):
     logger.info(
         "POST /organizations/%s/members/%s/role — changing role",
         org_uuid,
@@ -240,7 +240,6 @@ async def member_change_role(request: Request, org_uuid: str, member_user_id: in
         flash(request, "Acesso negado.", "danger")
         return RedirectResponse(f"/organizations/{org_uuid}", status_code=302)
 
-    form = await request.form()
     new_role = str(form.get("role", "")).strip()
     if new_role not in [r.value for r in OrgRole]:
         logger.warning("Invalid role %s for org=%s member=%s", new_role, org_uuid, member_user_id)
@@ -275,7 +274,7 @@ async def member_change_role(request: Request, org_uuid: str, member_user_id: in
 
 
 @router.post("/{org_uuid}/members/{member_user_id}/remove")
-async def member_remove(request: Request, org_uuid: str, member_user_id: int):
+def member_remove(request: Request, org_uuid: str, member_user_id: int):
     logger.info("POST /organizations/%s/members/%s/remove", org_uuid, member_user_id)
     service = get_organization_service(request)
     org = service.get_by_uuid(org_uuid)
@@ -318,7 +317,7 @@ async def member_remove(request: Request, org_uuid: str, member_user_id: int):
 
 
 @router.post("/{org_uuid}/invite")
-async def organization_invite(request: Request, org_uuid: str):
+def organization_invite(request: Request, org_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /organizations/%s/invite — sending invite", org_uuid)
     org_service = get_organization_service(request)
     org = org_service.get_by_uuid(org_uuid)
@@ -334,7 +333,6 @@ async def organization_invite(request: Request, org_uuid: str):
         flash(request, "Acesso negado.", "danger")
         return RedirectResponse(f"/organizations/{org_uuid}", status_code=302)
 
-    form = await request.form()
     username = str(form.get("username", "")).strip()
     role = str(form.get("role", "viewer")).strip()
 
@@ -371,7 +369,7 @@ async def organization_invite(request: Request, org_uuid: str):
 
 
 @router.post("/{org_uuid}/toggle-mfa")
-async def organization_toggle_mfa(request: Request, org_uuid: str):
+def organization_toggle_mfa(request: Request, org_uuid: str):
     logger.info("POST /organizations/%s/toggle-mfa", org_uuid)
     org_service = get_organization_service(request)
     org = org_service.get_by_uuid(org_uuid)
@@ -414,7 +412,7 @@ async def organization_toggle_mfa(request: Request, org_uuid: str):
 
 
 @router.post("/{org_uuid}/transfer-billing")
-async def organization_transfer_billing(request: Request, org_uuid: str):
+def organization_transfer_billing(request: Request, org_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /organizations/%s/transfer-billing", org_uuid)
     org_service = get_organization_service(request)
     org = org_service.get_by_uuid(org_uuid)
@@ -430,7 +428,6 @@ async def organization_transfer_billing(request: Request, org_uuid: str):
         flash(request, "Acesso negado.", "danger")
         return RedirectResponse(f"/organizations/{org_uuid}", status_code=302)
 
-    form = await request.form()
     billing_uuid = str(form.get("billing_uuid", "")).strip()
     if not billing_uuid:
         logger.warning("Transfer billing rejected: no billing selected for org=%s", org_uuid)
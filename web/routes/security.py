@@ -6,8 +6,9 @@ import logging
 import time
 
 import webauthn
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse, RedirectResponse
+from starlette.datastructures import FormData
 from webauthn.helpers.structs import (
     AuthenticatorSelectionCriteria,
     PublicKeyCredentialDescriptor,
@@ -18,7 +19,7 @@ from webauthn.helpers.structs import (
 from rentivo.models.audit_log import AuditEventType
 from rentivo.models.mfa import UserPasskey
 from rentivo.settings import settings
-from web.deps import get_audit_service, get_mfa_service, get_user_service, render
+from web.deps import form_data, get_audit_service, get_mfa_service, get_user_service, render, request_body
 from web.flash import flash
 
 logger = logging.getLogger(__name__)
@@ -29,7 +30,7 @@ WEBAUTHN_CHALLENGE_TIMEOUT = 300  # 5 minutes
 
 
 @router.get("/")
-async def security_settings(request: Request):
+def security_settings(request: Request):
     user_id = request.session["user_id"]
     mfa_service = get_mfa_service(request)
 
@@ -50,9 +51,8 @@ async def security_settings(request: Request):
 
 
 @router.post("/change-password")
-async def change_password(request: Request):
+def change_password(request: Request, form: FormData = Depends(form_data)):
     user_id = request.session["user_id"]
-    form = await request.form()
     current_password = str(form.get("current_password", ""))
     new_password = str(form.get("new_password", ""))
     confirm_password = str(form.get("confirm_password", ""))
@@ -99,7 +99,7 @@ async def change_password(request: Request):
 
 
 @router.get("/totp/setup")
-async def totp_setup_page(request: Request):
+def totp_setup_page(request: Request):
     user_id = request.session["user_id"]
     username = request.session["username"]
     mfa_service = get_mfa_service(request)
@@ -122,9 +122,8 @@ async def totp_setup_page(request: Request):
 
 
 @router.post("/totp/confirm")
-async def totp_confirm(request: Request):
+def totp_confirm(request: Request, form: FormData = Depends(form_data)):
     user_id = request.session["user_id"]
-    form = await request.form()
     code = str(form.get("code", "")).strip()
 
     mfa_service = get_mfa_service(request)
@@ -157,9 +156,8 @@ async def totp_confirm(request: Request):
 
 
 @router.post("/totp/disable")
-async def totp_disable(request: Request):
+def totp_disable(request: Request, form: FormData = Depends(form_data)):
     user_id = request.session["user_id"]
-    form = await request.form()
     password = str(form.get("password", ""))
 
     user_service = get_user_service(request)
@@ -192,7 +190,7 @@ async def totp_disable(request: Request):
 
 
 @router.post("/recovery-codes/regenerate")
-async def regenerate_recovery_codes(request: Request):
+def regenerate_recovery_codes(request: Request):
     user_id = request.session["user_id"]
     mfa_service = get_mfa_service(request)
 
@@ -225,7 +223,7 @@ async def regenerate_recovery_codes(request: Request):
 
 
 @router.post("/passkeys/register/begin")
-async def passkey_register_begin(request: Request):
+def passkey_register_begin(request: Request):
     user_id = request.session["user_id"]
     username = request.session["username"]
     mfa_service = get_mfa_service(request)
@@ -258,7 +256,7 @@ async def passkey_register_begin(request: Request):
 
 
 @router.post("/passkeys/register/complete")
-async def passkey_register_complete(request: Request):
+def passkey_register_complete(request: Request, raw_body: bytes = Depends(request_body)):
     user_id = request.session["user_id"]
     challenge_b64 = request.session.pop("webauthn_register_challenge", "")
     challenge_ts = request.session.pop("webauthn_register_ts", 0)
@@ -267,7 +265,7 @@ async def passkey_register_complete(request: Request):
         return JSONResponse({"error": "Desafio expirado. Tente novamente."}, status_code=400)
 
     challenge = base64.b64decode(challenge_b64)
-    body = await request.json()
+    body = json.loads(raw_body)
 
     try:
         verification = webauthn.verify_registration_response(
@@ -312,7 +310,7 @@ async def passkey_register_complete(request: Request):
 
 
 @router.post("/passkeys/{passkey_uuid}/delete")
-async def passkey_delete(request: Request, passkey_uuid: str):
+def passkey_delete(request: Request, passkey_uuid: str):
     user_id = request.session["user_id"]
     mfa_service = get_mfa_service(request)
 
@@ -341,7 +339,7 @@ async def passkey_delete(request: Request, passkey_uuid: str):
 
 
 @router.post("/passkeys/auth/begin")
-async def passkey_auth_begin(request: Request):
+def passkey_auth_begin(request: Request):
     user_id = request.session.get("mfa_pending_user_id")
     if not user_id:
         return JSONResponse({"error": "Sem login pendente"}, status_code=400)
@@ -368,7 +366,7 @@ async def passkey_auth_begin(request: Request):
 
 
 @router.post("/passkeys/auth/complete")
-async def passkey_auth_complete(request: Request):
+def passkey_auth_complete(request: Request, raw_body: bytes = Depends(request_body)):
     user_id = request.session.get("mfa_pending_user_id")
     username = request.session.get("mfa_pending_username")
     if not user_id:
@@ -381,7 +379,7 @@ async def passkey_auth_complete(request: Request):
         return JSONResponse({"error": "Desafio expirado."}, status_code=400)
 
     challenge = base64.b64decode(challenge_b64)
-    body = await request.json()
+    body = json.loads(raw_body)
 
     client_ip = request.client.host if request.client else "unknown"
 
@@ -3,8 +3,9 @@ from __future__ import annotations
 import logging
 import re
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
+from starlette.datastructures import FormData
 from starlette.responses import Response
 
 from rentivo.models.audit_log import AuditEventType
@@ -13,6 +14,7 @@ from rentivo.models.billing import ItemType
 from rentivo.models.theme import AVAILABLE_FONTS, DEFAULT_THEME, Theme
 from rentivo.pdf.invoice import InvoicePDF
 from web.deps import (
+    form_data,
     get_audit_service,
     get_authorization_service,
     get_billing_service,
@@ -91,7 +93,7 @@ def _serialize_theme(theme: Theme) -> dict:
 
 
 @router.get("/user")
-async def user_theme_form(request: Request):
+def user_theme_form(request: Request):
     logger.info("GET /themes/user — rendering user theme form")
     user_id = request.session.get("user_id")
     theme_service = get_theme_service(request)
@@ -115,14 +117,13 @@ async def user_theme_form(request: Request):
 
 
 @router.post("/user")
-async def user_theme_save(request: Request):
+def user_theme_save(request: Request, form: FormData = Depends(form_data)):
     logger.info("POST /themes/user — saving user theme")
     user_id = request.session.get("user_id")
     theme_service = get_theme_service(request)
 
     existing = theme_service.get_theme_for_owner("user", user_id)
 
-    form = await request.form()
     fields = _parse_theme_fields(dict(form))
 
     theme = theme_service.create_or_update_theme("user", user_id, **fields)
@@ -147,7 +148,7 @@ async def user_theme_save(request: Request):
 
 
 @router.post("/user/delete")
-async def user_theme_delete(request: Request):
+def user_theme_delete(request: Request):
     logger.info("POST /themes/user/delete — resetting user theme")
     user_id = request.session.get("user_id")
     theme_service = get_theme_service(request)
@@ -203,7 +204,7 @@ def _check_org_admin(request: Request, org_uuid: str):
 
 
 @router.get("/organization/{org_uuid}")
-async def org_theme_form(request: Request, org_uuid: str):
+def org_theme_form(request: Request, org_uuid: str):
     logger.info("GET /themes/organization/%s — rendering org theme form", org_uuid)
     result, user_id = _check_org_admin(request, org_uuid)
     if isinstance(result, RedirectResponse):
@@ -231,7 +232,7 @@ async def org_theme_form(request: Request, org_uuid: str):
 
 
 @router.post("/organization/{org_uuid}")
-async def org_theme_save(request: Request, org_uuid: str):
+def org_theme_save(request: Request, org_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /themes/organization/%s — saving org theme", org_uuid)
     result, user_id = _check_org_admin(request, org_uuid)
     if isinstance(result, RedirectResponse):
@@ -241,7 +242,6 @@ async def org_theme_save(request: Request, org_uuid: str):
     theme_service = get_theme_service(request)
     existing = theme_service.get_theme_for_owner("organization", org.id)
 
-    form = await request.form()
     fields = _parse_theme_fields(dict(form))
 
     theme = theme_service.create_or_update_theme("organization", org.id, **fields)
@@ -266,7 +266,7 @@ async def org_theme_save(request: Request, org_uuid: str):
 
 
 @router.post("/organization/{org_uuid}/delete")
-async def org_theme_delete(request: Request, org_uuid: str):
+def org_theme_delete(request: Request, org_uuid: str):
     logger.info("POST /themes/organization/%s/delete — resetting org theme", org_uuid)
     result, user_id = _check_org_admin(request, org_uuid)
     if isinstance(result, RedirectResponse):
@@ -340,7 +340,7 @@ def _resolve_effective_source(theme_service, billing) -> str:
 
 
 @router.get("/billing/{billing_uuid}")
-async def billing_theme_form(request: Request, billing_uuid: str):
+def billing_theme_form(request: Request, billing_uuid: str):
     logger.info("GET /themes/billing/%s — rendering billing theme form", billing_uuid)
     result, user_id = _check_billing_access(request, billing_uuid)
     if isinstance(result, RedirectResponse):
@@ -372,7 +372,7 @@ async def billing_theme_form(request: Request, billing_uuid: str):
 
 
 @router.post("/billing/{billing_uuid}")
-async def billing_theme_save(request: Request, billing_uuid: str):
+def billing_theme_save(request: Request, billing_uuid: str, form: FormData = Depends(form_data)):
     logger.info("POST /themes/billing/%s — saving billing theme", billing_uuid)
     result, user_id = _check_billing_access(request, billing_uuid)
     if isinstance(result, RedirectResponse):
@@ -382,7 +382,6 @@ async def billing_theme_save(request: Request, billing_uuid: str):
     theme_service = get_theme_service(request)
     existing = theme_service.get_theme_for_owner("billing", billing.id)
 
-    form = await request.form()
     fields = _parse_theme_fields(dict(form))
 
     theme = theme_service.create_or_update_theme("billing", billing.id, **fields)
@@ -407,7 +406,7 @@ async def billing_theme_save(request: Request, billing_uuid: str):
 
 
 @router.post("/billing/{billing_uuid}/delete")
-async def billing_theme_delete(request: Request, billing_uuid: str):
+def billing_theme_delete(request: Request, billing_uuid: str):
     logger.info("POST /themes/billing/%s/delete — resetting billing theme", billing_uuid)
     result, user_id = _check_billing_access(request, billing_uuid)
     if isinstance(result, RedirectResponse):
@@ -444,7 +443,7 @@ async def billing_theme_delete(request: Request, billing_uuid: str):
 
 
 @router.get("/preview")
-async def theme_preview(request: Request):
+def theme_preview(request: Request):
     logger.info("GET /themes/preview — generating sample PDF")
     fields = _parse_theme_fields(dict(request.query_params))
 
@@ -0,0 +1,393 @@
+"""Server-side web sessions.
+
+Starlette's ``SessionMiddleware`` keeps the whole session (user, flash
+messages, CSRF token, MFA and WebAuthn state) in a signed cookie that is
+re-signed on every response and sent with every request, static assets
+included. ``ServerSessionMiddleware`` keeps the data in a ``SessionBackend``
+and only puts an opaque random id in the cookie:
+
+- ``database``: the ``sessions`` table; works with any number of web nodes.
+- ``memory``: an in-process LRU; single node, sessions end on restart.
+- ``shared``: a key/value store speaking the get/set/delete subset of the
+  Redis client API. ``LocalKeyValueStore`` is an in-process stand-in until a
+  real shared store is deployed.
+
+The session is loaded on first access and written back only when its
+contents changed or it is past half its lifetime. Async code reads a
+blocking backend's session through ``load_session`` so the event loop never
+waits on the store. The store is keyed by a
+SHA-256 of the cookie value, so a leaked table does not leak live cookies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, MutableMapping
+from datetime import datetime, timedelta
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from rentivo.constants import SP_TZ
+from rentivo.db import get_engine, resilient_connect
+from rentivo.models.session import StoredSession
+from rentivo.repositories.sqlalchemy import SQLAlchemySessionRepository
+from rentivo.settings import settings
+from web.deps import run_blocking
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = "session"
+# secrets.token_urlsafe(32) produces 43 characters; anything else is a stale or forged cookie
+_SESSION_ID_LENGTH = 43
+
+
+def _now() -> datetime:
+    return datetime.now(SP_TZ)
+
+
+def _aware(value: datetime) -> datetime:
+    """MySQL returns naive datetimes; they were stored as Sao Paulo wall time."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=SP_TZ)
+
+
+def _session_key(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+class SessionBackend(ABC):
+    """Storage for server-side sessions. ``blocking`` backends are called from the thread pool."""
+
+    blocking = False
+
+    @abstractmethod
+    def load(self, session_key: str) -> StoredSession | None: ...
+
+    @abstractmethod
+    def save(self, session: StoredSession) -> None: ...
+
+    @abstractmethod
+    def delete(self, session_key: str) -> None: ...
+
+
+class DatabaseSessionBackend(SessionBackend):
+    """Sessions in the ``sessions`` table. Expired rows are purged at most once per ``purge_interval``."""
+
+    blocking = True
+
+    def __init__(self, purge_interval: float = 3600.0) -> None:
+        self.purge_interval = purge_interval
+        self._last_purge = time.monotonic()
+        self._purge_lock = threading.Lock()
+
+    def load(self, session_key: str) -> StoredSession | None:
+        with resilient_connect(get_engine()) as conn:
+            return SQLAlchemySessionRepository(conn).get(session_key, _now())
+
+    def save(self, session: StoredSession) -> None:
+        with resilient_connect(get_engine()) as conn:
+            repo = SQLAlchemySessionRepository(conn)
+            repo.save(session)
+            if self._purge_due():
+                purged = repo.delete_expired(_now())
+                logger.info("Purged %d expired session(s)", purged)
+
+    def delete(self, session_key: str) -> None:
+        with resilient_connect(get_engine()) as conn:
+            SQLAlchemySessionRepository(conn).delete(session_key)
+
+    def _purge_due(self) -> bool:
+        with self._purge_lock:
+            now = time.monotonic()
+            if now - self._last_purge < self.purge_interval:
+                return False
+            self._last_purge = now
+            return True
+
+
+class MemorySessionBackend(SessionBackend):
+    """In-process LRU of serialized sessions (single node). Keeps at most ``max_entries`` sessions."""
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, session_key: str) -> StoredSession | None:
+        with self._lock:
+            raw = self._entries.get(session_key)
+            if raw is None:
+                return None
+            self._entries.move_to_end(session_key)
+        session = StoredSession.model_validate_json(raw)
+        if session.expires_at <= _now():
+            self.delete(session_key)
+            return None
+        return session
+
+    def save(self, session: StoredSession) -> None:
+        raw = session.model_dump_json()
+        with self._lock:
+            self._entries[session.session_key] = raw
+            self._entries.move_to_end(session.session_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, session_key: str) -> None:
+        with self._lock:
+            self._entries.pop(session_key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LocalKeyValueStore:
+    """In-process stand-in for a shared key/value store (the ``get``/``set``/``delete`` subset of redis-py)."""
+
+    def __init__(self) -> None:
+        self._values: dict[str, tuple[float | None, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key: str, value: str | bytes, ex: int | None = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            self._values[key] = (time.monotonic() + ex if ex is not None else None, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._values.pop(key, None) is not None for key in keys)
+
+
+class KeyValueSessionBackend(SessionBackend):
+    """Sessions in a shared key/value store; expiry is delegated to the store's TTL."""
+
+    def __init__(self, client: Any, *, prefix: str = "rentivo:session:", blocking: bool = True) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.blocking = blocking
+
+    def load(self, session_key: str) -> StoredSession | None:
+        raw = self.client.get(self.prefix + session_key)
+        if raw is None:
+            return None
+        return StoredSession.model_validate_json(raw)
+
+    def save(self, session: StoredSession) -> None:
+        ttl = max(1, int((session.expires_at - _now()).total_seconds()))
+        self.client.set(self.prefix + session.session_key, session.model_dump_json(), ex=ttl)
+
+    def delete(self, session_key: str) -> None:
+        self.client.delete(self.prefix + session_key)
+
+
+def get_session_backend() -> SessionBackend:
+    backend = settings.session_backend
+
+    if backend == "database":
+        logger.info("Using session backend: database")
+        return DatabaseSessionBackend()
+
+    if backend == "memory":
+        logger.info("Using session backend: memory (max %d sessions)", settings.session_cache_size)
+        return MemorySessionBackend(settings.session_cache_size)
+
+    if backend == "shared":
+        logger.info("Using session backend: shared (local stand-in)")
+        return KeyValueSessionBackend(LocalKeyValueStore(), blocking=False)
+
+    raise ValueError(f"Unsupported session backend: {backend}")
+
+
+class Session(MutableMapping):
+    """Dict-like session that reads the backend on first access.
+
+    ``clear()`` also rotates the session id on the next response, so logging
+    in or out never keeps the previous id.
+    """
+
+    def __init__(self, loader: Callable[[], StoredSession | None], *, blocking: bool = False) -> None:
+        self._loader = loader
+        self.blocking = blocking
+        self._data: dict | None = None
+        self._snapshot = ""
+        self.expires_at: datetime | None = None
+        self.regenerate = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def stored(self) -> bool:
+        """Whether the backend held this session when it was loaded."""
+        return self.expires_at is not None
+
+    @property
+    def modified(self) -> bool:
+        # Compare serialized state so in-place changes (flash appends to a list) are caught
+        return self._data is not None and _dumps(self._data) != self._snapshot
+
+    def set_loaded(self, stored: StoredSession | None) -> None:
+        self._data = dict(stored.data) if stored else {}
+        self.expires_at = _aware(stored.expires_at) if stored else None
+        self._snapshot = _dumps(self._data)
+
+    def _load(self) -> dict:
+        if self._data is None:
+            self.set_loaded(self._loader())
+        return self._data
+
+    async def aload(self) -> None:
+        """Load the session without blocking the event loop (thread pool for blocking backends)."""
+        if self._data is not None:
+            return
+        stored = await run_blocking(self._loader) if self.blocking else self._loader()
+        if self._data is None:
+            self.set_loaded(stored)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._load()[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._load()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._load()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def clear(self) -> None:
+        self._load().clear()
+        self.regenerate = True
+
+
+async def load_session(scope: Scope) -> None:
+    """Make ``request.session`` safe to read from async code.
+
+    A no-op for signed-cookie sessions and for sessions already loaded.
+    """
+    session = scope.get("session")
+    if isinstance(session, Session):
+        await session.aload()
+
+
+class ServerSessionMiddleware:
+    """Pure ASGI middleware — ``request.session`` backed by a ``SessionBackend``.
+
+    The backend is only read when something uses ``request.session``, so
+    requests without a session cookie, static assets and token-authenticated
+    endpoints never touch it. Sync routes load it from their worker thread;
+    async middleware awaits ``load_session`` first.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: SessionBackend,
+        *,
+        max_age: int = 14 * 24 * 60 * 60,
+        cookie_name: str = SESSION_COOKIE,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+    ) -> None:
+        self.app = app
+        self.backend = backend
+        self.max_age = max_age
+        self.cookie_name = cookie_name
+        self.path = path
+        self.security_flags = f"httponly; samesite={same_site}" + ("; secure" if https_only else "")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cookie = HTTPConnection(scope).cookies.get(self.cookie_name)
+        session_id = cookie if cookie is not None and len(cookie) == _SESSION_ID_LENGTH else None
+        session_key = _session_key(session_id) if session_id else None
+        session = Session(
+            lambda: self.backend.load(session_key) if session_key else None,
+            blocking=self.backend.blocking and session_key is not None,
+        )
+        scope["session"] = session
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                set_cookie = await self._commit(session, session_id, session_key, stale_cookie=cookie is not None)
+                if set_cookie:
+                    MutableHeaders(scope=message).append("Set-Cookie", set_cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _commit(
+        self, session: Session, session_id: str | None, session_key: str | None, *, stale_cookie: bool
+    ) -> str | None:
+        """Write the session back if needed and return the Set-Cookie value, if any."""
+        if not session.loaded:
+            # Untouched; only drop cookies that can never match a session (e.g. old signed ones)
+            return self._cookie("", 0) if stale_cookie and session_id is None else None
+
+        data = dict(session)
+        if not data:
+            if session.stored:
+                await self._call(self.backend.delete, session_key)
+            return self._cookie("", 0) if stale_cookie else None
+
+        now = _now()
+        if not session.stored or session.regenerate:
+            # Never adopt an id the server did not issue
+            if session.stored:
+                await self._call(self.backend.delete, session_key)
+            session_id = secrets.token_urlsafe(32)
+            session_key = _session_key(session_id)
+        elif not session.modified and session.expires_at - now > timedelta(seconds=self.max_age / 2):
+            return None
+
+        stored = StoredSession(session_key=session_key, data=data, expires_at=now + timedelta(seconds=self.max_age))
+        await self._call(self.backend.save, stored)
+        return self._cookie(session_id, self.max_age)
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.backend.blocking:
+            return await run_blocking(func, *args)
+        return func(*args)
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        if max_age == 0:
+            expires = "expires=Thu, 01 Jan 1970 00:00:00 GMT"
+            return f"{self.cookie_name}=null; path={self.path}; {expires}; {self.security_flags}"
+        return f"{self.cookie_name}={value}; path={self.path}; Max-Age={max_age}; {self.security_flags}"
@@ -8,6 +8,17 @@ document.addEventListener("DOMContentLoaded", function () {
         });
     }
 
+    /* Pending invite badge, loaded after render when RENTIVO_INVITE_COUNT_ASYNC is on */
+    var inviteCount = document.querySelector("[data-invite-count]");
+    if (inviteCount) {
+        fetch("/invites/count", { credentials: "same-origin", headers: { "Accept": "application/json" } })
+            .then(function (response) { return response.ok ? response.json() : null; })
+            .then(function (data) {
+                if (data && data.count) inviteCount.textContent = " (" + data.count + ")";
+            })
+            .catch(function () {});
+    }
+
     /* Toast dismiss */
     document.querySelectorAll(".toast[data-dismissible] .toast-close").forEach(function (btn) {
         btn.addEventListener("click", function () {
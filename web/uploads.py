@@ -0,0 +1,129 @@
+"""Streaming multipart parsing for receipt uploads.
+
+Starlette's parser spools every file part in full before the route sees it.
+``ReceiptMultiPartParser`` keeps the spooling (memory up to 1 MB per file,
+then disk) but stops writing a part as soon as it exceeds
+``MAX_RECEIPT_SIZE`` or turns out to have a content type we don't accept, so
+an oversized or unwanted file never costs more than the limit. Routes then
+copy accepted parts straight from the spool to storage.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import parse_options_header
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from rentivo.models.receipt import ALLOWED_RECEIPT_TYPES, MAX_RECEIPT_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptMultiPartParser(MultiPartParser):
+    """Multipart parser that caps each file part at ``max_file_size`` bytes while streaming.
+
+    Only the parser's callback hooks and ``items`` are used: the current
+    part's headers are tracked here, and its ``UploadFile`` is picked up from
+    ``items`` when the part ends.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_file_size: int = MAX_RECEIPT_SIZE,
+        allowed_types: set[str] = ALLOWED_RECEIPT_TYPES,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_file_size = max_file_size
+        self.allowed_types = allowed_types
+        # Dropped file parts and how many bytes each one had
+        self._dropped: list[tuple[UploadFile, int]] = []
+        self._reset_part()
+
+    def _reset_part(self) -> None:
+        self._header_name = b""
+        self._header_value = b""
+        self._part_headers: dict[bytes, bytes] = {}
+        self._part_filename: str | None = None
+        self._part_received = 0
+        self._part_dropped = False
+
+    def on_part_begin(self) -> None:
+        super().on_part_begin()
+        self._reset_part()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        super().on_header_field(data, start, end)
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        super().on_header_value(data, start, end)
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        super().on_header_end()
+        self._part_headers[self._header_name.lower()] = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        _, options = parse_options_header(self._part_headers.get(b"content-disposition", b""))
+        if b"filename" in options:
+            self._part_filename = options[b"filename"].decode("utf-8", errors="replace")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part_filename is None:
+            super().on_part_data(data, start, end)
+            return
+
+        self._part_received += end - start
+        if self._part_dropped:
+            return
+        content_type = self._part_headers.get(b"content-type", b"").decode("latin-1")
+        if content_type not in self.allowed_types or self._part_received > self.max_file_size:
+            self._part_dropped = True
+            logger.info(
+                "Dropping upload %r (%s): %d bytes received, limit %d",
+                self._part_filename,
+                content_type,
+                self._part_received,
+                self.max_file_size,
+            )
+            return
+        super().on_part_data(data, start, end)
+
+    def on_part_end(self) -> None:
+        super().on_part_end()
+        if self._part_dropped:
+            _, upload = self.items[-1]
+            self._dropped.append((upload, self._part_received))
+
+    async def parse(self) -> FormData:
+        form = await super().parse()
+        for upload, received in self._dropped:
+            # Free whatever was spooled before the part was dropped
+            await upload.seek(0)
+            upload.file.truncate()
+            upload.size = received
+        return form
+
+
+async def receipt_form_data(request: Request) -> AsyncIterator[FormData]:
+    """Dependency: parse a form that may carry receipt files, closing the spooled files afterwards."""
+    if "multipart/form-data" not in request.headers.get("content-type", ""):
+        form = await request.form()
+    else:
+        parser = ReceiptMultiPartParser(request.headers, request.stream())
+        try:
+            form = await parser.parse()
+        except MultiPartException as exc:
+            raise HTTPException(status_code=400, detail=exc.message) from exc
+    try:
+        yield form
+    finally:
+        await form.close()